@@ -3,6 +3,7 @@ ComfyUI U5 EasyScripter - VBA-style Script Execution Node
 """
 
 from .scripter_node import ComfyUI_u5_EasyScripterNode
+from .script_metrics_routes import register_routes
 from .u5_loaders import (
     u5_CheckpointLoader,
     u5_LoraLoader,
@@ -45,4 +46,7 @@ NODE_DISPLAY_NAME_MAPPINGS = {
 
 WEB_DIRECTORY = "./web"
 
+# キュー・エンジンのメトリクス（GET /u5/easyscripter/metrics、JSON / Prometheusテキスト形式）
+register_routes()
+
 __all__ = ["NODE_CLASS_MAPPINGS", "NODE_DISPLAY_NAME_MAPPINGS", "WEB_DIRECTORY"]
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+実行モードのベンチマーク（interpreter / compiled / transpiled、optimize の有無）
+
+ループ中心のスクリプトを各モードで実行し、3回の最短時間と interpreter に対する倍率を表示する。
+RETURN1 の値も表示するので、モード間で結果が一致していることも確認できる。
+
+使用方法（リポジトリのルートで実行）:
+    python benchmarks/bench_modes.py
+    python benchmarks/bench_modes.py --optimize
+    python benchmarks/bench_modes.py --modes interpreter compiled --package ../old_checkout
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = ('interpreter', 'compiled', 'transpiled')
+REPEATS = 3
+
+SCRIPTS = {
+    'for_arith': 'S = 0\nFOR I = 1 TO 200000\n  S = S + I * 2 - 1\nNEXT\nRETURN1 = S',
+    'while_if': ('I = 0\nC = 0\nWHILE I < 100000\n  I = I + 1\n  IF I MOD 3 = 0 THEN\n    C = C + 1\n'
+                 '  ELSEIF I MOD 5 = 0 THEN\n    C = C + 2\n  ELSE\n    C = C - 1\n  END IF\nWEND\nRETURN1 = C'),
+    'arrays': 'DIM A(1000)\nFOR K = 1 TO 50\nFOR I = 0 TO 1000\n  A(I) = A(I) + I\nNEXT\nNEXT\nRETURN1 = A(1000)',
+    'func_calls': 'FUNCTION SQ(X)\n  SQ = X * X\nEND FUNCTION\nS = 0\nFOR I = 1 TO 30000\n  S = S + SQ(I)\nNEXT\nRETURN1 = S',
+    'func_locals': ('FUNCTION ACC(N)\n  T = 0\n  FOR J = 1 TO N\n    T = T + J * 2\n    IF T > 1000000 THEN\n'
+                    '      T = T - 1000000\n    END IF\n  NEXT\n  ACC = T\nEND FUNCTION\nS = 0\nFOR I = 1 TO 20\n'
+                    '  S = S + ACC(5000)\nNEXT\nRETURN1 = S'),
+    'builtin_loop': 'S = 0\nFOR I = 1 TO 30000\n  S = S + LEN(MID("abcdef", 2, 3)) + ABS(-I)\nNEXT\nRETURN1 = S',
+    'builtins_str': 'S = ""\nFOR I = 1 TO 20000\n  S = LEFT(S & STR(I MOD 10), 50)\nNEXT\nRETURN1 = LEN(S)',
+    'invariant_calls': ('P = "a photo of a cat, highly detailed"\nS = 0\nFOR I = 1 TO 30000\n'
+                        '  S = S + LEN(UPPER(TRIM(P))) + INSTR(P, "cat") + I\nNEXT\nRETURN1 = S'),
+}
+
+
+def best_time(engine_class, script, options):
+    """新しいエンジンでの実行時間の最短値（秒）と RETURN1"""
+    best = float('inf')
+    engine = None
+    for _ in range(REPEATS):
+        engine = engine_class(locale='en', **options)
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            engine.execute(script)
+            best = min(best, time.perf_counter() - start)
+    return best, engine.variables.get('RETURN1')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--optimize', action='store_true', help='ASTオプティマイザーを有効にする')
+    parser.add_argument('--package', default=PACKAGE_DIR, help='ScriptEngine を読み込むチェックアウト')
+    args = parser.parse_args()
+
+    # --package で指定したチェックアウトのエンジンを読み込むため、パスの設定後にインポートする
+    sys.path.insert(0, os.path.abspath(args.package))
+    from script_engine import ScriptEngine
+
+    for name, script in SCRIPTS.items():
+        row = []
+        for mode in args.modes:
+            options = {'mode': mode, 'optimize': True} if args.optimize else {'mode': mode}
+            row.append((mode,) + best_time(ScriptEngine, script, options))
+        base = row[0][1]
+        print(f"{name:16s} " + "  ".join(f"{mode}={seconds * 1000:8.1f}ms x{base / seconds:4.2f} ({value})"
+                                          for mode, seconds, value in row))
+
+
+if __name__ == '__main__':
+    main()
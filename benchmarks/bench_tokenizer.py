@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+トークナイザーのベンチマーク（ScriptParser.tokenize）
+
+生成したプロンプト組み立て風のスクリプト（文字列連結・IF・行末コメント）を
+行数を変えてトークナイズし、3回の最短時間を表示する。
+
+使用方法（リポジトリのルートで実行）:
+    python benchmarks/bench_tokenizer.py
+    python benchmarks/bench_tokenizer.py --package ../old_checkout   # 変更前との比較
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LINE_COUNTS = (100, 400, 1600)
+REPEATS = 3
+
+
+def generated_script(line_count: int) -> str:
+    """プロンプト組み立て風のスクリプト（4行で1ブロック）"""
+    lines = ["' generated prompt-building script"]
+    for i in range(line_count // 4):
+        lines.append(f'style_{i} = "masterpiece, best quality, detailed background, style number {i}" & TXT1')
+        lines.append(f'IF VAL1 > {i} AND LEN(style_{i}) <> 0 THEN  \' inline comment {i}')
+        lines.append(f'  prompt = prompt & style_{i} & ", " & MID(TXT2, 1, {i % 7 + 1}) & (VAL2 * {i}.5)')
+        lines.append('END IF')
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--package', default=PACKAGE_DIR, help='ScriptParser を読み込むチェックアウト')
+    args = parser.parse_args()
+
+    # --package で指定したチェックアウトのパーサーを読み込むため、パスの設定後にインポートする
+    sys.path.insert(0, os.path.abspath(args.package))
+    from script_parser import ScriptParser
+
+    # 診断用の出力は計測から除く
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser_instance = ScriptParser('en')
+    for line_count in LINE_COUNTS:
+        script = generated_script(line_count)
+        best = float('inf')
+        for _ in range(REPEATS):
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                tokens = parser_instance.tokenize(script)
+                best = min(best, time.perf_counter() - start)
+        print(f'{line_count:5d} lines: {len(tokens):6d} tokens  tokenize {best * 1000:8.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
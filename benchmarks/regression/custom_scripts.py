@@ -0,0 +1,541 @@
+# -*- coding: utf-8 -*-
+"""
+回帰コーパスの確認用スクリプト（ドキュメントの例でカバーされない構文・境界条件）
+"""
+
+SCRIPTS = {}
+SCRIPTS['loops'] = '''
+total = 0
+FOR I = 1 TO 10
+  total = total + I
+NEXT
+FOR J = 10 TO 1 STEP -3
+  PRINT(J)
+NEXT
+FOR K = 0 TO 1 STEP 0.1
+  cnt = cnt + 1
+NEXT
+PRINT(cnt, K)
+x = 0
+WHILE x < 5
+  x = x + 1
+WEND
+WHILE x < 10
+  x = x + 2
+END WHILE
+RETURN1 = total & ":" & x
+RETURN2 = I
+'''
+SCRIPTS['exit'] = '''
+FOR I = 1 TO 100
+  IF I > 5 THEN EXIT FOR
+  s = s & I
+NEXT
+n = 0
+WHILE 1
+  n = n + 1
+  IF n = 7 THEN
+    EXIT WHILE
+  END IF
+WEND
+FOR A = 1 TO 3
+  FOR B = 1 TO 3
+    IF B = 2 THEN EXIT FOR
+    PRINT(A & "-" & B)
+  NEXT
+NEXT
+FUNCTION Find(x)
+  FOR Q = 1 TO 100
+    IF Q * Q > x THEN
+      Find = Q
+      EXIT FUNCTION
+    END IF
+  NEXT
+  Find = -1
+END FUNCTION
+FUNCTION W()
+  k = 0
+  WHILE k < 10
+    k = k + 1
+    IF k = 3 THEN EXIT FOR
+  WEND
+  W = k
+END FUNCTION
+RETURN1 = s & "/" & n & "/" & Find(50) & "/" & Find(100000)
+RETURN2 = I & "," & Q
+'''
+SCRIPTS['exit_mismatch'] = '''
+FOR I = 1 TO 5
+  k = 0
+  WHILE k < 10
+    k = k + 1
+    IF k = 3 THEN EXIT FOR
+  WEND
+  PRINT("after while", I)
+NEXT
+RETURN1 = I & "/" & k
+'''
+SCRIPTS['exit_top'] = '''
+x = 1
+EXIT FOR
+x = 2
+'''
+SCRIPTS['exit_func_top'] = '''
+x = 1
+EXIT FUNCTION
+'''
+SCRIPTS['functions'] = '''
+FUNCTION Add(a, b)
+  Add = a + b
+END FUNCTION
+FUNCTION Fact(n)
+  IF n <= 1 THEN
+    Fact = 1
+  ELSE
+    Fact = n * Fact(n - 1)
+  END IF
+END FUNCTION
+FUNCTION Greet(name, OPTIONAL greeting = "Hello")
+  Greet = greeting & ", " & name
+END FUNCTION
+FUNCTION NoRet(x)
+  y = x * 2
+END FUNCTION
+FUNCTION UsesRet(x)
+  RETURN x * 3
+END FUNCTION
+FUNCTION ReadGlobal()
+  ReadGlobal = G1 & "|" & VAL1
+END FUNCTION
+FUNCTION Shadow(G1)
+  G1 = G1 + 1
+  Shadow = G1
+END FUNCTION
+FUNCTION SelfRead(x)
+  SelfRead = x
+  SelfRead = SelfRead + 1
+END FUNCTION
+FUNCTION Fib(n)
+  IF n < 2 THEN
+    Fib = n
+  ELSE
+    Fib = Fib(n-1) + Fib(n-2)
+  END IF
+END FUNCTION
+G1 = 10
+RETURN1 = Add(2, 3) & "," & Fact(6) & "," & Greet("Bob") & "," & Greet("Al", "Hi")
+RETURN2 = "[" & NoRet(2) & "]" & UsesRet(4) & ReadGlobal() & Shadow(5) & G1 & SelfRead(4) & Fib(12)
+PRINT(y)
+'''
+SCRIPTS['arrays'] = '''
+DIM A(5)
+FOR I = 0 TO 5
+  A[I] = I * I
+NEXT
+PRINT(UBOUND(A[]), LBOUND(A[]), A[3], A(4), A[99])
+B[2] = "x"
+B[7] = "y"
+PRINT(UBOUND(B[]), LBOUND(B[]), JOIN(B[], "-"))
+SPLIT C[], "a,b,,c", ","
+PRINT(UBOUND(C[]), JOIN(C[], "|"))
+n = SPLIT(D, "x y z", " ")
+PRINT(n, D[1])
+ARRAY E, 1, 2, "three"
+PRINT(JOIN(E[], "+"), ISARRAY(E[]))
+REDIM E[], 5, 1
+PRINT(UBOUND(E[]), JOIN(E[], ","))
+REDIM E[], 2
+PRINT(UBOUND(E[]), JOIN(E[], ","))
+REDIM F(3)
+PRINT(UBOUND(F[]))
+DIM M(2, 3)
+M(1, 2) = 5
+M(2, 3) = M(1, 2) * 2
+PRINT(M(2, 3), UBOUND(M[], 1), UBOUND(M[], 2), LBOUND(M[], 2), M(9, 9))
+Z = ARRAY(5, 6, 7)
+PRINT(UBOUND(Z[]), Z[2])
+cnt = CSVDIFF(DF, "a,b,c", "b,c,d")
+PRINT(cnt, JOIN(DF[], ","))
+PRINT(JOIN(E[], ",", 1))
+G = REGEXMATCHES("a1b22c333", "[0-9]+")
+PRINT(ISARRAY(G[]), JOIN(G[], ";"))
+RETURN1 = JOIN(A[], ",")
+'''
+SCRIPTS['array_params'] = '''
+FUNCTION SumArr(arr)
+  s = 0
+  FOR I = 0 TO UBOUND(arr[])
+    s = s + arr[I]
+  NEXT
+  SumArr = s
+END FUNCTION
+FUNCTION Mutate(arr)
+  arr[0] = 999
+  arr[10] = 1
+  Mutate = UBOUND(arr[])
+END FUNCTION
+FUNCTION MutateVar(arr)
+  arr[1] = 555
+  MutateVar = arr[1]
+END FUNCTION
+FUNCTION Local()
+  DIM L(3)
+  L[1] = 4
+  SPLIT P[], "q,r", ","
+  Local = L[1] & P[1] & UBOUND(L[])
+END FUNCTION
+FUNCTION Nested(arr)
+  Nested = Mutate(arr[])
+END FUNCTION
+ARRAY X, 1, 2, 3
+PRINT(SumArr(X[]))
+PRINT(Mutate(X[]), JOIN(X[], ","))
+PRINT(MutateVar(X), JOIN(X[], ","))
+PRINT(Local(), ISARRAY(L[]))
+ARRAY Y, 5, 5
+PRINT(Nested(Y[]), JOIN(Y[], ","))
+PRINT(SumArr(NOPE[]))
+RETURN1 = JOIN(X[], ",")
+'''
+SCRIPTS['select'] = '''
+FUNCTION Route(v)
+  SELECT CASE v
+    CASE "anime", "manga"
+      Route = "A"
+    CASE "photo"
+      Route = "P"
+    CASE 1, 2, 3
+      Route = "small"
+    CASE 4 TO 10
+      Route = "mid"
+    CASE IS > 100
+      Route = "huge"
+    CASE "10"
+      Route = "ten-string"
+    CASE ELSE
+      Route = "other"
+  END SELECT
+END FUNCTION
+r = ""
+r = r & Route("ANIME") & Route("Manga") & Route("photo") & Route(2) & Route("3") & Route(7) & Route(500) & Route(50) & Route("x") & Route(" 1") & Route("2.0") & Route("-1") & Route(True)
+SELECT CASE 5
+  CASE 5
+    PRINT("five")
+  CASE 5
+    PRINT("five again")
+END SELECT
+SELECT CASE "b"
+  CASE "a" TO "c"
+    PRINT("range str")
+END SELECT
+RETURN1 = r
+'''
+SCRIPTS['concat'] = '''
+s = ""
+FOR I = 1 TO 50
+  s = s & "p" & I & ","
+  IF I MOD 10 = 0 THEN
+    s = s & "|"
+  END IF
+NEXT
+t = "x"
+t = t & t
+t = t & LEN(t)
+u = 1.5
+u = u & 2
+PRINT(LEN(s), t, u)
+w = 0
+FOR I = 1 TO 5
+  w = w & I
+  w = w + 1
+NEXT
+PRINT(w)
+RETURN1 = s
+'''
+SCRIPTS['operators'] = '''
+a = 7
+b = 2
+PRINT(a + b, a - b, a * b, a / b, a \\ b, a MOD b, a ^ b, -a, +a, NOT a, NOT 0)
+PRINT(a = 7, a <> 7, a != 8, a < b, a > b, a <= 7, a >= 8)
+PRINT("abc" = "ABC", "abc" <> "ABD", "10" = 10, "5" < "10", 3 AND 0, 3 OR 0, "" AND 1, "FALSE" OR "0")
+PRINT(1 + 2 * 3 ^ 2, (1 + 2) * 3, 2 ^ 3 ^ 2, "a" & 1 + 2, 1.5 & "", True, False, True + 1)
+PRINT(10 / 4, 10 \\ 4, -7 \\ 2, -7 MOD 3, 0.1 + 0.2)
+c = "3" + "4"
+d = "x" + 1
+e = "3" * "4"
+PRINT(c, d, e)
+RETURN1 = a & b
+'''
+SCRIPTS['divzero'] = '''
+x = 5
+y = x / 0
+'''
+SCRIPTS['undefined_func'] = '''
+x = FOOBAR(1, 2)
+'''
+SCRIPTS['builtins'] = '''
+PRINT(LEN("hello"), MID("hello", 2, 3), LEFT("abc", 2), RIGHT("abc", 2), UPPER("a"), LCASE("B"))
+PRINT(ABS(-3), INT(3.7), ROUND(3.456, 2), SQRT(16), MAX(1, 5, 3), MIN(4, 2), SUM(1, 2, 3))
+PRINT(REPLACE("hello", "l", "L"), INSTR("hello", "ll"), TRIM("  x  "), CSTR(5), CINT("12"), VAL("3.5abc"))
+PRINT(IIF(1 > 0, "yes", "no"), IF(0, "a", "b"), FORMAT(1234.5, "0,000.00"), CSVCOUNT("a,b,c"), CSVREAD("a,b,c", 1))
+PRINT(REGEXREPLACE("a1b2", "[0-9]", "#"), TYPE(1), TYPE("s"), ISNUMERIC("12"), STRREVERSE("abc"))
+PRINT(LEN(12345), UCASE(LEN("ab")), CHR(65), ASC("A"), SPACE(2) & "|", STRING(3, "z"))
+PRINT(PYEXEC("math.sqrt", 16), PROPER("hello world"))
+x = LEN ("abc")
+PRINT(x)
+RETURN1 = LEN("x")
+'''
+SCRIPTS['strings'] = '''
+a = "He said ""hi"""
+b = 'single'
+c = "tab\\there"
+d = r"C:\\path\\n"
+e = "it's ok"
+f = "x" ' comment here
+g = "a\\\\n"
+PRINT(a, b, c, d, e, f, g)
+REM a comment
+' another comment
+RETURN1 = a & b
+'''
+SCRIPTS['scalars_special'] = '''
+RETURN = 5
+PRINT(RETURN1, RETURN)
+RETURN1 = 7
+PRINT(RETURN)
+RETURN2 = "two"
+RELAY_OUTPUT = "relay"
+PRINT(VAL1, VAL2, TXT1, TXT2, VAL_1)
+VAL1 = 99
+PRINT(VAL1)
+DIM zz
+PRINT(zz)
+PRINT(undefinedvar)
+PRINT(PRINT)
+'''
+SCRIPTS['func_globals'] = '''
+counter = 0
+FUNCTION Inc()
+  counter = counter + 1
+  Inc = counter
+END FUNCTION
+PRINT(Inc(), Inc(), counter)
+FUNCTION UseVal()
+  UseVal = VAL1 + RETURN
+END FUNCTION
+RETURN = 3
+PRINT(UseVal())
+FUNCTION ForInFunc(n)
+  t = 0
+  FOR i = 1 TO n
+    t = t + i
+  NEXT
+  ForInFunc = t & "/" & i
+END FUNCTION
+PRINT(ForInFunc(4), i)
+FUNCTION SetRet()
+  RETURN1 = 42
+  SetRet = 1
+END FUNCTION
+x = SetRet()
+PRINT(RETURN1, RETURN)
+RETURN1 = x
+'''
+SCRIPTS['nested_calls'] = '''
+FUNCTION Sq(x)
+  Sq = x * x
+END FUNCTION
+FUNCTION SumSq(n)
+  t = 0
+  FOR k = 1 TO n
+    t = t + Sq(k)
+  NEXT
+  SumSq = t
+END FUNCTION
+total = 0
+FOR j = 1 TO 20
+  total = total + SumSq(j)
+NEXT
+PRINT(total)
+RETURN1 = total
+'''
+SCRIPTS['deep_recursion'] = '''
+FUNCTION R(n)
+  IF n = 0 THEN
+    R = 0
+  ELSE
+    R = 1 + R(n - 1)
+  END IF
+END FUNCTION
+PRINT(R(50))
+PRINT(R(200))
+'''
+SCRIPTS['ifs'] = '''
+FOR v = 1 TO 6
+  IF v = 1 THEN
+    PRINT("one")
+  ELSEIF v = 2 THEN
+    PRINT("two")
+  ELSEIF v < 5 THEN
+    PRINT("small")
+  ELSE
+    PRINT("big")
+  END IF
+NEXT
+IF "" THEN
+  PRINT("empty true")
+ELSE
+  PRINT("empty false")
+END IF
+IF "false" THEN
+  PRINT("x")
+ENDIF
+IF 1 THEN
+ENDIF
+r = IF(1, "a", "b")
+PRINT(r)
+RETURN1 = v
+'''
+SCRIPTS['reserved'] = '''
+FOR = 1
+'''
+SCRIPTS['function_conflict'] = '''
+FUNCTION LEN(x)
+  LEN = 1
+END FUNCTION
+'''
+SCRIPTS['argcount'] = '''
+FUNCTION Two(a, b)
+  Two = a
+END FUNCTION
+x = Two(1)
+'''
+SCRIPTS['const_heavy'] = '''
+w = 2 * 512
+h = 3 * 256 + 0
+p = "a" & "b" & "c"
+IF 1 = 1 THEN
+  q = "yes"
+ELSE
+  q = "no"
+END IF
+IF 0 THEN
+  q2 = 1
+ELSEIF 1 THEN
+  q2 = 2
+END IF
+FOR I = 1 TO 3
+  L = LEN("constant string")
+  z = z + L + I
+NEXT
+k = 0
+WHILE k < 3
+  m = UPPER("abc") & k
+  k = k + 1
+WEND
+PRINT(w, h, p, q, q2, z, m)
+'''
+SCRIPTS['float_for'] = '''
+c = 0
+FOR I = 1 TO 2 STEP 0.25
+  c = c + 1
+  PRINT(I)
+NEXT
+FOR I = 5 TO 1
+  PRINT("never")
+NEXT
+FOR I = "1" TO "3"
+  PRINT(I)
+NEXT
+FOR I = 1 TO 3
+  I = I + 1
+  PRINT(I)
+NEXT
+FOR I = 3 TO 1 STEP -1
+  PRINT(I)
+NEXT
+n = 3
+FOR I = 1 TO n
+  n = 10
+  PRINT(I)
+NEXT
+RETURN1 = c
+'''
+SCRIPTS['multi_dim'] = '''
+DIM G(3, 4)
+FOR i = 0 TO 3
+  FOR j = 0 TO 4
+    G(i, j) = i * 10 + j
+  NEXT
+NEXT
+PRINT(G(2, 3), G(3, 4), UBOUND(G[], 1), UBOUND(G[], 2), UBOUND(G[], 3), LBOUND(G[], 1))
+H(1, 1) = "x"
+PRINT(H(1, 1), H(0, 0))
+DIM T(1, 1, 1)
+T(1, 1, 1) = 8
+PRINT(T(1, 1, 1), UBOUND(T[], 3))
+FUNCTION Cell(m, a, b)
+  Cell = m(a, b)
+END FUNCTION
+PRINT(Cell(G[], 1, 2))
+RETURN1 = G(1, 1)
+'''
+SCRIPTS['misc_calls'] = '''
+PRINT("a", 1, 2.5, 3.0)
+PRINT()
+x = PRINT("inline")
+PRINT(x)
+PRINT("CLEAR")
+PRINT("after clear")
+RANDOMIZE(42)
+r1 = RAND()
+RANDOMIZE(42)
+r2 = RAND()
+PRINT(r1 = r2)
+PRINT(PICKCSV("a,b,c", 2))
+PRINT(JSON_OK)
+j = PARSEJSON("{""a"": [1,2]}")
+PRINT(GETJSON(j, "a"))
+PRINT(GETANYTYPE())
+PRINT(HTTPSTATUS())
+RETURN1 = 1
+'''
+SCRIPTS['exit_leak'] = '''
+FUNCTION W()
+  k = 0
+  WHILE k < 10
+    k = k + 1
+    IF k = 3 THEN EXIT FOR
+  WEND
+  W = k
+END FUNCTION
+FOR I = 1 TO 5
+  PRINT("iter", I)
+  x = W()
+  PRINT("not reached")
+NEXT
+PRINT("after", I, x)
+FUNCTION E2()
+  E2 = 5
+  EXIT FUNCTION
+  E2 = 6
+END FUNCTION
+PRINT(E2())
+WHILE 1
+  FOR J = 1 TO 3
+    IF J = 2 THEN EXIT WHILE
+  NEXT
+WEND
+PRINT("J", J)
+'''
+SCRIPTS['big_loop'] = '''
+t = 0
+s = ""
+FOR I = 1 TO 3000
+  t = t + I MOD 7
+  IF I MOD 500 = 0 THEN
+    s = s & I & ";"
+  END IF
+NEXT
+RETURN1 = t & s
+'''
@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+回帰コーパスの実行（ScriptEngine の結果のスナップショット比較）
+
+目的:
+- 高速化の変更（トークナイザー・実行モード・オプティマイザーなど）でスクリプトの結果が
+  変わっていないことを確認する
+
+コーパス:
+- doc_blocks.json: docs/en/*.md と docs/01_syntax_reference.md の ```vba ブロック
+  （時刻・ファイル・HTTP・ComfyUI依存の関数を含むものは SKIP_PATTERN で除外）
+- custom_scripts.py: ループ・配列・関数・EXIT・文字列などを網羅する確認用スクリプト
+- golden.json: 各スクリプトの結果（戻り値・変数・配列・PRINT出力・RETURN系の代入フラグ）
+
+使用方法（リポジトリのルートで実行）:
+    python benchmarks/regression/run_regression.py check
+    python benchmarks/regression/run_regression.py check --mode transpiled --optimize
+    python benchmarks/regression/run_regression.py save    # golden.json を更新（意図した挙動の変更時のみ）
+    python benchmarks/regression/run_regression.py check --package ../old_checkout
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import sys
+
+from custom_scripts import SCRIPTS
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+PACKAGE_DIR = os.path.dirname(os.path.dirname(HERE))
+DOC_BLOCKS = os.path.join(HERE, 'doc_blocks.json')
+GOLDEN = os.path.join(HERE, 'golden.json')
+
+# 実行環境（時刻・ファイル・ネットワーク・ComfyUI）に依存する関数を含むドキュメントの例は除外
+SKIP_PATTERN = re.compile(
+    r'\b(HTTP\w*|OUTPUT|INPUT|SLEEP|VRAMFREE|NOW|TIME|DATE|TIMER|LOOP_SUBGRAPH|LOOPSUBGRAPH|IMAGETO\w+|'
+    r'ISFILEEXIST|OPTIMAL_LATENT|OPTIMALLATENT|YEAR|MONTH|DAY|HOUR|MINUTE|SECOND|WEEKDAY)\b', re.I)
+
+# ノードと同じ初期変数（scripter_node._execute_script_impl）
+INITIAL_VARIABLES = [
+    ('VAL1', 3.0), ('VAL2', 4.0), ('VAL_1', 3.0), ('VAL_2', 4.0),
+    ('TXT1', 'hello'), ('TXT2', ''), ('PRINT', ''), ('any_input', None),
+]
+
+
+def snapshot(value):
+    """比較用にJSONへ変換できる形にする（配列は添字の repr をキーにした辞書）"""
+    if isinstance(value, float) and value != value:
+        return 'nan'
+    if isinstance(value, dict):
+        return {repr(k): snapshot(v) for k, v in sorted(value.items(), key=lambda kv: repr(kv[0]))}
+    if isinstance(value, (list, tuple)):
+        return [snapshot(v) for v in value]
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    try:
+        if hasattr(value, 'keys'):
+            return snapshot({k: value[k] for k in value.keys()})
+    except Exception:
+        pass
+    return repr(type(value))
+
+
+def run_script(engine_class, source, engine_options):
+    """1つのスクリプトを新しいエンジンで実行し、結果のスナップショットを返す"""
+    random.seed(0)
+    engine = engine_class(locale='en', **engine_options)
+    engine.variables['RETURN1'] = 0.0
+    engine.variables['RETURN'] = 0.0
+    engine.variables['RETURN2'] = 0.0
+    for name, value in INITIAL_VARIABLES:
+        engine.set_variable(name, value)
+    result = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            value = engine.execute(source)
+        result['result'] = snapshot(value)
+    except Exception as e:
+        result['error'] = type(e).__name__ + ': ' + str(e)
+    result['vars'] = snapshot(dict(engine.variables))
+    result['arrays'] = snapshot({name: (dict(array.items()) if hasattr(array, 'items') else array)
+                                 for name, array in engine.arrays.items()})
+    result['print'] = list(engine.print_stack)
+    result['flags'] = [engine.return1_assigned, engine.return2_assigned,
+                       engine.relay_output_assigned, snapshot(engine.relay_output_value)]
+    return result
+
+
+def load_cases():
+    """コーパスのスクリプト（ケース名 → ソース）"""
+    cases = {}
+    with open(DOC_BLOCKS, encoding='utf-8') as f:
+        for block in json.load(f):
+            if not SKIP_PATTERN.search(block['src']):
+                cases['doc:' + block['id']] = block['src']
+    for name, source in SCRIPTS.items():
+        cases['custom:' + name] = source
+    return cases
+
+
+def run_corpus(engine_class, engine_options):
+    """全ケースを2回ずつ実行（2回目はASTキャッシュ・コンパイル結果の再利用経路）"""
+    results = {}
+    for name, source in load_cases().items():
+        first = run_script(engine_class, source, engine_options)
+        second = run_script(engine_class, source, engine_options)
+        if json.dumps(first, sort_keys=True, default=str) != json.dumps(second, sort_keys=True, default=str):
+            print('REPEAT MISMATCH', name)
+        results[name] = second
+    # JSONの往復で golden.json と同じ型（タプル → リストなど）にそろえる
+    return json.loads(json.dumps(results, ensure_ascii=False, sort_keys=True, default=str))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('action', choices=('check', 'save'))
+    parser.add_argument('--mode', default='interpreter', choices=('interpreter', 'compiled', 'transpiled'))
+    parser.add_argument('--optimize', action='store_true')
+    parser.add_argument('--package', default=PACKAGE_DIR, help='ScriptEngine を読み込むチェックアウト')
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+    # --package で指定したチェックアウトのエンジンを読み込むため、パスの設定後にインポートする
+    sys.path.insert(0, os.path.abspath(args.package))
+    from script_engine import ScriptEngine
+
+    results = run_corpus(ScriptEngine, {'mode': args.mode, 'optimize': args.optimize})
+
+    if args.action == 'save':
+        with open(GOLDEN, 'w', encoding='utf-8', newline='\n') as f:
+            json.dump(results, f, ensure_ascii=False, indent=1, sort_keys=True)
+        print('saved', len(results))
+        return 0
+
+    with open(GOLDEN, encoding='utf-8') as f:
+        golden = json.load(f)
+    mismatched = [name for name in golden if golden[name] != results.get(name)]
+    for name in mismatched[:10]:
+        print('DIFF', name)
+        for field, expected in golden[name].items():
+            actual = results.get(name, {}).get(field)
+            if expected != actual:
+                print('  ', field, '\n    golden:', str(expected)[:600], '\n    actual:', str(actual)[:600])
+    print(f'{len(golden) - len(mismatched)}/{len(golden)} match')
+    return 1 if mismatched else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
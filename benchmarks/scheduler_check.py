@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+実行キューのスケジューリングの確認（優先度0のタスクが優先度の高いタスクに追い越され続けないこと）
+
+ワーカー1つのキューに、' @PRIORITY 99（MAX_PRIORITY に制限される）の短いタスクを途切れずに投入し続け、
+その途中で投入した優先度0のタスクがタイムアウト前に実行されることを確認する。
+実時間を短くするため PRIORITY_SECONDS を縮小して実行する（優先度の上限が待ち時間の上限になる関係は同じ）。
+
+使用方法（リポジトリのルートで実行）:
+    python benchmarks/scheduler_check.py
+    python benchmarks/scheduler_check.py --package ../old_checkout
+
+失敗があれば終了コード1。
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRIORITY_SECONDS = 0.1       # 優先度1あたりの秒数（既定の10秒を縮小）
+FEED_TASK_SECONDS = 0.02     # 優先度の高いタスク1件の実行時間
+FEED_IN_FLIGHT = 3           # 常に待機させておく優先度の高いタスクの数
+NORMAL_TIMEOUT = 3.0         # 優先度0のタスクのタイムアウト
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--package', default=PACKAGE_DIR, help='script_execution_queue を読み込むチェックアウト')
+    args = parser.parse_args()
+
+    # --package で指定したチェックアウトのキューを読み込むため、パスと環境変数の設定後にインポートする
+    os.environ['EASYSCRIPTER_WORKERS'] = '1'
+    sys.path.insert(0, os.path.abspath(args.package))
+    import script_execution_queue as execution_queue
+
+    failures = []
+    hints = [execution_queue.scheduling_hints(f"' @PRIORITY {value}\nRETURN1 = 1")[0]
+             for value in (999999, -100, 3)]
+    limit = getattr(execution_queue, 'MAX_PRIORITY', 5)  # 制限のない古いチェックアウトでは期待値として使う
+    if hints != [limit, -limit, 3]:
+        failures.append(f"scheduling_hints did not clamp @PRIORITY: {hints}")
+
+    execution_queue.PRIORITY_SECONDS = PRIORITY_SECONDS
+    queue = execution_queue.ScriptExecutionQueue.get_instance('en')
+    high_priority, cost_hint = execution_queue.scheduling_hints("' @PRIORITY 99\n' @COST 0.02\nRETURN1 = 1")
+    stop = threading.Event()
+    started = {}
+
+    def work(name, seconds):
+        started.setdefault(name, time.monotonic())
+        time.sleep(seconds)
+        return name
+
+    def submit_high(index):
+        try:
+            queue.enqueue_and_wait(work, f"high-{index}", 30, f"high-{index}", FEED_TASK_SECONDS,
+                                   priority=high_priority, cost_hint=cost_hint)
+        except Exception as e:
+            failures.append(f"high-{index}: {type(e).__name__}: {e}")
+
+    def feed():
+        """優先度の高いタスクを常に FEED_IN_FLIGHT 件待機させる"""
+        index = 0
+        threads = []
+        while not stop.is_set():
+            threads = [thread for thread in threads if thread.is_alive()]
+            while len(threads) < FEED_IN_FLIGHT + 1:
+                thread = threading.Thread(target=submit_high, args=(index,), daemon=True)
+                thread.start()
+                threads.append(thread)
+                index += 1
+            time.sleep(FEED_TASK_SECONDS / 4)
+        for thread in threads:
+            thread.join()
+
+    feeder = threading.Thread(target=feed, daemon=True)
+    feeder.start()
+    time.sleep(0.2)
+    enqueued_at = time.monotonic()
+    try:
+        queue.enqueue_and_wait(work, 'normal', NORMAL_TIMEOUT, 'normal', 0.0)
+        waited = started['normal'] - enqueued_at
+        # 待ち時間の上限: 優先度の差による先行分と予想実行時間の差（AGING_RATE で割る）＋実行中のタスク1件
+        bound = ((limit * PRIORITY_SECONDS + execution_queue.DEFAULT_EXPECTED_SECONDS - cost_hint)
+                 / execution_queue.AGING_RATE + FEED_TASK_SECONDS)
+        print(f"priority-0 task started after {waited:.2f}s (bound {bound:.2f}s) "
+              f"while priority-{high_priority} tasks kept arriving")
+        if waited > bound + 0.5:
+            failures.append(f"priority-0 task waited {waited:.2f}s, more than the bound {bound:.2f}s")
+    except TimeoutError as e:
+        failures.append(f"priority-0 task was starved: {e}")
+    stop.set()
+    feeder.join()
+
+    for failure in failures:
+        print('FAIL', failure)
+    print('ok' if not failures else f"{len(failures)} failure(s)")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
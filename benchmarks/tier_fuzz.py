@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+実行モード間の差分ファジング
+
+ランダムなスクリプト（算術・文字列連結・IF/ELSEIF・FOR（小数・負のSTEP）・WHILE・SELECT CASE・
+EXIT FOR/WHILE/FUNCTION・ユーザー定義関数・1次元/2次元配列・ビルトイン関数）を生成し、
+interpreter / compiled / transpiled をそれぞれ optimize の有無で実行して、
+変数・配列・PRINTの出力・エラーメッセージが全モードで一致することを確認する。
+生成するループは必ず終了する（WHILEは上限付きのカウンター、FORのSTEPは0以外の定数）。
+EXIT FOR/WHILE は対応するループの中にだけ生成し、IF の条件は ( で始めない（IF() 関数の呼び出しと解釈されるため）。
+
+使用方法（リポジトリのルートで実行）:
+    python benchmarks/tier_fuzz.py
+    python benchmarks/tier_fuzz.py --count 1000 --seed 42
+    python benchmarks/tier_fuzz.py --show 3    # 不一致のスクリプトを3件まで表示
+
+不一致があれば終了コード1。
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIGURATIONS = [(mode, optimize) for mode in ('interpreter', 'compiled', 'transpiled') for optimize in (False, True)]
+
+NUMBERS = ['0', '1', '-1', '2', '3', '2.5', '0.5', '-0.25', '10', '"4"', 'I', 'J', 'N', 'N / 2']
+STRINGS = ['"a"', '"B"', '""', '"1,2,3"', 'TXT', 'S']
+NONZERO_DIVISORS = ['2', '3', '-1', '2.5', '"4"', '10']
+STEPS = ['', ' STEP 1', ' STEP 2', ' STEP -1', ' STEP 0.5', ' STEP -0.5']
+
+
+class ScriptGenerator:
+    """終了が保証されたランダムなスクリプトの生成"""
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.while_count = 0
+        self.allow_calls = True  # 関数 G の本体では G を呼ばない（無限再帰になるため）
+
+    def number(self, depth: int = 0) -> str:
+        rng = self.rng
+        r = rng.random()
+        if depth > 1 or r < 0.45:
+            return rng.choice(NUMBERS)
+        if r < 0.75:
+            op = rng.choice(['+', '-', '*', '/', 'MOD', '\\', '^'])
+            # 除算の右辺は多くの場合0以外の定数にする（ゼロ除算のエラーで終わるスクリプトを減らす）
+            if op in ('/', 'MOD', '\\') and rng.random() < 0.7:
+                right = rng.choice(NONZERO_DIVISORS)
+            else:
+                right = self.number(depth + 1)
+            return f"({self.number(depth + 1)} {op} {right})"
+        if r < 0.85:
+            return f"{rng.choice(['ABS', 'INT', 'ROUND', 'SQR'])}({self.number(depth + 1)})"
+        if r < 0.92 or not self.allow_calls:
+            return f"LEN({self.string(depth + 1)})"
+        return f"G({self.number(depth + 1)})"
+
+    def string(self, depth: int = 0) -> str:
+        rng = self.rng
+        r = rng.random()
+        if depth > 1 or r < 0.4:
+            return rng.choice(STRINGS)
+        if r < 0.7:
+            return f"{self.string(depth + 1)} & {self.number(depth + 1)}"
+        if r < 0.8:
+            return f"UCASE({self.string(depth + 1)})"
+        if r < 0.9:
+            return f"MID({self.string(depth + 1)}, {rng.choice(['1', '2', 'I'])}, 2)"
+        return f"JOIN(A[], \"{rng.choice([',', ''])}\")"
+
+    def condition(self) -> str:
+        rng = self.rng
+        r = rng.random()
+        left = self.number(1)
+        if left.startswith('('):
+            left = 'N + ' + left
+        comparison = f"{left} {rng.choice(['=', '<>', '<', '>', '<=', '>='])} {self.number(1)}"
+        if r < 0.6:
+            return comparison
+        if r < 0.8:
+            return f"{comparison} {rng.choice(['AND', 'OR'])} {self.string(1)} = {rng.choice(STRINGS)}"
+        return f"NOT ({comparison})"
+
+    def block(self, depth: int, in_function: bool, loops: tuple = (), count: int = 0) -> str:
+        return "\n".join(self.statement(depth, in_function, loops) for _ in range(count or self.rng.randint(1, 4)))
+
+    def statement(self, depth: int, in_function: bool, loops: tuple) -> str:
+        rng = self.rng
+        r = rng.random()
+        if depth < 3 and r < 0.14:
+            variable = rng.choice(['I', 'J', 'K'])
+            return (f"FOR {variable} = {rng.choice(['0', '1', '3', '-2'])} TO {rng.choice(['0', '2', '4', '-1'])}"
+                    f"{rng.choice(STEPS)}\n{self.block(depth + 1, in_function, loops + ('FOR',))}\nNEXT")
+        if depth < 3 and r < 0.22:
+            self.while_count += 1
+            counter = f"W{self.while_count}"
+            return (f"{counter} = 0\nWHILE {counter} < {rng.randint(1, 5)}\n{counter} = {counter} + 1\n"
+                    f"{self.block(depth + 1, in_function, loops + ('WHILE',))}\nWEND")
+        if depth < 3 and r < 0.34:
+            return (f"IF {self.condition()} THEN\n{self.block(depth + 1, in_function, loops)}\n"
+                    f"ELSEIF {self.condition()} THEN\n{self.block(depth + 1, in_function, loops)}\n"
+                    f"ELSE\n{self.block(depth + 1, in_function, loops)}\nEND IF")
+        if depth < 3 and r < 0.40:
+            cases = [self.block(depth + 1, in_function, loops) for _ in range(4)]
+            return (f"SELECT CASE {rng.choice(['I', 'N MOD 4', 'S', 'J'])}\nCASE 1\n{cases[0]}\n"
+                    f"CASE 2, \"a\"\n{cases[1]}\nCASE IS > 5\n{cases[2]}\nCASE ELSE\n{cases[3]}\nEND SELECT")
+        if r < 0.46 and loops:
+            return 'EXIT ' + rng.choice(loops)
+        if r < 0.48 and in_function:
+            return 'EXIT FUNCTION'
+        if r < 0.56:
+            return f"A({rng.choice(['0', '1', '2', 'I', 'UBOUND(A) + 1'])}) = {rng.choice([self.number(), self.string()])}"
+        if r < 0.60:
+            return f"M({rng.choice(['0', '1', '2'])}, {rng.choice(['0', '1', 'J'])}) = {self.number()}"
+        if r < 0.64:
+            return f"T = T & \"|\" & UBOUND(A) & \":\" & M(1, 1) & \":\" & A({rng.choice(['0', '1', 'I'])})"
+        if r < 0.70:
+            return f"N = N + {self.number()}"
+        if r < 0.80:
+            return f"S = {self.string()}"
+        if r < 0.85:
+            return f"PRINT({self.string()})"
+        return f"T = T & \"/\" & {rng.choice([self.number(), self.string()])}"
+
+    def script(self) -> str:
+        self.allow_calls = False
+        function = ("FUNCTION G(P)\n  G = P\n" + self.block(1, True, count=2) + "\n  G = G + 1\nEND FUNCTION\n")
+        self.allow_calls = True
+        prologue = 'TXT = "Hello"\nS = ""\nT = ""\nN = 1\nI = 0\nJ = 0\nDIM A(2)\nDIM M(2, 2)\n'
+        body = self.block(0, False, count=self.rng.randint(3, 8))
+        return function + prologue + body + "\nRETURN1 = N\nRETURN2 = T\n"
+
+
+def outcome(engine_class, script: str, mode: str, optimize: bool) -> str:
+    """実行結果（変数・配列・PRINT出力・エラー）を比較用の文字列にする"""
+    engine = engine_class(locale='en', mode=mode, optimize=optimize)
+    error = None
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            engine.execute(script)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    arrays = {name: sorted((repr(key), repr(value)) for key, value in array.items())
+              for name, array in engine.arrays.items()}
+    variables = sorted((name, repr(value)) for name, value in engine.variables.items())
+    return json.dumps([error, variables, arrays, list(engine.print_stack)], ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--count', type=int, default=300, help='生成するスクリプトの数')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--show', type=int, default=1, help='表示する不一致のスクリプトの数')
+    parser.add_argument('--package', default=PACKAGE_DIR, help='ScriptEngine を読み込むチェックアウト')
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(10000)
+    # --package で指定したチェックアウトのエンジンを読み込むため、パスの設定後にインポートする
+    sys.path.insert(0, os.path.abspath(args.package))
+    from script_engine import ScriptEngine
+
+    generator = ScriptGenerator(random.Random(args.seed))
+    mismatches = 0
+    errors = 0
+    for index in range(args.count):
+        script = generator.script()
+        results = [outcome(ScriptEngine, script, mode, optimize) for mode, optimize in CONFIGURATIONS]
+        if json.loads(results[0])[0] is not None:
+            errors += 1
+        if len(set(results)) == 1:
+            continue
+        mismatches += 1
+        if mismatches <= args.show:
+            print(f"--- mismatch #{index}\n{script}")
+            for (mode, optimize), result in zip(CONFIGURATIONS, results):
+                print(f"  {mode:11s} optimize={optimize!s:5s} {result[:300]}")
+    print(f"{args.count - mismatches}/{args.count} scripts agree across {len(CONFIGURATIONS)} configurations "
+          f"({errors} end with a script error)")
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
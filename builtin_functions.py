@@ -4,8 +4,11 @@
 各機能別モジュールから関数をインポートして統合したインターフェースを提供
 """
 
-from typing import Any, Optional
+import os
+from typing import Any, Callable, List, Optional
 try:
+    from .script_array import ScriptArray, GridArray
+    from .script_locks import get_named_lock
     from .functions import BuiltinFunctions
     from .functions.model_functions import builtin_optimal_latent
     from .functions.loop_functions import builtin_loop_subgraph
@@ -13,6 +16,8 @@ try:
     from .functions.python_functions import PythonFunctions
     from .functions.misc_functions import MiscFunctions
 except ImportError:
+    from script_array import ScriptArray, GridArray
+    from script_locks import get_named_lock
     from functions import BuiltinFunctions
     from functions.model_functions import builtin_optimal_latent
     from functions.loop_functions import builtin_loop_subgraph
@@ -183,21 +188,218 @@ BUILTIN_FUNCTIONS = {
     'PYDECODE': PythonFunctions.PYDECODE,
 }
 
+# 特殊処理関数
+SPECIAL_FUNCTIONS = frozenset(['REDIM', 'ARRAY', 'SPLIT', 'UBOUND', 'JOIN', 'ISARRAY',
+                               'REGEXMATCHES', 'REGEXSPLIT', 'CSVDIFF', 'PRINT', 'LOOP_SUBGRAPH'])
+
+# ビルトイン関数として予約されている名前（ユーザー定義関数には使えない）
+BUILTIN_NAMES = frozenset(BUILTIN_FUNCTIONS) | SPECIAL_FUNCTIONS
+
+# 純粋なビルトイン関数
+# （引数だけで結果が決まり、副作用がなく、スカラー値を返すもの。ループ外への巻き上げ・CACHED関数で使用）
+_PURE_FUNCTIONS = frozenset([
+    # 数学関数
+    'ABS', 'INT', 'ROUND', 'SQRT', 'SQR', 'MIN', 'MAX', 'SIN', 'COS', 'TAN', 'ASIN', 'ACOS', 'ATAN',
+    'POW', 'LOG', 'LOG10', 'EXP', 'SGN', 'FIX', 'CEILING', 'FLOOR', 'RADIANS', 'DEGREES',
+    # 文字列関数
+    'LEN', 'LEFT', 'RIGHT', 'MID', 'UPPER', 'UCASE', 'LOWER', 'LCASE', 'TRIM', 'LTRIM', 'RTRIM',
+    'REPLACE', 'INSTR', 'INSTRREV', 'STRREVERSE', 'STRCOMP', 'SPACE', 'STRING', 'PROPER',
+    'CHR', 'ASC', 'STR', 'VAL', 'CSTR', 'CDBL', 'CINT', 'URLENCODE', 'URLDECODE',
+    # 判定・型関数
+    'ISNUMERIC', 'TYPE', 'IIF', 'CSVCOUNT',
+])
+
+# 引数のASTノードや配列をScriptEngine.call_functionが直接扱う関数
+_ENGINE_FUNCTIONS = frozenset(['PRINT', 'REDIM', 'ARRAY', 'UBOUND', 'ISARRAY', 'JOIN', 'CSVDIFF'])
+
+
+def _reserved_output_arguments(engine, args: List[Any]) -> List[Any]:
+    """OUTPUT: 第1引数が予約変数名の文字列の場合、スクリプト実行開始時の値に変換"""
+    if len(args) > 0 and isinstance(args[0], str):
+        reserved_var = args[0].upper()
+        if reserved_var in ['TXT1', 'TXT2', 'ANY_INPUT']:
+            args = list(args)
+            # スクリプト実行開始時の初期値を使用（スクリプト内での上書きを無視）
+            if hasattr(engine, '_reserved_vars_initial') and reserved_var in engine._reserved_vars_initial:
+                args[0] = engine._reserved_vars_initial[reserved_var]
+            else:
+                # フォールバック: 現在の値を取得
+                args[0] = engine.get_variable(reserved_var, args[0])
+    return args
+
+
+def _any_input_arguments(engine, args: List[Any]) -> List[Any]:
+    """ANY型関数: 引数なしの場合はany_input変数を引数として渡す"""
+    if len(args) == 0:
+        return [engine.get_variable('any_input', None)]
+    return args
+
+
+def _python_arguments(engine, args: List[Any]) -> List[Any]:
+    """PYEXEC: 配列をPythonリストに変換"""
+    converted_args = []
+    for arg in args:
+        if arg.__class__ is ScriptArray and arg.cells is not None:
+            converted_args.append(arg.to_list())
+        elif isinstance(arg, (dict, ScriptArray)) and all(isinstance(k, int) for k in arg.keys()):
+            # 辞書型配列をPythonリストに変換
+            sorted_keys = sorted(arg.keys())
+            converted_args.append([arg[k] for k in sorted_keys])
+        elif arg.__class__ is GridArray:
+            # 多次元配列は従来どおりタプルをキーとする辞書で渡す
+            converted_args.append(arg.to_dict())
+        else:
+            converted_args.append(arg)
+    return converted_args
+
+
+def _output_lock_key(args: List[Any]) -> str:
+    """OUTPUT: 同じ出力パスへの書き込み（重複ファイル名の判定・追記）を直列化するロック名"""
+    path = args[1] if len(args) > 1 and isinstance(args[1], str) else ""
+    if path:
+        path = os.path.normcase(os.path.normpath(path.replace('\\', '/')))
+    return 'OUTPUT:' + path
+
+
+# 呼び出し方法が通常と異なるビルトイン関数の設定（BuiltinDescriptorの引数）
+_CALL_SETTINGS = {
+    # ファイル入出力（locale渡し。エラーはそのまま送出）
+    'OUTPUT': dict(needs_locale=True, convert_args=_reserved_output_arguments, wrap_errors=False,
+                   lock_key=_output_lock_key),
+    'INPUT': dict(needs_locale=True, wrap_errors=False),
+    'ISFILEEXIST': dict(needs_locale=True, wrap_errors=False),
+    # Engine-aware functions (engine渡しが必要な関数)
+    'LOOP_SUBGRAPH': dict(needs_engine=True, needs_locale=True),
+    'LOOPSUBGRAPH': dict(needs_engine=True, needs_locale=True),
+    'OPTIMAL_LATENT': dict(needs_engine=True),
+    'OPTIMALLATENT': dict(needs_engine=True),
+    # ANY型関数
+    'GETANYTYPE': dict(convert_args=_any_input_arguments),
+    'GETANYWIDTH': dict(convert_args=_any_input_arguments),
+    'GETANYHEIGHT': dict(convert_args=_any_input_arguments),
+    'GETANYVALUEINT': dict(convert_args=_any_input_arguments),
+    'GETANYVALUEFLOAT': dict(convert_args=_any_input_arguments),
+    'GETANYSTRING': dict(convert_args=_any_input_arguments),
+    # Python関数実行
+    'PYEXEC': dict(convert_args=_python_arguments),
+    # メモリ解放（モデルのアンロードは並行実行中の他のスクリプトと排他）
+    'VRAMFREE': dict(lock_key=lambda args: 'VRAMFREE'),
+    # 乱数（RANDOMIZEのシードはエンジンごと）
+    'RAND': dict(engine_state='random_state'),
+    'RND': dict(engine_state='random_state'),
+    'RANDOMIZE': dict(engine_state='random_state'),
+    'RNDCSV': dict(engine_state='random_state'),
+    'RANDCSV': dict(engine_state='random_state'),
+    'PICKCSV': dict(engine_state='random_state'),
+    # HTTP通信（HTTPSTATUS・HTTPHEADERSが参照する最後のレスポンスはエンジンごと）
+    'HTTPGET': dict(engine_state='http_state'),
+    'HTTPPOST': dict(engine_state='http_state'),
+    'HTTPPUT': dict(engine_state='http_state'),
+    'HTTPDELETE': dict(engine_state='http_state'),
+    'HTTPJSON': dict(engine_state='http_state'),
+    'HTTPSTATUS': dict(engine_state='http_state'),
+    'HTTPHEADERS': dict(engine_state='http_state'),
+}
+
+
+class BuiltinDescriptor:
+    """
+    ビルトイン関数の呼び出し方法
+
+    Attributes:
+        name: 関数名（大文字）
+        function: 関数オブジェクト
+        needs_engine: 第1引数に ScriptEngine を渡す
+        needs_locale: キーワード引数 locale に ScriptEngine.locale を渡す
+        convert_args: 呼び出し前に引数を変換する関数 (engine, args) -> args
+        engine_state: キーワード引数 state に渡す ScriptEngine の属性名（エンジンごとの状態）
+        lock_key: 呼び出し中に保持する名前付きロックの名前を返す関数 args -> str（script_locks.py）
+        pure: 純粋な関数（_PURE_FUNCTIONS参照）
+        engine_function: ScriptEngine.call_function が引数のASTノードや配列を直接扱う
+        wrap_errors: 例外を関数の実行エラー（error_function_execution）に変換する
+        direct: 評価済みの引数をそのまま function に渡せる
+        adapter: 上記の設定を反映した呼び出し関数 (engine, args) -> 戻り値（事前に作成）
+    """
+
+    __slots__ = ('name', 'function', 'needs_engine', 'needs_locale', 'convert_args', 'engine_state', 'lock_key',
+                 'pure', 'engine_function', 'wrap_errors', 'direct', 'adapter')
+
+    def __init__(self, name: str, function: Callable, needs_engine: bool = False, needs_locale: bool = False,
+                 convert_args: Optional[Callable] = None, engine_state: Optional[str] = None,
+                 lock_key: Optional[Callable] = None, pure: bool = False, engine_function: bool = False,
+                 wrap_errors: bool = True):
+        self.name = name
+        self.function = function
+        self.needs_engine = needs_engine
+        self.needs_locale = needs_locale
+        self.convert_args = convert_args
+        self.engine_state = engine_state
+        self.lock_key = lock_key
+        self.pure = pure
+        self.engine_function = engine_function
+        self.wrap_errors = wrap_errors
+        self.direct = not (needs_engine or needs_locale or convert_args is not None
+                           or engine_state is not None or lock_key is not None)
+        self.adapter = self._build_adapter()
+
+    def _build_adapter(self) -> Callable:
+        function = self.function
+        state_attr = self.engine_state
+        if self.needs_engine and self.needs_locale:
+            def call(engine, args):
+                return function(engine, *args, locale=engine.locale)
+        elif self.needs_engine:
+            def call(engine, args):
+                return function(engine, *args)
+        elif self.needs_locale:
+            def call(engine, args):
+                return function(*args, locale=engine.locale)
+        elif state_attr is not None:
+            def call(engine, args):
+                return function(*args, state=getattr(engine, state_attr))
+        else:
+            def call(engine, args):
+                return function(*args)
+
+        convert_args = self.convert_args
+        if convert_args is not None:
+            plain_call = call
+
+            def call(engine, args):
+                return plain_call(engine, convert_args(engine, args))
+
+        lock_key = self.lock_key
+        if lock_key is None:
+            return call
+
+        def locked_call(engine, args):
+            with get_named_lock(lock_key(args)):
+                return call(engine, args)
+        return locked_call
+
+
+# 関数名 → 呼び出し方法
+BUILTIN_DESCRIPTORS = {
+    name: BuiltinDescriptor(name, function, pure=name in _PURE_FUNCTIONS,
+                            engine_function=name in _ENGINE_FUNCTIONS, **_CALL_SETTINGS.get(name, {}))
+    for name, function in BUILTIN_FUNCTIONS.items()
+}
+
+PURE_BUILTIN_FUNCTIONS = frozenset(name for name, descriptor in BUILTIN_DESCRIPTORS.items() if descriptor.pure)
+
+
 def is_builtin_function(name: str) -> bool:
     """指定された名前がビルトイン関数かどうかを判定"""
-    name_upper = name.upper()
-    # 通常のビルトイン関数
-    if name_upper in BUILTIN_FUNCTIONS:
-        return True
-    # 特殊処理関数
-    special_functions = ['REDIM', 'ARRAY', 'SPLIT', 'UBOUND', 'JOIN', 'ISARRAY',
-                        'REGEXMATCHES', 'REGEXSPLIT', 'CSVDIFF', 'PRINT', 'LOOP_SUBGRAPH']
-    return name_upper in special_functions
+    return name.upper() in BUILTIN_NAMES
 
 def get_builtin_function(name: str):
     """ビルトイン関数を取得"""
     return BUILTIN_FUNCTIONS.get(name.upper())
 
+def get_builtin_descriptor(name: str) -> Optional[BuiltinDescriptor]:
+    """ビルトイン関数の呼び出し方法を取得"""
+    return BUILTIN_DESCRIPTORS.get(name.upper())
+
 def get_function_usage(func_name: str) -> Optional[str]:
     """
     ビルトイン関数の使用例を取得
@@ -4,20 +4,27 @@ CSV操作関数のモジュール
 CSV manipulation functions module
 """
 
+from collections.abc import Mapping
 from typing import Any
-import random
+
+try:
+    from .math_functions import random_generator
+except ImportError:
+    from math_functions import random_generator
+
 
 class CsvFunctions:
     """CSV操作関数のクラス"""
 
     @staticmethod
-    def RNDCSV(csv_text: Any, count: Any = None):
+    def RNDCSV(csv_text: Any, count: Any = None, *, state: Any = None):
         """
         CSV形式のテキストからランダムに要素を選択
 
         Args:
             csv_text: カンマ区切りのテキスト（例: "a,b,c,d,e"）
             count: 選択する要素数（省略時は1つの文字列を返す）
+            state: 呼び出し元エンジンの乱数の状態（RandomState、省略時は random モジュール）
 
         Returns:
             - count未指定時: ランダムに選択された1つの要素（文字列）
@@ -48,25 +55,25 @@ class CsvFunctions:
 
             # count未指定時は従来通り1つの文字列を返す
             if count is None:
-                return random.choice(elements)
+                return random_generator(state).choice(elements)
 
             # count指定時
             try:
                 count_int = int(float(count))
             except (ValueError, TypeError):
                 # 無効なcountの場合は1つ返す
-                return random.choice(elements)
+                return random_generator(state).choice(elements)
 
             # count=1の場合は文字列を返す（配列にしない）
             if count_int == 1:
-                return random.choice(elements)
+                return random_generator(state).choice(elements)
 
             # count >= 要素数の場合は元の順序で全要素を返す
             if count_int >= len(elements):
                 return elements
 
             # ランダムに指定数選択（重複あり）
-            return random.choices(elements, k=count_int)
+            return random_generator(state).choices(elements, k=count_int)
 
         except Exception:
             # エラーが発生した場合
@@ -251,13 +258,14 @@ class CsvFunctions:
             return ""
 
     @staticmethod
-    def PICKCSV(csv_text: Any, index: Any = None) -> str:
+    def PICKCSV(csv_text: Any, index: Any = None, *, state: Any = None) -> str:
         """
         CSV形式のテキストからN番目の要素を選択
 
         Args:
             csv_text: カンマ区切りのテキスト（例: "a,b,c,d,e"）
             index: 選択する要素のインデックス（1ベース）。0の場合はランダム選択
+            state: 呼び出し元エンジンの乱数の状態（RandomState、省略時は random モジュール）
 
         Returns:
             指定されたインデックスの要素（文字列）
@@ -289,11 +297,11 @@ class CsvFunctions:
                 idx = int(float(index)) if index is not None else 0
             except (ValueError, TypeError):
                 # 無効なインデックスの場合はランダム選択
-                return random.choice(elements)
+                return random_generator(state).choice(elements)
 
             # インデックスが0の場合はランダム選択
             if idx == 0:
-                return random.choice(elements)
+                return random_generator(state).choice(elements)
 
             # 負のインデックスの処理（末尾から数える）
             if idx < 0:
@@ -384,8 +392,8 @@ class CsvFunctions:
             結合されたCSV文字列
         """
         try:
-            # Script Engineの辞書型配列 {0: value, 1: value, ...} の場合
-            if isinstance(source_array, dict):
+            # Script Engineの配列（ScriptArray・辞書型配列 {0: value, 1: value, ...}）の場合
+            if isinstance(source_array, Mapping):
                 # キーが整数の場合は配列として扱う
                 if source_array and all(isinstance(k, int) for k in source_array.keys()):
                     # キーでソートして値を取り出す
@@ -409,6 +417,6 @@ class CsvFunctions:
 
     # エイリアス関数
     @staticmethod
-    def RANDCSV(csv_text: Any, count: Any = None):
+    def RANDCSV(csv_text: Any, count: Any = None, *, state: Any = None):
         """RNDCSVのエイリアス"""
-        return CsvFunctions.RNDCSV(csv_text, count)
\ No newline at end of file
+        return CsvFunctions.RNDCSV(csv_text, count, state=state)
\ No newline at end of file
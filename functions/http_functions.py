@@ -13,15 +13,30 @@ import json as json_module
 from typing import Optional, Dict, Any
 
 
+class HttpState:
+    """
+    最後のHTTPレスポンス情報（HTTPSTATUS / HTTPHEADERS 用）
+
+    ScriptEngineごとに保持し、HTTP関数に state として渡す
+    （並行実行中の他のスクリプトのレスポンスと混ざらない）
+    """
+
+    __slots__ = ('status_code', 'headers')
+
+    def __init__(self):
+        self.status_code: int = 0
+        self.headers: Dict[str, str] = {}
+
+
+# state を指定しない呼び出し（エンジン外からの直接呼び出し）で共有する状態
+_shared_state = HttpState()
+
+
 class HttpFunctions:
     """HTTP/HTTPS通信機能クラス"""
 
-    # 最後のHTTPレスポンス情報を保持（クラス変数）
-    _last_status_code: int = 0
-    _last_headers: Dict[str, str] = {}
-
     @staticmethod
-    def HTTPGET(url: str, headers: Optional[str] = None) -> str:
+    def HTTPGET(url: str, headers: Optional[str] = None, *, state: Optional[HttpState] = None) -> str:
         """
         HTTP GETリクエストを送信
 
@@ -32,10 +47,10 @@ class HttpFunctions:
         Returns:
             レスポンスボディ（文字列）
         """
-        return HttpFunctions._http_request("GET", url, headers=headers)
+        return HttpFunctions._http_request("GET", url, headers=headers, state=state)
 
     @staticmethod
-    def HTTPPOST(url: str, body: str, headers: Optional[str] = None) -> str:
+    def HTTPPOST(url: str, body: str, headers: Optional[str] = None, *, state: Optional[HttpState] = None) -> str:
         """
         HTTP POSTリクエストを送信
 
@@ -47,10 +62,10 @@ class HttpFunctions:
         Returns:
             レスポンスボディ（文字列）
         """
-        return HttpFunctions._http_request("POST", url, body=body, headers=headers)
+        return HttpFunctions._http_request("POST", url, body=body, headers=headers, state=state)
 
     @staticmethod
-    def HTTPPUT(url: str, body: str, headers: Optional[str] = None) -> str:
+    def HTTPPUT(url: str, body: str, headers: Optional[str] = None, *, state: Optional[HttpState] = None) -> str:
         """
         HTTP PUTリクエストを送信
 
@@ -62,10 +77,10 @@ class HttpFunctions:
         Returns:
             レスポンスボディ（文字列）
         """
-        return HttpFunctions._http_request("PUT", url, body=body, headers=headers)
+        return HttpFunctions._http_request("PUT", url, body=body, headers=headers, state=state)
 
     @staticmethod
-    def HTTPDELETE(url: str, headers: Optional[str] = None) -> str:
+    def HTTPDELETE(url: str, headers: Optional[str] = None, *, state: Optional[HttpState] = None) -> str:
         """
         HTTP DELETEリクエストを送信
 
@@ -76,10 +91,11 @@ class HttpFunctions:
         Returns:
             レスポンスボディ（文字列）
         """
-        return HttpFunctions._http_request("DELETE", url, headers=headers)
+        return HttpFunctions._http_request("DELETE", url, headers=headers, state=state)
 
     @staticmethod
-    def HTTPJSON(url: str, method: str, json_body: Optional[str] = None, headers: Optional[str] = None) -> str:
+    def HTTPJSON(url: str, method: str, json_body: Optional[str] = None, headers: Optional[str] = None, *,
+                 state: Optional[HttpState] = None) -> str:
         """
         JSON形式でHTTP通信を実行（Content-Type: application/json自動設定）
 
@@ -103,7 +119,8 @@ class HttpFunctions:
             method.upper(),
             url,
             body=json_body,
-            headers=combined_headers
+            headers=combined_headers,
+            state=state
         )
 
         # JSONレスポンスをパースして返却
@@ -116,31 +133,32 @@ class HttpFunctions:
             return response
 
     @staticmethod
-    def HTTPSTATUS() -> int:
+    def HTTPSTATUS(*, state: Optional[HttpState] = None) -> int:
         """
         最後のHTTPリクエストのステータスコードを取得
 
         Returns:
             ステータスコード（整数）
         """
-        return HttpFunctions._last_status_code
+        return (state or _shared_state).status_code
 
     @staticmethod
-    def HTTPHEADERS() -> str:
+    def HTTPHEADERS(*, state: Optional[HttpState] = None) -> str:
         """
         最後のHTTPレスポンスヘッダーを取得
 
         Returns:
             ヘッダー辞書（JSON文字列）
         """
-        return json_module.dumps(HttpFunctions._last_headers, ensure_ascii=False)
+        return json_module.dumps((state or _shared_state).headers, ensure_ascii=False)
 
     @staticmethod
     def _http_request(
         method: str,
         url: str,
         body: Optional[str] = None,
-        headers: Optional[str] = None
+        headers: Optional[str] = None,
+        state: Optional[HttpState] = None
     ) -> str:
         """
         HTTP/HTTPSリクエストを送信する内部メソッド
@@ -150,10 +168,14 @@ class HttpFunctions:
             url: リクエストURL（URLエンコードはユーザーが行う）
             body: リクエストボディ(オプション)
             headers: HTTPヘッダー(オプション、改行区切り "Key: Value" 形式)
+            state: ステータスコードとヘッダーの保存先（省略時はモジュール共有の状態）
 
         Returns:
             レスポンスボディ(文字列)
         """
+        if state is None:
+            state = _shared_state
+
         # リクエストボディをバイト列に変換
         data = body.encode('utf-8') if body else None
 
@@ -172,8 +194,8 @@ class HttpFunctions:
             # リクエスト送信
             with urllib.request.urlopen(req) as response:
                 # ステータスコードとヘッダーを保存
-                HttpFunctions._last_status_code = response.status
-                HttpFunctions._last_headers = dict(response.headers)
+                state.status_code = response.status
+                state.headers = dict(response.headers)
 
                 # レスポンスボディを読み込み
                 response_body = response.read().decode('utf-8')
@@ -181,8 +203,8 @@ class HttpFunctions:
 
         except urllib.error.HTTPError as e:
             # HTTPエラー(4xx, 5xx)
-            HttpFunctions._last_status_code = e.code
-            HttpFunctions._last_headers = dict(e.headers)
+            state.status_code = e.code
+            state.headers = dict(e.headers)
 
             # エラーレスポンスボディを読み込み
             error_body = e.read().decode('utf-8') if e.fp else ""
@@ -190,14 +212,14 @@ class HttpFunctions:
 
         except urllib.error.URLError as e:
             # URL/ネットワークエラー
-            HttpFunctions._last_status_code = 0
-            HttpFunctions._last_headers = {}
+            state.status_code = 0
+            state.headers = {}
             raise RuntimeError(f"HTTP通信エラー: {str(e)}")
 
         except Exception as e:
             # その他のエラー
-            HttpFunctions._last_status_code = 0
-            HttpFunctions._last_headers = {}
+            state.status_code = 0
+            state.headers = {}
             raise RuntimeError(f"予期しないHTTPエラー: {str(e)}")
 
     @staticmethod
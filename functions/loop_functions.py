@@ -4,10 +4,16 @@
 サブグラフループ実行機能を提供
 """
 
+import logging
+
 try:
     from ..locales import get_message
+    from ..script_logging import get_logger, log_message
 except ImportError:
     from locales import get_message
+    from script_logging import get_logger, log_message
+
+logger = get_logger('engine')
 
 def builtin_loop_subgraph(count, channel="RETURN1", engine=None, locale='ja'):
     """
@@ -96,7 +102,7 @@ def builtin_loop_subgraph(count, channel="RETURN1", engine=None, locale='ja'):
         # locale引数はキーワード引数として渡されるため再配置不要
 
         # デバッグログ
-        print(get_message('loop_arg_reorder_detected', locale, count, channel))
+        log_message(logger, logging.DEBUG, 'loop_arg_reorder_detected', locale, count, channel)
     
     if engine is None:
         raise RuntimeError(get_message('loop_engine_required', locale))
@@ -112,10 +118,10 @@ def builtin_loop_subgraph(count, channel="RETURN1", engine=None, locale='ja'):
     original_count = count
     if count < 1:
         count = 1
-        print(get_message('loop_count_clamped_to_min', locale, original_count))
+        log_message(logger, logging.WARNING, 'loop_count_clamped_to_min', locale, original_count)
     elif count > 100:
         count = 100
-        print(get_message('loop_count_clamped_to_max', locale, original_count))
+        log_message(logger, logging.WARNING, 'loop_count_clamped_to_max', locale, original_count)
 
     # チャネルの検証
     # Noneの場合はAUTOに変換(後方互換性のため)
@@ -136,7 +142,7 @@ def builtin_loop_subgraph(count, channel="RETURN1", engine=None, locale='ja'):
             "count": count,
             "needs_detection": True  # scripter_node.pyで接続先を自動検出
         }
-        print(get_message('loop_set_auto_channel', locale, count))
+        log_message(logger, logging.INFO, 'loop_set_auto_channel', locale, count)
     else:
         # 通常のチャネル指定: チャネル別に保存
         engine.loop_config[channel] = {
@@ -144,6 +150,6 @@ def builtin_loop_subgraph(count, channel="RETURN1", engine=None, locale='ja'):
             "count": count,
             "current_iteration": 0
         }
-        print(get_message('loop_set_specific_channel', locale, channel, count))
+        log_message(logger, logging.INFO, 'loop_set_specific_channel', locale, channel, count)
 
     return count
@@ -19,6 +19,29 @@ except ImportError:
         def get_message(key, locale='ja'):
             return key
 
+
+class RandomState:
+    """
+    乱数の状態（ScriptEngineごとに保持し、RAND / RND / RANDOMIZE / RNDCSV / PICKCSV に state として渡す）
+
+    RANDOMIZEでシードを設定するまでは random モジュールの共有ジェネレーターを使い、
+    設定後はそのエンジン専用の random.Random を使う（並行実行中の他のスクリプトの乱数列に影響しない）
+    """
+
+    __slots__ = ('generator',)
+
+    def __init__(self):
+        self.generator: Any = random
+
+    def seed(self, seed_value: int):
+        self.generator = random.Random(seed_value)
+
+
+def random_generator(state: Any) -> Any:
+    """乱数のジェネレーター（RandomState、stateがない場合は random モジュール）"""
+    return state.generator if state is not None else random
+
+
 class MathFunctions:
     """数学・三角関数のクラス"""
 
@@ -469,7 +492,7 @@ class MathFunctions:
             return 0.0
 
     @staticmethod
-    def RAND(min_value: Any = 0, max_value: Any = 1) -> float:
+    def RAND(min_value: Any = 0, max_value: Any = 1, *, state: Any = None) -> float:
         """
         Generate a random float between min_value and max_value (inclusive of min, exclusive of max)
 
@@ -485,6 +508,7 @@ class MathFunctions:
             RAND(1, 10) -> 1.0 to 10.0
             RAND(0, 100) -> 0.0 to 100.0
         """
+        generator = random_generator(state)
         try:
             min_val = float(min_value) if min_value is not None else 0.0
             max_val = float(max_value) if max_value is not None else 1.0
@@ -493,12 +517,12 @@ class MathFunctions:
             if min_val > max_val:
                 min_val, max_val = max_val, min_val
 
-            return random.uniform(min_val, max_val)
+            return generator.uniform(min_val, max_val)
         except (TypeError, ValueError):
-            return random.random()  # デフォルトで0.0から1.0の乱数
+            return generator.random()  # デフォルトで0.0から1.0の乱数
 
     @staticmethod
-    def RANDOMIZE(*args) -> float:
+    def RANDOMIZE(*args, state: Any = None) -> float:
         """
         Configure the random-number seed (VBA Randomize equivalent)
 
@@ -507,6 +531,7 @@ class MathFunctions:
                 - no argument: seed with system entropy
                 - one argument: use the provided seed value
                 - two arguments: draw a seed between min and max
+            state: RandomState of the calling engine (None: seed the shared random module)
 
         Returns:
             The seed value that was set (float)
@@ -533,19 +558,22 @@ class MathFunctions:
         except (TypeError, ValueError):
             seed_value = _random_seed_from_range(0, 2 ** 31 - 1)
 
-        random.seed(seed_value)
+        if state is not None:
+            state.seed(seed_value)
+        else:
+            random.seed(seed_value)
         return float(seed_value)
 
     # エイリアス関数
     @staticmethod
-    def RND(*args) -> float:
+    def RND(*args, state: Any = None) -> float:
         """RANDのエイリアス"""
         if len(args) == 0:
-            return MathFunctions.RAND()
+            return MathFunctions.RAND(state=state)
         elif len(args) == 1:
-            return MathFunctions.RAND(0, args[0])
+            return MathFunctions.RAND(0, args[0], state=state)
         else:
-            return MathFunctions.RAND(*args)
+            return MathFunctions.RAND(*args, state=state)
 
     @staticmethod
     def SQR(value: Any) -> float:
@@ -10,6 +10,7 @@ import importlib
 import json
 import base64
 import builtins
+from collections.abc import Mapping
 from typing import Any
 
 # グローバルインポート（CLAUDE.md動的インポート禁止ルールに準拠）
@@ -385,7 +386,7 @@ class PythonFunctions:
             Result = PYEXEC("numpy.mean", data_array)
         """
         # 既に辞書型配列の場合はそのまま返す（冪等性）
-        if isinstance(value, dict) and all(isinstance(k, int) for k in value.keys()):
+        if isinstance(value, Mapping) and all(isinstance(k, int) for k in value.keys()):
             return value
         
         # CSV文字列の場合はパースして辞書型配列に変換
@@ -37,6 +37,18 @@ MESSAGES = {
         'error_join_needs_array': 'JOIN function requires array name',
         'error_csvdiff_args': 'CSVDIFF function requires array name, CSV1, and CSV2',
         'error_array_function_needs_name': '{0} function requires array name',
+        'error_invalid_engine_mode': "Unknown execution mode '{0}' (available: {1})",
+        'engine_mode_ignored': "[EasyScripter] Unknown execution mode '{0}' ignored (available: {1})",
+        'error_cached_function_impure': "FUNCTION {0} cannot be CACHED: {1}",
+        'cached_reason_global_variable': "it reads '{0}', which may refer to a global variable",
+        'cached_reason_array': "it uses arrays",
+        'cached_reason_shared_variable': "it assigns '{0}', which is shared with the script",
+        'cached_reason_impure_builtin': "it calls '{0}', which is not a pure built-in function",
+        'cached_reason_nested_function': "it contains a nested FUNCTION definition",
+        'cached_reason_impure_callee': "it calls '{0}', which is not a pure user-defined function",
+        'error_script_cancelled': "Script execution was cancelled",
+        'error_statement_budget_exceeded': "Script stopped: exceeded the statement budget ({0} statements)",
+        'error_time_budget_exceeded': "Script stopped: exceeded the time budget ({0}s)",
 
         # Script Parser messages
         'error_invalid_char': "Invalid character: '{0}' at line {1}, position {2}",
@@ -80,8 +92,21 @@ MESSAGES = {
         'scripter_node_task_sent': '[EasyScripter] Task sent: {0}',
         'scripter_node_timeout': '[EasyScripter] Timeout: {0} - {1}',
         'scripter_node_timeout_error': '[ERROR] Task timeout: {0}',
+        'scripter_node_queue_full': '[EasyScripter] Rejected (queue full): {0} - {1}',
+        'scripter_node_queue_full_error': '[ERROR] Too many scripts waiting; try again later: {0}',
         'scripter_node_queue_error': '[EasyScripter] Queueing error: {0} - {1}',
         'scripter_node_queue_error_result': '[ERROR] Queueing error: {0}',
+        'scripter_node_profile_write_error': '[EasyScripter] Failed to write profile report: {0}',
+        'profile_header': '[Profile] Total {0:.3f} ms ({1} run(s), measured with the tree-walking interpreter)',
+        'profile_lines_header': '[Profile]  line     hits   total ms    self ms  statement',
+        'profile_functions_header': '[Profile] function                 calls   total ms    self ms',
+        'profile_builtins_header': '[Profile] built-in function        calls   total ms',
+        'process_pool_kept_in_process': "[EasyScripter] ' @PROCESS ignored; running in-process because of: {0}",
+        'process_pool_worker_started': '[EasyScripter] Worker process started (pid {0})',
+        'process_pool_start_failed': '[EasyScripter] Could not start a worker process; running in-process: {0}',
+        'process_pool_worker_killed': '[EasyScripter] Terminating worker process {0} to cancel the script',
+        'error_process_worker_exited': 'The worker process exited unexpectedly (exit code {0})',
+        'error_process_result': 'Could not send the script result from the worker process: {0}',
         'scripter_node_debug_execute_called': '[DEBUG] execute_script called: unique_id={0}, type={1}',
         'scripter_node_diag_impl_start': '[DIAG-4] _execute_script_impl started: unique_id={0}',
         'scripter_node_diag_engine_created': '[DIAG-4] ScriptEngine created: id={0}, return1_assigned={1}, return2_assigned={2}, loop_config={3}, variables_count={4}',
@@ -165,6 +190,18 @@ MESSAGES = {
         'error_join_needs_array': 'JOIN関数には配列名が必要です',
         'error_csvdiff_args': 'CSVDIFF関数には配列名、CSV1、CSV2が必要です',
         'error_array_function_needs_name': '{0}関数には配列名が必要です',
+        'error_invalid_engine_mode': "不明な実行モード '{0}' です（使用可能: {1}）",
+        'engine_mode_ignored': "[EasyScripter] 不明な実行モード '{0}' を無視します（使用可能: {1}）",
+        'error_cached_function_impure': "関数 {0} はCACHEDにできません: {1}",
+        'cached_reason_global_variable': "グローバル変数の可能性がある '{0}' を参照しています",
+        'cached_reason_array': "配列を使用しています",
+        'cached_reason_shared_variable': "スクリプトと共有される '{0}' に代入しています",
+        'cached_reason_impure_builtin': "純粋でないビルトイン関数 '{0}' を呼び出しています",
+        'cached_reason_nested_function': "関数定義を含んでいます",
+        'cached_reason_impure_callee': "純粋でないユーザー定義関数 '{0}' を呼び出しています",
+        'error_script_cancelled': "スクリプトの実行がキャンセルされました",
+        'error_statement_budget_exceeded': "スクリプトを停止しました: 実行ステートメント数の上限（{0}）を超えました",
+        'error_time_budget_exceeded': "スクリプトを停止しました: 実行時間の上限（{0}秒）を超えました",
 
         # Script Parser messages
         'error_invalid_char': "無効な文字: '{0}' at line {1}, position {2}",
@@ -208,8 +245,21 @@ MESSAGES = {
         'scripter_node_task_sent': '[EasyScripter] タスク送信: {0}',
         'scripter_node_timeout': '[EasyScripter] タイムアウト: {0} - {1}',
         'scripter_node_timeout_error': '[エラー] タスクがタイムアウトしました: {0}',
+        'scripter_node_queue_full': '[EasyScripter] 拒否（キューが満杯）: {0} - {1}',
+        'scripter_node_queue_full_error': '[エラー] 待機中のスクリプトが多すぎます。しばらくしてから再実行してください: {0}',
         'scripter_node_queue_error': '[EasyScripter] キューイングエラー: {0} - {1}',
         'scripter_node_queue_error_result': '[エラー] キューイングエラー: {0}',
+        'scripter_node_profile_write_error': '[EasyScripter] プロファイルレポートの書き出しに失敗しました: {0}',
+        'profile_header': '[プロファイル] 合計 {0:.3f} ms（実行 {1} 回、ツリーウォーカーで計測）',
+        'profile_lines_header': '[プロファイル]    行   実行回数   累計 ms    自己 ms  ステートメント',
+        'profile_functions_header': '[プロファイル] 関数                  呼び出し   累計 ms    自己 ms',
+        'profile_builtins_header': '[プロファイル] ビルトイン関数        呼び出し   累計 ms',
+        'process_pool_kept_in_process': "[EasyScripter] ' @PROCESS を無視してプロセス内で実行します（理由: {0}）",
+        'process_pool_worker_started': '[EasyScripter] ワーカープロセスを起動しました（pid {0}）',
+        'process_pool_start_failed': '[EasyScripter] ワーカープロセスを起動できないため、プロセス内で実行します: {0}',
+        'process_pool_worker_killed': '[EasyScripter] スクリプトをキャンセルするため、ワーカープロセス {0} を終了します',
+        'error_process_worker_exited': 'ワーカープロセスが予期せず終了しました（終了コード {0}）',
+        'error_process_result': 'ワーカープロセスからスクリプトの結果を送れませんでした: {0}',
         'scripter_node_debug_execute_called': '[DEBUG] execute_script called: unique_id={0}, type={1}',
         'scripter_node_diag_impl_start': '[DIAG-4] _execute_script_impl 開始: unique_id={0}',
         'scripter_node_diag_engine_created': '[DIAG-4] ScriptEngine生成完了: id={0}, return1_assigned={1}, return2_assigned={2}, loop_config={3}, variables_count={4}',
@@ -314,6 +364,12 @@ QUEUE_MESSAGES = {
         'queue_task_completed': '[ScriptExecutionQueue] Task completed: {0} ({1:.2f}s)',
         'queue_task_error': '[ScriptExecutionQueue] Task error: {0} - {1}',
         'queue_task_timeout': 'Task {0} timed out ({1}s)',
+        'queue_task_cancelled': 'Task {0} was cancelled after timing out ({1}s)',
+        'queue_task_skipped': '[ScriptExecutionQueue] Task skipped (cancelled before start): {0}',
+        'queue_task_rejected': '[ScriptExecutionQueue] Task rejected: {0} (queue is full, limit {1})',
+        'queue_full': 'The execution queue is full ({1} tasks waiting); task {0} was rejected',
+        'queue_priority_clamped': '[ScriptExecutionQueue] @PRIORITY {0} is out of range; using {1} (limit ±{2})',
+        'queue_worker_abandoned': '[ScriptExecutionQueue] Task {0} did not stop within {1}s of cancellation; starting a new worker thread',
         
         # Diagnostics DIAG-2
         'queue_diag2_enqueue_call': '[DIAG-2] enqueue_and_wait called: task_id={0}, worker_alive={1}, queue_size={2}, _running={3}',
@@ -346,6 +402,12 @@ QUEUE_MESSAGES = {
         'queue_task_completed': '[ScriptExecutionQueue] タスク完了: {0} ({1:.2f}秒)',
         'queue_task_error': '[ScriptExecutionQueue] タスクエラー: {0} - {1}',
         'queue_task_timeout': 'タスク {0} がタイムアウトしました（{1}秒）',
+        'queue_task_cancelled': 'タスク {0} はタイムアウト（{1}秒）のためキャンセルされました',
+        'queue_task_skipped': '[ScriptExecutionQueue] タスクをスキップ（開始前にキャンセル済み）: {0}',
+        'queue_task_rejected': '[ScriptExecutionQueue] タスクを拒否: {0}（キューが満杯、上限 {1}）',
+        'queue_full': '実行キューが満杯です（待機中 {1} 件）。タスク {0} を受け付けませんでした',
+        'queue_priority_clamped': '[ScriptExecutionQueue] @PRIORITY {0} は範囲外のため {1} を使用します（上限 ±{2}）',
+        'queue_worker_abandoned': '[ScriptExecutionQueue] タスク {0} がキャンセル後 {1}秒以内に停止しませんでした。新しいワーカースレッドを起動します',
         
         # Diagnostics DIAG-2
         'queue_diag2_enqueue_call': '[DIAG-2] enqueue_and_wait 呼び出し: task_id={0}, worker_alive={1}, queue_size={2}, _running={3}',
@@ -0,0 +1,623 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptArray / GridArray - スクリプト配列のリスト・ndarrayによる実装
+
+目的:
+- DIM A(100000) で10万件の辞書を作らない。UBOUND/LBOUND を max()/min() ではなくO(1)で求める
+- SPLIT / ARRAY / REDIM で要素を1件ずつ辞書に入れる処理を省く
+
+アーキテクチャ:
+- 連続領域（dense）: インデックス base 〜 base + len(cells) - 1 の値をリスト cells に格納する。
+  末尾への追加は list.append（償却O(1)）。未代入の位置は番兵 MISSING で表し、
+  両端は常に代入済みの要素になるように保つ（UBOUND = base + len(cells) - 1、LBOUND = base）
+- 疎領域（sparse）: 既存の要素数より大きく離れたインデックスへの代入や、
+  整数以外のキー（多次元のタプルなど）への代入があった場合だけ、従来どおりの辞書に切り替える
+- 辞書型配列（Dict[int, Any]）と同じインターフェース（MutableMapping）を持つため、
+  キーの存在確認・get()・keys()/items() などを使う既存の処理や、配列を受け取る
+  ビルトイン関数はそのまま動作する。存在しないインデックスは「含まれない」扱いのため、
+  範囲外アクセスが0を返す動作も変わらない
+- keys() / values() / items() はインデックス順（辞書型配列は代入順）
+- スクリプトの外（ノードの出力・PYEXEC）に渡す場合は to_dict() / to_list() で従来の型に戻す
+- copy()（ユーザー関数への配列引数など）は要素を共有し、どちらかが最初に変更された時点で
+  複製する（コピーオンライト）。is_shared_with() で変更の有無を判定できる
+
+多次元配列（GridArray）:
+- DIM M(1000, 1000) でタプルをキーとする辞書を100万件作らず、全要素を1つの連続領域に格納する。
+  要素の位置は各次元のインデックスから直接計算する（タプルのハッシュ計算なし）
+- numpyがある場合は ndarray（すべての値が数値の間はfloat64、それ以外の値を代入した時点で
+  object型に変換）、ない場合はPythonのリストを使う
+- 範囲外のインデックスへの代入や要素の削除があった場合だけ、従来どおりのタプルをキーとする
+  辞書に切り替える。keys() / items() / to_dict() は従来の辞書型配列と同じタプルのキーを返す
+
+使用方法:
+    array = ScriptArray.filled(101)          # DIM A(100)
+    array = ScriptArray(["a", "b", "c"])     # SPLIT / ARRAY
+    value = array.get(index, 0)
+    value = array.get(index, MISSING)        # 存在しない要素はMISSING（辞書型配列にも使える）
+    upper = array.upper_bound()
+
+    grid = GridArray.filled((3, 4))          # DIM M(2, 3)
+    value = grid.get((1, 2), MISSING)
+    upper = grid.upper_bound(2)              # UBOUND(M, 2)
+"""
+
+import itertools
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# numpyはオプション（ない場合、多次元配列はリストで保持）
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+class _Missing:
+    """存在しない要素（配列内の未代入の位置）を表す番兵"""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'MISSING'
+
+
+MISSING = _Missing()
+
+# 連続領域のまま広げられる空きの最小幅（これより広く、かつ要素数より広い空きは疎領域に切り替え）
+SPARSE_GAP = 1024
+
+
+class _CopyOnWrite:
+    """
+    copy() で要素（cells / sparse）を複製せずに共有し、最初の変更時に複製する仕組み
+
+    share は同じ要素を共有している配列の数を数える [数] のリスト（共有していない場合はNone）。
+    変更する処理は必ず先に _own() を呼ぶ
+    """
+
+    __slots__ = ()
+
+    def _share(self) -> List[int]:
+        share = self.share
+        if share is None:
+            share = self.share = [1]
+        share[0] += 1
+        return share
+
+    def _own(self):
+        """要素を共有している場合は複製して、この配列専用にする"""
+        share = self.share
+        self.share = None
+        if share is not None and share[0] > 1:
+            share[0] -= 1
+            if self.cells is not None:
+                self.cells = self.cells.copy()
+            if self.sparse is not None:
+                self.sparse = self.sparse.copy()
+
+    def is_shared_with(self, other: Any) -> bool:
+        """other と要素を共有している（copy() 以降どちらも変更されていない）か"""
+        return self.share is not None and getattr(other, 'share', None) is self.share
+
+    def _unshare(self):
+        """共有している要素を手放す（直後に要素を置き換える場合のみ使う）"""
+        share = self.share
+        self.share = None
+        if share is not None:
+            share[0] -= 1
+
+
+class ScriptArray(_CopyOnWrite, MutableMapping):
+    """
+    リストを使ったスクリプト配列（インデックス → 値）
+
+    Args:
+        values: 先頭から順に格納する値
+        base: 最初の値のインデックス（デフォルト0）
+    """
+
+    __slots__ = ('base', 'cells', 'holes', 'sparse', 'share')
+
+    def __init__(self, values: Optional[Iterable[Any]] = None, base: int = 0):
+        self.base = base
+        self.cells: Optional[List[Any]] = list(values) if values is not None else []
+        self.holes = 0  # cells内のMISSINGの数
+        self.sparse: Optional[Dict[Any, Any]] = None
+        self.share: Optional[List[int]] = None
+
+    @classmethod
+    def filled(cls, size: int, value: Any = 0) -> 'ScriptArray':
+        """インデックス 0 〜 size-1 を value で初期化した配列（DIM・REDIM）"""
+        array = cls()
+        array.cells = [value] * size if size > 0 else []
+        return array
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> 'ScriptArray':
+        """辞書型配列から変換"""
+        array = cls()
+        for key, value in mapping.items():
+            array[key] = value
+        return array
+
+    # ------------------------------------------------------------------
+    # 要素アクセス
+    # ------------------------------------------------------------------
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        cells = self.cells
+        if cells is not None and key.__class__ is int:
+            position = key - self.base
+            if 0 <= position < len(cells):
+                value = cells[position]
+                if value is not MISSING:
+                    return value
+            return default
+        return self._get_slow(key, default)
+
+    def _get_slow(self, key: Any, default: Any) -> Any:
+        if self.sparse is not None:
+            return self.sparse.get(key, default)
+        key = _integer_key(key)
+        if key is None:
+            return default
+        return self.get(key, default)
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        cells = self.cells
+        if cells is not None and key.__class__ is int:
+            position = key - self.base
+            return 0 <= position < len(cells) and cells[position] is not MISSING
+        return self._get_slow(key, MISSING) is not MISSING
+
+    def __setitem__(self, key: Any, value: Any):
+        cells = self.cells
+        if cells is not None and key.__class__ is int and self.share is None:
+            # 代入済みの位置の上書き（最も多いケース）
+            position = key - self.base
+            if 0 <= position < len(cells) and cells[position] is not MISSING:
+                cells[position] = value
+                return
+        self._set_slow(key, value)
+
+    def _set_slow(self, key: Any, value: Any):
+        self._own()
+        cells = self.cells
+        if cells is None:
+            self.sparse[key] = value
+            return
+        if key.__class__ is not int:
+            integer = _integer_key(key)
+            if integer is None:
+                # 整数以外のキーは辞書で保持
+                self._to_sparse()
+                self.sparse[key] = value
+                return
+            key = integer
+        position = key - self.base
+        size = len(cells)
+        if 0 <= position < size:
+            if cells[position] is MISSING:
+                self.holes -= 1
+            cells[position] = value
+        elif position == size:
+            cells.append(value)
+        elif size == 0:
+            self.base = key
+            cells.append(value)
+        elif position > size:
+            gap = position - size
+            if gap > SPARSE_GAP and gap > size:
+                self._to_sparse()
+                self.sparse[key] = value
+                return
+            cells.extend([MISSING] * gap)
+            cells.append(value)
+            self.holes += gap
+        else:
+            # 先頭より前への代入
+            gap = -position - 1
+            if gap > SPARSE_GAP and gap > size:
+                self._to_sparse()
+                self.sparse[key] = value
+                return
+            cells[0:0] = [value] + [MISSING] * gap
+            self.base = key
+            self.holes += gap
+
+    def __delitem__(self, key: Any):
+        self._own()
+        if self.cells is None:
+            del self.sparse[key]
+            return
+        position = _integer_key(key)
+        if position is None or key not in self:
+            raise KeyError(key)
+        position -= self.base
+        cells = self.cells
+        cells[position] = MISSING
+        self.holes += 1
+        # 両端の未代入の位置を取り除く
+        while cells and cells[-1] is MISSING:
+            cells.pop()
+            self.holes -= 1
+        start = 0
+        while start < len(cells) and cells[start] is MISSING:
+            start += 1
+        if start:
+            del cells[:start]
+            self.base += start
+            self.holes -= start
+        if not cells:
+            self.base = 0
+
+    def _to_sparse(self):
+        """辞書による保持に切り替える"""
+        self.sparse = dict(self.items())
+        self.cells = None
+        self.holes = 0
+        self.base = 0
+
+    # ------------------------------------------------------------------
+    # 辞書型配列互換のインターフェース
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        if self.cells is None:
+            return len(self.sparse)
+        return len(self.cells) - self.holes
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self.keys())
+
+    def keys(self) -> Iterable[Any]:
+        cells = self.cells
+        if cells is None:
+            return self.sparse.keys()
+        if not self.holes:
+            return range(self.base, self.base + len(cells))
+        base = self.base
+        return [base + position for position, value in enumerate(cells) if value is not MISSING]
+
+    def values(self) -> List[Any]:
+        cells = self.cells
+        if cells is None:
+            return list(self.sparse.values())
+        if not self.holes:
+            return list(cells)
+        return [value for value in cells if value is not MISSING]
+
+    def items(self) -> List[Any]:
+        cells = self.cells
+        if cells is None:
+            return list(self.sparse.items())
+        base = self.base
+        if not self.holes:
+            return list(zip(range(base, base + len(cells)), cells))
+        return [(base + position, value) for position, value in enumerate(cells) if value is not MISSING]
+
+    def copy(self) -> 'ScriptArray':
+        """コピー（要素はどちらかが最初に変更されるまで共有する）"""
+        array = ScriptArray.__new__(ScriptArray)
+        array.base = self.base
+        array.cells = self.cells
+        array.holes = self.holes
+        array.sparse = self.sparse
+        array.share = self._share()
+        return array
+
+    def update(self, other: Any = (), **kwargs: Any):
+        self._own()
+        cells = self.cells
+        if (other.__class__ is ScriptArray and cells is not None and other.cells is not None
+                and not self.holes and not other.holes and not kwargs):
+            start = other.base - self.base
+            end = start + len(other.cells)
+            if 0 <= start and end <= len(cells):
+                # 範囲内の連続領域はスライスで上書き
+                cells[start:end] = other.cells
+                return
+        items = other.items() if isinstance(other, Mapping) else other
+        for key, value in items:
+            self[key] = value
+        for key, value in kwargs.items():
+            self[key] = value
+
+    def clear(self):
+        self._unshare()
+        self.base = 0
+        self.cells = []
+        self.holes = 0
+        self.sparse = None
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Mapping):
+            return dict(self.items()) == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        # 辞書型配列と同じ表記（PRINTなどで文字列化された場合）
+        return repr(dict(self.items()))
+
+    # ------------------------------------------------------------------
+    # 配列操作
+    # ------------------------------------------------------------------
+
+    def upper_bound(self) -> Any:
+        """最大のインデックス（空の場合はNone）"""
+        if self.cells is None:
+            return max(self.sparse.keys()) if self.sparse else None
+        return self.base + len(self.cells) - 1 if self.cells else None
+
+    def lower_bound(self) -> Any:
+        """最小のインデックス（空の場合はNone）"""
+        if self.cells is None:
+            return min(self.sparse.keys()) if self.sparse else None
+        return self.base if self.cells else None
+
+    def to_dict(self) -> Dict[Any, Any]:
+        """辞書型配列（インデックス → 値）に変換"""
+        return dict(self.items())
+
+    def to_list(self) -> List[Any]:
+        """インデックス順の値のリスト"""
+        if self.cells is None:
+            return [self.sparse[key] for key in sorted(self.sparse.keys())]
+        return self.values()
+
+    def resized(self, size: int, fill: Any = 0) -> 'ScriptArray':
+        """インデックス 0 〜 size-1 の新しい配列（既存の値を保持し、ない位置は fill）"""
+        size = max(size, 0)
+        if self.cells is not None and self.base == 0 and not self.holes:
+            values = self.cells[:size]
+            if len(values) < size:
+                values.extend([fill] * (size - len(values)))
+            return ScriptArray(values)
+        return ScriptArray([self.get(index, fill) for index in range(size)])
+
+
+# float64で誤差なく保持できる整数の範囲
+_EXACT_INTEGER = 2 ** 53
+
+
+class GridArray(_CopyOnWrite, MutableMapping):
+    """
+    多次元のスクリプト配列（インデックスのタプル → 値）
+
+    Args:
+        shape: 各次元の要素数（DIM M(2, 3) の場合は (3, 4)）
+        cells: 行優先順の全要素（numpyのndarrayまたはリスト）
+    """
+
+    __slots__ = ('shape', 'cells', 'numeric', 'sparse', 'share')
+
+    def __init__(self, shape: Sequence[int], cells: Any):
+        self.shape: Tuple[int, ...] = tuple(shape)
+        self.cells = cells
+        # cellsがfloat64のndarrayの場合True（取り出し時にPythonのfloatに変換する）
+        self.numeric = HAS_NUMPY and cells.__class__ is np.ndarray and cells.dtype == np.float64
+        self.sparse: Optional[Dict[Any, Any]] = None
+        self.share: Optional[List[int]] = None
+
+    @classmethod
+    def filled(cls, shape: Sequence[int], value: Any = 0) -> 'GridArray':
+        """全要素を value で初期化した配列（多次元のDIM）"""
+        shape = tuple(max(size, 0) for size in shape)
+        count = 1
+        for size in shape:
+            count *= size
+        if HAS_NUMPY and _is_exact_number(value):
+            return cls(shape, np.full(count, value, dtype=np.float64))
+        return cls(shape, [value] * count)
+
+    @classmethod
+    def from_mapping(cls, mapping: Mapping) -> 'GridArray':
+        """タプルをキーとする辞書型配列から変換"""
+        keys = list(mapping.keys())
+        if keys and all(key.__class__ is tuple for key in keys):
+            dimensions = len(keys[0])
+            if dimensions and all(len(key) == dimensions for key in keys):
+                try:
+                    shape = tuple(int(max(key[axis] for key in keys)) + 1 for axis in range(dimensions))
+                except (TypeError, ValueError):
+                    shape = None
+                if shape is not None and all(size > 0 for size in shape):
+                    grid = cls.filled(shape, MISSING)
+                    for key, value in mapping.items():
+                        grid[key] = value
+                    if grid.sparse is None and not any(value is MISSING for value in grid.cells):
+                        return grid.compacted()
+        # 0から始まる全要素が揃っていない場合は辞書で保持
+        grid = cls((), [])
+        grid.sparse = dict(mapping)
+        grid.cells = None
+        return grid
+
+    def compacted(self) -> 'GridArray':
+        """すべての値が数値であればfloat64のndarrayに変換した配列（numpyがない場合はそのまま）"""
+        if not HAS_NUMPY or self.cells is None or self.numeric:
+            return self
+        values = list(self.cells)
+        if all(_is_exact_number(value) for value in values):
+            return GridArray(self.shape, np.array(values, dtype=np.float64))
+        return self
+
+    # ------------------------------------------------------------------
+    # 要素アクセス
+    # ------------------------------------------------------------------
+
+    def _offset(self, key: Any) -> int:
+        """行優先順の位置（範囲外・不正なキーは-1）"""
+        if key.__class__ is not tuple or len(key) != len(self.shape):
+            return -1
+        offset = 0
+        for index, size in zip(key, self.shape):
+            if index.__class__ is not int:
+                index = _integer_key(index)
+                if index is None:
+                    return -1
+            if not 0 <= index < size:
+                return -1
+            offset = offset * size + index
+        return offset
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        if self.cells is None:
+            return self.sparse.get(key, default)
+        offset = self._offset(key)
+        if offset < 0:
+            return default
+        value = self.cells[offset]
+        if self.numeric:
+            return value.item()
+        return default if value is MISSING else value
+
+    def __getitem__(self, key: Any) -> Any:
+        value = self.get(key, MISSING)
+        if value is MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key: Any) -> bool:
+        return self.get(key, MISSING) is not MISSING
+
+    def __setitem__(self, key: Any, value: Any):
+        if self.share is not None:
+            self._own()
+        if self.cells is None:
+            self.sparse[key] = value
+            return
+        offset = self._offset(key)
+        if offset < 0:
+            # 範囲外のインデックスは辞書で保持
+            self._to_sparse()
+            self.sparse[key] = value
+            return
+        if self.numeric and not _is_exact_number(value):
+            # 数値以外の値はobject型で保持
+            self.cells = self.cells.astype(object)
+            self.numeric = False
+        self.cells[offset] = value
+
+    def __delitem__(self, key: Any):
+        if key not in self:
+            raise KeyError(key)
+        self._own()
+        self._to_sparse()
+        del self.sparse[key]
+
+    def _to_sparse(self):
+        """辞書による保持に切り替える"""
+        self.sparse = dict(self.items())
+        self.cells = None
+        self.numeric = False
+
+    # ------------------------------------------------------------------
+    # 辞書型配列互換のインターフェース
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        if self.cells is None:
+            return len(self.sparse)
+        return len(self.cells)
+
+    def __iter__(self) -> Iterator[Any]:
+        if self.cells is None:
+            return iter(self.sparse)
+        return itertools.product(*[range(size) for size in self.shape])
+
+    def keys(self) -> Iterable[Any]:
+        if self.cells is None:
+            return self.sparse.keys()
+        return list(self)
+
+    def values(self) -> List[Any]:
+        if self.cells is None:
+            return list(self.sparse.values())
+        if self.numeric:
+            return self.cells.tolist()
+        return list(self.cells)
+
+    def items(self) -> List[Any]:
+        if self.cells is None:
+            return list(self.sparse.items())
+        return list(zip(self, self.values()))
+
+    def to_dict(self) -> Dict[Any, Any]:
+        """タプルをキーとする辞書型配列に変換"""
+        return dict(self.items())
+
+    def copy(self) -> 'GridArray':
+        """コピー（要素はどちらかが最初に変更されるまで共有する）"""
+        grid = GridArray.__new__(GridArray)
+        grid.shape = self.shape
+        grid.cells = self.cells
+        grid.numeric = self.numeric
+        grid.sparse = self.sparse
+        grid.share = self._share()
+        return grid
+
+    def clear(self):
+        self._unshare()
+        self.shape = ()
+        self.cells = None
+        self.numeric = False
+        self.sparse = {}
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other.items())
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        # 辞書型配列と同じ表記（PRINTなどで文字列化された場合）
+        return repr(self.to_dict())
+
+    # ------------------------------------------------------------------
+    # 配列操作
+    # ------------------------------------------------------------------
+
+    def upper_bound(self, dimension: int = 1) -> Any:
+        """指定された次元（1ベース）の最大のインデックス（該当する次元がない・空の場合はNone）"""
+        if self.cells is None:
+            indices = [key[dimension - 1] for key in self.sparse.keys()
+                       if key.__class__ is tuple and 0 < dimension <= len(key)]
+            return max(indices) if indices else None
+        if len(self.cells) == 0 or dimension > len(self.shape):
+            return None
+        # 0以下の次元は辞書型配列（key[dimension - 1]）と同じく後ろから数える
+        return self.shape[dimension - 1] - 1
+
+    def lower_bound(self, dimension: int = 1) -> Any:
+        """指定された次元（1ベース）の最小のインデックス（該当する次元がない・空の場合はNone）"""
+        if self.cells is None:
+            indices = [key[dimension - 1] for key in self.sparse.keys()
+                       if key.__class__ is tuple and 0 < dimension <= len(key)]
+            return min(indices) if indices else None
+        if len(self.cells) == 0 or dimension > len(self.shape):
+            return None
+        return 0
+
+
+def _is_exact_number(value: Any) -> bool:
+    """float64で誤差なく保持できる数値か（整数はfloatとして取り出される）"""
+    return value.__class__ is float or (value.__class__ is int and -_EXACT_INTEGER <= value <= _EXACT_INTEGER)
+
+
+def _integer_key(key: Any) -> Optional[int]:
+    """整数として扱えるキー（True、2.0 など）をintに変換（扱えない場合はNone）"""
+    if isinstance(key, int):
+        return int(key)
+    if isinstance(key, float) and key.is_integer():
+        return int(key)
+    return None
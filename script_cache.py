@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptCache - パース済みASTのプロセス共通キャッシュ
+
+目的:
+- 同じスクリプト本文を実行するたびにトークナイズ・パースし直すコストを削減
+- LOOP_SUBGRAPHの複製ノードや再キューされたプロンプトでパース処理をスキップ
+
+アーキテクチャ:
+- キー: PARSER_VERSION + PARSER_BUILD_DATE + スクリプト本文 の SHA-256
+  （パーサーの仕様が変わればキーも変わるため、古いASTが使われることはない）
+- LRU方式: 上限件数を超えたら最も長く使われていないエントリを破棄
+- 共有可能なAST: キャッシュに入れる前にリストをタプルへ変換（freeze_ast）し、
+  複数のScriptEngineから同時に参照されても書き換えられないようにする。
+  登録時に変数参照の解決（script_resolver.resolve_program）も1回だけ行う
+- スレッドセーフ: threading.Lockで排他制御
+- ディスクキャッシュ: メモリにないASTは cache/ast/<バージョン>/ 以下のJSONから遅延ロードし、
+  パースしたASTも書き出しておく（ComfyUI再起動直後のパースを省略するため）。
+  パーサーのバージョンが変わると古いバージョンのディレクトリは自動的に削除される
+- 最適化済みAST: get_or_parse() にオプティマイザー（script_optimizer.ASTOptimizer）を渡すと、
+  元のASTとは別のキー（<キー>:optimized）でメモリにのみ保持する
+
+使用方法:
+    cache = get_ast_cache()
+    ast = cache.get_or_parse(script, parser)
+    ast = cache.get_or_parse(script, parser, optimizer)  # 最適化済みAST
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from .script_parser import ASTNode, PARSER_VERSION, PARSER_BUILD_DATE
+    from .script_logging import get_logger
+    from .script_resolver import resolve_program
+    from .script_metrics import get_metrics
+except ImportError:
+    from script_parser import ASTNode, PARSER_VERSION, PARSER_BUILD_DATE
+    from script_logging import get_logger
+    from script_resolver import resolve_program
+    from script_metrics import get_metrics
+
+logger = get_logger('cache')
+
+
+# キャッシュするスクリプト数の上限（デフォルト）
+DEFAULT_AST_CACHE_SIZE = 128
+
+# ディスクキャッシュの保存先（ノードパック直下の cache/ast）
+DEFAULT_DISK_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'ast')
+
+
+def freeze_ast(value: Any) -> Any:
+    """
+    AST内のリストを再帰的にタプルへ変換する（複数エンジン間で安全に共有するため）
+
+    Args:
+        value: ASTNode、ASTNodeのリスト、またはリテラル値
+
+    Returns:
+        変換後の値（ASTNodeは同じオブジェクトを属性だけ書き換えて返す）
+    """
+    if isinstance(value, ASTNode):
+        for key, attr in list(vars(value).items()):
+            if key.startswith('_'):
+                continue  # 実行時キャッシュ（_compiledなど）は対象外
+            if isinstance(attr, (list, tuple, ASTNode)):
+                setattr(value, key, freeze_ast(attr))
+        return value
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze_ast(item) for item in value)
+    return value
+
+
+def ast_to_json(value: Any) -> Any:
+    """ASTをJSONに変換可能な値へ変換（_で始まる実行時キャッシュ属性は含めない）"""
+    if isinstance(value, ASTNode):
+        return {"__node__": value.type,
+                "fields": {key: ast_to_json(attr) for key, attr in list(vars(value).items())
+                           if key != 'type' and not key.startswith('_')}}
+    if isinstance(value, (list, tuple)):
+        return [ast_to_json(item) for item in value]
+    return value
+
+
+def ast_from_json(value: Any) -> Any:
+    """ast_to_json() で変換した値からASTを復元"""
+    if isinstance(value, dict) and "__node__" in value:
+        fields = {key: ast_from_json(attr) for key, attr in value["fields"].items()}
+        return ASTNode(value["__node__"], **fields)
+    if isinstance(value, list):
+        return [ast_from_json(item) for item in value]
+    return value
+
+
+class DiskASTCache:
+    """
+    パース済みASTをJSONファイルとして保存するディスクキャッシュ
+
+    保存先は <cache_dir>/<PARSER_VERSION>_<PARSER_BUILD_DATE>/<キー>.json 。
+    最初に使用された時点で、別バージョン用のディレクトリを削除する。
+    書き込みできない環境では警告を1回出して無効化される。
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_DISK_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.version_tag = "".join(
+            c if c.isalnum() or c in '.-' else '_' for c in f"{PARSER_VERSION}_{PARSER_BUILD_DATE}"
+        )
+        self.version_dir = os.path.join(cache_dir, self.version_tag)
+        self.enabled = True
+        self._prepared = False
+        self._lock = threading.Lock()
+
+    def _prepare(self) -> bool:
+        """初回使用時に保存先を作成し、古いバージョンのキャッシュを削除"""
+        if self._prepared:
+            return self.enabled
+        with self._lock:
+            if not self._prepared:
+                try:
+                    os.makedirs(self.version_dir, exist_ok=True)
+                    for entry in os.listdir(self.cache_dir):
+                        stale = os.path.join(self.cache_dir, entry)
+                        if entry != self.version_tag and os.path.isdir(stale):
+                            shutil.rmtree(stale, ignore_errors=True)
+                except OSError as e:
+                    self._disable(e)
+                self._prepared = True
+        return self.enabled
+
+    def _disable(self, error: Exception):
+        self.enabled = False
+        logger.warning("[ScriptCache] Disk cache disabled (%s): %s", self.cache_dir, error)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.version_dir, f"{key}.json")
+
+    def load(self, key: str) -> Optional[Any]:
+        """キーに対応するASTを読み込む（存在しない・壊れている場合はNone）"""
+        if not self._prepare():
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            # 壊れたファイルは削除して再パースさせる
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        if data.get("parser_version") != PARSER_VERSION or data.get("parser_build_date") != PARSER_BUILD_DATE:
+            return None
+        return ast_from_json(data.get("ast", []))
+
+    def store(self, key: str, ast: Any):
+        """ASTを書き出す（一時ファイルに書いてから置き換えるため読み込み側が壊れたJSONを見ることはない）"""
+        if not self._prepare():
+            return
+        data = {
+            "parser_version": PARSER_VERSION,
+            "parser_build_date": PARSER_BUILD_DATE,
+            "ast": ast_to_json(ast),
+        }
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            if isinstance(e, OSError):
+                self._disable(e)
+
+    def clear(self):
+        """このバージョンのディスクキャッシュを削除"""
+        shutil.rmtree(self.version_dir, ignore_errors=True)
+        self._prepared = False
+
+
+class ASTCache:
+    """パース済みASTのLRUキャッシュ（プロセス内で共有）"""
+
+    def __init__(self, max_entries: int = DEFAULT_AST_CACHE_SIZE, disk_cache: Optional[DiskASTCache] = None):
+        self.max_entries = max_entries
+        self.disk_cache = disk_cache
+        self._entries: 'OrderedDict[str, Tuple[ASTNode, ...]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self.optimized = 0
+        self.eliminated: Dict[str, int] = {}  # 最適化パスごとの除去ノード数の累計
+
+    @staticmethod
+    def make_key(script: str) -> str:
+        """スクリプト本文とパーサーバージョンからキャッシュキーを生成"""
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}\0{PARSER_BUILD_DATE}\0".encode('utf-8'))
+        digest.update(script.encode('utf-8', errors='surrogatepass'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[ASTNode, ...]]:
+        """キーに対応するASTを取得（見つからない場合はNone）"""
+        with self._lock:
+            ast = self._entries.get(key)
+            if ast is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return ast
+
+    def put(self, key: str, ast: Any) -> Tuple[ASTNode, ...]:
+        """ASTを共有可能な形に変換して登録し、登録されたASTを返す"""
+        frozen = resolve_program(freeze_ast(ast))
+        with self._lock:
+            # 並行してパースされていた場合は先に登録された方を使う
+            existing = self._entries.get(key)
+            if existing is not None:
+                self._entries.move_to_end(key)
+                return existing
+            self._entries[key] = frozen
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return frozen
+
+    def get_or_parse(self, script: str, parser, optimizer=None) -> Tuple[ASTNode, ...]:
+        """
+        キャッシュからASTを取得し、なければパースして登録する
+
+        Args:
+            script: スクリプト本文
+            parser: キャッシュミス時に使用するScriptParser
+            optimizer: 指定した場合は最適化済みのASTを返す（ASTOptimizer）
+
+        Returns:
+            ステートメントのタプル（読み取り専用として扱うこと）
+        """
+        if optimizer is not None:
+            return self._get_or_optimize(script, parser, optimizer)
+
+        key = self.make_key(script)
+        ast = self.get(key)
+        if ast is not None:
+            return ast
+
+        # メモリにない場合はディスクキャッシュを確認
+        if self.disk_cache is not None:
+            ast = self.disk_cache.load(key)
+            if ast is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                return self.put(key, ast)
+
+        ast = self.put(key, parser.parse(script))
+        if self.disk_cache is not None:
+            self.disk_cache.store(key, ast)
+        return ast
+
+    def _get_or_optimize(self, script: str, parser, optimizer) -> Tuple[ASTNode, ...]:
+        """最適化済みのASTを取得（なければ元のASTを最適化して登録。ディスクには保存しない）"""
+        key = f"{self.make_key(script)}:optimized"
+        ast = self.get(key)
+        if ast is not None:
+            return ast
+
+        result = optimizer.optimize(self.get_or_parse(script, parser))
+        with self._lock:
+            self.optimized += 1
+            for name, count in result.eliminated.items():
+                self.eliminated[name] = self.eliminated.get(name, 0) + count
+        return self.put(key, result.statements)
+
+    def clear(self):
+        """キャッシュと統計情報をクリア"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.disk_hits = 0
+            self.optimized = 0
+            self.eliminated = {}
+
+    def stats(self) -> Dict[str, Any]:
+        """ヒット率などの統計情報を取得"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": (self.hits / lookups) if lookups else 0.0,
+                "optimized": self.optimized,
+                "eliminated": dict(self.eliminated),
+            }
+
+
+_ast_cache: Optional[ASTCache] = None
+_ast_cache_lock = threading.Lock()
+
+
+# モジュールレベルでの便利関数
+def get_ast_cache() -> ASTCache:
+    """プロセス共通のASTCacheインスタンスを取得"""
+    global _ast_cache
+    if _ast_cache is None:
+        with _ast_cache_lock:
+            if _ast_cache is None:  # ダブルチェックロッキング
+                _ast_cache = ASTCache(disk_cache=DiskASTCache())
+                get_metrics().register_gauges('ast_cache', _ast_cache.stats)
+    return _ast_cache
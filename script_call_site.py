@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptCallSite - FUNCTION_CALLノードの呼び出し先の事前解決
+
+目的:
+- 関数呼び出しのたびに SPLIT判定、引数の種類の判定、特殊処理関数の判定、
+  is_builtin_function() による検索を繰り返さない（LEN / MID / ABS などをループ内で呼ぶ場合）
+
+アーキテクチャ:
+- bind_call_site(node): ノードごとに1回だけ CallSite を作成し、_call_site 属性にキャッシュする
+  （ASTCacheを通じて全エンジンで共有）
+- 呼び出し先の種類（ビルトイン関数と同名のユーザー定義関数は定義できないため静的に確定する）:
+    CALL_BUILTIN   通常のビルトイン関数（関数オブジェクトを直接呼ぶ）
+    CALL_ADAPTER   engine・locale渡しや引数の変換が必要なビルトイン関数
+                   （BuiltinDescriptor.adapter を ScriptEngine.call_builtin で呼ぶ）
+    CALL_SPLIT     SPLIT(配列名, 文字列, 区切り文字)（第1引数を評価せずに扱う）
+    CALL_DISPATCH  ユーザー定義関数・特殊処理関数・未定義の名前（ScriptEngine.call_function）
+- 引数の種類（配列変数参照 / 配列の可能性がある変数 / 通常の式）も事前に判定する
+- ガード: 同名の配列は実行中に作成される可能性があるため、呼び出し時に配列の存在だけを確認し、
+  存在する場合は配列アクセスとして処理する（ScriptEngine / ScriptCompiler / ScriptTranspiler共通）
+
+使用方法:
+    site = bind_call_site(node)
+    if site.kind == CALL_BUILTIN:
+        result = site.builtin(*args)
+    elif site.kind == CALL_ADAPTER:
+        result = engine.call_builtin(site.descriptor, args)
+"""
+
+from typing import Any, Callable, Optional, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .builtin_functions import BUILTIN_DESCRIPTORS, BuiltinDescriptor
+except ImportError:
+    from script_parser import ASTNode
+    from builtin_functions import BUILTIN_DESCRIPTORS, BuiltinDescriptor
+
+
+# 呼び出し先の種類
+CALL_BUILTIN = 'builtin'
+CALL_ADAPTER = 'adapter'
+CALL_SPLIT = 'split'
+CALL_DISPATCH = 'dispatch'
+
+# 引数の種類
+ARG_VALUE = 0       # 通常の式
+ARG_ARRAY_VAR = 1   # 配列変数参照（ITEMS[]記法）
+ARG_VARIABLE = 2    # 変数（同名の配列があれば配列の実体を渡す）
+
+
+class CallSite:
+    """事前に解決した関数呼び出し"""
+
+    __slots__ = ('name', 'kind', 'builtin', 'descriptor', 'arguments')
+
+    def __init__(self, node: ASTNode):
+        self.name: str = node.name.upper()
+        # 引数ごとの (種類, 大文字の変数名, ノード)
+        self.arguments: Tuple[Tuple[int, Optional[str], Any], ...] = tuple(
+            _classify_argument(arg) for arg in node.arguments
+        )
+        self.builtin: Optional[Callable] = None
+        self.descriptor: Optional[BuiltinDescriptor] = BUILTIN_DESCRIPTORS.get(self.name)
+        if self.name == 'SPLIT' and len(node.arguments) >= 3:
+            self.kind = CALL_SPLIT
+        elif self.descriptor is None or self.descriptor.engine_function:
+            self.kind = CALL_DISPATCH
+        elif self.descriptor.direct:
+            self.kind = CALL_BUILTIN
+            self.builtin = self.descriptor.function
+        else:
+            self.kind = CALL_ADAPTER
+
+
+def _classify_argument(arg: Any) -> Tuple[int, Optional[str], Any]:
+    if isinstance(arg, ASTNode):
+        if arg.type == 'ARRAY_VAR':
+            return ARG_ARRAY_VAR, arg.name.upper(), arg
+        if arg.type == 'VARIABLE':
+            return ARG_VARIABLE, arg.name.upper(), arg
+    return ARG_VALUE, None, arg
+
+
+def bind_call_site(node: ASTNode) -> CallSite:
+    """FUNCTION_CALLノードの呼び出し先を取得（初回のみ解決し、ノードにキャッシュ）"""
+    site = getattr(node, '_call_site', None)
+    if site is None:
+        site = CallSite(node)
+        node._call_site = site
+    return site
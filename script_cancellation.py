@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptCancellation - 実行中スクリプトの協調的キャンセルと実行予算
+
+目的:
+- 終了しないWHILEループなどを含むスクリプトがワーカースレッドを占有し続け、
+  ScriptExecutionQueue の後続のタスク（他のEasyScripterノード）がすべて待たされるのを防ぐ
+
+アーキテクチャ:
+- CancellationToken: 呼び出し元（ScriptExecutionQueue.enqueue_and_wait のタイムアウトなど）が
+  別スレッドから cancel() し、実行中のスクリプトが次のチェックで停止する
+- ExecutionGuard: ScriptEngine.guard に設定すると、ループの反復（ループ本体のステートメント数）と
+  ユーザー定義関数の呼び出し（関数本体のステートメント数）ごとに step() で実行ステートメント数を数え、
+  CHECK_INTERVAL ステートメントごとにキャンセル・ステートメント数の上限・経過時間の上限を確認する。
+  ループと関数呼び出し以外は実行回数がスクリプトの長さで決まるため数えない
+- 予算の設定: 引数または環境変数（未設定・0以下は無制限）
+    EASYSCRIPTER_MAX_STATEMENTS   1回の実行で実行できるステートメント数
+    EASYSCRIPTER_MAX_SECONDS      1回の実行の経過時間（秒）
+- 停止時は ScriptCancelled（理由のメッセージ付き）を送出する。ScriptEngine.execute() は
+  他のエラーと異なりラップせずにそのまま送出する
+- ビルトイン関数（SLEEP・HTTP通信など）の実行中は停止できない（関数から戻った次のチェックで停止する）
+
+使用方法:
+    token = CancellationToken()
+    engine.guard = ExecutionGuard.from_environment(token, locale)
+    engine.execute(script)        # 別スレッドから token.cancel(reason) で停止
+"""
+
+import os
+import time
+from typing import Optional
+
+try:
+    from .locales import get_message
+except ImportError:
+    from locales import get_message
+
+
+ENV_MAX_STATEMENTS = 'EASYSCRIPTER_MAX_STATEMENTS'
+ENV_MAX_SECONDS = 'EASYSCRIPTER_MAX_SECONDS'
+
+# キャンセル・予算を確認する間隔（ステートメント数）
+CHECK_INTERVAL = 32
+
+
+class ScriptCancelled(Exception):
+    """スクリプトの実行がキャンセルされた、または実行予算を超えた"""
+    pass
+
+
+class CancellationToken:
+    """スクリプトの実行を別スレッドから停止するためのトークン"""
+
+    __slots__ = ('cancelled', 'reason')
+
+    def __init__(self):
+        self.cancelled = False
+        self.reason: Optional[str] = None
+
+    def cancel(self, reason: Optional[str] = None):
+        """キャンセルを要求（最初の理由を保持する）"""
+        if not self.cancelled:
+            self.reason = reason
+            self.cancelled = True
+
+
+def _read_limit(name: str, convert) -> Optional[float]:
+    """環境変数から上限値を読み取る（未設定・不正な値・0以下はNone）"""
+    value = os.environ.get(name)
+    if not value:
+        return None
+    try:
+        limit = convert(value.strip())
+    except ValueError:
+        return None
+    return limit if limit > 0 else None
+
+
+class ExecutionGuard:
+    """1回のスクリプト実行のキャンセル・実行予算の監視"""
+
+    __slots__ = ('token', 'max_statements', 'max_seconds', 'locale', 'statements', 'next_check', 'deadline')
+
+    def __init__(self, token: Optional[CancellationToken] = None, max_statements: Optional[int] = None,
+                 max_seconds: Optional[float] = None, locale: str = 'ja'):
+        self.token = token
+        self.max_statements = max_statements
+        self.max_seconds = max_seconds
+        self.locale = locale
+        self.start()
+
+    @classmethod
+    def from_environment(cls, token: Optional[CancellationToken] = None, locale: str = 'ja') -> 'ExecutionGuard':
+        """環境変数の予算でガードを作成"""
+        return cls(token, _read_limit(ENV_MAX_STATEMENTS, int), _read_limit(ENV_MAX_SECONDS, float), locale)
+
+    def start(self):
+        """実行開始時に数え直す（ScriptEngine.execute() が呼び出す）"""
+        self.statements = 0
+        self.deadline = time.monotonic() + self.max_seconds if self.max_seconds else None
+        self.next_check = 0
+        self.check()
+
+    def step(self, count: int):
+        """count ステートメントを実行する（一定間隔でキャンセル・予算を確認）"""
+        self.statements += count
+        if self.statements >= self.next_check:
+            self.check()
+
+    def check(self):
+        """キャンセル・予算超過の場合は ScriptCancelled を送出"""
+        token = self.token
+        if token is not None and token.cancelled:
+            raise ScriptCancelled(token.reason or get_message('error_script_cancelled', self.locale))
+        max_statements = self.max_statements
+        if max_statements and self.statements > max_statements:
+            raise ScriptCancelled(get_message('error_statement_budget_exceeded', self.locale, max_statements))
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ScriptCancelled(get_message('error_time_budget_exceeded', self.locale, self.max_seconds))
+        next_check = self.statements + CHECK_INTERVAL
+        if max_statements and next_check > max_statements:
+            next_check = max_statements + 1
+        self.next_check = next_check
@@ -0,0 +1,864 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptCompiler - ASTをクロージャの木に変換する実行方式（ScriptEngine の compiled モード）
+
+目的:
+- execute_statement / evaluate_expression の if node.type == ... の分岐や hasattr 判定を
+  ノードの訪問ごとではなく、コンパイル時に1回だけ行う
+- ループの多いスクリプトでディスパッチのコストを削減
+
+アーキテクチャ:
+- compile_statement() / compile_expression() はノード種別ごとに特化したクロージャ fn(engine) を返す。
+  演算子・子ノードのクロージャ・大文字化済みの名前はコンパイル時に束縛される
+- クロージャはエンジンを引数で受け取るため、特定のScriptEngineインスタンスに依存しない。
+  生成したクロージャはASTノードの _compiled 属性にキャッシュされ、
+  ASTCacheで共有されたASTを実行する全エンジンで再利用される
+- 意味論はツリーウォーカー（interpreter モード）と同一:
+  変数・配列・スコープはエンジンの辞書をそのまま操作し、
+  RETURN/RETURN1 の連動や EXIT FOR/WHILE/FUNCTION（完了シグナル、script_control_flow.py参照）も同じ動作になる。
+  使用頻度の低い構文（DIM、REDIM、SPLITなど）や特殊処理関数はエンジンのメソッドに委譲する
+
+使用方法:
+    engine = ScriptEngine(mode='compiled')
+    engine.execute(script)
+"""
+
+import operator
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .script_control_flow import LoopExit, Completion, EXIT_FOR, EXIT_WHILE, EXIT_SIGNALS, contains_exit, counter_values
+    from .script_resolver import SPECIAL_VARIABLES, RETURN_SLOT, UNSET
+    from .script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT
+    from .script_optimizer import HoistedResult
+    from .script_select_case import bind_case_table
+    from .script_string_builder import UNBUFFERED_VARIABLES, split_append, bind_append_plan, open_builders, close_builders
+    from .script_array import ScriptArray, GridArray, MISSING
+    from .script_metrics import COUNT_BUILTIN_CALLS
+    from .locales import get_message
+except ImportError:
+    from script_parser import ASTNode
+    from script_control_flow import LoopExit, Completion, EXIT_FOR, EXIT_WHILE, EXIT_SIGNALS, contains_exit, counter_values
+    from script_resolver import SPECIAL_VARIABLES, RETURN_SLOT, UNSET
+    from script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT
+    from script_optimizer import HoistedResult
+    from script_select_case import bind_case_table
+    from script_string_builder import UNBUFFERED_VARIABLES, split_append, bind_append_plan, open_builders, close_builders
+    from script_array import ScriptArray, GridArray, MISSING
+    from script_metrics import COUNT_BUILTIN_CALLS
+    from locales import get_message
+
+
+# コンパイル済みのステートメント・式（引数はScriptEngine）
+CompiledNode = Callable[[Any], Any]
+
+# 比較演算子（両辺を数値に変換して比較）
+NUMERIC_COMPARISONS = {
+    'LT': operator.lt,
+    'GT': operator.gt,
+    'LTE': operator.le,
+    'GTE': operator.ge,
+}
+
+# 算術演算子（両辺を数値に変換して計算、ゼロ除算チェックは個別）
+ARITHMETIC_OPERATORS = {
+    'PLUS': operator.add,
+    'MINUS': operator.sub,
+    'MULTIPLY': operator.mul,
+    'POWER': operator.pow,
+}
+
+# 真偽値を返すようにコンパイルできる演算子
+CONDITION_OPERATORS = frozenset(['AND', 'OR', 'EQ', 'NEQ']) | frozenset(NUMERIC_COMPARISONS)
+
+
+def compile_block(statements: Iterable[Any]) -> Tuple[CompiledNode, ...]:
+    """ステートメントの並びをコンパイル済みクロージャのタプルに変換"""
+    return tuple(compile_statement(statement) for statement in statements)
+
+
+def compile_function_body(func_def: ASTNode) -> Tuple[CompiledNode, ...]:
+    """ユーザー定義関数（FUNCTION_DEF）の本体をコンパイル（結果はノードにキャッシュ）"""
+    body = getattr(func_def, '_compiled_body', None)
+    if body is None:
+        body = compile_block(func_def.body)
+        func_def._compiled_body = body
+    return body
+
+
+def compile_statement(node: Any) -> CompiledNode:
+    """ステートメントをコンパイル（結果はノードにキャッシュ）"""
+    if not isinstance(node, ASTNode):
+        return _compile_constant(node)
+    compiled = getattr(node, '_compiled', None)
+    if compiled is None:
+        builder = _STATEMENT_BUILDERS.get(node.type)
+        # ステートメント以外のノードは式として評価（execute_statement と同じ）
+        compiled = builder(node) if builder is not None else compile_expression(node)
+        node._compiled = compiled
+    return compiled
+
+
+def compile_expression(node: Any) -> CompiledNode:
+    """式をコンパイル"""
+    if not isinstance(node, ASTNode):
+        # ASTNodeでない場合(直接の値)
+        return _compile_constant(node)
+    builder = _EXPRESSION_BUILDERS.get(node.type)
+    if builder is None:
+        return _delegate_expression(node)
+    return builder(node)
+
+
+def compile_condition(node: Any) -> CompiledNode:
+    """
+    条件式をコンパイル（IF/WHILE用）
+
+    比較・論理演算は 1.0/0.0 を経由せず真偽値を直接返す。
+    それ以外の式は評価結果を engine.is_true() で真偽値に変換する。
+    """
+    if isinstance(node, ASTNode):
+        if node.type == 'BINARY_OP' and node.operator in CONDITION_OPERATORS:
+            return _compile_binary_condition(node)
+        if node.type == 'UNARY_OP' and node.operator == 'NOT':
+            operand = compile_condition(node.operand)
+
+            def not_condition(engine):
+                return not operand(engine)
+            return not_condition
+
+    value = compile_expression(node)
+
+    def truth(engine):
+        return engine.is_true(value(engine))
+    return truth
+
+
+# ======================================================================
+# 共通ヘルパー
+# ======================================================================
+
+def _compile_constant(value: Any) -> CompiledNode:
+    def constant(engine):
+        return value
+    return constant
+
+
+def _delegate_statement(node: ASTNode) -> CompiledNode:
+    """ツリーウォーカーでそのまま実行（使用頻度の低いステートメント用）"""
+    def delegated(engine):
+        return engine.execute_statement(node)
+    return delegated
+
+
+def _delegate_expression(node: ASTNode) -> CompiledNode:
+    """ツリーウォーカーでそのまま評価（使用頻度の低い式用）"""
+    def delegated(engine):
+        return engine.evaluate_expression(node)
+    return delegated
+
+
+def _compile_numeric_operand(node: Any) -> CompiledNode:
+    """数値として使われる被演算子をコンパイル（数値リテラルは事前にfloatへ変換）"""
+    if isinstance(node, ASTNode) and node.type == 'LITERAL' and type(node.value) in (int, float):
+        return _compile_constant(float(node.value))
+    return compile_expression(node)
+
+
+def _make_variable_setter(name: str, slot: Optional[int] = None) -> Callable[[Any, Any], None]:
+    """
+    ScriptEngine.set_variable(name, value) と同じ動作をする代入関数を生成
+
+    slot はリゾルバーが割り当てたスロット番号（-1はグローバル、Noneは未解決）
+    """
+    name_upper = name.upper()
+    if slot is not None and slot < 0:
+        def set_global_variable(engine, value):
+            if isinstance(value, (list, dict, ScriptArray, GridArray)):
+                engine.set_variable(name, value)
+                return
+            engine.variables[name_upper] = value
+        return set_global_variable
+
+    if slot is not None:
+        is_return_slot = slot == RETURN_SLOT
+
+        def set_local_variable(engine, value):
+            if isinstance(value, (list, dict, ScriptArray, GridArray)):
+                engine.set_variable(name, value)
+                return
+            scope = engine.call_stack[-1]
+            # 関数名への代入は戻り値の設定
+            if is_return_slot:
+                scope['return_value'] = value
+            scope['frame'].values[slot] = value
+        return set_local_variable
+
+    alias = {'RETURN': 'RETURN1', 'RETURN1': 'RETURN'}.get(name_upper)
+    is_return2 = name_upper == 'RETURN2'
+
+    def set_variable(engine, value):
+        # 配列（リスト・辞書）の代入はエンジンの処理に任せる
+        if isinstance(value, (list, dict, ScriptArray, GridArray)):
+            engine.set_variable(name, value)
+            return
+        # RETURNとRETURN1の連動（後方互換性）
+        if alias is not None:
+            engine.return1_assigned = True
+            engine.variables[alias] = value
+        elif is_return2:
+            engine.return2_assigned = True
+
+        call_stack = engine.call_stack
+        if call_stack:
+            scope = call_stack[-1]
+            # 関数名への代入は戻り値の設定
+            if name_upper == scope['function_name'].upper():
+                scope['return_value'] = value
+            scope['frame'].store(name_upper, value)
+        else:
+            engine.variables[name_upper] = value
+    return set_variable
+
+
+def run_compiled_block(block: Iterable[CompiledNode], engine) -> Optional[Completion]:
+    """コンパイル済みのステートメントを順に実行（EXIT文に到達した場合はその完了シグナルを返す）"""
+    for statement in block:
+        signal = statement(engine)
+        if signal.__class__ is Completion:
+            return signal
+    return None
+
+
+# ======================================================================
+# ステートメント
+# ======================================================================
+
+def _compile_assign(node: ASTNode) -> CompiledNode:
+    value_fn = compile_expression(node.value)
+    set_variable = _make_variable_setter(node.variable, node._slot)
+    # RELAY_OUTPUT変数への代入を検出（Tier 3実装）
+    if node.variable.upper() == 'RELAY_OUTPUT':
+        def assign_relay_output(engine):
+            value = value_fn(engine)
+            engine.relay_output_assigned = True
+            engine.relay_output_value = value
+            set_variable(engine, value)
+            return value
+        return assign_relay_output
+
+    append = split_append(node)
+    if append is not None and node.variable.upper() not in UNBUFFERED_VARIABLES:
+        name = node.variable.upper()
+        variable_fn = compile_expression(append[0])
+        part_fns = tuple(compile_expression(expression) for expression in append[1])
+
+        def assign_or_append(engine):
+            parts = engine.string_builders.get(name)
+            if parts is None:
+                value = value_fn(engine)
+                set_variable(engine, value)
+                return value
+            # ループ内の文字列の追記はバッファに溜める（script_string_builder.py参照）
+            format_for_string = engine.format_for_string
+            if not parts:
+                head = format_for_string(variable_fn(engine))
+            values = [format_for_string(part(engine)) for part in part_fns]
+            if not parts:
+                parts.append(head)
+            parts.extend(values)
+        return assign_or_append
+
+    def assign(engine):
+        value = value_fn(engine)
+        set_variable(engine, value)
+        return value
+    return assign
+
+
+def _compile_assign_array(node: ASTNode) -> CompiledNode:
+    array_name = node.array.upper()
+    index_fn = compile_expression(node.index)
+    value_fn = compile_expression(node.value)
+
+    def assign_array(engine):
+        index = int(index_fn(engine))
+        value = value_fn(engine)
+        call_stack = engine.call_stack
+        arrays = call_stack[-1]['arrays'] if call_stack else engine.arrays
+        if array_name not in arrays:
+            arrays[array_name] = ScriptArray()
+        arrays[array_name][index] = value
+        return value
+    return assign_array
+
+
+def _compile_assign_array_multi(node: ASTNode) -> CompiledNode:
+    array_name = node.array.upper()
+    index_fns = tuple(compile_expression(index) for index in node.indices)
+    value_fn = compile_expression(node.value)
+
+    def assign_array_multi(engine):
+        indices = tuple(int(index_fn(engine)) for index_fn in index_fns)
+        value = value_fn(engine)
+        call_stack = engine.call_stack
+        arrays = call_stack[-1]['arrays'] if call_stack else engine.arrays
+        if array_name not in arrays:
+            arrays[array_name] = {}
+        arrays[array_name][indices] = value
+        return value
+    return assign_array_multi
+
+
+def _compile_if(node: ASTNode) -> CompiledNode:
+    condition = compile_condition(node.condition)
+    then_block = compile_block(node.then_branch)
+    elseif_branches = tuple(
+        (compile_condition(elseif_condition), compile_block(elseif_statements))
+        for elseif_condition, elseif_statements in (getattr(node, 'elseif_branches', None) or ())
+    )
+    else_block = compile_block(node.else_branch) if node.else_branch else ()
+
+    def if_statement(engine):
+        if condition(engine):
+            return run_compiled_block(then_block, engine)
+        # 最初に真になったELSEIF句のみ実行
+        for elseif_condition, elseif_block in elseif_branches:
+            if elseif_condition(engine):
+                return run_compiled_block(elseif_block, engine)
+        return run_compiled_block(else_block, engine)
+    return if_statement
+
+
+def _compile_while(node: ASTNode) -> CompiledNode:
+    condition = compile_condition(node.condition)
+    body = compile_block(node.body)
+    # EXIT文を含まない本体は完了シグナルを判定しない
+    exits = contains_exit(node.body)
+    plan = bind_append_plan(node)
+    buffered = bool(plan.targets)
+    # 1回の反復で数えるステートメント数（ExecutionGuard.step）
+    cost = len(body) or 1
+
+    def while_loop(engine):
+        # ループ内の文字列の追記はバッファに溜める
+        owned = open_builders(plan, engine) if buffered else ()
+        guard = engine.guard
+        try:
+            while condition(engine):
+                if guard is not None:
+                    guard.step(cost)
+                if exits:
+                    for statement in body:
+                        signal = statement(engine)
+                        if signal.__class__ is Completion:
+                            # EXIT WHILEはこのループで終了、それ以外は外側に返す
+                            return None if signal is EXIT_WHILE else signal
+                else:
+                    for statement in body:
+                        statement(engine)
+        except LoopExit as e:
+            # 呼び出した関数の外に出たEXIT（例外で伝わる）
+            # 他のループタイプ（FOR）のEXITは再スロー
+            if e.loop_type != 'WHILE':
+                raise
+        finally:
+            if owned:
+                close_builders(owned, engine)
+    return while_loop
+
+
+def _compile_for(node: ASTNode) -> CompiledNode:
+    name = node.variable.upper()
+    slot = node._slot
+    start_fn = compile_expression(node.start)
+    end_fn = compile_expression(node.end)
+    step_fn = compile_expression(node.step) if hasattr(node, 'step') else _compile_constant(1)
+    body = compile_block(node.body)
+    # EXIT文を含まない本体は完了シグナルを判定しない
+    exits = contains_exit(node.body)
+    plan = bind_append_plan(node)
+    buffered = bool(plan.targets)
+    # 1回の反復で数えるステートメント数（ExecutionGuard.step）
+    cost = len(body) or 1
+
+    def for_loop(engine):
+        start = start_fn(engine)
+        end = end_fn(engine)
+        step = step_fn(engine)
+
+        # 数値に変換
+        to_number = engine.to_number
+        values = counter_values(to_number(start), to_number(end), to_number(step))
+
+        # ループ変数は解決済みの格納先に直接代入、文字列の追記はバッファに溜める
+        target, key = engine.variable_target(name, slot)
+        owned = open_builders(plan, engine) if buffered else ()
+        guard = engine.guard
+        try:
+            if exits:
+                for current in values:
+                    if guard is not None:
+                        guard.step(cost)
+                    target[key] = current
+                    for statement in body:
+                        signal = statement(engine)
+                        if signal.__class__ is Completion:
+                            # EXIT FORはこのループで終了、それ以外は外側に返す
+                            return None if signal is EXIT_FOR else signal
+            else:
+                for current in values:
+                    if guard is not None:
+                        guard.step(cost)
+                    target[key] = current
+                    for statement in body:
+                        statement(engine)
+        except LoopExit as e:
+            # 呼び出した関数の外に出たEXIT（例外で伝わる）
+            # 他のループタイプ（WHILE）のEXITは再スロー
+            if e.loop_type != 'FOR':
+                raise
+        finally:
+            if owned:
+                close_builders(owned, engine)
+    return for_loop
+
+
+def _compile_select_case(node: ASTNode) -> CompiledNode:
+    test_fn = compile_expression(node.test_expression)
+    find_case = bind_case_table(node).find
+    blocks = tuple(compile_block(case.statements) for case in node.cases)
+    else_block = compile_block(node.else_case) if node.else_case else ()
+
+    def select_case(engine):
+        # 最初にマッチしたCase（ジャンプテーブルで検索）、なければCase Else
+        index = find_case(engine, test_fn(engine))
+        return run_compiled_block(else_block if index is None else blocks[index], engine)
+    return select_case
+
+
+def _compile_return(node: ASTNode) -> CompiledNode:
+    value_node = getattr(node, 'value', None)
+    if not value_node:
+        def return_without_value(engine):
+            call_stack = engine.call_stack
+            if call_stack:
+                call_stack[-1]['return_value'] = 0
+            return 0
+        return return_without_value
+
+    value_fn = compile_expression(value_node)
+
+    def return_value(engine):
+        value = value_fn(engine)
+        call_stack = engine.call_stack
+        if call_stack:
+            call_stack[-1]['return_value'] = value
+        else:
+            # グローバルスコープでのRETURN（RETURN変数として扱う）
+            engine.variables['RETURN'] = value
+        return value
+    return return_value
+
+
+def _compile_exit(node: ASTNode) -> CompiledNode:
+    signal = EXIT_SIGNALS.get(node.exit_type.upper())
+    if signal is not None:
+        # 完了シグナルを返し、対応するループ・関数本体が脱出する
+        def exit_statement(engine):
+            return signal
+        return exit_statement
+    # 不明なEXIT文タイプはツリーウォーカーでエラーにする
+    return _delegate_statement(node)
+
+
+def _compile_hoist(node: ASTNode) -> CompiledNode:
+    """ループの外に移動した式の事前評価（script_optimizer.py参照）"""
+    value_fn = compile_expression(node.value)
+    name_upper = node._name or node.variable.upper()
+    slot = node._slot
+
+    def hoist(engine):
+        try:
+            value = value_fn(engine)
+        except Exception as e:
+            # 例外は元の位置（HOISTED）で送出する
+            value = HoistedResult(error=e)
+        else:
+            if isinstance(value, (list, dict, ScriptArray, GridArray)):
+                value = HoistedResult(value=value)
+        engine.store_variable(name_upper, slot, value)
+    return hoist
+
+
+def _compile_function_definition(node: ASTNode) -> CompiledNode:
+    def define_function(engine):
+        return engine.execute_function_definition(node)
+    return define_function
+
+
+_STATEMENT_BUILDERS = {
+    'FUNCTION_DEF': _compile_function_definition,
+    'ASSIGN': _compile_assign,
+    'ASSIGN_ARRAY': _compile_assign_array,
+    'ASSIGN_ARRAY_MULTI': _compile_assign_array_multi,
+    'SELECT_CASE': _compile_select_case,
+    'IF': _compile_if,
+    'WHILE': _compile_while,
+    'FOR': _compile_for,
+    'dim': _delegate_statement,
+    'REDIM_STMT': _delegate_statement,
+    'ARRAY_STMT': _delegate_statement,
+    'SPLIT_STMT': _delegate_statement,
+    'RETURN': _compile_return,
+    'EXIT': _compile_exit,
+    'HOIST': _compile_hoist,
+}
+
+
+# ======================================================================
+# 式
+# ======================================================================
+
+def _compile_literal(node: ASTNode) -> CompiledNode:
+    return _compile_constant(node.value)
+
+
+def _compile_variable(node: ASTNode) -> CompiledNode:
+    name_upper = node.name.upper()
+    if name_upper in SPECIAL_VARIABLES:
+        # 特殊変数は常にグローバルスコープから取得
+        def read_special_variable(engine):
+            return engine.variables.get(name_upper, 0)
+        return read_special_variable
+
+    slot = node._slot
+    if slot is not None and slot < 0:
+        def read_global_variable(engine):
+            return engine.variables.get(name_upper, 0)
+        return read_global_variable
+
+    if slot is not None:
+        def read_local_variable(engine):
+            value = engine.call_stack[-1]['frame'].values[slot]
+            if value is UNSET:
+                # 未代入のローカル変数は戻り値またはグローバル変数
+                return engine.get_variable(name_upper, 0)
+            return value
+        return read_local_variable
+
+    def read_variable(engine):
+        call_stack = engine.call_stack
+        if call_stack:
+            scope = call_stack[-1]
+            value = scope['frame'].load(name_upper)
+            if value is not UNSET:
+                return value
+            # 関数名（戻り値）をチェック
+            if name_upper == scope['function_name'].upper():
+                return scope.get('return_value', 0)
+        return engine.variables.get(name_upper, 0)
+    return read_variable
+
+
+def _compile_hoisted(node: ASTNode) -> CompiledNode:
+    name_upper = node._name or node.name.upper()
+    slot = node._slot
+    if slot is not None and slot >= 0:
+        def read_local_hoisted(engine):
+            value = engine.call_stack[-1]['frame'].values[slot]
+            if value.__class__ is HoistedResult:
+                return value.unwrap()
+            return value
+        return read_local_hoisted
+
+    def read_hoisted(engine):
+        value = engine.load_variable(name_upper, slot)
+        if value.__class__ is HoistedResult:
+            return value.unwrap()
+        return value
+    return read_hoisted
+
+
+def _compile_array_access(node: ASTNode) -> CompiledNode:
+    array_name = node.array.upper()
+    index_fn = compile_expression(node.index)
+
+    def read_array(engine):
+        index = int(index_fn(engine))
+        call_stack = engine.call_stack
+        if call_stack:
+            array_dict = call_stack[-1]['arrays'].get(array_name)
+            if array_dict is not None:
+                value = array_dict.get(index, MISSING)
+                if value is not MISSING:
+                    return value
+        array_dict = engine.arrays.get(array_name)
+        if array_dict is not None:
+            value = array_dict.get(index, MISSING)
+            if value is not MISSING:
+                return value
+        return 0
+    return read_array
+
+
+def _compile_binary_condition(node: ASTNode) -> CompiledNode:
+    """比較・論理演算を真偽値を返すクロージャにコンパイル"""
+    op = node.operator
+
+    if op == 'AND':
+        left, right = compile_condition(node.left), compile_condition(node.right)
+
+        def and_condition(engine):
+            # 左が偽なら右を評価しない（短絡評価）
+            return left(engine) and right(engine)
+        return and_condition
+
+    if op == 'OR':
+        left, right = compile_condition(node.left), compile_condition(node.right)
+
+        def or_condition(engine):
+            # 左が真なら右を評価しない（短絡評価）
+            return left(engine) or right(engine)
+        return or_condition
+
+    if op == 'EQ':
+        left, right = compile_expression(node.left), compile_expression(node.right)
+
+        def equal_condition(engine):
+            left_value = left(engine)
+            right_value = right(engine)
+            # 両方が文字列の場合、大文字小文字を区別しない比較
+            if isinstance(left_value, str) and isinstance(right_value, str):
+                return left_value.upper() == right_value.upper()
+            return bool(left_value == right_value)
+        return equal_condition
+
+    if op == 'NEQ':
+        left, right = compile_expression(node.left), compile_expression(node.right)
+
+        def not_equal_condition(engine):
+            left_value = left(engine)
+            right_value = right(engine)
+            if isinstance(left_value, str) and isinstance(right_value, str):
+                return left_value.upper() != right_value.upper()
+            return bool(left_value != right_value)
+        return not_equal_condition
+
+    compare = NUMERIC_COMPARISONS[op]
+    left, right = _compile_numeric_operand(node.left), _compile_numeric_operand(node.right)
+
+    def numeric_condition(engine):
+        left_value = left(engine)
+        right_value = right(engine)
+        if type(left_value) is not float:
+            left_value = engine.to_number(left_value)
+        if type(right_value) is not float:
+            right_value = engine.to_number(right_value)
+        return compare(left_value, right_value)
+    return numeric_condition
+
+
+def _compile_binary_op(node: ASTNode) -> CompiledNode:
+    op = node.operator
+
+    # 比較・論理演算（VBA準拠: 結果は数値 True=1.0, False=0.0）
+    if op in CONDITION_OPERATORS:
+        condition = _compile_binary_condition(node)
+
+        def condition_value(engine):
+            return 1.0 if condition(engine) else 0.0
+        return condition_value
+
+    if op == 'CONCAT':
+        left, right = compile_expression(node.left), compile_expression(node.right)
+
+        def concat(engine):
+            left_value = left(engine)
+            right_value = right(engine)
+            return engine.format_for_string(left_value) + engine.format_for_string(right_value)
+        return concat
+
+    left, right = _compile_numeric_operand(node.left), _compile_numeric_operand(node.right)
+
+    if op in ARITHMETIC_OPERATORS:
+        calculate = ARITHMETIC_OPERATORS[op]
+
+        def arithmetic(engine):
+            left_value = left(engine)
+            right_value = right(engine)
+            if type(left_value) is not float:
+                left_value = engine.to_number(left_value)
+            if type(right_value) is not float:
+                right_value = engine.to_number(right_value)
+            return calculate(left_value, right_value)
+        return arithmetic
+
+    if op in ('DIVIDE', 'MOD', 'INTDIV'):
+        error_key = 'error_zero_division_mod' if op == 'MOD' else 'error_zero_division'
+
+        def division(engine):
+            left_value = engine.to_number(left(engine))
+            right_value = engine.to_number(right(engine))
+            if right_value == 0:
+                raise RuntimeError(get_message(error_key, engine.locale))
+            if op == 'DIVIDE':
+                return left_value / right_value
+            if op == 'MOD':
+                return left_value % right_value
+            return int(left_value // right_value)
+        return division
+
+    # その他の演算子はエンジンの処理に任せる
+    def binary_op(engine):
+        return engine.evaluate_binary_op(op, left(engine), right(engine))
+    return binary_op
+
+
+def _compile_unary_op(node: ASTNode) -> CompiledNode:
+    op = node.operator
+    if op == 'NOT':
+        condition = compile_condition(node)
+
+        def not_value(engine):
+            # VBA準拠: 結果は数値（True=1.0, False=0.0）
+            return 1.0 if condition(engine) else 0.0
+        return not_value
+
+    operand = compile_expression(node.operand)
+    if op == 'MINUS':
+        def negate(engine):
+            return -engine.to_number(operand(engine))
+        return negate
+
+    def unary_op(engine):
+        return engine.evaluate_unary_op(op, operand(engine))
+    return unary_op
+
+
+def _compile_argument(arg: Any) -> CompiledNode:
+    """関数の引数を (値, 元の配列名) を返すクロージャにコンパイル"""
+    if isinstance(arg, ASTNode) and arg.type == 'ARRAY_VAR':
+        # 配列変数参照(ITEMS[]記法) - 配列の実体を引数として渡す
+        var_name = arg.name.upper()
+
+        def array_argument(engine):
+            call_stack = engine.call_stack
+            if call_stack:
+                arrays = call_stack[-1]['arrays']
+                if var_name in arrays:
+                    return arrays[var_name], var_name
+            if var_name in engine.arrays:
+                return engine.arrays[var_name], var_name
+            # 配列が存在しない場合は空の配列として渡す
+            return ScriptArray(), var_name
+        return array_argument
+
+    value_fn = compile_expression(arg)
+    if isinstance(arg, ASTNode) and arg.type == 'VARIABLE':
+        # 変数ノードの場合、配列かどうかをチェック(後方互換性用)
+        var_name = arg.name.upper()
+
+        def variable_argument(engine):
+            call_stack = engine.call_stack
+            if call_stack:
+                arrays = call_stack[-1]['arrays']
+                if var_name in arrays:
+                    return arrays[var_name], var_name
+            if var_name in engine.arrays:
+                return engine.arrays[var_name], var_name
+            return value_fn(engine), None
+        return variable_argument
+
+    def value_argument(engine):
+        return value_fn(engine), None
+    return value_argument
+
+
+def _compile_function_call(node: ASTNode) -> CompiledNode:
+    site = bind_call_site(node)
+    func_name = site.name
+    arg_nodes = node.arguments
+    index_fns = tuple(compile_expression(arg) for arg in arg_nodes)
+    argument_fns = tuple(_compile_argument(arg) for arg in arg_nodes)
+    is_split = site.kind == CALL_SPLIT
+
+    # 引数評価後の呼び出し処理（通常のビルトイン関数は関数オブジェクトを直接呼ぶ）
+    builtin = site.builtin
+    descriptor = site.descriptor
+    if site.kind == CALL_BUILTIN and COUNT_BUILTIN_CALLS:
+        def call(engine, args, arg_names):
+            engine.builtin_calls[func_name] += 1
+            try:
+                return builtin(*args)
+            except Exception as e:
+                raise engine.builtin_call_error(func_name, e)
+    elif site.kind == CALL_BUILTIN:
+        def call(engine, args, arg_names):
+            try:
+                return builtin(*args)
+            except Exception as e:
+                raise engine.builtin_call_error(func_name, e)
+    elif site.kind == CALL_ADAPTER:
+        def call(engine, args, arg_names):
+            return engine.call_builtin(descriptor, args)
+    else:
+        def call(engine, args, arg_names):
+            return engine.call_function(node, func_name, args, arg_names)
+
+    def read_array_element(engine):
+        if len(index_fns) == 1:
+            # 1次元配列アクセス
+            key = int(index_fns[0](engine))
+        else:
+            # 多次元配列アクセス
+            key = tuple(int(index_fn(engine)) for index_fn in index_fns)
+        call_stack = engine.call_stack
+        if call_stack:
+            local_array = call_stack[-1]['arrays'].get(func_name)
+            if local_array is not None:
+                value = local_array.get(key, MISSING)
+                if value is not MISSING:
+                    return value
+        global_array = engine.arrays.get(func_name)
+        if global_array is not None:
+            value = global_array.get(key, MISSING)
+            if value is not MISSING:
+                return value
+        # インデックスが範囲外の場合は0を返す
+        return 0
+
+    def function_call(engine):
+        # 配列が定義されている場合は配列アクセスとして処理
+        call_stack = engine.call_stack
+        if (call_stack and func_name in call_stack[-1]['arrays']) or func_name in engine.arrays:
+            return read_array_element(engine)
+
+        # SPLIT関数の特別処理(第1引数は配列名として扱う)
+        if is_split:
+            return engine.evaluate_expression(node)
+
+        args = []
+        arg_names = []  # 配列名を追跡
+        for argument_fn in argument_fns:
+            value, arg_name = argument_fn(engine)
+            args.append(value)
+            arg_names.append(arg_name)
+
+        # ユーザー定義関数を最優先でチェック
+        if func_name in engine.user_functions:
+            return engine.execute_user_function(func_name, args, arg_names)
+        return call(engine, args, arg_names)
+    return function_call
+
+
+_EXPRESSION_BUILDERS = {
+    'LITERAL': _compile_literal,
+    'VARIABLE': _compile_variable,
+    'HOISTED': _compile_hoisted,
+    'ARRAY_ACCESS': _compile_array_access,
+    'BINARY_OP': _compile_binary_op,
+    'UNARY_OP': _compile_unary_op,
+    'FUNCTION_CALL': _compile_function_call,
+}
@@ -0,0 +1,124 @@
+"""
+制御フロー用の完了シグナルと例外クラス
+EXIT FUNCTION / EXIT FOR / EXIT WHILE をScriptEngineとScriptCompilerで共有する
+
+- ステートメントは EXIT 文に到達すると完了シグナル（EXIT_FOR / EXIT_WHILE / EXIT_FUNCTION）を
+  戻り値として返し、IF・SELECT CASE はそのまま呼び出し元に返す。
+  対応するループ・関数本体が戻り値を判定して脱出する（例外の送出・捕捉を伴わない）
+- 関数本体の外に出るシグナル（ループ外の EXIT FOR など）だけは従来どおり
+  LoopExit / FunctionExit を送出する（呼び出し元のループで捕捉される）
+- counter_values: FOR文のループ変数が取る値の列（3つの実行方式で共有）
+"""
+
+import math
+from typing import Any, Iterable, Iterator
+
+try:
+    from .script_parser import ASTNode
+except ImportError:
+    from script_parser import ASTNode
+
+
+class ControlFlowExit(Exception):
+    """
+    制御フロー脱出の基底クラス
+    Base class for control flow exit (EXIT FUNCTION/FOR/WHILE)
+    """
+    pass
+
+
+class FunctionExit(ControlFlowExit):
+    """
+    EXIT FUNCTION用例外クラス
+    Exception for EXIT FUNCTION statement
+    """
+    pass
+
+
+class LoopExit(ControlFlowExit):
+    """
+    EXIT FOR / EXIT WHILE用例外クラス
+    Exception for EXIT FOR and EXIT WHILE statements
+
+    Attributes:
+        loop_type: "FOR" or "WHILE"
+    """
+    def __init__(self, loop_type: str):
+        self.loop_type = loop_type.upper()
+        super().__init__()
+
+
+class Completion:
+    """
+    ステートメントの完了シグナル（EXIT文による脱出）
+    Completion signal returned by a statement that reached an EXIT
+
+    Attributes:
+        exit_type: "FOR", "WHILE" or "FUNCTION"
+    """
+    __slots__ = ('exit_type',)
+
+    def __init__(self, exit_type: str):
+        self.exit_type = exit_type
+
+    def to_exception(self) -> ControlFlowExit:
+        """シグナルが関数本体の外に出る場合に送出する例外"""
+        if self.exit_type == 'FUNCTION':
+            return FunctionExit()
+        return LoopExit(self.exit_type)
+
+    def __repr__(self) -> str:
+        return f"EXIT_{self.exit_type}"
+
+
+EXIT_FOR = Completion('FOR')
+EXIT_WHILE = Completion('WHILE')
+EXIT_FUNCTION = Completion('FUNCTION')
+
+# EXIT文の種類 → 完了シグナル
+EXIT_SIGNALS = {'FOR': EXIT_FOR, 'WHILE': EXIT_WHILE, 'FUNCTION': EXIT_FUNCTION}
+
+
+def contains_exit(value: Any) -> bool:
+    """
+    ステートメント（の並び）がEXIT文を含むか（含まないブロックは完了シグナルの判定を省ける）
+
+    入れ子の関数定義の本体は対象外（定義時には実行されないため）
+    """
+    if isinstance(value, ASTNode):
+        if value.type == 'EXIT':
+            return True
+        if value.type == 'FUNCTION_DEF':
+            return False
+        return any(contains_exit(attr) for key, attr in list(vars(value).items()) if not key.startswith('_'))
+    if isinstance(value, (list, tuple)):
+        return any(contains_exit(item) for item in value)
+    return False
+
+
+def counter_values(start: float, end: float, step: float) -> Iterable[float]:
+    """
+    FOR文のループ変数が取る値の列（start, end, step は数値変換済み、endとstepはループ開始時に確定）
+
+    start と step が整数値の場合は range による整数演算で列挙する（ループ本体がPythonの
+    比較・加算を経由せず、2**53 を超える値でも加算の丸めで値がずれたりループが止まったりしない）。
+    それ以外は従来どおり step を累積加算する（STEP 0 で start >= end の場合は無限ループ）
+    """
+    # -0.0 は range で 0.0 になるため累積加算に任せる
+    if step and start.is_integer() and step.is_integer() and math.isfinite(end) \
+            and (start or math.copysign(1.0, start) > 0):
+        stride = int(step)
+        stop = math.floor(end) + 1 if stride > 0 else math.ceil(end) - 1
+        return map(float, range(int(start), stop, stride))
+    return _accumulate(start, end, step)
+
+
+def _accumulate(current: float, end: float, step: float) -> Iterator[float]:
+    if step > 0:
+        while current <= end:
+            yield current
+            current += step
+    else:
+        while current >= end:
+            yield current
+            current += step
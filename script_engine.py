@@ -3,62 +3,136 @@
 パースされたASTを実行する
 """
 
+import logging
+import os
+import re
+from collections import Counter
 from typing import Any, Dict, Optional, Union, List
-import itertools
 
 try:
     from .script_parser import ScriptParser, ASTNode
+    from .script_cache import get_ast_cache
+    from .script_control_flow import FunctionExit, LoopExit, Completion, EXIT_FOR, EXIT_WHILE, EXIT_FUNCTION, EXIT_SIGNALS, counter_values
+    from .script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT, ARG_ARRAY_VAR, ARG_VARIABLE
+    from .script_select_case import bind_case_table, numeric_key
+    from .script_string_builder import bind_append_plan, open_builders, close_builders
+    from .script_function_cache import FunctionCache, analyze_function, bind_function_cache, impure_error, memo_key
+    from .script_cancellation import ExecutionGuard, ScriptCancelled
+    from .script_array import ScriptArray, GridArray, MISSING
+    from .functions.math_functions import RandomState
+    from .functions.http_functions import HttpState
+    from .script_metrics import COUNT_BUILTIN_CALLS
+    from .script_resolver import SPECIAL_VARIABLES, RETURN_SLOT, UNSET, FrameLayout, get_frame_layout
+    from .script_compiler import compile_block, compile_function_body, run_compiled_block
+    from .script_transpiler import transpile_block, transpile_function_body
+    from .script_optimizer import ASTOptimizer, HoistedResult, evaluate_hoisted, HOIST_VARIABLE_PREFIX
+    from .script_logging import get_logger, log_message
     from .builtin_functions import (
-        get_builtin_function,
         is_builtin_function,
         get_function_usage,
         BuiltinFunctions,
-        BUILTIN_FUNCTIONS
+        BuiltinDescriptor,
+        BUILTIN_FUNCTIONS,
+        BUILTIN_DESCRIPTORS
     )
     from .locales import get_message
 except ImportError:
     from script_parser import ScriptParser, ASTNode
+    from script_cache import get_ast_cache
+    from script_control_flow import FunctionExit, LoopExit, Completion, EXIT_FOR, EXIT_WHILE, EXIT_FUNCTION, EXIT_SIGNALS, counter_values
+    from script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT, ARG_ARRAY_VAR, ARG_VARIABLE
+    from script_select_case import bind_case_table, numeric_key
+    from script_string_builder import bind_append_plan, open_builders, close_builders
+    from script_function_cache import FunctionCache, analyze_function, bind_function_cache, impure_error, memo_key
+    from script_cancellation import ExecutionGuard, ScriptCancelled
+    from script_array import ScriptArray, GridArray, MISSING
+    from functions.math_functions import RandomState
+    from functions.http_functions import HttpState
+    from script_metrics import COUNT_BUILTIN_CALLS
+    from script_resolver import SPECIAL_VARIABLES, RETURN_SLOT, UNSET, FrameLayout, get_frame_layout
+    from script_compiler import compile_block, compile_function_body, run_compiled_block
+    from script_transpiler import transpile_block, transpile_function_body
+    from script_optimizer import ASTOptimizer, HoistedResult, evaluate_hoisted, HOIST_VARIABLE_PREFIX
+    from script_logging import get_logger, log_message
     from builtin_functions import (
-        get_builtin_function,
         is_builtin_function,
         get_function_usage,
         BuiltinFunctions,
-        BUILTIN_FUNCTIONS
+        BuiltinDescriptor,
+        BUILTIN_FUNCTIONS,
+        BUILTIN_DESCRIPTORS
     )
     from locales import get_message
 
 
-# ======================================================================
-# EXIT statement exception classes
-# ======================================================================
+# 実行モード
+# - interpreter: ASTをそのまま辿って実行するツリーウォーカー（デフォルト）
+# - compiled: ASTをノード種別ごとのクロージャに変換してから実行（script_compiler.py）
+# - transpiled: ASTをPythonソースに変換し compile() した関数で実行（script_transpiler.py）
+EXECUTION_MODES = ('interpreter', 'compiled', 'transpiled')
 
-class ControlFlowExit(Exception):
-    """
-    制御フロー脱出の基底クラス
-    Base class for control flow exit (EXIT FUNCTION/FOR/WHILE)
-    """
-    pass
+# ノード・ワーカープロセスのエンジンの実行モード（環境変数 EASYSCRIPTER_ENGINE_MODE、既定 interpreter）
+ENV_ENGINE_MODE = 'EASYSCRIPTER_ENGINE_MODE'
+# スクリプトごとの実行モードのディレクティブ（' @MODE transpiled のコメント行、環境変数より優先）
+MODE_DIRECTIVE = re.compile(r"^\s*'\s+@MODE\s+(\w+)", re.IGNORECASE | re.MULTILINE)
+# AST最適化（環境変数 EASYSCRIPTER_OPTIMIZE=1、またはスクリプトの ' @OPTIMIZE / ' @OPTIMIZE OFF のコメント行）
+ENV_OPTIMIZE = 'EASYSCRIPTER_OPTIMIZE'
+OPTIMIZE_DIRECTIVE = re.compile(r"^\s*'\s+@OPTIMIZE\b(?:[ \t]+(\w+))?", re.IGNORECASE | re.MULTILINE)
+_TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+logger = get_logger('engine')
 
 
-class FunctionExit(ControlFlowExit):
+def _read_engine_mode(script: Optional[str], locale: str) -> str:
     """
-    EXIT FUNCTION用例外クラス
-    Exception for EXIT FUNCTION statement
+    ' @MODE ディレクティブ、なければ環境変数から実行モードを読み取る
+    （未設定は interpreter、不正な値は警告して無視する）
     """
-    pass
+    candidates = []
+    if script and '@' in script:
+        match = MODE_DIRECTIVE.search(script)
+        if match:
+            candidates.append(match.group(1))
+    candidates.append(os.environ.get(ENV_ENGINE_MODE, ''))
+    for value in candidates:
+        value = value.strip().lower()
+        if not value:
+            continue
+        if value in EXECUTION_MODES:
+            return value
+        log_message(logger, logging.WARNING, 'engine_mode_ignored', locale, value, ", ".join(EXECUTION_MODES))
+    return EXECUTION_MODES[0]
+
 
+def _read_optimize(script: Optional[str]) -> bool:
+    """' @OPTIMIZE ディレクティブ（値なしは有効）、なければ環境変数からAST最適化の有無を読み取る"""
+    if script and '@' in script:
+        match = OPTIMIZE_DIRECTIVE.search(script)
+        if match:
+            return match.group(1) is None or match.group(1).lower() in _TRUE_VALUES
+    return os.environ.get(ENV_OPTIMIZE, '').strip().lower() in _TRUE_VALUES
 
-class LoopExit(ControlFlowExit):
+
+def engine_options(script: Optional[str], locale: str = 'ja') -> Dict[str, Any]:
     """
-    EXIT FOR / EXIT WHILE用例外クラス
-    Exception for EXIT FOR and EXIT WHILE statements
+    ノード・ワーカープロセスで作成する ScriptEngine のキーワード引数（実行モード・AST最適化）
 
-    Attributes:
-        loop_type: "FOR" or "WHILE"
+    使用方法:
+        engine = ScriptEngine(locale=locale, **engine_options(script, locale))
     """
-    def __init__(self, loop_type: str):
-        self.loop_type = loop_type.upper()
-        super().__init__()
+    return {'mode': _read_engine_mode(script, locale), 'optimize': _read_optimize(script)}
+
+
+class _VariableStore:
+    """store_variable を container[key] = value の形で呼び出す格納先（ScriptEngine.variable_target参照）"""
+    __slots__ = ('engine', 'slot')
+
+    def __init__(self, engine: 'ScriptEngine', slot: Optional[int]):
+        self.engine = engine
+        self.slot = slot
+
+    def __setitem__(self, name: str, value: Any):
+        self.engine.store_variable(name, self.slot, value)
 
 
 # ======================================================================
@@ -68,12 +142,30 @@ class LoopExit(ControlFlowExit):
 class ScriptEngine:
     """VBA風スクリプトの実行エンジン"""
 
-    def __init__(self, locale: str = 'ja'):
+    def __init__(self, locale: str = 'ja', mode: str = 'interpreter', optimize: bool = False):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(get_message('error_invalid_engine_mode', locale, mode, ", ".join(EXECUTION_MODES)))
         self.locale = locale  # デフォルトで日本語
+        self.mode = mode  # 実行モード（EXECUTION_MODES参照）
+        # AST最適化（定数畳み込み・不要分岐の除去・ループ不変式の巻き上げ。script_optimizer.py）
+        self.optimizer: Optional[ASTOptimizer] = ASTOptimizer(self) if optimize else None
         self.variables: Dict[str, Any] = {}
-        self.arrays: Dict[str, Dict[int, Any]] = {}
+        self.arrays: Dict[str, Any] = {}  # 配列名 → ScriptArray（多次元配列はGridArray）
         self.user_functions: Dict[str, Any] = {}  # ユーザー定義関数を保持
         self.call_stack: List[Dict[str, Any]] = []  # 関数呼び出しスタック
+        # 実行中のループで追記をバッファリングしている文字列変数 → 部分のリスト（script_string_builder.py）
+        self.string_builders: Dict[str, List[str]] = {}
+        # CACHED関数の名前 → 引数ごとの戻り値（script_function_cache.py）
+        self.function_caches: Dict[str, FunctionCache] = {}
+        # キャンセル・実行予算の監視（script_cancellation.py、Noneの場合は無制限）
+        self.guard: Optional[ExecutionGuard] = None
+        # 行・関数単位のプロファイラ（script_profiler.py の attach() が設定）
+        self.profiler = None
+        # エンジンごとの乱数（RANDOMIZEのシード）とHTTPレスポンス情報（並行実行中のスクリプトと共有しない）
+        self.random_state = RandomState()
+        self.http_state = HttpState()
+        # ビルトイン関数名 → 呼び出し回数（EASYSCRIPTER_COUNT_BUILTINS 有効時のみ。PRINTなどエンジンが直接扱う関数は除く）
+        self.builtin_calls: Counter = Counter()
         self.max_call_depth = 100  # 最大呼び出し深度（無限再帰防止）
         self.parser = ScriptParser(locale=self.locale)
         self.print_stack: List[str] = []  # PRINT関数の出力スタック
@@ -94,9 +186,14 @@ class ScriptEngine:
         self.arrays.clear()
         self.user_functions.clear()
         self.call_stack.clear()
+        self.string_builders.clear()
+        self.function_caches.clear()
         self.print_stack.clear()
         self.return1_assigned = False
         self.return2_assigned = False
+        self.random_state = RandomState()
+        self.http_state = HttpState()
+        self.builtin_calls.clear()
 
     def set_variable(self, name: str, value: Any):
         """変数を設定（スコープ対応）"""
@@ -114,9 +211,9 @@ class ScriptEngine:
         elif name_upper == 'RETURN2':
             self.return2_assigned = True
 
-        # 値がリストの場合は辞書型配列に変換
+        # 値がリストの場合は配列に変換
         if isinstance(value, list):
-            array_dict = {i: v for i, v in enumerate(value)}
+            array_dict = ScriptArray(value)
             # 現在のスコープを取得
             current_scope = self.get_current_scope()
             if current_scope:
@@ -126,7 +223,7 @@ class ScriptEngine:
             return
 
         # 値が配列オブジェクトの場合は配列として設定
-        if isinstance(value, dict) and all(isinstance(k, int) for k in value.keys()):
+        if value.__class__ is ScriptArray or (isinstance(value, dict) and all(isinstance(k, int) for k in value.keys())):
             # 現在のスコープを取得
             current_scope = self.get_current_scope()
             if current_scope:
@@ -141,32 +238,85 @@ class ScriptEngine:
             # 関数内の場合、関数名への代入をチェック（戻り値設定）
             if name_upper == current_scope['function_name'].upper():
                 current_scope['return_value'] = value
-            # ローカルスコープに設定
-            current_scope['variables'][name_upper] = value
+            # ローカルスコープ（変数フレーム）に設定
+            current_scope['frame'].store(name_upper, value)
         else:
             # グローバルスコープに設定
             self.variables[name_upper] = value
 
+    def store_variable(self, name: str, slot: Optional[int], value: Any):
+        """
+        リゾルバーで解決済みの変数に代入（script_resolver.py参照）
+
+        Args:
+            name: 大文字化済みの変数名
+            slot: スロット番号（-1はグローバル、Noneは未解決で set_variable と同じ処理）
+            value: 代入する値
+        """
+        if slot is None or isinstance(value, (list, dict, ScriptArray, GridArray)):
+            self.set_variable(name, value)
+        elif slot < 0:
+            self.variables[name] = value
+        else:
+            scope = self.call_stack[-1]
+            # 関数名への代入は戻り値の設定
+            if slot == RETURN_SLOT:
+                scope['return_value'] = value
+            scope['frame'].values[slot] = value
+
+    def variable_target(self, name: str, slot: Optional[int]):
+        """
+        数値を繰り返し代入する変数（FOR文のループ変数）の格納先 (container, key) を返す
+
+        container[key] = value は store_variable(name, slot, value) と同じ結果になる（valueは数値のみ）。
+        ローカル変数は現在のフレームのスロット、グローバル変数は変数辞書に直接書き込む
+
+        Args:
+            name: 大文字化済みの変数名
+            slot: スロット番号（store_variable と同じ）
+        """
+        if slot is None or slot == RETURN_SLOT:
+            # RETURN系の変数・関数名（戻り値）は連動する値があるため汎用処理
+            return _VariableStore(self, slot), name
+        if slot < 0:
+            return self.variables, name
+        return self.call_stack[-1]['frame'].values, slot
+
+    def load_variable(self, name: str, slot: Optional[int]) -> Any:
+        """
+        リゾルバーで解決済みの変数を取得（未代入の場合は0）
+
+        Args:
+            name: 大文字化済みの変数名
+            slot: スロット番号（-1はグローバル、Noneは未解決で get_variable と同じ処理）
+        """
+        if slot is None:
+            return self.get_variable(name, 0)
+        if slot < 0:
+            return self.variables.get(name, 0)
+        value = self.call_stack[-1]['frame'].values[slot]
+        if value is UNSET:
+            # 未代入のローカル変数は戻り値またはグローバル変数
+            return self.get_variable(name, 0)
+        return value
+
     def get_variable(self, name: str, default: Any = None) -> Any:
         """変数を取得（スコープ対応）"""
         name_upper = name.upper()
 
         # 特殊変数（RETURN, VAL1, VAL2, TXT1, TXT2）は常にグローバルスコープから取得
         # これにより、PRINT関数内で特殊変数を参照した際に正しい値が取得できる
-        special_vars = ['RETURN', 'VAL1', 'VAL2', 'VAL_1', 'VAL_2', 'TXT1', 'TXT2']
-        if name_upper in special_vars:
+        if name_upper in SPECIAL_VARIABLES:
             value = self.variables.get(name_upper, default if default is not None else 0)
             return value
 
         # 現在のスコープから検索
         current_scope = self.get_current_scope()
         if current_scope:
-            # ローカル変数をチェック
-            if name_upper in current_scope['variables']:
-                return current_scope['variables'][name_upper]
-            # パラメータをチェック
-            if name_upper in current_scope['parameters']:
-                return current_scope['parameters'][name_upper]
+            # ローカル変数・パラメータをチェック
+            value = current_scope['frame'].load(name_upper)
+            if value is not UNSET:
+                return value
             # 関数名（戻り値）をチェック
             if name_upper == current_scope['function_name'].upper():
                 return current_scope.get('return_value', 0)
@@ -186,16 +336,18 @@ class ScriptEngine:
         """PRINT関数の出力をスタックに追加"""
         self.print_stack.append(message)
 
-    def push_scope(self, function_name: str, parameters: Dict[str, Any], parameter_arrays: Dict[str, Dict] = None, array_mappings: Dict[str, str] = None):
-        """新しいスコープをプッシュ"""
+    def push_scope(self, function_name: str, parameters: Dict[str, Any], parameter_arrays: Dict[str, Dict] = None, array_mappings: Dict[str, str] = None,
+                   layout: FrameLayout = None):
+        """新しいスコープをプッシュ（layoutは関数のスロット割り当て。省略時はパラメータのみ）"""
         if len(self.call_stack) >= self.max_call_depth:
             raise RuntimeError(get_message('error_max_call_depth', self.locale, self.max_call_depth))
 
+        if layout is None:
+            layout = FrameLayout(function_name, parameters.keys())
         scope = {
             'function_name': function_name,
-            'variables': {},
+            'frame': layout.new_frame(parameters),  # ローカル変数とパラメータ
             'arrays': parameter_arrays.copy() if parameter_arrays else {},
-            'parameters': parameters.copy(),
             'array_mappings': array_mappings.copy() if array_mappings else {},
             'return_value': ""  # EasyScripter仕様: 未設定の関数戻り値は空文字列
         }
@@ -212,21 +364,29 @@ class ScriptEngine:
                     if param_name in scope['arrays']:
                         # 関数内で変更された配列を元の配列に反映
                         original_name_upper = original_name.upper()
+                        param_array = scope['arrays'][param_name]
 
                         # 現在のスコープ(呼び出し元)を確認
                         parent_scope = self.get_current_scope()
                         if parent_scope and original_name_upper in parent_scope['arrays']:
-                            # 親スコープの配列に反映
-                            parent_scope['arrays'][original_name_upper].update(scope['arrays'][param_name])
+                            original_array = parent_scope['arrays'][original_name_upper]
                         elif original_name_upper in self.arrays:
-                            # グローバル配列に反映
-                            self.arrays[original_name_upper].update(scope['arrays'][param_name])
+                            original_array = self.arrays[original_name_upper]
+                        else:
+                            original_array = None
+
+                        if original_array is not None:
+                            # 親スコープまたはグローバルの配列に反映
+                            # （要素を共有したまま＝どちらも変更されていない場合は反映しても同じ内容）
+                            if not (isinstance(param_array, (ScriptArray, GridArray))
+                                    and param_array.is_shared_with(original_array)):
+                                original_array.update(param_array)
                         else:
                             # 配列が存在しない場合、新しく作成
                             if parent_scope:
-                                parent_scope['arrays'][original_name_upper] = scope['arrays'][param_name].copy()
+                                parent_scope['arrays'][original_name_upper] = param_array.copy()
                             else:
-                                self.arrays[original_name_upper] = scope['arrays'][param_name].copy()
+                                self.arrays[original_name_upper] = param_array.copy()
 
             return scope.get('return_value', "")  # EasyScripter仕様: 未設定の関数戻り値は空文字列
         return ""  # EasyScripter仕様: 未設定の関数戻り値は空文字列
@@ -257,6 +417,13 @@ class ScriptEngine:
             array_dict = self.arrays[array_name_upper]
 
         if array_dict:
+            if array_dict.__class__ is ScriptArray and array_dict.cells is not None:
+                # 1次元配列（連続領域）はO(1)
+                return float(array_dict.upper_bound()) if dimension == 1 else -1.0
+            if array_dict.__class__ is GridArray and array_dict.cells is not None:
+                # 多次元配列も各次元の要素数からO(1)
+                upper = array_dict.upper_bound(dimension)
+                return float(upper) if upper is not None else -1.0
             if not array_dict:
                 return -1.0  # 空配列
 
@@ -299,6 +466,11 @@ class ScriptEngine:
             array_dict = self.arrays[array_name_upper]
 
         if array_dict:
+            if array_dict.__class__ is ScriptArray and array_dict.cells is not None:
+                return float(array_dict.lower_bound()) if dimension == 1 else 0.0
+            if array_dict.__class__ is GridArray and array_dict.cells is not None:
+                lower = array_dict.lower_bound(dimension)
+                return float(lower) if lower is not None else 0.0
             if not array_dict:
                 return 0.0  # 空配列でも0を返す
 
@@ -339,14 +511,10 @@ class ScriptEngine:
         # 配列に格納（0ベースインデックス）
         if current_scope:
             # 関数内の場合、ローカルスコープに配列を作成
-            current_scope['arrays'][array_name] = {}
-            for i, part in enumerate(parts):
-                current_scope['arrays'][array_name][i] = part
+            current_scope['arrays'][array_name] = ScriptArray(parts)
         else:
             # グローバルスコープに配列を作成
-            self.arrays[array_name] = {}
-            for i, part in enumerate(parts):
-                self.arrays[array_name][i] = part
+            self.arrays[array_name] = ScriptArray(parts)
 
         # 要素数を返す
         return float(len(parts))
@@ -361,13 +529,33 @@ class ScriptEngine:
                 'ANY_INPUT': self.variables.get('ANY_INPUT')
             }
 
-            ast = self.parser.parse(script)
-            for statement in ast:
-                self.execute_statement(statement)
+            # パース済みASTはプロセス共通キャッシュから取得（同一スクリプトは再パースしない）
+            ast = get_ast_cache().get_or_parse(script, self.parser, self.optimizer)
+            if self.guard is not None:
+                self.guard.start()
+            if self.mode == 'compiled':
+                # クロージャに変換済みのステートメントを順に呼び出す
+                signal = run_compiled_block(compile_block(ast), self)
+            elif self.mode == 'transpiled':
+                # Pythonソースに変換・compile()済みのステートメントを順に呼び出す
+                signal = run_compiled_block(transpile_block(ast), self)
+            else:
+                signal = self.execute_block(ast)
+            if signal is not None:
+                # ループ・関数の外のEXIT文は従来どおり例外（実行エラー）にする
+                raise signal.to_exception()
             # RETURNまたはRETURN_VALUEの値を返す
             return self.variables.get('RETURN', self.variables.get('RETURN_VALUE', None))
+        except ScriptCancelled:
+            # キャンセル・予算超過は呼び出し元（実行キュー）が区別できるようにそのまま送出
+            raise
         except Exception as e:
             raise RuntimeError(get_message('error_script_execution', self.locale, str(e)))
+        finally:
+            if self.optimizer is not None:
+                # 巻き上げ用の隠し変数は次回の実行や変数の参照元に残さない
+                for name in [name for name in self.variables if name.startswith(HOIST_VARIABLE_PREFIX)]:
+                    del self.variables[name]
 
     def execute_statement(self, node: ASTNode) -> Any:
         """ステートメントを実行"""
@@ -377,15 +565,28 @@ class ScriptEngine:
 
         elif node.type == 'ASSIGN':
             # 変数代入（スコープ対応）
+            var_name = node._name or node.variable.upper()  # 変数名を大文字化
+            if node._append is not None:
+                parts = self.string_builders.get(var_name)
+                if parts is not None:
+                    # ループ内の文字列の追記はバッファに溜める（script_string_builder.py参照）
+                    variable, expressions = node._append
+                    if not parts:
+                        head = self.format_for_string(self.evaluate_expression(variable))
+                    values = [self.format_for_string(self.evaluate_expression(expression)) for expression in expressions]
+                    if not parts:
+                        parts.append(head)
+                    parts.extend(values)
+                    return None
+
             value = self.evaluate_expression(node.value)
-            var_name = node.variable.upper()  # 変数名を大文字化
 
             # RELAY_OUTPUT変数への代入を検出（Tier 3実装）
             if var_name == "RELAY_OUTPUT":
                 self.relay_output_assigned = True
                 self.relay_output_value = value
 
-            self.set_variable(node.variable, value)
+            self.store_variable(var_name, node._slot, value)
             return value
 
         elif node.type == 'ASSIGN_ARRAY':
@@ -399,12 +600,12 @@ class ScriptEngine:
             if current_scope:
                 # 関数内の場合、ローカルスコープの配列に設定
                 if array_name not in current_scope['arrays']:
-                    current_scope['arrays'][array_name] = {}
+                    current_scope['arrays'][array_name] = ScriptArray()
                 current_scope['arrays'][array_name][index] = value
             else:
                 # グローバルスコープに設定
                 if array_name not in self.arrays:
-                    self.arrays[array_name] = {}
+                    self.arrays[array_name] = ScriptArray()
                 self.arrays[array_name][index] = value
             return value
 
@@ -437,41 +638,52 @@ class ScriptEngine:
             condition = self.evaluate_expression(node.condition)
             if self.is_true(condition):
                 # IF条件が真の場合
-                for stmt in node.then_branch:
-                    self.execute_statement(stmt)
+                branch = node.then_branch
             else:
+                # ELSE句の実行（ELSEIF句が実行されなかった場合のみ）
+                branch = node.else_branch
                 # ELSEIF条件の順次評価
-                executed = False
                 if hasattr(node, 'elseif_branches') and node.elseif_branches:
                     for elseif_condition, elseif_statements in node.elseif_branches:
                         if self.is_true(self.evaluate_expression(elseif_condition)):
-                            for stmt in elseif_statements:
-                                self.execute_statement(stmt)
-                            executed = True
+                            branch = elseif_statements
                             break  # 最初に真になったELSEIF句のみ実行
-
-                # ELSE句の実行（ELSEIF句が実行されなかった場合のみ）
-                if not executed and node.else_branch:
-                    for stmt in node.else_branch:
-                        self.execute_statement(stmt)
+            # EXIT文の完了シグナルは外側のループ・関数に返す
+            for stmt in branch or ():
+                signal = self.execute_statement(stmt)
+                if signal.__class__ is Completion:
+                    return signal
 
         elif node.type == 'WHILE':
-            # WHILE文
+            # WHILE文（ループ内の文字列の追記はバッファに溜める）
+            plan = bind_append_plan(node)
+            owned = open_builders(plan, self) if plan.targets else ()
+            guard = self.guard
             try:
                 while self.is_true(self.evaluate_expression(node.condition)):
+                    if guard is not None:
+                        guard.step(len(node.body) or 1)
                     for stmt in node.body:
-                        self.execute_statement(stmt)
+                        signal = self.execute_statement(stmt)
+                        if signal.__class__ is Completion:
+                            # EXIT WHILEはこのループで終了、それ以外（EXIT FOR/FUNCTION）は外側に返す
+                            return None if signal is EXIT_WHILE else signal
             except LoopExit as e:
+                # 呼び出した関数の外に出たEXIT（例外で伝わる）
                 # EXIT WHILE処理
                 if e.loop_type == 'WHILE':
                     pass  # ループを正常終了
                 else:
                     # 他のループタイプ（FOR）のEXITは再スロー
                     raise
+            finally:
+                if owned:
+                    close_builders(owned, self)
 
         elif node.type == 'FOR':
             # FOR文（ループ変数も大文字小文字を区別しない）
-            var_name = node.variable.upper()
+            var_name = node._name or node.variable.upper()
+            var_slot = node._slot
             start = self.evaluate_expression(node.start)
             end = self.evaluate_expression(node.end)
             step = self.evaluate_expression(node.step) if hasattr(node, 'step') else 1
@@ -481,28 +693,34 @@ class ScriptEngine:
             end = self.to_number(end)
             step = self.to_number(step)
 
-            # ループ実行
-            current = start
+            # ループ実行（ループ変数は解決済みの格納先に直接代入、文字列の追記はバッファに溜める）
+            target, key = self.variable_target(var_name, var_slot)
+            body = node.body or ()
+            execute_statement = self.execute_statement
+            plan = bind_append_plan(node)
+            owned = open_builders(plan, self) if plan.targets else ()
+            guard = self.guard
             try:
-                if step > 0:
-                    while current <= end:
-                        self.set_variable(var_name, current)
-                        for stmt in node.body:
-                            self.execute_statement(stmt)
-                        current += step
-                else:
-                    while current >= end:
-                        self.set_variable(var_name, current)
-                        for stmt in node.body:
-                            self.execute_statement(stmt)
-                        current += step
+                for current in counter_values(start, end, step):
+                    if guard is not None:
+                        guard.step(len(body) or 1)
+                    target[key] = current
+                    for stmt in body:
+                        signal = execute_statement(stmt)
+                        if signal.__class__ is Completion:
+                            # EXIT FORはこのループで終了、それ以外（EXIT WHILE/FUNCTION）は外側に返す
+                            return None if signal is EXIT_FOR else signal
             except LoopExit as e:
+                # 呼び出した関数の外に出たEXIT（例外で伝わる）
                 # EXIT FOR処理
                 if e.loop_type == 'FOR':
                     pass  # ループを正常終了
                 else:
                     # 他のループタイプ（WHILE）のEXITは再スロー
                     raise
+            finally:
+                if owned:
+                    close_builders(owned, self)
 
         elif node.type == 'dim':
             # DIM文（配列宣言）
@@ -515,19 +733,15 @@ class ScriptEngine:
                     # 配列を初期化（0ベースインデックス）
                     scope = self.get_current_scope()
                     if scope:
-                        scope['arrays'][array_name] = {i: 0 for i in range(size + 1)}
+                        scope['arrays'][array_name] = ScriptArray.filled(size + 1)
                     else:
-                        self.arrays[array_name] = {i: 0 for i in range(size + 1)}
+                        self.arrays[array_name] = ScriptArray.filled(size + 1)
                 else:
                     # 多次元配列
                     sizes = [int(self.evaluate_expression(s)) for s in node.sizes]
-                    # 多次元配列を初期化
+                    # 多次元配列を初期化（全要素を1つの連続領域に格納）
                     scope = self.get_current_scope()
-                    array_dict = {}
-                    # 全ての組み合わせのインデックスを作成
-                    for indices in itertools.product(*[range(s+1) for s in sizes]):
-                        # タプルをキーとして使用
-                        array_dict[indices] = 0
+                    array_dict = GridArray.filled([s + 1 for s in sizes])
                     if scope:
                         scope['arrays'][array_name] = array_dict
                     else:
@@ -588,18 +802,21 @@ class ScriptEngine:
                     return return_value
             return 0
 
+        elif node.type == 'HOIST':
+            # ループの外に移動した式の事前評価（オプティマイザーが生成）
+            value = evaluate_hoisted(self, node.value)
+            self.store_variable(node._name or node.variable.upper(), node._slot, value)
+            return None
+
         elif node.type == 'EXIT':
             # EXIT文の処理
             exit_type = node.exit_type.upper()  # "FUNCTION", "FOR", "WHILE"
 
-            if exit_type == 'FUNCTION':
-                raise FunctionExit()
-            elif exit_type == 'FOR':
-                raise LoopExit('FOR')
-            elif exit_type == 'WHILE':
-                raise LoopExit('WHILE')
-            else:
+            # 完了シグナルを返し、対応するループ・関数本体が脱出する
+            signal = EXIT_SIGNALS.get(exit_type)
+            if signal is None:
                 raise RuntimeError(f"不明なEXIT文タイプ: {exit_type}")
+            return signal
 
         else:
             # その他の式
@@ -613,8 +830,15 @@ class ScriptEngine:
         if is_builtin_function(func_name):
             raise RuntimeError(get_message('error_function_conflict', self.locale, node.name))
 
-        # 関数を辞書に登録
+        # CACHED関数は本体がメモ化できることを確認（呼び出し先の関数は最初の呼び出し時に確認）
+        if getattr(node, 'cached', False):
+            reason = analyze_function(node).reason
+            if reason is not None:
+                raise impure_error(node, reason, self.locale)
+
+        # 関数を辞書に登録（呼び出し先が変わる可能性があるためメモ化した結果は破棄）
         self.user_functions[func_name] = node
+        self.function_caches.clear()
         return None
 
     def execute_select_case(self, node: ASTNode) -> Any:
@@ -622,18 +846,29 @@ class ScriptEngine:
         # テスト式を評価
         test_value = self.evaluate_expression(node.test_expression)
 
-        # 各Caseを順番に評価
-        for case in node.cases:
-            if self.match_case(test_value, case.conditions):
-                # マッチしたCaseのステートメントを実行
-                for stmt in case.statements:
-                    self.execute_statement(stmt)
-                return  # 最初にマッチしたCaseで終了
+        # リテラルのCaseはジャンプテーブルで検索し、範囲・IS条件のみ順番に評価
+        index = bind_case_table(node).find(self, test_value)
+        # 最初にマッチしたCase、なければCase Elseのステートメントを実行
+        statements = node.else_case if index is None else node.cases[index].statements
+        for stmt in statements or ():
+            signal = self.execute_statement(stmt)
+            if signal.__class__ is Completion:
+                # EXIT文の完了シグナルは外側のループ・関数に返す
+                return signal
+        return None
+
+    def execute_block(self, statements: List[ASTNode]) -> Optional[Completion]:
+        """
+        ステートメントの並びを実行
 
-        # Case Elseの実行
-        if node.else_case:
-            for stmt in node.else_case:
-                self.execute_statement(stmt)
+        Returns:
+            EXIT文に到達した場合はその完了シグナル、最後まで実行した場合はNone
+        """
+        for stmt in statements:
+            signal = self.execute_statement(stmt)
+            if signal.__class__ is Completion:
+                return signal
+        return None
 
     def match_case(self, test_value: Any, conditions: List[ASTNode]) -> bool:
         """Case条件のマッチング判定"""
@@ -680,32 +915,11 @@ class ScriptEngine:
     def compare_values(self, left: Any, right: Any, operator: str) -> bool:
         """値を比較（大文字小文字を区別しない）"""
         # 両方が数値として有効な場合のみ数値比較
-        left_is_numeric = False
-        right_is_numeric = False
-
-        try:
-            # 数値型かチェック
-            if isinstance(left, (int, float)):
-                left_num = float(left)
-                left_is_numeric = True
-            elif isinstance(left, str) and left.replace('.', '', 1).replace('-', '', 1).isdigit():
-                left_num = float(left)
-                left_is_numeric = True
-        except:
-            pass
-
-        try:
-            if isinstance(right, (int, float)):
-                right_num = float(right)
-                right_is_numeric = True
-            elif isinstance(right, str) and right.replace('.', '', 1).replace('-', '', 1).isdigit():
-                right_num = float(right)
-                right_is_numeric = True
-        except:
-            pass
+        left_num = numeric_key(left)
+        right_num = numeric_key(right)
 
         # 両方が数値の場合は数値比較
-        if left_is_numeric and right_is_numeric:
+        if left_num is not None and right_num is not None:
             if operator == 'EQ':
                 return left_num == right_num
             elif operator == 'NEQ':
@@ -743,6 +957,26 @@ class ScriptEngine:
         func_name_upper = func_name.upper()
         func_def = self.user_functions[func_name_upper]
 
+        if getattr(func_def, 'cached', False):
+            # CACHED関数は引数の値ごとに戻り値をメモ化（script_function_cache.py参照）
+            cache = self.function_caches.get(func_name_upper)
+            if cache is None:
+                cache = bind_function_cache(func_def, self)
+                self.function_caches[func_name_upper] = cache
+            key = memo_key(arguments)
+            if key is not None and cache.guard_names.isdisjoint(self.arrays):
+                return_value = cache.get(key, MISSING)
+                if return_value is MISSING:
+                    return_value = self.invoke_user_function(func_def, func_name, arguments, arg_names)
+                    cache.store(key, return_value)
+                return return_value
+
+        return self.invoke_user_function(func_def, func_name, arguments, arg_names)
+
+    def invoke_user_function(self, func_def: ASTNode, func_name: str, arguments: List[Any], arg_names: List[str] = None) -> Any:
+        """ユーザー定義関数の本体を新しいスコープで実行"""
+        func_name_upper = func_name.upper()
+
         # 必須パラメータの数をチェック
         required_params = [p for p in func_def.parameters if not hasattr(p, 'optional') or not p.optional]
         if len(arguments) < len(required_params):
@@ -765,8 +999,8 @@ class ScriptEngine:
                 # 引数が提供されている場合
                 arg_value = arguments[i]
                 # 配列引数の場合、配列として設定
-                if isinstance(arg_value, dict) and arg_names and i < len(arg_names) and arg_names[i]:
-                    parameter_arrays[param_name] = arg_value.copy()  # コピーを作成
+                if isinstance(arg_value, (dict, ScriptArray, GridArray)) and arg_names and i < len(arg_names) and arg_names[i]:
+                    parameter_arrays[param_name] = arg_value.copy()  # コピーを作成（ScriptArray・GridArrayは変更時に複製）
                     array_mappings[param_name] = arg_names[i]  # 元の配列名を記録
                     parameters[param_name] = 0  # 変数としても初期化
                 else:
@@ -778,13 +1012,23 @@ class ScriptEngine:
                 # デフォルト値がない場合は0
                 parameters[param_name] = 0
 
+        if self.guard is not None:
+            self.guard.step(len(func_def.body) or 1)
+
         # 新しいスコープでの実行（配列も渡す）
-        self.push_scope(func_name_upper, parameters, parameter_arrays, array_mappings)
+        self.push_scope(func_name_upper, parameters, parameter_arrays, array_mappings, get_frame_layout(func_def))
 
         try:
-            # 関数本体を実行
-            for statement in func_def.body:
-                self.execute_statement(statement)
+            # 関数本体を実行（EXIT FUNCTIONは完了シグナルで本体の実行を終える）
+            if self.mode == 'compiled':
+                signal = run_compiled_block(compile_function_body(func_def), self)
+            elif self.mode == 'transpiled':
+                signal = transpile_function_body(func_def)(self)
+            else:
+                signal = self.execute_block(func_def.body)
+            if signal is not None and signal is not EXIT_FUNCTION:
+                # ループ外のEXIT FOR/WHILEは呼び出し元に例外で伝える（呼び出し元のループで捕捉）
+                raise signal.to_exception()
         except FunctionExit:
             # EXIT FUNCTION処理 - 早期リターン
             pass  # finally節で戻り値を返すので何もしない
@@ -808,7 +1052,16 @@ class ScriptEngine:
 
         elif node.type == 'VARIABLE':
             # 変数名を大文字に統一して取得(スコープ対応)
-            return self.get_variable(node.name, 0)
+            if node._slot is None:
+                return self.get_variable(node.name, 0)
+            return self.load_variable(node._name, node._slot)
+
+        elif node.type == 'HOISTED':
+            # ループの外で評価済みの式（例外・配列は元の位置で送出・返却する）
+            value = self.load_variable(node._name or node.name.upper(), node._slot)
+            if value.__class__ is HoistedResult:
+                return value.unwrap()
+            return value
 
         elif node.type == 'ARRAY_VAR':
             # 配列変数参照(ITEMS[]記法) - 配列オブジェクト自体を返す
@@ -824,7 +1077,7 @@ class ScriptEngine:
                 return {'_array_ref': array_name, '_scope': 'global', '_data': self.arrays[array_name]}
 
             # 配列が存在しない場合は空の配列オブジェクトを返す
-            return {'_array_ref': array_name, '_scope': 'local' if current_scope else 'global', '_data': {}}
+            return {'_array_ref': array_name, '_scope': 'local' if current_scope else 'global', '_data': ScriptArray()}
 
         elif node.type == 'ARRAY_ACCESS':
             # 配列名を大文字に統一
@@ -867,8 +1120,9 @@ class ScriptEngine:
             return self.evaluate_unary_op(node.operator, operand)
 
         elif node.type == 'FUNCTION_CALL':
-            # 関数呼び出し
-            func_name = node.name.upper()
+            # 関数呼び出し（呼び出し先はノードごとに事前解決済み）
+            site = bind_call_site(node)
+            func_name = site.name
 
             # 配列アクセスかどうかチェック(配列が定義されている場合)
             current_scope = self.get_current_scope()
@@ -895,16 +1149,19 @@ class ScriptEngine:
                     # 多次元配列アクセス
                     indices = tuple(int(self.evaluate_expression(arg)) for arg in node.arguments)
                     # 配列から値を取得
-                    if current_scope and func_name in current_scope['arrays'] and indices in current_scope['arrays'][func_name]:
-                        return current_scope['arrays'][func_name][indices]
-                    elif func_name in self.arrays and indices in self.arrays[func_name]:
-                        return self.arrays[func_name][indices]
-                    else:
-                        # インデックスが範囲外の場合は0を返す
-                        return 0
+                    if current_scope and func_name in current_scope['arrays']:
+                        value = current_scope['arrays'][func_name].get(indices, MISSING)
+                        if value is not MISSING:
+                            return value
+                    if func_name in self.arrays:
+                        value = self.arrays[func_name].get(indices, MISSING)
+                        if value is not MISSING:
+                            return value
+                    # インデックスが範囲外の場合は0を返す
+                    return 0
 
             # SPLIT関数の特別処理(第1引数は配列名として扱う)
-            elif func_name == 'SPLIT' and len(node.arguments) >= 3:
+            elif site.kind == CALL_SPLIT:
                 # 第1引数は配列変数参照または変数名として扱い、評価しない
                 array_name_node = node.arguments[0]
                 if hasattr(array_name_node, 'type'):
@@ -927,352 +1184,330 @@ class ScriptEngine:
                 return self.execute_split_function(array_name, text, delimiter)
 
             # 引数を評価
-            args = []
-            arg_names = []  # 配列名を追跡
-            for arg in node.arguments:
-                # 配列変数参照の場合(ITEMS[]記法)
-                if isinstance(arg, ASTNode) and arg.type == 'ARRAY_VAR':
-                    var_name = arg.name.upper()
+            args, arg_names = self.evaluate_call_arguments(site.arguments, current_scope)
+
+            # 通常のビルトイン関数は関数オブジェクトを直接呼び出す（プロファイル中は call_builtin で計測）
+            if site.kind == CALL_BUILTIN and self.profiler is None:
+                if COUNT_BUILTIN_CALLS:
+                    self.builtin_calls[func_name] += 1
+                try:
+                    return site.builtin(*args)
+                except Exception as e:
+                    raise self.builtin_call_error(func_name, e)
+            if site.kind in (CALL_ADAPTER, CALL_BUILTIN):
+                return self.call_builtin(site.descriptor, args)
+
+            # 関数を呼び出す（ユーザー定義関数 → 特殊処理関数 → ビルトイン関数の順）
+            return self.call_function(node, func_name, args, arg_names)
+
+        return 0
+
+    def evaluate_call_arguments(self, arguments, current_scope: Optional[Dict[str, Any]]):
+        """
+        関数呼び出しの引数を評価
+
+        Args:
+            arguments: CallSite.arguments（引数ごとの (種類, 大文字の変数名, ノード)）
+            current_scope: 現在のスコープ（トップレベルではNone）
+
+        Returns:
+            (評価済みの引数, 配列引数の元の配列名（配列でない引数はNone）)
+        """
+        args = []
+        arg_names = []  # 配列名を追跡
+        for arg_kind, var_name, arg in arguments:
+            # 配列変数参照の場合(ITEMS[]記法)
+            if arg_kind == ARG_ARRAY_VAR:
+                arg_names.append(var_name)
+                # 配列の実体を引数として渡す
+                if current_scope and var_name in current_scope['arrays']:
+                    args.append(current_scope['arrays'][var_name])
+                elif var_name in self.arrays:
+                    args.append(self.arrays[var_name])
+                else:
+                    # 配列が存在しない場合は空の配列として渡す
+                    args.append(ScriptArray())
+            # 変数ノードの場合、配列かどうかをチェック(後方互換性用)
+            elif arg_kind == ARG_VARIABLE:
+                if current_scope and var_name in current_scope['arrays']:
+                    # 関数スコープの配列として渡す
                     arg_names.append(var_name)
-                    # 配列の実体を引数として渡す
-                    current_scope = self.get_current_scope()
-                    if current_scope and var_name in current_scope['arrays']:
-                        args.append(current_scope['arrays'][var_name])
-                    elif var_name in self.arrays:
-                        args.append(self.arrays[var_name])
-                    else:
-                        # 配列が存在しない場合は空の配列として渡す
-                        args.append({})
-                # 変数ノードの場合、配列かどうかをチェック(後方互換性用)
-                elif isinstance(arg, ASTNode) and arg.type == 'VARIABLE':
-                    var_name = arg.name.upper()
-                    # 配列があるかチェック
-                    current_scope = self.get_current_scope()
-                    if current_scope and var_name in current_scope['arrays']:
-                        # 関数スコープの配列として渡す
-                        arg_names.append(var_name)
-                        args.append(current_scope['arrays'][var_name])
-                    elif var_name in self.arrays:
-                        # グローバル配列として渡す
-                        arg_names.append(var_name)
-                        args.append(self.arrays[var_name])
-                    else:
-                        # 配列でない場合は通常の変数として評価
-                        arg_names.append(None)
-                        args.append(self.evaluate_expression(arg))
+                    args.append(current_scope['arrays'][var_name])
+                elif var_name in self.arrays:
+                    # グローバル配列として渡す
+                    arg_names.append(var_name)
+                    args.append(self.arrays[var_name])
                 else:
-                    args.append(self.evaluate_expression(arg))
+                    # 配列でない場合は通常の変数として評価
                     arg_names.append(None)
+                    args.append(self.evaluate_expression(arg))
+            else:
+                args.append(self.evaluate_expression(arg))
+                arg_names.append(None)
+        return args, arg_names
 
-            # ユーザー定義関数を最優先でチェック
-            if func_name in self.user_functions:
-                return self.execute_user_function(func_name, args, arg_names)
-
-            # PRINT関数の特殊処理
-            elif func_name == 'PRINT':
-                # 特殊フラグ "CLEAR" のチェック
-                if len(args) == 1 and str(args[0]).upper() == "CLEAR":
-                    self.clear_print_stack()
-                    return ""
-
-                # 引数を文字列に変換して連結(数値のフォーマットを改善)
-                if args:
-                    formatted_args = []
-                    for arg in args:
-                        if isinstance(arg, float) and arg.is_integer():
-                            # 整数値の場合は .0 を表示しない
-                            formatted_args.append(str(int(arg)))
-                        else:
-                            formatted_args.append(str(arg))
-                    output = " ".join(formatted_args)
-                else:
-                    output = ""
-
-                # スタックに追加
-                self.add_to_print_stack(output)
-                return output
-
-            # OUTPUT関数の特殊処理（予約変数変換 + locale渡し）
-            elif func_name == 'OUTPUT':
-                # 第1引数が文字列リテラルで予約変数名の場合、実値に変換
-                if len(args) > 0 and isinstance(args[0], str):
-                    reserved_var = args[0].upper()
-                    if reserved_var in ['TXT1', 'TXT2', 'ANY_INPUT']:
-                        # スクリプト実行開始時の初期値を使用（スクリプト内での上書きを無視）
-                        if hasattr(self, '_reserved_vars_initial') and reserved_var in self._reserved_vars_initial:
-                            args[0] = self._reserved_vars_initial[reserved_var]
-                        else:
-                            # フォールバック: 現在の値を取得
-                            args[0] = self.get_variable(reserved_var, args[0])
-
-                # ビルトイン関数として実行（locale引数を追加）
-                func = get_builtin_function(func_name)
-                result = func(*args, locale=self.locale)
-                return result
-
-            # INPUT関数の特殊処理（locale渡し）
-            elif func_name == 'INPUT':
-                func = get_builtin_function(func_name)
-                result = func(*args, locale=self.locale)
-                return result
-
-            # ISFILEEXIST関数の特殊処理（locale渡し）
-            elif func_name == 'ISFILEEXIST':
-                func = get_builtin_function(func_name)
-                result = func(*args, locale=self.locale)
-                return result
-
-            # REDIM関数の特殊処理
-            elif func_name == 'REDIM':
-                if len(node.arguments) < 2:
-                    raise RuntimeError(get_message('error_redim_needs_array', self.locale))
-
-                # 第一引数は配列変数参照または変数名
-                first_arg = node.arguments[0]
-                if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
-                    array_name = first_arg.name.upper()
-                elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
-                    array_name = first_arg.name.upper()
-                else:
-                    raise RuntimeError(get_message('error_redim_first_arg', self.locale))
-
-                new_size = int(self.evaluate_expression(node.arguments[1]))
-                preserve = False
-                if len(node.arguments) > 2:
-                    preserve_arg = self.evaluate_expression(node.arguments[2])
-                    preserve = self.is_true(preserve_arg)
-
-                self.execute_redim_function(array_name, new_size, preserve)
-                return float(new_size)
-
-            # ARRAY関数の特殊処理
-            elif func_name == 'ARRAY':
-                # すべての引数を値として評価(空配列も許可)
-                values = []
-                for arg in node.arguments:
-                    values.append(self.evaluate_expression(arg))
-
-                # 配列を作成して返す
-                return self.execute_array_function(*values)
-
-            # UBOUND/LBOUND関数の特殊処理
-            elif func_name in ['UBOUND', 'LBOUND']:
-                if len(node.arguments) == 0:
-                    raise RuntimeError(get_message('error_array_function_needs_name', self.locale, func_name))
-
-                # 第一引数が配列変数参照または変数ノードの場合、変数名を直接使用
-                first_arg = node.arguments[0]
-                if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
-                    array_name = first_arg.name
-                elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
-                    array_name = first_arg.name
-                else:
-                    # 文字列リテラルの場合は評価結果を使用
-                    array_name = str(self.evaluate_expression(first_arg))
+    def call_function(self, node: ASTNode, func_name: str, args: List[Any], arg_names: List[Optional[str]]) -> Any:
+        """
+        引数評価済みの関数呼び出しを実行
+
+        Args:
+            node: FUNCTION_CALLノード（引数を評価せずに扱う関数で使用）
+            func_name: 大文字化済みの関数名
+            args: 評価済みの引数
+            arg_names: 配列引数の元の配列名（配列でない引数はNone）
+        """
+        # ユーザー定義関数を最優先でチェック
+        if func_name in self.user_functions:
+            return self.execute_user_function(func_name, args, arg_names)
+
+        # PRINT関数の特殊処理
+        elif func_name == 'PRINT':
+            # 特殊フラグ "CLEAR" のチェック
+            if len(args) == 1 and str(args[0]).upper() == "CLEAR":
+                self.clear_print_stack()
+                return ""
+
+            # 引数を文字列に変換して連結(数値のフォーマットを改善)
+            if args:
+                formatted_args = []
+                for arg in args:
+                    if isinstance(arg, float) and arg.is_integer():
+                        # 整数値の場合は .0 を表示しない
+                        formatted_args.append(str(int(arg)))
+                    else:
+                        formatted_args.append(str(arg))
+                output = " ".join(formatted_args)
+            else:
+                output = ""
+
+            # スタックに追加
+            self.add_to_print_stack(output)
+            return output
+
+        # REDIM関数の特殊処理
+        elif func_name == 'REDIM':
+            if len(node.arguments) < 2:
+                raise RuntimeError(get_message('error_redim_needs_array', self.locale))
+
+            # 第一引数は配列変数参照または変数名
+            first_arg = node.arguments[0]
+            if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
+                array_name = first_arg.name.upper()
+            elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
+                array_name = first_arg.name.upper()
+            else:
+                raise RuntimeError(get_message('error_redim_first_arg', self.locale))
 
-                dimension = int(self.evaluate_expression(node.arguments[1])) if len(node.arguments) > 1 else 1
+            new_size = int(self.evaluate_expression(node.arguments[1]))
+            preserve = False
+            if len(node.arguments) > 2:
+                preserve_arg = self.evaluate_expression(node.arguments[2])
+                preserve = self.is_true(preserve_arg)
 
-                if func_name == 'UBOUND':
-                    return self.get_array_ubound(array_name, dimension)
-                else:
-                    return self.get_array_lbound(array_name, dimension)
+            self.execute_redim_function(array_name, new_size, preserve)
+            return float(new_size)
 
+        # ARRAY関数の特殊処理
+        elif func_name == 'ARRAY':
+            # すべての引数を値として評価(空配列も許可)
+            values = []
+            for arg in node.arguments:
+                values.append(self.evaluate_expression(arg))
+
+            # 配列を作成して返す
+            return self.execute_array_function(*values)
+
+        # UBOUND/LBOUND関数の特殊処理
+        elif func_name in ['UBOUND', 'LBOUND']:
+            if len(node.arguments) == 0:
+                raise RuntimeError(get_message('error_array_function_needs_name', self.locale, func_name))
+
+            # 第一引数が配列変数参照または変数ノードの場合、変数名を直接使用
+            first_arg = node.arguments[0]
+            if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
+                array_name = first_arg.name
+            elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
+                array_name = first_arg.name
+            else:
+                # 文字列リテラルの場合は評価結果を使用
+                array_name = str(self.evaluate_expression(first_arg))
 
-            # ISARRAY関数の特殊処理
-            elif func_name == 'ISARRAY':
-                if len(args) == 0:
-                    raise RuntimeError(get_message('error_isarray_needs_arg', self.locale))
+            dimension = int(self.evaluate_expression(node.arguments[1])) if len(node.arguments) > 1 else 1
 
-                # 引数が配列かどうかを直接チェック
-                arg = args[0]
-                # 配列は辞書として格納されている
-                if isinstance(arg, dict):
-                    return 1.0
-                elif isinstance(arg, list):
+            if func_name == 'UBOUND':
+                return self.get_array_ubound(array_name, dimension)
+            else:
+                return self.get_array_lbound(array_name, dimension)
+
+
+        # ISARRAY関数の特殊処理
+        elif func_name == 'ISARRAY':
+            if len(args) == 0:
+                raise RuntimeError(get_message('error_isarray_needs_arg', self.locale))
+
+            # 引数が配列かどうかを直接チェック
+            arg = args[0]
+            # 配列はScriptArray（多次元配列はGridArray）として格納されている
+            if isinstance(arg, (dict, ScriptArray, GridArray)):
+                return 1.0
+            elif isinstance(arg, list):
+                return 1.0
+            elif isinstance(arg, str):
+                # 変数名が文字列で渡された場合
+                var_name = arg.upper()
+                if var_name in self.arrays and self.arrays[var_name]:
                     return 1.0
-                elif isinstance(arg, str):
-                    # 変数名が文字列で渡された場合
-                    var_name = arg.upper()
-                    if var_name in self.arrays and self.arrays[var_name]:
-                        return 1.0
-                return 0.0
+            return 0.0
+
+        # JOIN関数の特殊処理
+        elif func_name == 'JOIN':
+            if len(node.arguments) == 0:
+                raise RuntimeError(get_message('error_join_needs_array', self.locale))
+
+            # 第1引数は配列変数参照または変数名
+            first_arg = node.arguments[0]
+            if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
+                array_name = first_arg.name.upper()
+            elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
+                array_name = first_arg.name.upper()
+            else:
+                array_name = str(self.evaluate_expression(first_arg)).upper()
 
-            # JOIN関数の特殊処理
-            elif func_name == 'JOIN':
-                if len(node.arguments) == 0:
-                    raise RuntimeError(get_message('error_join_needs_array', self.locale))
-
-                # 第1引数は配列変数参照または変数名
-                first_arg = node.arguments[0]
-                if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
-                    array_name = first_arg.name.upper()
-                elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
-                    array_name = first_arg.name.upper()
-                else:
-                    array_name = str(self.evaluate_expression(first_arg)).upper()
-
-                # 残りの引数を評価
-                args = []
-                for i in range(1, len(node.arguments)):
-                    args.append(self.evaluate_expression(node.arguments[i]))
-                delimiter = str(args[0]) if len(args) > 0 else " "  # デフォルトは半角スペース
-                unique_only = False
-                if len(args) > 1:
-                    # 第3引数で重複除外を指定(0以外の値でユニーク化)
-                    try:
-                        unique_val = float(args[1])
-                        unique_only = unique_val != 0
-                    except:
-                        unique_only = False
-
-                # 現在のスコープを取得
-                current_scope = self.get_current_scope()
-                array_dict = None
-
-                # スコープから配列を検索
-                if current_scope and array_name in current_scope['arrays']:
-                    array_dict = current_scope['arrays'][array_name]
-                elif array_name in self.arrays:
-                    array_dict = self.arrays[array_name]
-
-                # 配列が存在しない場合は空文字列を返す
-                if not array_dict:
-                    return ""
-
-                # 配列要素を順番に取得
-                sorted_keys = sorted(array_dict.keys())
-                elements = []
-                seen = set() if unique_only else None
-
-                for key in sorted_keys:
-                    value = array_dict[key]
-                    # 数値の場合は整数かどうかチェック
-                    if isinstance(value, float) and value.is_integer():
-                        value_str = str(int(value))
-                    else:
-                        value_str = str(value)
-
-                    # ユニークモードの場合は重複チェック
-                    if unique_only:
-                        value_upper = value_str.upper()
-                        if value_upper not in seen:
-                            seen.add(value_upper)
-                            elements.append(value_str)
-                    else:
-                        elements.append(value_str)
+            # 残りの引数を評価
+            args = []
+            for i in range(1, len(node.arguments)):
+                args.append(self.evaluate_expression(node.arguments[i]))
+            delimiter = str(args[0]) if len(args) > 0 else " "  # デフォルトは半角スペース
+            unique_only = False
+            if len(args) > 1:
+                # 第3引数で重複除外を指定(0以外の値でユニーク化)
+                try:
+                    unique_val = float(args[1])
+                    unique_only = unique_val != 0
+                except:
+                    unique_only = False
 
-                # 区切り文字で結合
-                return delimiter.join(elements)
+            # 現在のスコープを取得
+            current_scope = self.get_current_scope()
+            array_dict = None
 
-            # CSVDIFF関数の特殊処理
-            elif func_name == 'CSVDIFF':
-                if len(node.arguments) < 3:
-                    raise RuntimeError(get_message('error_csvdiff_args', self.locale))
+            # スコープから配列を検索
+            if current_scope and array_name in current_scope['arrays']:
+                array_dict = current_scope['arrays'][array_name]
+            elif array_name in self.arrays:
+                array_dict = self.arrays[array_name]
 
-                # 第1引数は配列変数参照または変数名
-                first_arg = node.arguments[0]
-                if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
-                    array_name = first_arg.name.upper()
-                elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
-                    array_name = first_arg.name.upper()
+            # 配列が存在しない場合は空文字列を返す
+            if not array_dict:
+                return ""
+
+            # 配列要素を順番に取得
+            sorted_keys = sorted(array_dict.keys())
+            elements = []
+            seen = set() if unique_only else None
+
+            for key in sorted_keys:
+                value = array_dict[key]
+                # 数値の場合は整数かどうかチェック
+                if isinstance(value, float) and value.is_integer():
+                    value_str = str(int(value))
                 else:
-                    array_name = str(self.evaluate_expression(first_arg)).upper()
+                    value_str = str(value)
 
-                csv1 = str(self.evaluate_expression(node.arguments[1])) if len(node.arguments) > 1 else ""
-                csv2 = str(self.evaluate_expression(node.arguments[2])) if len(node.arguments) > 2 else ""
+                # ユニークモードの場合は重複チェック
+                if unique_only:
+                    value_upper = value_str.upper()
+                    if value_upper not in seen:
+                        seen.add(value_upper)
+                        elements.append(value_str)
+                else:
+                    elements.append(value_str)
+
+            # 区切り文字で結合
+            return delimiter.join(elements)
+
+        # CSVDIFF関数の特殊処理
+        elif func_name == 'CSVDIFF':
+            if len(node.arguments) < 3:
+                raise RuntimeError(get_message('error_csvdiff_args', self.locale))
+
+            # 第1引数は配列変数参照または変数名
+            first_arg = node.arguments[0]
+            if isinstance(first_arg, ASTNode) and first_arg.type == 'ARRAY_VAR':
+                array_name = first_arg.name.upper()
+            elif isinstance(first_arg, ASTNode) and first_arg.type == 'VARIABLE':
+                array_name = first_arg.name.upper()
+            else:
+                array_name = str(self.evaluate_expression(first_arg)).upper()
 
-                # CSVの差分を取得
-                diff_elements = BuiltinFunctions.CSVDIFF(csv1, csv2)
+            csv1 = str(self.evaluate_expression(node.arguments[1])) if len(node.arguments) > 1 else ""
+            csv2 = str(self.evaluate_expression(node.arguments[2])) if len(node.arguments) > 2 else ""
 
-                # 配列を初期化
-                self.arrays[array_name] = {}
+            # CSVの差分を取得
+            diff_elements = BuiltinFunctions.CSVDIFF(csv1, csv2)
 
-                # 差分要素を配列に格納
-                for i, element in enumerate(diff_elements):
-                    self.arrays[array_name][i] = element
+            # 差分要素を配列に格納
+            self.arrays[array_name] = ScriptArray(diff_elements)
 
-                # 要素数を返す
-                return float(len(diff_elements))
+            # 要素数を返す
+            return float(len(diff_elements))
 
-            # ビルトイン関数かどうかチェック
-            elif is_builtin_function(func_name):
-                func = get_builtin_function(func_name)
-                try:
-                    # Engine-aware functions (engine渡しが必要な関数)
-                    if func_name in ['LOOP_SUBGRAPH', 'LOOPSUBGRAPH']:
-                        # locale引数を追加で渡す
-                        result = func(self, *args, locale=self.locale)
-                    elif func_name in ['OPTIMAL_LATENT', 'OPTIMALLATENT']:
-                        result = func(self, *args)
-                    # ANY型関数は引数なしの場合、any_input変数を自動的に渡す
-                    elif func_name in ['GETANYTYPE', 'GETANYWIDTH', 'GETANYHEIGHT',
-                                     'GETANYVALUEINT', 'GETANYVALUEFLOAT', 'GETANYSTRING']:
-                        if len(args) == 0:
-                            # any_input変数を引数として渡す
-                            any_data = self.get_variable('any_input', None)
-                            result = func(any_data)
-                        else:
-                            # 引数が指定されている場合はそのまま渡す
-                            result = func(*args)
-                    # PYEXEC関数: 辞書型配列をPythonリストに変換
-                    elif func_name == 'PYEXEC':
-                        # 引数を変換（辞書型配列 → Pythonリスト）
-                        converted_args = []
-                        for arg in args:
-                            if isinstance(arg, dict) and all(isinstance(k, int) for k in arg.keys()):
-                                # 辞書型配列をPythonリストに変換
-                                sorted_keys = sorted(arg.keys())
-                                converted_args.append([arg[k] for k in sorted_keys])
-                            else:
-                                converted_args.append(arg)
-                        result = func(*converted_args)
-                    else:
-                        # 通常のビルトイン関数
-                        result = func(*args)
-                    return result
-                except TypeError as e:
-                    # 引数エラーの可能性が高い
-                    usage = get_function_usage(func_name)
-                    error_msg = get_message('error_function_execution', self.locale, func_name, str(e))
-                    if usage:
-                        error_msg += f"\n使用例: {usage}"
-                    raise RuntimeError(error_msg)
-                except Exception as e:
-                    raise RuntimeError(get_message('error_function_execution', self.locale, func_name, str(e)))
+        # その他のビルトイン関数は呼び出し方法（BuiltinDescriptor）に従って呼び出す
+        elif func_name in BUILTIN_DESCRIPTORS:
+            return self.call_builtin(BUILTIN_DESCRIPTORS[func_name], args)
+        else:
+            # ビルトイン関数ではない場合、変数として扱う(引数がない場合のみ)
+            if len(args) == 0:
+                # 関数内からアクセスの場合、ローカル変数をチェック
+                return self.get_variable(node.name, 0)
             else:
-                # ビルトイン関数ではない場合、変数として扱う(引数がない場合のみ)
-                if len(args) == 0:
-                    # 関数内からアクセスの場合、ローカル変数をチェック
-                    return self.get_variable(node.name, 0)
-                else:
-                    # 引数がある場合はエラーとして扱う
-                    # 似た名前のビルトイン関数を提案
-                    suggestions = []
-                    func_name_upper = func_name.upper()
-
-                    # よくある間違いをチェック
-                    common_mistakes = {
-                        'PRINT': get_message('hint_print_usage', self.locale),
-                        'IF': get_message('hint_if_control', self.locale),
-                        'VAR': get_message('hint_var_deprecated', self.locale)
-                    }
-
-                    if func_name_upper in common_mistakes:
-                        raise RuntimeError(get_message('error_function_not_defined', self.locale, func_name) + "\n" + common_mistakes[func_name_upper])
-
-                    # 似た名前の関数を検索
-                    for builtin_func in BUILTIN_FUNCTIONS:
-                        if builtin_func.startswith(func_name_upper[:2]):
-                            usage = get_function_usage(builtin_func)
-                            if usage:
-                                suggestions.append(f"  {usage}")
-
-                    error_msg = get_message('error_function_not_defined', self.locale, func_name)
-                    if suggestions:
-                        error_msg += "\n利用可能な類似関数:\n" + "\n".join(suggestions[:3])  # 最大3つまで表示
-                    raise RuntimeError(error_msg)
-
-        return 0
+                # 引数がある場合はエラーとして扱う
+                # 似た名前のビルトイン関数を提案
+                suggestions = []
+                func_name_upper = func_name.upper()
+
+                # よくある間違いをチェック
+                common_mistakes = {
+                    'PRINT': get_message('hint_print_usage', self.locale),
+                    'IF': get_message('hint_if_control', self.locale),
+                    'VAR': get_message('hint_var_deprecated', self.locale)
+                }
+
+                if func_name_upper in common_mistakes:
+                    raise RuntimeError(get_message('error_function_not_defined', self.locale, func_name) + "\n" + common_mistakes[func_name_upper])
+
+                # 似た名前の関数を検索
+                for builtin_func in BUILTIN_FUNCTIONS:
+                    if builtin_func.startswith(func_name_upper[:2]):
+                        usage = get_function_usage(builtin_func)
+                        if usage:
+                            suggestions.append(f"  {usage}")
+
+                error_msg = get_message('error_function_not_defined', self.locale, func_name)
+                if suggestions:
+                    error_msg += "\n利用可能な類似関数:\n" + "\n".join(suggestions[:3])  # 最大3つまで表示
+                raise RuntimeError(error_msg)
+
+    def call_builtin(self, descriptor: BuiltinDescriptor, args: List[Any]) -> Any:
+        """ビルトイン関数を呼び出し方法（engine・locale渡し、引数の変換）に従って呼び出す"""
+        if COUNT_BUILTIN_CALLS:
+            self.builtin_calls[descriptor.name] += 1
+        if not descriptor.wrap_errors:
+            return descriptor.adapter(self, args)
+        try:
+            return descriptor.adapter(self, args)
+        except Exception as e:
+            raise self.builtin_call_error(descriptor.name, e)
+
+    def builtin_call_error(self, func_name: str, error: Exception) -> RuntimeError:
+        """ビルトイン関数の実行エラーをスクリプトエラーに変換"""
+        error_msg = get_message('error_function_execution', self.locale, func_name, str(error))
+        if isinstance(error, TypeError):
+            # 引数エラーの可能性が高いため使用例を付加
+            usage = get_function_usage(func_name)
+            if usage:
+                error_msg += f"\n使用例: {usage}"
+        return RuntimeError(error_msg)
 
     def evaluate_binary_op(self, operator: str, left: Any, right: Any) -> Any:
         """二項演算子を評価"""
@@ -1407,26 +1642,22 @@ class ScriptEngine:
         current_scope = self.get_current_scope()
 
         # 既存の配列データを取得
-        existing_data = {}
+        existing_data = None
         if current_scope and array_name in current_scope['arrays']:
-            existing_data = current_scope['arrays'][array_name].copy()
+            existing_data = current_scope['arrays'][array_name]
         elif array_name in self.arrays:
-            existing_data = self.arrays[array_name].copy()
+            existing_data = self.arrays[array_name]
 
         # 新しい配列を作成
-        new_array = {}
-
-        # preserveがTrueの場合、既存のデータを保持
         if preserve and existing_data:
-            for i in range(new_size):  # 0からnew_size-1まで
-                if i in existing_data:
-                    new_array[i] = existing_data[i]
-                else:
-                    new_array[i] = 0  # デフォルト値
+            # preserveがTrueの場合、既存のデータを保持（0からnew_size-1まで、ない要素は0）
+            if existing_data.__class__ is ScriptArray:
+                new_array = existing_data.resized(new_size)
+            else:
+                new_array = ScriptArray([existing_data.get(i, 0) for i in range(new_size)])
         else:
             # preserveがFalseの場合、すべて0で初期化
-            for i in range(new_size):  # 0からnew_size-1まで
-                new_array[i] = 0
+            new_array = ScriptArray.filled(new_size)
 
         # 配列を設定
         if current_scope:
@@ -1436,12 +1667,9 @@ class ScriptEngine:
 
         return float(new_size)
 
-    def execute_array_function(self, *values) -> Dict[int, Any]:
+    def execute_array_function(self, *values) -> ScriptArray:
         """ARRAY関数の実行 - 値のリストから配列を作成"""
-        new_array = {}
-        for i, value in enumerate(values):
-            new_array[i] = value
-        return new_array
+        return ScriptArray(values)
 
     def execute_array_function_with_name(self, array_name: str, values: List[Any]) -> float:
         """ARRAY関数の実行 - 指定した配列名に値のリストから配列を作成"""
@@ -1451,9 +1679,7 @@ class ScriptEngine:
         current_scope = self.get_current_scope()
 
         # 新しい配列を作成
-        new_array = {}
-        for i, value in enumerate(values):
-            new_array[i] = value
+        new_array = ScriptArray(values)
 
         # 配列を設定
         if current_scope:
@@ -4,31 +4,242 @@ ScriptExecutionQueue - EasyScripter並行実行制御機構
 
 目的:
 - ComfyUI実行中にEasyScripterノードが並行起動された際のハングアップを防止
-- FIFOキューによる順次実行制御
+- 予想実行時間の短いタスクを優先するキューと複数のワーカースレッドによる並行実行制御
 - エラー発生時もキューを継続
+- 完了通知: タスクごとの threading.Event をワーカーがセットし、待機側はポーリングせずに起床する
 
 アーキテクチャ:
 - シングルトンパターン: 全EasyScripterノードで1つのキューを共有
-- ワーカースレッド: バックグラウンドでキューからタスクを取り出して実行
-- スレッドセーフ: threading.Queueとthreading.Lockで排他制御
+- ワーカープール: EASYSCRIPTER_WORKERS（既定 DEFAULT_WORKER_COUNT、1で従来の順次実行）個のワーカースレッドが
+  キューからタスクを取り出して並行に実行する。SLEEP や HTTP通信で待機中のスクリプトが他のノードを待たせない
+- 排他が必要な操作（VRAMFREE、同じパスへのOUTPUT、LOOP_SUBGRAPHのグラフ展開）だけを
+  名前付きロック（script_locks.py）で直列化する。乱数のシードとHTTPレスポンス情報は ScriptEngine ごとに保持する
+- スケジューリング（TaskScheduler）: 最短予想実行時間優先（SJF）＋エージング。
+  スコア = 予想実行時間 - 待ち時間 * AGING_RATE - 優先度 * PRIORITY_SECONDS の小さい順（同点は投入順）。
+  予想実行時間はコストのヒント（' @COST 秒数）、なければ実行履歴（RuntimeHistory: ノードのunique_idと
+  スクリプトのハッシュごとの指数移動平均）、履歴もなければ DEFAULT_EXPECTED_SECONDS。
+  優先度は ' @PRIORITY 整数（大きいほど先、既定0、±MAX_PRIORITY に制限）。長いタスクも待つほどスコアが下がり、いずれ実行される
+- 待機数の上限: EASYSCRIPTER_MAX_QUEUE（既定 DEFAULT_MAX_QUEUE_DEPTH、0で無制限）に達している場合は
+  QueueFullError ですぐに拒否する（過負荷時にタスクが溜まってタイムアウトするのを防ぐ）
+- スレッドセーフ: threading.Conditionとthreading.Lockで排他制御
+- メトリクス（script_metrics.py）: 投入・完了・失敗・タイムアウト・拒否・スキップの件数、待ち時間と実行時間の
+  ヒストグラム、タスクID別のエラー・タイムアウト数を記録し、待機数・実行中の数などをゲージとして登録する
+- タイムアウト時のキャンセル: タスクごとの CancellationToken（script_cancellation.py）を cancel() し、
+  実行中のスクリプトをループ・関数呼び出しの次のチェックで停止させる。開始前のタスクは実行しない。
+  呼び出し元にはキャンセル後すぐに TimeoutError を返し、停止の確認はバックグラウンドのスレッドで行う。
+  CANCEL_GRACE_SECONDS 以内に停止しない場合（ビルトイン関数の実行中など）は、そのスレッドを切り離して
+  同じ枠に新しいワーカースレッドを起動し、後続のタスクを待たせない
 
 使用方法:
     queue = ScriptExecutionQueue.get_instance()
     result = queue.enqueue_and_wait(task_callable, *args, **kwargs)
+
+    # スケジューリングのヒント付き
+    priority, cost_hint = scheduling_hints(script, locale)
+    result = queue.enqueue_and_wait(task_callable, task_id, timeout, priority=priority, cost_hint=cost_hint,
+                                    cost_key=f"{unique_id}:{hash(script)}", **kwargs)
 """
 
+import itertools
+import logging
+import os
 import queue
+import re
 import threading
 import time
-import traceback
-from typing import Callable, Any, Dict, Optional
+from collections import OrderedDict
+from typing import Callable, Any, Dict, List, Optional, Tuple
 
 # CRITICAL: グローバルインポート（関数内動的インポート禁止ルールに準拠）
 # ComfyUI環境では関数内動的インポートがModuleNotFoundErrorを引き起こす
 try:
     from .locales import get_message
+    from .script_logging import get_logger, log_message
+    from .script_cancellation import CancellationToken, ScriptCancelled
+    from .script_metrics import get_metrics
 except ImportError:
     from locales import get_message
+    from script_logging import get_logger, log_message
+    from script_cancellation import CancellationToken, ScriptCancelled
+    from script_metrics import get_metrics
+
+logger = get_logger('queue')
+
+# ワーカースレッド数（環境変数 EASYSCRIPTER_WORKERS で変更、1で従来の順次実行）
+ENV_WORKERS = 'EASYSCRIPTER_WORKERS'
+DEFAULT_WORKER_COUNT = 4
+
+# タイムアウトでキャンセルしたタスクの停止を待つ秒数（超えた場合はワーカースレッドを切り離す）
+CANCEL_GRACE_SECONDS = 5.0
+
+# DIAG-3（待機状況のDEBUGログ）の出力間隔（秒）
+DIAG_WAIT_INTERVAL = 1.0
+
+# 待機中のタスク数の上限（環境変数 EASYSCRIPTER_MAX_QUEUE で変更、0で無制限）
+ENV_MAX_QUEUE = 'EASYSCRIPTER_MAX_QUEUE'
+DEFAULT_MAX_QUEUE_DEPTH = 64
+
+# スケジューリング: 待ち時間1秒で予想実行時間 AGING_RATE 秒分、優先度1で PRIORITY_SECONDS 秒分だけ先に実行する
+AGING_RATE = 1.0
+PRIORITY_SECONDS = 10.0
+# 優先度の上限（絶対値）。MAX_PRIORITY * PRIORITY_SECONDS（50秒）をノードのタイムアウト（120秒）より十分小さくし、
+# 優先度0のタスクが後から来る優先度の高いタスクに追い越され続けてタイムアウトしないようにする
+MAX_PRIORITY = 5
+# 実行履歴もコストのヒントもないタスクの予想実行時間（秒）
+DEFAULT_EXPECTED_SECONDS = 1.0
+# 実行時間の指数移動平均の重みと、履歴を保持するキーの数
+HISTORY_SMOOTHING = 0.3
+HISTORY_SIZE = 1024
+
+# スケジューリングのディレクティブ（' @PRIORITY 整数 / ' @COST 秒数 のコメント行）
+PRIORITY_DIRECTIVE = re.compile(r"^\s*'\s+@PRIORITY\s+([-+]?\d+)\b", re.IGNORECASE | re.MULTILINE)
+COST_DIRECTIVE = re.compile(r"^\s*'\s+@COST\s+(\d+(?:\.\d*)?|\.\d+)", re.IGNORECASE | re.MULTILINE)
+
+
+class QueueFullError(Exception):
+    """待機中のタスク数が上限に達しているため、タスクを受け付けなかった"""
+    pass
+
+
+def _complete(result_container: Dict[str, Any], result: Any, error: Optional[BaseException]):
+    """タスクの結果を格納し、待機中のスレッドに完了を通知"""
+    result_container["result"] = result
+    result_container["error"] = error
+    result_container["done"].set()
+
+
+def _read_worker_count() -> int:
+    """環境変数からワーカースレッド数を読み取る（未設定・不正な値は既定値、最小1）"""
+    value = os.environ.get(ENV_WORKERS)
+    if not value:
+        return DEFAULT_WORKER_COUNT
+    try:
+        return max(1, int(value.strip()))
+    except ValueError:
+        return DEFAULT_WORKER_COUNT
+
+
+def _read_max_queue_depth() -> int:
+    """環境変数から待機数の上限を読み取る（未設定・不正な値は既定値、0以下は無制限）"""
+    value = os.environ.get(ENV_MAX_QUEUE)
+    if not value:
+        return DEFAULT_MAX_QUEUE_DEPTH
+    try:
+        return max(0, int(value.strip()))
+    except ValueError:
+        return DEFAULT_MAX_QUEUE_DEPTH
+
+
+def _clamp_priority(priority: int) -> int:
+    """優先度を -MAX_PRIORITY 〜 MAX_PRIORITY に制限"""
+    return max(-MAX_PRIORITY, min(MAX_PRIORITY, priority))
+
+
+def scheduling_hints(script: Optional[str], locale: str = 'ja') -> Tuple[int, Optional[float]]:
+    """
+    スクリプトの ' @PRIORITY / ' @COST ディレクティブを読み取る（範囲外の優先度は制限して警告）
+
+    Returns:
+        (優先度, コストのヒント秒数（指定がない場合はNone）)
+    """
+    if not script or '@' not in script:
+        return 0, None
+    priority = 0
+    priority_match = PRIORITY_DIRECTIVE.search(script)
+    if priority_match:
+        priority = int(priority_match.group(1))
+        if priority != _clamp_priority(priority):
+            log_message(logger, logging.WARNING, 'queue_priority_clamped', locale,
+                        priority, _clamp_priority(priority), MAX_PRIORITY)
+            priority = _clamp_priority(priority)
+    cost_match = COST_DIRECTIVE.search(script)
+    return priority, float(cost_match.group(1)) if cost_match else None
+
+
+class RuntimeHistory:
+    """キー（ノードのunique_idとスクリプトのハッシュ）ごとの実行時間の指数移動平均（LRU）"""
+
+    def __init__(self, max_entries: int = HISTORY_SIZE):
+        self.max_entries = max_entries
+        self._averages: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def expected(self, key: Optional[str]) -> float:
+        """予想実行時間（秒、履歴がない場合は DEFAULT_EXPECTED_SECONDS）"""
+        if key is None:
+            return DEFAULT_EXPECTED_SECONDS
+        with self._lock:
+            return self._averages.get(key, DEFAULT_EXPECTED_SECONDS)
+
+    def record(self, key: Optional[str], seconds: float):
+        """実行時間を記録"""
+        if key is None:
+            return
+        with self._lock:
+            average = self._averages.get(key)
+            if average is None:
+                self._averages[key] = seconds
+                if len(self._averages) > self.max_entries:
+                    self._averages.popitem(last=False)
+            else:
+                self._averages[key] = average + HISTORY_SMOOTHING * (seconds - average)
+                self._averages.move_to_end(key)
+
+
+def _task_score(task_item: Dict[str, Any], now: float) -> float:
+    """タスクのスコア（小さいほど先に実行）"""
+    waited = now - task_item["enqueued_at"]
+    return task_item["expected_seconds"] - waited * AGING_RATE - task_item["priority"] * PRIORITY_SECONDS
+
+
+class TaskScheduler:
+    """待機中のタスクをスコア（_task_score）の小さい順に取り出す待ち行列"""
+
+    def __init__(self, max_depth: int = 0):
+        self.max_depth = max_depth
+        self.history = RuntimeHistory()
+        self._pending: List[Dict[str, Any]] = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+
+    def put(self, task_item: Dict[str, Any]) -> bool:
+        """タスクを追加（待機数が上限に達している場合は追加せずにFalse）"""
+        cost_hint = task_item["cost_hint"]
+        task_item["expected_seconds"] = cost_hint if cost_hint is not None else self.history.expected(task_item["cost_key"])
+        with self._condition:
+            if self.max_depth and len(self._pending) >= self.max_depth:
+                return False
+            task_item["enqueued_at"] = time.monotonic()
+            task_item["sequence"] = next(self._sequence)
+            self._pending.append(task_item)
+            self._condition.notify()
+        return True
+
+    def get(self, timeout: float) -> Dict[str, Any]:
+        """スコアが最小のタスクを取り出す（timeout秒以内に追加されない場合は queue.Empty）"""
+        with self._condition:
+            if not self._pending:
+                self._condition.wait(timeout)
+                if not self._pending:
+                    raise queue.Empty
+            pending = self._pending
+            now = time.monotonic()
+            index = min(range(len(pending)), key=lambda i: (_task_score(pending[i], now), pending[i]["sequence"]))
+            return pending.pop(index)
+
+    def remove(self, task_item: Dict[str, Any]) -> bool:
+        """開始前のタスクを取り除く（既に取り出されている場合はFalse）"""
+        with self._condition:
+            for index, pending in enumerate(self._pending):
+                if pending is task_item:
+                    del self._pending[index]
+                    return True
+        return False
+
+    def qsize(self) -> int:
+        """待機中のタスク数"""
+        with self._condition:
+            return len(self._pending)
 
 
 class ScriptExecutionQueue:
@@ -46,39 +257,55 @@ class ScriptExecutionQueue:
                     cls._instance = cls(locale=locale)
         return cls._instance
 
-    def __init__(self, locale: str = 'ja'):
-        """初期化（外部から直接呼び出し禁止、get_instance()を使用）"""
+    def __init__(self, locale: str = 'ja', worker_count: Optional[int] = None):
+        """初期化（外部から直接呼び出し禁止、get_instance()を使用）
+
+        Args:
+            locale: ログメッセージのロケール
+            worker_count: ワーカースレッド数（Noneの場合は環境変数 EASYSCRIPTER_WORKERS）
+        """
         if ScriptExecutionQueue._instance is not None:
             raise RuntimeError(get_message('queue_error_singleton', locale))
 
         self.locale = locale
         self._get_message = get_message
 
-        self._queue: queue.Queue = queue.Queue()
-        self._worker_thread: Optional[threading.Thread] = None
+        self._queue = TaskScheduler(_read_max_queue_depth())
+        self._worker_count = worker_count if worker_count is not None else _read_worker_count()
+        # ワーカーの枠 → スレッド（切り離したスレッドは枠から外れる）
+        self._workers: List[Optional[threading.Thread]] = [None] * self._worker_count
         self._running = False
-        self._current_task_id: Optional[str] = None
+        # ワーカーの枠 → 実行中のタスクID
+        self._running_tasks: Dict[int, str] = {}
         self._current_task_lock = threading.Lock()
+        self._metrics = get_metrics()
+        self._metrics.register_gauges('queue', self.get_gauges)
 
         # ワーカースレッド起動
         self._start_worker()
 
-        print(self._get_message('queue_initialized', self.locale))
+        log_message(logger, logging.INFO, 'queue_initialized', self.locale)
 
     def _start_worker(self):
-        """ワーカースレッドを起動"""
-        if self._worker_thread is not None and self._worker_thread.is_alive():
-            return  # 既に起動済み
-
+        """停止しているワーカースレッドを起動"""
         self._running = True
-        self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self._worker_thread.start()
-
-    def _worker_loop(self):
+        for index, worker in enumerate(self._workers):
+            if worker is None or not worker.is_alive():
+                self._spawn_worker(index)
+
+    def _spawn_worker(self, index: int):
+        """指定した枠に新しいワーカースレッドを起動"""
+        worker = threading.Thread(target=self._worker_loop, args=(index,), daemon=True,
+                                  name=f"EasyScripterWorker-{index}")
+        self._workers[index] = worker
+        worker.start()
+
+    def _worker_loop(self, index: int):
         """ワーカースレッドのメインループ"""
-        print(self._get_message('queue_worker_started', self.locale))
+        log_message(logger, logging.INFO, 'queue_worker_started', self.locale)
 
-        while self._running:
+        # 切り離されたワーカースレッドは実行中のタスクを終えたら終了する
+        while self._running and self._workers[index] is threading.current_thread():
             try:
                 # キューからタスクを取得（タイムアウト1秒）
                 task_item = self._queue.get(timeout=1.0)
@@ -88,44 +315,55 @@ class ScriptExecutionQueue:
                 args = task_item["args"]
                 kwargs = task_item["kwargs"]
                 result_container = task_item["result_container"]
+                cancel_token = task_item["cancel_token"]
+                metrics = self._metrics
+                metrics.observe('queue_wait_seconds', time.monotonic() - task_item["enqueued_at"])
+
+                if cancel_token.cancelled:
+                    # 待機中にタイムアウトしたタスクは実行しない
+                    log_message(logger, logging.DEBUG, 'queue_task_skipped', self.locale, task_id)
+                    metrics.increment('tasks_skipped')
+                    _complete(result_container, None, ScriptCancelled(cancel_token.reason))
+                    continue
 
                 # 現在実行中のタスクIDを記録
                 with self._current_task_lock:
-                    self._current_task_id = task_id
+                    self._running_tasks[index] = task_id
+                    task_item["worker_index"] = index
 
-                print(self._get_message('queue_task_started', self.locale, task_id))
+                log_message(logger, logging.DEBUG, 'queue_task_started', self.locale, task_id)
 
                 try:
                     # タスク実行
                     start_time = time.time()
                     result = task_callable(*args, **kwargs)
                     elapsed = time.time() - start_time
+                    self._queue.history.record(task_item["cost_key"], elapsed)
+                    metrics.observe('task_run_seconds', elapsed)
+                    metrics.increment('tasks_completed')
 
                     # 結果を格納
-                    result_container["result"] = result
-                    result_container["error"] = None
-                    result_container["completed"] = True
+                    _complete(result_container, result, None)
 
-                    print(self._get_message('queue_task_completed', self.locale, task_id, elapsed))
+                    log_message(logger, logging.DEBUG, 'queue_task_completed', self.locale, task_id, elapsed)
 
                 except Exception as e:
                     # エラー発生時
                     error_msg = f"{type(e).__name__}: {str(e)}"
-                    print(self._get_message('queue_task_error', self.locale, task_id, error_msg))
-                    traceback.print_exc()
+                    log_message(logger, logging.ERROR, 'queue_task_error', self.locale, task_id, error_msg,
+                                exc_info=True)
+                    metrics.observe('task_run_seconds', time.time() - start_time)
+                    metrics.increment('tasks_failed')
+                    metrics.record_task_error(task_id)
 
                     # エラー情報を格納
-                    result_container["result"] = None
-                    result_container["error"] = e
-                    result_container["completed"] = True
+                    _complete(result_container, None, e)
 
                 finally:
-                    # 現在実行中のタスクIDをクリア
+                    # 現在実行中のタスクIDをクリア（切り離された後は新しいワーカーのタスクを消さない）
                     with self._current_task_lock:
-                        self._current_task_id = None
-
-                    # キューのタスク完了を通知
-                    self._queue.task_done()
+                        if self._running_tasks.get(index) == task_id:
+                            del self._running_tasks[index]
 
             except queue.Empty:
                 # タイムアウト（キューが空）
@@ -133,11 +371,10 @@ class ScriptExecutionQueue:
 
             except Exception as e:
                 # ワーカースレッド自体のエラー（回復不能）
-                print(self._get_message('queue_worker_fatal_error', self.locale, e))
-                traceback.print_exc()
+                log_message(logger, logging.CRITICAL, 'queue_worker_fatal_error', self.locale, e, exc_info=True)
                 break
 
-        print(self._get_message('queue_worker_stopped', self.locale))
+        log_message(logger, logging.INFO, 'queue_worker_stopped', self.locale)
 
     def enqueue_and_wait(
         self,
@@ -145,6 +382,10 @@ class ScriptExecutionQueue:
         task_id: Optional[str] = None,
         timeout: Optional[float] = None,
         *args,
+        cancel_token: Optional[CancellationToken] = None,
+        priority: int = 0,
+        cost_hint: Optional[float] = None,
+        cost_key: Optional[str] = None,
         **kwargs
     ) -> Any:
         """タスクをキューに追加し、完了まで待機
@@ -154,6 +395,10 @@ class ScriptExecutionQueue:
             task_id: タスクID（デバッグ用、Noneの場合は自動生成）
             timeout: タイムアウト秒数（Noneの場合は無制限）
             *args: task_callableの位置引数
+            cancel_token: タイムアウト時にキャンセルするトークン（task_callableにも cancel_token として渡す）
+            priority: 優先度（大きいほど先に実行、既定0、±MAX_PRIORITY に制限）
+            cost_hint: 予想実行時間（秒、Noneの場合は cost_key の実行履歴）
+            cost_key: 実行時間の履歴のキー（例: ノードのunique_idとスクリプトのハッシュ）
             **kwargs: task_callableのキーワード引数
 
         Returns:
@@ -162,6 +407,7 @@ class ScriptExecutionQueue:
         Raises:
             Exception: task_callable内で発生した例外
             TimeoutError: タイムアウト発生時
+            QueueFullError: 待機中のタスク数が上限に達している
         """
         if task_id is None:
             task_id = f"task_{threading.get_ident()}_{time.time()}"
@@ -169,66 +415,88 @@ class ScriptExecutionQueue:
         # ========================================
         # DIAG-2: ワーカースレッド生存確認
         # ========================================
-        worker_alive = self._worker_thread.is_alive() if self._worker_thread else False
-        queue_size_before = self._queue.qsize()
-        
-        print(self._get_message('queue_diag2_enqueue_call', self.locale, 
-                                task_id, worker_alive, queue_size_before, self._running))
-        
+        worker_alive = self._is_worker_alive()
+        if logger.isEnabledFor(logging.DEBUG):
+            log_message(logger, logging.DEBUG, 'queue_diag2_enqueue_call', self.locale,
+                        task_id, worker_alive, self._queue.qsize(), self._running)
+
         if not worker_alive:
-            print(self._get_message('queue_diag2_worker_stopped', self.locale,
-                                    self._running, self._worker_thread))
+            log_message(logger, logging.WARNING, 'queue_diag2_worker_stopped', self.locale,
+                        self._running, self._workers)
 
         # 結果格納用コンテナ（スレッド間共有）
         result_container: Dict[str, Any] = {
             "result": None,
             "error": None,
-            "completed": False
+            "done": threading.Event()
         }
 
+        # キャンセル用トークン（指定がない場合も開始前のタスクのキャンセルに使う）
+        if cancel_token is not None:
+            kwargs["cancel_token"] = cancel_token
+        else:
+            cancel_token = CancellationToken()
+
         # タスクアイテム作成
         task_item = {
             "task_id": task_id,
             "callable": task_callable,
             "args": args,
             "kwargs": kwargs,
-            "result_container": result_container
+            "result_container": result_container,
+            "cancel_token": cancel_token,
+            "priority": _clamp_priority(priority),
+            "cost_hint": cost_hint,
+            "cost_key": cost_key,
+            "worker_index": None  # 実行を開始したワーカーの枠（キャンセル時の切り離しに使う）
         }
 
-        # キューに追加
-        self._queue.put(task_item)
-        queue_size = self._queue.qsize()
-        print(self._get_message('queue_task_enqueued', self.locale, task_id, queue_size))
+        # キューに追加（待機数が上限に達している場合はすぐに拒否）
+        if not self._queue.put(task_item):
+            log_message(logger, logging.WARNING, 'queue_task_rejected', self.locale, task_id, self._queue.max_depth)
+            self._metrics.increment('tasks_rejected')
+            raise QueueFullError(self._get_message('queue_full', self.locale, task_id, self._queue.max_depth))
+        self._metrics.increment('tasks_enqueued')
+        if logger.isEnabledFor(logging.DEBUG):
+            log_message(logger, logging.DEBUG, 'queue_task_enqueued', self.locale, task_id, self._queue.qsize())
+
+        # 完了まで待機（ワーカーが done イベントをセットした時点で起床）
+        done = result_container["done"]
+        start_wait_time = time.monotonic()
+        diag_enabled = logger.isEnabledFor(logging.DEBUG)
+        while True:
+            # タイムアウトまでの残り時間（DIAG-3有効時は1秒ごとに起床）
+            wait_seconds = None
+            if timeout is not None:
+                wait_seconds = max(0.0, timeout - (time.monotonic() - start_wait_time))
+            if diag_enabled:
+                wait_seconds = DIAG_WAIT_INTERVAL if wait_seconds is None else min(wait_seconds, DIAG_WAIT_INTERVAL)
+            if done.wait(wait_seconds):
+                break
+            elapsed = time.monotonic() - start_wait_time
 
-        # 完了まで待機（ポーリング方式）
-        start_wait_time = time.time()
-        poll_count = 0
-        while not result_container["completed"]:
-            poll_count += 1
-            time.sleep(0.05)  # 50ms間隔でチェック
+            # タイムアウトチェック
+            if timeout is not None and elapsed >= timeout:
+                # タイムアウト時の詳細ログ
+                worker_alive_check = self._is_worker_alive()
+                log_message(logger, logging.WARNING, 'queue_diag3_timeout', self.locale,
+                            task_id, elapsed, worker_alive_check,
+                            self._queue.qsize(), self.get_current_task_id())
+                self._metrics.increment('tasks_timed_out')
+                self._metrics.record_task_timeout(task_id)
+                self._cancel_task(task_item, timeout)
+                raise TimeoutError(
+                    self._get_message('queue_task_timeout', self.locale, task_id, timeout)
+                )
 
             # ========================================
             # DIAG-3: タスク実行フロー詳細追跡（1秒ごと）
             # ========================================
-            if poll_count % 20 == 0:  # 20 * 0.05s = 1秒
-                elapsed = time.time() - start_wait_time
+            if diag_enabled:
                 current_task = self.get_current_task_id()
-                print(self._get_message('queue_diag3_waiting', self.locale,
-                                        task_id, elapsed, result_container['completed'],
-                                        current_task, self._queue.qsize()))
-
-            # タイムアウトチェック
-            if timeout is not None:
-                elapsed = time.time() - start_wait_time
-                if elapsed > timeout:
-                    # タイムアウト時の詳細ログ
-                    worker_alive_check = self._worker_thread.is_alive() if self._worker_thread else False
-                    print(self._get_message('queue_diag3_timeout', self.locale,
-                                            task_id, elapsed, worker_alive_check,
-                                            self._queue.qsize(), self.get_current_task_id()))
-                    raise TimeoutError(
-                        self._get_message('queue_task_timeout', self.locale, task_id, timeout)
-                    )
+                log_message(logger, logging.DEBUG, 'queue_diag3_waiting', self.locale,
+                            task_id, elapsed, done.is_set(),
+                            current_task, self._queue.qsize())
 
         # 結果を返却
         if result_container["error"] is not None:
@@ -237,10 +505,60 @@ class ScriptExecutionQueue:
 
         return result_container["result"]
 
+    def _cancel_task(self, task_item: Dict[str, Any], timeout: float):
+        """タイムアウトしたタスクをキャンセルする（実行中のタスクの停止はバックグラウンドで確認し、呼び出し元を待たせない）"""
+        task_id = task_item["task_id"]
+        cancel_token = task_item["cancel_token"]
+        result_container = task_item["result_container"]
+        cancel_token.cancel(self._get_message('queue_task_cancelled', self.locale, task_id, timeout))
+
+        # 開始前のタスクは待ち行列から取り除く（待機数の上限に数えない）
+        if self._queue.remove(task_item):
+            self._metrics.increment('tasks_skipped')
+            _complete(result_container, None, ScriptCancelled(cancel_token.reason))
+            return
+
+        # 実行中のタスクはループ・関数呼び出しの次のチェックで停止する
+        if result_container["done"].is_set():
+            return
+        watcher = threading.Thread(target=self._abandon_if_stuck, args=(task_item,), daemon=True,
+                                   name=f"EasyScripterCancel-{task_id}")
+        watcher.start()
+
+    def _abandon_if_stuck(self, task_item: Dict[str, Any]):
+        """キャンセルしたタスクが CANCEL_GRACE_SECONDS 以内に停止しない場合、ワーカースレッドを切り離す"""
+        task_id = task_item["task_id"]
+        if task_item["result_container"]["done"].wait(CANCEL_GRACE_SECONDS):
+            return
+
+        with self._current_task_lock:
+            index = task_item["worker_index"]
+            if index is None or self._running_tasks.get(index) != task_id:
+                return  # 開始前（ワーカーが取り出した時点でスキップされる）
+            # 停止しないタスクは切り離したスレッドに任せ、その枠の後続のタスクは新しいワーカーで実行
+            log_message(logger, logging.WARNING, 'queue_worker_abandoned', self.locale, task_id, CANCEL_GRACE_SECONDS)
+            del self._running_tasks[index]
+            self._spawn_worker(index)
+
+    def _is_worker_alive(self) -> bool:
+        """いずれかのワーカースレッドが動作中かどうか"""
+        return any(worker is not None and worker.is_alive() for worker in self._workers)
+
+    def get_worker_count(self) -> int:
+        """ワーカースレッド数を取得"""
+        return self._worker_count
+
     def get_current_task_id(self) -> Optional[str]:
-        """現在実行中のタスクIDを取得"""
+        """現在実行中のタスクIDを取得（複数実行中の場合は最小の枠のタスク）"""
+        with self._current_task_lock:
+            if not self._running_tasks:
+                return None
+            return self._running_tasks[min(self._running_tasks)]
+
+    def get_current_task_ids(self) -> List[str]:
+        """現在実行中のすべてのタスクIDを取得（ワーカーの枠の順）"""
         with self._current_task_lock:
-            return self._current_task_id
+            return [self._running_tasks[index] for index in sorted(self._running_tasks)]
 
     def get_queue_size(self) -> int:
         """キューの待機タスク数を取得"""
@@ -249,17 +567,30 @@ class ScriptExecutionQueue:
     def is_executing(self) -> bool:
         """現在タスク実行中かどうか"""
         with self._current_task_lock:
-            return self._current_task_id is not None
+            return bool(self._running_tasks)
+
+    def get_gauges(self) -> Dict[str, Any]:
+        """メトリクス用の現在値（待機数・上限・実行中の数・ワーカー数・動作中のワーカー数）"""
+        with self._current_task_lock:
+            running = len(self._running_tasks)
+        return {
+            "depth": self._queue.qsize(),
+            "max_depth": self._queue.max_depth,
+            "running": running,
+            "workers": self._worker_count,
+            "workers_alive": sum(1 for worker in self._workers if worker is not None and worker.is_alive()),
+        }
 
     def shutdown(self):
         """ワーカースレッドを停止（テスト用）"""
-        print(self._get_message('queue_shutdown_request', self.locale))
+        log_message(logger, logging.INFO, 'queue_shutdown_request', self.locale)
         self._running = False
 
-        if self._worker_thread is not None:
-            self._worker_thread.join(timeout=5.0)
+        for worker in self._workers:
+            if worker is not None:
+                worker.join(timeout=5.0)
 
-        print(self._get_message('queue_shutdown_complete', self.locale))
+        log_message(logger, logging.INFO, 'queue_shutdown_complete', self.locale)
 
 
 # モジュールレベルでの便利関数
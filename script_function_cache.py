@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptFunctionCache - CACHED修飾子付きユーザー定義関数の結果のメモ化
+
+目的:
+- FUNCTION Fib(n) CACHED のように宣言した関数は、引数の値が同じ呼び出しの結果を再利用する。
+  再帰で同じ引数を何度も計算する関数や、ループ内で同じ引数で呼ばれる関数の本体の実行を省く
+
+アーキテクチャ:
+- analyze_function(func_def): 関数本体を静的に解析し、FunctionPurity を _purity 属性に
+  キャッシュする（ASTCacheを通じて全エンジンで共有）。メモ化できない理由（reason）:
+    グローバル変数を参照しうる変数の読み出し
+        （特殊変数、パラメータ以外で読み出し時点までに代入されていない可能性がある変数。
+         未代入のローカル変数はグローバル変数にフォールバックするため）
+    配列の使用（配列要素の読み書き、ITEMS[]記法、DIM/REDIM/ARRAY/SPLIT文）
+    スクリプトと共有される変数（RETURN系・RELAY_OUTPUT）への代入
+    純粋でない（BuiltinDescriptor.pure が偽の）ビルトイン関数の呼び出し（PRINT / RAND / NOW / HTTP* など）
+    入れ子の関数定義
+  パラメータのデフォルト値は呼び出し元のスコープで評価されるため、変数を読み出せば対象外とする
+- ユーザー定義関数の呼び出し先（FunctionPurity.callees）は実行時まで確定しないため、
+  最初の呼び出し時に bind_function_cache() で呼び出し先をたどり、すべて純粋であることを確認する
+- 関数呼び出しと変数の引数は、同名のグローバル配列があれば配列として扱われる。
+  該当する名前（FunctionCache.guard_names）の配列が存在する間はメモ化を使わない
+- FunctionCache: 関数ごとのLRU（OrderedDict）。キーは引数の (型, 値) の並び（memo_key）で、
+  配列などスカラー以外の引数を含む呼び出しと、スカラー以外の戻り値はメモ化しない。
+  エラーになった呼び出しは記録しない
+- ScriptEngine.function_caches（関数名 → FunctionCache）は関数定義の実行時と reset() で破棄する
+  （呼び出し先の関数が再定義される場合があるため）
+
+使用方法:
+    FUNCTION Fib(n) CACHED
+        IF n < 2 THEN
+            Fib = n
+        ELSE
+            Fib = Fib(n - 1) + Fib(n - 2)
+        END IF
+    END FUNCTION
+"""
+
+import math
+from collections import OrderedDict
+from typing import Any, Iterable, Optional, Set, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .script_resolver import SPECIAL_VARIABLES, LINKED_RETURN_VARIABLES
+    from .builtin_functions import is_builtin_function, PURE_BUILTIN_FUNCTIONS
+    from .locales import get_message
+except ImportError:
+    from script_parser import ASTNode
+    from script_resolver import SPECIAL_VARIABLES, LINKED_RETURN_VARIABLES
+    from builtin_functions import is_builtin_function, PURE_BUILTIN_FUNCTIONS
+    from locales import get_message
+
+
+# 関数ごとに保持する結果の最大数
+DEFAULT_FUNCTION_CACHE_SIZE = 1024
+
+# 代入するとスクリプトの結果に影響する変数
+SHARED_VARIABLES = LINKED_RETURN_VARIABLES | frozenset(['RELAY_OUTPUT'])
+
+# メモ化する引数・戻り値の型
+_SCALAR_TYPES = (int, float, str, bool)
+
+# 配列を扱うノード
+_ARRAY_NODES = frozenset(['ARRAY_VAR', 'ARRAY_ACCESS', 'ASSIGN_ARRAY', 'ASSIGN_ARRAY_MULTI',
+                          'REDIM_STMT', 'ARRAY_STMT', 'SPLIT_STMT'])
+
+_MISSING = object()
+
+
+class FunctionPurity:
+    """関数本体の静的解析の結果"""
+
+    __slots__ = ('reason', 'callees', 'guard_names')
+
+    def __init__(self, reason: Optional[Tuple[str, Tuple[Any, ...]]], callees: Iterable[str], guard_names: Iterable[str]):
+        # メモ化できない最初の理由 (メッセージキー, 引数)、純粋な場合はNone
+        self.reason = reason
+        # 呼び出すユーザー定義関数（ビルトイン関数以外）の名前
+        self.callees = frozenset(callees)
+        # 同名のグローバル配列があると配列として扱われる名前（関数呼び出し・変数の引数）
+        self.guard_names = frozenset(guard_names)
+
+
+class _PurityScan:
+    """確実に代入済みの変数を追跡しながら関数本体を走査"""
+
+    def __init__(self):
+        self.function_name: Optional[str] = None
+        self.reason: Optional[Tuple[str, Tuple[Any, ...]]] = None
+        self.callees: Set[str] = set()
+        self.guard_names: Set[str] = set()
+
+    def reject(self, key: str, *args):
+        if self.reason is None:
+            self.reason = (key, args)
+
+    def block(self, statements: Any, assigned: Set[str]) -> Set[str]:
+        """ステートメントの並びを走査し、終了時点で確実に代入済みの変数を返す（assignedは変更しない）"""
+        assigned = set(assigned)
+        self.visit(statements, assigned)
+        return assigned
+
+    def visit(self, value: Any, assigned: Set[str]):
+        """ノードを走査（代入文の場合は assigned に変数名を追加）"""
+        if isinstance(value, (list, tuple)):
+            for item in value:
+                self.visit(item, assigned)
+            return
+        if not isinstance(value, ASTNode):
+            return
+        node_type = value.type
+        if node_type in ('LITERAL', 'EXIT'):
+            return
+        if node_type in _ARRAY_NODES:
+            self.reject('cached_reason_array')
+            return
+
+        if node_type in ('VARIABLE', 'HOISTED'):
+            name = value._name or value.name.upper()
+            if name in SPECIAL_VARIABLES or (name not in assigned and name != self.function_name):
+                self.reject('cached_reason_global_variable', value.name)
+
+        elif node_type == 'FUNCTION_CALL':
+            name = value.name.upper()
+            self.guard_names.add(name)
+            for arg in value.arguments:
+                if isinstance(arg, ASTNode) and arg.type == 'VARIABLE':
+                    self.guard_names.add(arg.name.upper())
+            if not is_builtin_function(name):
+                self.callees.add(name)
+            elif name not in PURE_BUILTIN_FUNCTIONS:
+                self.reject('cached_reason_impure_builtin', value.name)
+            self.visit(value.arguments, assigned)
+
+        elif node_type in ('ASSIGN', 'HOIST'):
+            self.visit(value.value, assigned)
+            name = value._name or value.variable.upper()
+            if name in SHARED_VARIABLES:
+                self.reject('cached_reason_shared_variable', value.variable)
+            assigned.add(name)
+
+        elif node_type == 'dim':
+            if value.sizes:
+                self.reject('cached_reason_array')
+            else:
+                assigned.add(value.array_name.upper())
+
+        elif node_type == 'IF':
+            # 条件が偽でELSE句がない場合も含め、すべての分岐で代入された変数だけが確実に代入済み
+            self.visit(value.condition, assigned)
+            branches = [self.block(value.then_branch, assigned)]
+            for condition, statements in getattr(value, 'elseif_branches', None) or ():
+                self.visit(condition, assigned)
+                branches.append(self.block(statements, assigned))
+            branches.append(self.block(value.else_branch, assigned))
+            assigned.update(set.intersection(*branches))
+
+        elif node_type == 'FOR':
+            # ループ本体が1回も実行されない場合があるため、本体での代入はループの後に持ち越さない
+            self.visit((value.start, value.end, getattr(value, 'step', None)), assigned)
+            self.block(value.body, assigned | {value._name or value.variable.upper()})
+
+        elif node_type == 'WHILE':
+            self.visit(value.condition, assigned)
+            self.block(value.body, assigned)
+
+        elif node_type == 'FUNCTION_DEF':
+            self.reject('cached_reason_nested_function')
+
+        else:
+            # SELECT CASE・演算子・RETURN文など（入れ子のステートメントの並びでの代入は持ち越さない）
+            for key, attr in list(vars(value).items()):
+                if key.startswith('_') or key == 'type':
+                    continue
+                if isinstance(attr, (list, tuple)):
+                    self.block(attr, assigned)
+                else:
+                    self.visit(attr, assigned)
+
+
+def analyze_function(func_def: ASTNode) -> FunctionPurity:
+    """関数本体を解析（初回のみ実行し、ノードにキャッシュ）"""
+    purity = getattr(func_def, '_purity', None)
+    if purity is None:
+        scan = _PurityScan()
+        # デフォルト値は呼び出し元のスコープで評価される（代入済みの変数はない）
+        for param in func_def.parameters:
+            if getattr(param, 'default_value', None) is not None:
+                scan.visit(param.default_value, set())
+        scan.function_name = func_def.name.upper()
+        scan.block(func_def.body, {param.name.upper() for param in func_def.parameters})
+        purity = FunctionPurity(scan.reason, scan.callees, scan.guard_names)
+        func_def._purity = purity
+    return purity
+
+
+def impure_error(func_def: ASTNode, reason: Tuple[str, Tuple[Any, ...]], locale: str) -> RuntimeError:
+    """メモ化できない関数のエラー"""
+    key, args = reason
+    return RuntimeError(get_message('error_cached_function_impure', locale, func_def.name,
+                                    get_message(key, locale, *args)))
+
+
+class FunctionCache:
+    """CACHED関数1つ分の引数 → 戻り値のLRU"""
+
+    __slots__ = ('guard_names', 'max_entries', '_entries')
+
+    def __init__(self, guard_names: Iterable[str], max_entries: int = DEFAULT_FUNCTION_CACHE_SIZE):
+        self.guard_names = frozenset(guard_names)
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Tuple[Any, ...], Any]' = OrderedDict()
+
+    def get(self, key: Tuple[Any, ...], default: Any = None) -> Any:
+        value = self._entries.get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def store(self, key: Tuple[Any, ...], value: Any):
+        """戻り値を記録（スカラー以外の値は記録しない）"""
+        if not isinstance(value, _SCALAR_TYPES):
+            return
+        entries = self._entries
+        entries[key] = value
+        if len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def memo_key(arguments: Iterable[Any]) -> Optional[Tuple[Any, ...]]:
+    """
+    引数の値からメモ化のキーを作成（スカラー以外の引数を含む場合はNone）
+
+    1 / 1.0 / True や 0.0 / -0.0 は等しい値として扱われるため、型と符号もキーに含める
+    """
+    key = []
+    for value in arguments:
+        value_type = value.__class__
+        if value_type not in _SCALAR_TYPES:
+            return None
+        if value_type is float and value == 0:
+            key.append((value_type, value, math.copysign(1.0, value)))
+        else:
+            key.append((value_type, value))
+    return tuple(key)
+
+
+def bind_function_cache(func_def: ASTNode, engine) -> FunctionCache:
+    """
+    CACHED関数の FunctionCache を作成
+
+    呼び出し先のユーザー定義関数を（再帰的に）たどり、すべて純粋であることを確認する。
+    純粋でない関数を呼び出す場合は RuntimeError を送出する
+    """
+    user_functions = engine.user_functions
+    guard_names: Set[str] = set()
+    visited = {func_def.name.upper()}
+    pending = [func_def]
+    while pending:
+        purity = analyze_function(pending.pop())
+        if purity.reason is not None:
+            raise impure_error(func_def, purity.reason, engine.locale)
+        guard_names.update(purity.guard_names)
+        for callee in purity.callees:
+            if callee in visited:
+                continue
+            visited.add(callee)
+            callee_def = user_functions.get(callee)
+            if callee_def is None or analyze_function(callee_def).reason is not None:
+                raise impure_error(func_def, ('cached_reason_impure_callee', (callee,)), engine.locale)
+            pending.append(callee_def)
+    return FunctionCache(guard_names)
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptLocks - リソース単位の名前付きロック
+
+目的:
+- ScriptExecutionQueue の複数ワーカーでスクリプトを並行実行する際、
+  本当に排他が必要な操作（VRAMFREE、同じパスへのOUTPUT、LOOP_SUBGRAPHのグラフ展開）だけを
+  リソース名ごとのロックで直列化する（キュー全体を直列化しない）
+
+アーキテクチャ:
+- 名前 → threading.RLock の WeakValueDictionary（使用中のロックだけを保持し、不要になれば解放される）
+- 同じスレッドからの再入を許す（RLock）
+- 取得・作成はレジストリ用のロックで保護する
+
+使用方法:
+    with get_named_lock('VRAMFREE'):
+        ...
+"""
+
+import threading
+import weakref
+
+_registry_lock = threading.Lock()
+_named_locks: 'weakref.WeakValueDictionary[str, threading.RLock]' = weakref.WeakValueDictionary()
+
+
+def get_named_lock(name: str):
+    """
+    リソース名に対応するロックを取得（存在しない場合は作成）
+
+    Args:
+        name: リソース名（例: 'VRAMFREE', 'OUTPUT:images/a.png'）
+
+    Returns:
+        同じ名前に対して同じ RLock（使用中の間）
+    """
+    with _registry_lock:
+        lock = _named_locks.get(name)
+        if lock is None:
+            lock = threading.RLock()
+            _named_locks[name] = lock
+        return lock
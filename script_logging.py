@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptLogging - EasyScripterのログ出力（loggingモジュールベース）
+
+目的:
+- 実行のたびにコンソールへ大量に出ていた診断用print()をログレベルで制御する
+- 無効なレベルのメッセージはget_message()によるフォーマット自体を行わない
+
+アーキテクチャ:
+- ロガー階層: "EasyScripter" の下にコンポーネント別ロガーを配置
+  （parser / engine / queue / node / loaders / cache / optimizer / process）
+- 出力先: 標準出力（従来のprint()と同じ見た目になるようメッセージのみを出力）。
+  ComfyUI本体のルートロガーへは伝播させない
+- レベル設定: 環境変数または configure_logging() で変更可能
+    EASYSCRIPTER_LOG_LEVEL              全コンポーネント共通（デフォルト: INFO）
+    EASYSCRIPTER_LOG_LEVEL_<COMPONENT>  コンポーネント別（例: EASYSCRIPTER_LOG_LEVEL_PARSER=DEBUG）
+- 遅延フォーマット: log_message() はレベルが有効な場合のみメッセージを組み立てる。
+  引数の計算自体が重い箇所は呼び出し側で logger.isEnabledFor() を確認すること
+
+使用方法:
+    logger = get_logger('queue')
+    log_message(logger, logging.DEBUG, 'queue_task_started', locale, task_id)
+"""
+
+import logging
+import os
+import sys
+import threading
+from typing import Any, Dict, Optional, Union
+
+try:
+    from .locales import get_message
+except ImportError:
+    from locales import get_message
+
+
+ROOT_LOGGER_NAME = 'EasyScripter'
+
+# ログレベルを個別に設定できるコンポーネント
+COMPONENTS = ('parser', 'engine', 'queue', 'node', 'loaders', 'cache', 'optimizer', 'process')
+
+# 本番環境でのデフォルトレベル（診断メッセージはDEBUGで出力される）
+DEFAULT_LOG_LEVEL = 'INFO'
+
+ENV_LOG_LEVEL = 'EASYSCRIPTER_LOG_LEVEL'
+
+_configure_lock = threading.Lock()
+_handler: Optional[logging.Handler] = None
+
+
+class LocalizedMessage:
+    """get_message() の呼び出しをハンドラーが出力する時点まで遅延させるメッセージ"""
+
+    __slots__ = ('key', 'locale', 'args')
+
+    def __init__(self, key: str, locale: str, args: tuple):
+        self.key = key
+        self.locale = locale
+        self.args = args
+
+    def __str__(self) -> str:
+        return get_message(self.key, self.locale, *self.args)
+
+
+def _parse_level(value: Union[str, int, None]) -> Optional[int]:
+    """レベル名（"DEBUG"など）または数値をloggingのレベル値に変換（不正な値はNone）"""
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    value = value.strip().upper()
+    if value.isdigit():
+        return int(value)
+    level = logging.getLevelName(value)
+    return level if isinstance(level, int) else None
+
+
+def configure_logging(level: Union[str, int, None] = None,
+                      component_levels: Optional[Dict[str, Union[str, int]]] = None):
+    """
+    ログレベルを設定する（モジュール読み込み時に環境変数の値で自動的に呼ばれる）
+
+    Args:
+        level: 全コンポーネント共通のレベル（Noneの場合は環境変数またはデフォルト値）
+        component_levels: コンポーネント名 → レベル（Noneの場合は環境変数の値）
+    """
+    global _handler
+    with _configure_lock:
+        root = logging.getLogger(ROOT_LOGGER_NAME)
+        if _handler is None:
+            _handler = logging.StreamHandler(sys.stdout)
+            _handler.setFormatter(logging.Formatter('%(message)s'))
+            root.addHandler(_handler)
+            root.propagate = False
+
+        root_level = _parse_level(level if level is not None else os.environ.get(ENV_LOG_LEVEL))
+        root.setLevel(root_level if root_level is not None else _parse_level(DEFAULT_LOG_LEVEL))
+
+        for component in COMPONENTS:
+            if component_levels is not None:
+                value = component_levels.get(component)
+            else:
+                value = os.environ.get(f"{ENV_LOG_LEVEL}_{component.upper()}")
+            # 個別設定がないコンポーネントは親（EasyScripter）のレベルに従う
+            component_level = _parse_level(value)
+            logging.getLogger(f"{ROOT_LOGGER_NAME}.{component}").setLevel(
+                component_level if component_level is not None else logging.NOTSET
+            )
+
+
+def get_logger(component: str) -> logging.Logger:
+    """コンポーネント用のロガーを取得（例: get_logger('parser')）"""
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{component}")
+
+
+def log_message(logger: logging.Logger, level: int, key: str, locale: str, *args: Any, **kwargs: Any):
+    """
+    ロケール対応メッセージをログに出力する（無効なレベルではフォーマットを行わない）
+
+    Args:
+        logger: get_logger() で取得したロガー
+        level: logging.DEBUG などのレベル
+        key: locales.MESSAGES のメッセージキー
+        locale: ロケール
+        *args: メッセージのフォーマット引数
+        **kwargs: logger.log() に渡す追加引数（exc_info など）
+    """
+    if logger.isEnabledFor(level):
+        logger.log(level, LocalizedMessage(key, locale, args), **kwargs)
+
+
+configure_logging()
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptMetrics - 実行キュー・エンジンのメトリクス
+
+目的:
+- コンソール出力以外に実行状況を把握する手段がなかったため、インスタンスのサイズ決め
+  （EASYSCRIPTER_WORKERS / EASYSCRIPTER_PROCESS_WORKERS / EASYSCRIPTER_MAX_QUEUE）に使える数値を集計し、
+  ComfyUIのサーバー（PromptServer）のルートで公開する（script_metrics_routes.py）
+
+アーキテクチャ:
+- MetricsRegistry（プロセス共通、get_metrics()）:
+    カウンター        タスクの投入・完了・失敗・タイムアウト・拒否・スキップ数、スクリプトのエラー数
+    ヒストグラム      キューの待ち時間（queue_wait_seconds）、タスクの実行時間（task_run_seconds）
+    タスクID別        エラー数・タイムアウト数（最近の TASK_ENTRY_LIMIT 件、JSONのみ）
+    ビルトイン関数別  呼び出し回数（ScriptEngine.builtin_calls を実行後に record_builtin_calls() で合算）
+    ゲージ            register_gauges() で登録した関数を snapshot() の時点で呼び出す
+                      （queue: 待機数・実行中の数など、ast_cache: ヒット率など、process_pool: プロセス数）
+- 公開: script_metrics_routes.register_routes() が JSON と format_prometheus() のテキスト形式で公開する
+  Prometheusにはタスク別の系列を出力しない（古いタスクIDを捨てるとカウンターが減って見え、
+  タスクIDの数だけ系列が増えるため）。件数は tasks_failed・tasks_timed_out・script_errors の合計で見る
+- このモジュールは ComfyUI（server・aiohttp）をインポートしない
+  （エンジン・コンパイラー・トランスパイラーと ' @PROCESS のワーカープロセスが COUNT_BUILTIN_CALLS を読み込むため）
+- ビルトイン関数別の呼び出し回数は1呼び出しごとの加算（約0.1µs）がループ中心のスクリプトで
+  数十%の負荷になるため、環境変数 EASYSCRIPTER_COUNT_BUILTINS=1 の場合のみ集計する
+  （コンパイル時・変換時に集計付きの呼び出しを選ぶので、無効時の実行経路は変わらない）
+
+使用方法:
+    metrics = get_metrics()
+    metrics.increment('tasks_enqueued')
+    metrics.observe('queue_wait_seconds', 0.012)
+    snapshot = metrics.snapshot()
+    text = format_prometheus(snapshot)
+"""
+
+import bisect
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+ENV_COUNT_BUILTINS = 'EASYSCRIPTER_COUNT_BUILTINS'
+METRIC_PREFIX = 'easyscripter'
+
+# 時間のヒストグラムのバケット（秒、上限）
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# タスクID別の集計を保持する件数（古いものから捨てる）
+TASK_ENTRY_LIMIT = 256
+
+COUNTERS = (
+    'tasks_enqueued', 'tasks_completed', 'tasks_failed', 'tasks_timed_out',
+    'tasks_rejected', 'tasks_skipped', 'script_errors',
+)
+
+HISTOGRAMS = ('queue_wait_seconds', 'task_run_seconds')
+
+
+def _read_count_builtins() -> bool:
+    """環境変数からビルトイン関数の呼び出し回数を集計するかを読み込む"""
+    return os.environ.get(ENV_COUNT_BUILTINS, '').strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+# プロセス起動時に決定（コンパイル済み・変換済みのコードは集計の有無を埋め込んでキャッシュされるため）
+COUNT_BUILTIN_CALLS = _read_count_builtins()
+
+_HELP = {
+    'tasks_enqueued': 'Tasks added to the execution queue',
+    'tasks_completed': 'Tasks that returned normally',
+    'tasks_failed': 'Tasks that raised an exception',
+    'tasks_timed_out': 'Tasks whose caller timed out',
+    'tasks_rejected': 'Tasks rejected because the queue was full',
+    'tasks_skipped': 'Tasks cancelled before they started',
+    'script_errors': 'Script runs that ended with an error',
+    'queue_wait_seconds': 'Time from enqueue until a worker started the task',
+    'task_run_seconds': 'Time a worker spent running the task',
+    'builtin_calls': 'Built-in function calls',
+}
+
+
+class Histogram:
+    """累積しないバケットの度数・合計・件数（出力時にPrometheusの累積形式に変換）"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds: Tuple[float, ...] = TIME_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 最後は +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """累積度数（le → 件数）・合計・件数"""
+        buckets = {}
+        total = 0
+        for bound, count in zip(self.bounds + (float('inf'),), self.counts):
+            total += count
+            buckets[_format_bound(bound)] = total
+        return {"buckets": buckets, "sum": self.sum, "count": self.count}
+
+
+def _format_bound(bound: float) -> str:
+    return '+Inf' if bound == float('inf') else repr(bound)
+
+
+class MetricsRegistry:
+    """プロセス共通のメトリクス（スレッドセーフ）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters: Dict[str, int] = {name: 0 for name in COUNTERS}
+        self.histograms: Dict[str, Histogram] = {name: Histogram() for name in HISTOGRAMS}
+        self.task_errors: 'OrderedDict[str, int]' = OrderedDict()
+        self.task_timeouts: 'OrderedDict[str, int]' = OrderedDict()
+        self.builtin_calls: Counter = Counter()
+        self._gauges: Dict[str, Callable[[], Mapping[str, Any]]] = {}
+
+    def increment(self, name: str, amount: int = 1):
+        """カウンターを加算"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float):
+        """ヒストグラムに値を記録"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(value)
+
+    def record_task_error(self, task_id: str):
+        """タスクID別のエラー数を加算"""
+        with self._lock:
+            _count_recent(self.task_errors, task_id)
+
+    def record_task_timeout(self, task_id: str):
+        """タスクID別のタイムアウト数を加算"""
+        with self._lock:
+            _count_recent(self.task_timeouts, task_id)
+
+    def record_builtin_calls(self, calls: Mapping[str, int]):
+        """1回の実行のビルトイン関数の呼び出し回数（ScriptEngine.builtin_calls）を合算"""
+        if calls:
+            with self._lock:
+                self.builtin_calls.update(calls)
+
+    def register_gauges(self, name: str, provider: Callable[[], Mapping[str, Any]]):
+        """snapshot() の時点で呼び出すゲージの関数を登録（同じ名前は置き換え）"""
+        with self._lock:
+            self._gauges[name] = provider
+
+    def snapshot(self) -> Dict[str, Any]:
+        """全メトリクスの現在値（JSONにそのまま変換できる辞書）"""
+        with self._lock:
+            data = {
+                "uptime_seconds": time.time() - self.started_at,
+                "builtin_counting": COUNT_BUILTIN_CALLS,
+                "counters": dict(self.counters),
+                "histograms": {name: histogram.snapshot() for name, histogram in self.histograms.items()},
+                "task_errors": dict(self.task_errors),
+                "task_timeouts": dict(self.task_timeouts),
+                "builtin_calls": dict(self.builtin_calls.most_common()),
+            }
+            providers = list(self._gauges.items())
+        # ゲージの関数は各コンポーネントのロックを取るため、レジストリのロックの外で呼び出す
+        data["gauges"] = {name: dict(provider()) for name, provider in providers}
+        return data
+
+
+def _count_recent(counts: 'OrderedDict[str, int]', key: str):
+    counts[key] = counts.get(key, 0) + 1
+    counts.move_to_end(key)
+    if len(counts) > TASK_ENTRY_LIMIT:
+        counts.popitem(last=False)
+
+
+_metrics = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """プロセス共通のMetricsRegistryを取得"""
+    return _metrics
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _metric_name(*parts: str) -> str:
+    name = "_".join((METRIC_PREFIX,) + parts)
+    return "".join(c if c.isalnum() or c == '_' else '_' for c in name)
+
+
+def _header(lines: List[str], name: str, metric_type: str, help_key: Optional[str] = None):
+    if help_key in _HELP:
+        lines.append(f"# HELP {name} {_HELP[help_key]}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def format_prometheus(snapshot: Dict[str, Any]) -> str:
+    """snapshot() の結果をPrometheusのテキスト形式に変換"""
+    lines: List[str] = []
+    name = _metric_name('uptime_seconds')
+    _header(lines, name, 'gauge')
+    lines.append(f"{name} {snapshot['uptime_seconds']:.3f}")
+
+    for counter, value in snapshot["counters"].items():
+        name = _metric_name(counter, 'total')
+        _header(lines, name, 'counter', counter)
+        lines.append(f"{name} {value}")
+
+    for histogram_name, histogram in snapshot["histograms"].items():
+        name = _metric_name(histogram_name)
+        _header(lines, name, 'histogram', histogram_name)
+        for bound, count in histogram["buckets"].items():
+            lines.append(f'{name}_bucket{{le="{bound}"}} {count}')
+        lines.append(f"{name}_sum {histogram['sum']:.6f}")
+        lines.append(f"{name}_count {histogram['count']}")
+
+    # タスクID別の集計（task_errors・task_timeouts）はJSONのみ
+    name = _metric_name('builtin_calls', 'total')
+    _header(lines, name, 'counter', 'builtin_calls')
+    for function, value in snapshot["builtin_calls"].items():
+        lines.append(f'{name}{{function="{_escape_label(function)}"}} {value}')
+
+    for group, gauges in snapshot["gauges"].items():
+        for gauge, value in gauges.items():
+            if isinstance(value, (int, float)):
+                name = _metric_name(group, gauge)
+                _header(lines, name, 'gauge')
+                lines.append(f"{name} {float(value)!r}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptMetricsRoutes - メトリクスのHTTPルート（ComfyUIのPromptServer）
+
+目的:
+- script_metrics.py（MetricsRegistry・COUNT_BUILTIN_CALLS）を ComfyUI に依存しないモジュールに保つ
+  （エンジン・コンパイラー・トランスパイラー、' @PROCESS のワーカープロセスも読み込むため、
+  aiohttp・server をインポートするのはこのモジュールだけにする）
+
+公開: GET METRICS_ROUTE
+- 既定はJSON（snapshot() と呼び出し回数の多いビルトイン関数 busiest_builtins）
+- ?format=prometheus または Accept: text/plain（Prometheusのスクレイパー）の場合は
+  Prometheusのテキスト形式（format_prometheus()、メトリクス名は easyscripter_ で始まる）
+
+使用方法:
+    register_routes()    # __init__.py から呼び出す（PromptServerがない環境では何もしない）
+"""
+
+try:
+    from aiohttp import web
+    from server import PromptServer
+    HAS_PROMPT_SERVER = True
+except ImportError:
+    HAS_PROMPT_SERVER = False
+
+try:
+    from .script_metrics import format_prometheus, get_metrics
+except ImportError:
+    from script_metrics import format_prometheus, get_metrics
+
+METRICS_ROUTE = '/u5/easyscripter/metrics'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# JSONに含める呼び出し回数の多いビルトイン関数の数
+BUSIEST_BUILTINS = 20
+
+
+def _wants_prometheus(request) -> bool:
+    """?format=prometheus、またはJSONを求めずにtext/plainを受け付けるクライアント（Prometheus）"""
+    requested = request.query.get('format', '').lower()
+    if requested:
+        return requested in ('prometheus', 'text')
+    accept = request.headers.get('Accept', '')
+    return 'text/plain' in accept and 'application/json' not in accept
+
+
+def register_routes() -> bool:
+    """PromptServerに METRICS_ROUTE を登録（登録できない環境ではFalse）"""
+    if not HAS_PROMPT_SERVER or getattr(PromptServer, 'instance', None) is None:
+        return False
+
+    @PromptServer.instance.routes.get(METRICS_ROUTE)
+    async def easyscripter_metrics(request):
+        snapshot = get_metrics().snapshot()
+        if _wants_prometheus(request):
+            return web.Response(body=format_prometheus(snapshot).encode('utf-8'),
+                                headers={'Content-Type': PROMETHEUS_CONTENT_TYPE})
+        snapshot["busiest_builtins"] = list(snapshot["builtin_calls"].items())[:BUSIEST_BUILTINS]
+        return web.json_response(snapshot)
+
+    return True
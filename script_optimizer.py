@@ -0,0 +1,497 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptOptimizer - AST最適化パイプライン（定数畳み込み・不要分岐の除去・ループ不変式の巻き上げ）
+
+目的:
+- テンプレートから生成されたスクリプトに多い "a" & "b" や 2*512 のような定数式、
+  条件が定数のIF文、ループ内で毎回同じ値を計算しているビルトイン関数呼び出しを実行前に整理する
+
+アーキテクチャ:
+- ScriptParser.parse() と実行の間で動作する（ScriptEngine(optimize=True) で有効化）
+- 最適化は元のASTを複製してから行い、結果は元のASTとは別エントリとしてASTCacheに保持される
+- パス（DEFAULT_PASSES の順に実行）:
+    ConstantFolding         リテラルだけの二項・単項演算を engine.evaluate_binary_op /
+                            evaluate_unary_op で計算してリテラルに置き換える
+                            （実行時エラーになる式はそのまま残す）
+    DeadBranchElimination   条件が定数のIF/ELSEIF、条件が偽のWHILEを除去する
+    LoopInvariantHoisting   FOR/WHILEの本体（WHILEは条件式も）に含まれる、引数がループ内で
+                            変化しない純粋なビルトイン関数呼び出しをループの直前に移動する
+- 巻き上げた呼び出しは HOIST ステートメント（ループ直前で評価して隠し変数 $HOISTn に保存）と
+  HOISTED 式（保存した値の参照）に置き換わる。評価時の例外は HoistedResult に保存しておき、
+  元の呼び出し位置で送出するため、ループが1回も実行されない場合もエラーの有無は変わらない
+- PURE_FUNCTIONS: 巻き上げてよいビルトイン関数（引数だけで結果が決まり、副作用がなく、
+  配列を返さないもの）。RAND / NOW / HTTP* / INPUT / OUTPUT / PRINT などは含めない
+- 各パスは除去・移動したASTノード数を数え、OptimizationResult.eliminated にパス名ごとに記録する
+
+使用方法:
+    engine = ScriptEngine(optimize=True)
+    engine.execute(script)
+
+    result = ASTOptimizer(engine).optimize(ast)
+    result.statements, result.eliminated
+"""
+
+import json
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .script_call_site import bind_call_site, CALL_BUILTIN
+    from .script_array import ScriptArray, GridArray
+    from .script_logging import get_logger
+    from .builtin_functions import PURE_BUILTIN_FUNCTIONS
+except ImportError:
+    from script_parser import ASTNode
+    from script_call_site import bind_call_site, CALL_BUILTIN
+    from script_array import ScriptArray, GridArray
+    from script_logging import get_logger
+    from builtin_functions import PURE_BUILTIN_FUNCTIONS
+
+logger = get_logger('optimizer')
+
+
+# ループの外へ移動してよいビルトイン関数
+# （引数だけで結果が決まり、副作用がなく、スカラー値を返すもの。BuiltinDescriptor.pure）
+PURE_FUNCTIONS = PURE_BUILTIN_FUNCTIONS
+
+# 隠し変数名の接頭辞（スクリプトの識別子には使えない文字で始める）
+HOIST_VARIABLE_PREFIX = '$HOIST'
+
+# ScriptEngine.call_function で処理される関数のうち、スクリプトの変数・配列を書き換えないもの
+_READ_ONLY_FUNCTIONS = frozenset([
+    'PRINT', 'OUTPUT', 'INPUT', 'ISFILEEXIST', 'UBOUND', 'LBOUND', 'ISARRAY', 'JOIN',
+    'GETANYTYPE', 'GETANYWIDTH', 'GETANYHEIGHT', 'GETANYVALUEINT', 'GETANYVALUEFLOAT', 'GETANYSTRING',
+])
+
+# 引数で指定した配列を書き換える関数
+_ARRAY_WRITING_FUNCTIONS = frozenset(['SPLIT', 'REDIM', 'ARRAY'])
+
+# ステートメントの並びを持つ属性（ノード種別 → 属性名）
+_STATEMENT_BLOCKS = {
+    'IF': ('then_branch', 'else_branch'),
+    'WHILE': ('body',),
+    'FOR': ('body',),
+    'FUNCTION_DEF': ('body',),
+    'CASE': ('statements',),
+    'SELECT_CASE': ('else_case',),
+}
+
+# 配列・変数を書き換えるステートメント（ノード種別 → 対象の名前を持つ属性）
+_TARGET_ATTRIBUTES = {
+    'ASSIGN': 'variable',
+    'FOR': 'variable',
+    'HOIST': 'variable',
+    'ASSIGN_ARRAY': 'array',
+    'ASSIGN_ARRAY_MULTI': 'array',
+    'dim': 'array_name',
+    'REDIM_STMT': 'array_name',
+    'ARRAY_STMT': 'array_name',
+    'SPLIT_STMT': 'array_name',
+}
+
+
+class HoistedResult:
+    """巻き上げた呼び出しの結果のうち、変数にそのまま保存できないもの（例外・配列）"""
+
+    __slots__ = ('value', 'error')
+
+    def __init__(self, value: Any = None, error: Optional[BaseException] = None):
+        self.value = value
+        self.error = error
+
+    def unwrap(self) -> Any:
+        """元の呼び出し位置での評価結果を返す（評価時の例外はここで送出）"""
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def evaluate_hoisted(engine, expression: Any) -> Any:
+    """HOISTステートメントの式を評価（例外・配列は HoistedResult に包む）"""
+    try:
+        value = engine.evaluate_expression(expression)
+    except Exception as e:
+        return HoistedResult(error=e)
+    if isinstance(value, (list, dict, ScriptArray, GridArray)):
+        return HoistedResult(value=value)
+    return value
+
+
+class OptimizationResult:
+    """最適化済みのステートメントと、パスごとの除去ノード数"""
+
+    __slots__ = ('statements', 'eliminated')
+
+    def __init__(self, statements: List[Any], eliminated: Dict[str, int]):
+        self.statements = statements
+        self.eliminated = eliminated
+
+
+def clone_ast(value: Any) -> Any:
+    """ASTを複製（_で始まる実行時キャッシュ・解決結果は複製しない）"""
+    if isinstance(value, ASTNode):
+        fields = {key: clone_ast(attr) for key, attr in list(vars(value).items())
+                  if key != 'type' and not key.startswith('_')}
+        return ASTNode(value.type, **fields)
+    if isinstance(value, (list, tuple)):
+        return [clone_ast(item) for item in value]
+    return value
+
+
+def count_nodes(value: Any) -> int:
+    """AST内のノード数を数える"""
+    if isinstance(value, ASTNode):
+        return 1 + sum(count_nodes(attr) for key, attr in list(vars(value).items()) if not key.startswith('_'))
+    if isinstance(value, (list, tuple)):
+        return sum(count_nodes(item) for item in value)
+    return 0
+
+
+def is_literal(node: Any) -> bool:
+    return isinstance(node, ASTNode) and node.type == 'LITERAL'
+
+
+def make_literal(value: Any) -> ASTNode:
+    if isinstance(value, str):
+        return ASTNode('LITERAL', value=value, datatype='STRING')
+    if isinstance(value, bool):
+        return ASTNode('LITERAL', value=value, datatype='BOOL')
+    return ASTNode('LITERAL', value=value, datatype='NUMBER')
+
+
+class OptimizationPass:
+    """
+    最適化パスの基底クラス
+
+    statement() はステートメントを置き換えるステートメントのリストを、
+    expression() は置き換える式を返す。既定の実装は子ノードを再帰的に処理するだけ。
+    """
+
+    name = 'pass'
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.eliminated = 0
+
+    def run(self, statements: List[Any]) -> List[Any]:
+        return self.block(statements)
+
+    def block(self, statements: Any) -> Any:
+        if not statements:
+            return statements
+        result = []
+        for statement in statements:
+            result.extend(self.statement(statement))
+        return result
+
+    def statement(self, node: Any) -> List[Any]:
+        self.visit_children(node)
+        return [node]
+
+    def expression(self, node: Any) -> Any:
+        self.visit_children(node)
+        return node
+
+    def visit_children(self, node: Any):
+        """子ノードを処理（ステートメントの並びは block()、それ以外は expression()）"""
+        if not isinstance(node, ASTNode):
+            return
+        blocks = _STATEMENT_BLOCKS.get(node.type, ())
+        for key, attr in list(vars(node).items()):
+            if key.startswith('_') or key == 'type':
+                continue
+            if key in blocks:
+                setattr(node, key, self.block(attr))
+            elif node.type == 'IF' and key == 'elseif_branches':
+                setattr(node, key, [(self.expression(condition), self.block(statements))
+                                    for condition, statements in (attr or ())])
+            elif node.type == 'SELECT_CASE' and key == 'cases':
+                for case in attr:
+                    self.visit_children(case)
+            elif node.type == 'FUNCTION_DEF' and key == 'parameters':
+                for parameter in attr:
+                    self.visit_children(parameter)
+            elif isinstance(attr, ASTNode):
+                setattr(node, key, self.expression(attr))
+            elif isinstance(attr, (list, tuple)):
+                setattr(node, key, [self.expression(item) for item in attr])
+
+
+class ConstantFolding(OptimizationPass):
+    """リテラルだけの演算をリテラルに置き換える"""
+
+    name = 'constant_folding'
+
+    def expression(self, node: Any) -> Any:
+        self.visit_children(node)
+        if not isinstance(node, ASTNode):
+            return node
+        if node.type == 'BINARY_OP':
+            left, right = node.left, node.right
+            if is_literal(left) and node.operator in ('AND', 'OR'):
+                # 短絡評価で右辺が評価されない場合は右辺ごと除去できる
+                left_true = self.engine.is_true(left.value)
+                if node.operator == 'AND' and not left_true:
+                    return self.fold(node, 0.0)
+                if node.operator == 'OR' and left_true:
+                    return self.fold(node, 1.0)
+            if is_literal(left) and is_literal(right):
+                try:
+                    value = self.engine.evaluate_binary_op(node.operator, left.value, right.value)
+                except Exception:
+                    return node  # 実行時エラー（ゼロ除算など）はそのまま残す
+                return self.fold(node, value)
+        elif node.type == 'UNARY_OP' and is_literal(node.operand):
+            try:
+                value = self.engine.evaluate_unary_op(node.operator, node.operand.value)
+            except Exception:
+                return node
+            return self.fold(node, value)
+        return node
+
+    def fold(self, node: ASTNode, value: Any) -> Any:
+        if type(value) not in (float, int, str, bool):
+            return node  # 複素数などリテラルで表せない値は畳み込まない
+        self.eliminated += count_nodes(node) - 1
+        return make_literal(value)
+
+
+class DeadBranchElimination(OptimizationPass):
+    """条件が定数の分岐を除去する"""
+
+    name = 'dead_branches'
+
+    def statement(self, node: Any) -> List[Any]:
+        self.visit_children(node)
+        if not isinstance(node, ASTNode):
+            return [node]
+        if node.type == 'IF':
+            return self.prune_if(node)
+        if node.type == 'WHILE' and is_literal(node.condition) and not self.engine.is_true(node.condition.value):
+            self.eliminated += count_nodes(node)
+            return []
+        return [node]
+
+    def prune_if(self, node: ASTNode) -> List[Any]:
+        branches = [(node.condition, node.then_branch)] + list(getattr(node, 'elseif_branches', None) or [])
+        else_branch = node.else_branch
+        remaining = []
+        for index, (condition, statements) in enumerate(branches):
+            if not is_literal(condition):
+                remaining.append((condition, statements))
+                continue
+            if self.engine.is_true(condition.value):
+                # 常に真の条件: 以降の分岐は実行されないため、この分岐をELSEとして扱う
+                self.eliminated += count_nodes(condition) + count_nodes(else_branch)
+                self.eliminated += sum(count_nodes(c) + count_nodes(s) for c, s in branches[index + 1:])
+                else_branch = statements
+                break
+            # 常に偽の条件: 分岐ごと除去
+            self.eliminated += count_nodes(condition) + count_nodes(statements)
+
+        if not remaining:
+            # IF文自体を除去し、実行される側のステートメントを展開
+            self.eliminated += 1
+            return list(else_branch or [])
+        if len(remaining) == len(branches) and else_branch is node.else_branch:
+            return [node]
+        node.condition, node.then_branch = remaining[0]
+        node.elseif_branches = remaining[1:]
+        node.else_branch = else_branch
+        return [node]
+
+
+class LoopInvariantHoisting(OptimizationPass):
+    """ループ内で結果が変わらない純粋なビルトイン関数呼び出しをループの直前に移動する"""
+
+    name = 'loop_invariant_hoisting'
+
+    def __init__(self, engine):
+        super().__init__(engine)
+        self.hoist_count = 0
+        self.function_name: Optional[str] = None
+
+    def statement(self, node: Any) -> List[Any]:
+        if not isinstance(node, ASTNode):
+            return [node]
+        if node.type == 'FUNCTION_DEF':
+            outer, self.function_name = self.function_name, node.name.upper()
+            self.visit_children(node)
+            self.function_name = outer
+            return [node]
+        # 内側のループから処理する（外側のループでさらに巻き上げられる場合がある）
+        self.visit_children(node)
+        if node.type in ('FOR', 'WHILE'):
+            return self.hoist(node) + [node]
+        return [node]
+
+    def hoist(self, loop: ASTNode) -> List[ASTNode]:
+        variant = self.loop_variant_names(loop)
+        if variant is None:
+            return []
+        hoisted: Dict[str, ASTNode] = {}  # 同じ呼び出しは1つの隠し変数を共有
+
+        def replace(node: Any) -> Any:
+            if isinstance(node, ASTNode) and node.type == 'FUNCTION_CALL' and self.is_invariant(node, variant):
+                key = json.dumps(_structure(node), sort_keys=True)
+                statement = hoisted.get(key)
+                if statement is None:
+                    self.hoist_count += 1
+                    # 事前評価はループの行で実行する（プロファイラの集計もループの行）
+                    statement = ASTNode('HOIST', variable=f"{HOIST_VARIABLE_PREFIX}{self.hoist_count}", value=node,
+                                        line=loop.line)
+                    hoisted[key] = statement
+                self.eliminated += count_nodes(node)
+                return ASTNode('HOISTED', name=statement.variable)
+            _ExpressionRewriter(replace).visit_children(node)
+            return node
+
+        rewriter = _ExpressionRewriter(replace)
+        if loop.type == 'WHILE':
+            loop.condition = replace(loop.condition)
+        loop.body = rewriter.block(loop.body)
+        return list(hoisted.values())
+
+    def loop_variant_names(self, loop: ASTNode) -> Optional[Set[str]]:
+        """ループ内で値が変わりうる変数・配列名（解析できない構文を含む場合はNone）"""
+        names: Set[str] = set()
+        if not _collect_variant_names(loop, names):
+            return None
+        if 'RETURN' in names or 'RETURN1' in names:
+            # RETURNとRETURN1は連動する
+            names.update(('RETURN', 'RETURN1'))
+        if self.function_name is not None and _contains_type(loop, 'RETURN'):
+            # 関数内のRETURN文は関数名（戻り値）を書き換える
+            names.add(self.function_name)
+        return names
+
+    def is_invariant(self, node: Any, variant: Set[str]) -> bool:
+        """式がループ内で同じ値になり、副作用がないか"""
+        if not isinstance(node, ASTNode):
+            return True
+        node_type = node.type
+        if node_type == 'LITERAL':
+            return True
+        if node_type in ('VARIABLE', 'HOISTED', 'ARRAY_VAR'):
+            return node.name.upper() not in variant
+        if node_type == 'ARRAY_ACCESS':
+            return node.array.upper() not in variant and self.is_invariant(node.index, variant)
+        if node_type == 'BINARY_OP':
+            return self.is_invariant(node.left, variant) and self.is_invariant(node.right, variant)
+        if node_type == 'UNARY_OP':
+            return self.is_invariant(node.operand, variant)
+        if node_type == 'FUNCTION_CALL':
+            site = bind_call_site(node)
+            # 同名の配列が作成される可能性がある場合は配列アクセスになりうる
+            return (site.kind == CALL_BUILTIN and site.name in PURE_FUNCTIONS and site.name not in variant
+                    and all(self.is_invariant(arg, variant) for arg in node.arguments))
+        return False
+
+
+class _ExpressionRewriter(OptimizationPass):
+    """式の位置にあるノードを関数で置き換える（LoopInvariantHoistingの補助）"""
+
+    def __init__(self, replace):
+        super().__init__(None)
+        self.replace = replace
+
+    def statement(self, node: Any) -> List[Any]:
+        if isinstance(node, ASTNode) and node.type == 'FUNCTION_DEF':
+            return [node]  # 関数本体は別のスコープ
+        self.visit_children(node)
+        return [node]
+
+    def expression(self, node: Any) -> Any:
+        return self.replace(node)
+
+
+def _structure(value: Any) -> Any:
+    """呼び出しの同一性判定用の構造（ノード種別と属性）"""
+    if isinstance(value, ASTNode):
+        return {key: _structure(attr) for key, attr in list(vars(value).items()) if not key.startswith('_')}
+    if isinstance(value, (list, tuple)):
+        return [_structure(item) for item in value]
+    if isinstance(value, float):
+        return repr(value)
+    return value
+
+
+def _contains_type(value: Any, node_type: str) -> bool:
+    if isinstance(value, ASTNode):
+        if value.type == node_type:
+            return True
+        return any(_contains_type(attr, node_type) for key, attr in list(vars(value).items()) if not key.startswith('_'))
+    if isinstance(value, (list, tuple)):
+        return any(_contains_type(item, node_type) for item in value)
+    return False
+
+
+def _collect_variant_names(value: Any, names: Set[str]) -> bool:
+    """
+    ループ内で書き換えられる変数・配列名を収集
+
+    SPLIT / REDIM / ARRAY は引数で指定した配列を書き換えるため、引数の変数名・配列名・
+    文字列リテラルも対象に含める。ユーザー定義関数（グローバル配列やRETURNを書き換えうる）や
+    PYEXEC などの呼び出し、関数定義を含む場合は解析できないためFalseを返す。
+    """
+    if isinstance(value, ASTNode):
+        node_type = value.type
+        if node_type == 'FUNCTION_DEF':
+            return False
+        if node_type == 'RETURN':
+            names.add('RETURN')
+        target = _TARGET_ATTRIBUTES.get(node_type)
+        if target is not None:
+            name = getattr(value, target, None)
+            if isinstance(name, str):
+                names.add(name.upper())
+        if node_type == 'FUNCTION_CALL':
+            site = bind_call_site(value)
+            if site.kind != CALL_BUILTIN and site.name not in _READ_ONLY_FUNCTIONS:
+                if site.name not in _ARRAY_WRITING_FUNCTIONS:
+                    return False
+                for arg in value.arguments:
+                    if isinstance(arg, ASTNode):
+                        if arg.type in ('VARIABLE', 'ARRAY_VAR'):
+                            names.add(arg.name.upper())
+                        elif arg.type == 'LITERAL' and isinstance(arg.value, str):
+                            names.add(arg.value.upper())
+        for key, attr in list(vars(value).items()):
+            if not key.startswith('_') and not _collect_variant_names(attr, names):
+                return False
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_collect_variant_names(item, names) for item in value)
+    return True
+
+
+# 既定のパイプライン
+DEFAULT_PASSES = (ConstantFolding, DeadBranchElimination, LoopInvariantHoisting)
+
+
+class ASTOptimizer:
+    """
+    最適化パイプライン
+
+    Args:
+        engine: 定数畳み込みで演算の評価に使用するScriptEngine
+        passes: 実行するパスのクラス（既定は DEFAULT_PASSES）
+    """
+
+    def __init__(self, engine, passes: Tuple[type, ...] = DEFAULT_PASSES):
+        self.engine = engine
+        self.passes = passes
+
+    def optimize(self, statements: Any) -> OptimizationResult:
+        """ASTを複製して最適化する（元のASTは変更しない）"""
+        optimized = clone_ast(list(statements))
+        eliminated: Dict[str, int] = {}
+        for pass_class in self.passes:
+            optimization_pass = pass_class(self.engine)
+            optimized = optimization_pass.run(optimized)
+            eliminated[optimization_pass.name] = optimization_pass.eliminated
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("[ScriptOptimizer] Eliminated nodes per pass: %s",
+                         ", ".join(f"{name}={count}" for name, count in eliminated.items()))
+        return OptimizationResult(optimized, eliminated)
@@ -4,16 +4,21 @@ VBA風スクリプトパーサー
 """
 
 # バージョン情報（Raw文字列リテラル対応版）
-PARSER_VERSION = "2.1.0-raw-string-support"
-PARSER_BUILD_DATE = "2025-01-21"
+PARSER_VERSION = "2.3.0-line-numbers"
+PARSER_BUILD_DATE = "2026-10-18"
 
+import logging
 import re
-from typing import List, Any, Optional, Union
+from typing import List, Any, Iterator, Optional, Union
 
 try:
     from .locales import get_message
+    from .script_logging import get_logger, log_message
 except ImportError:
     from locales import get_message
+    from script_logging import get_logger, log_message
+
+logger = get_logger('parser')
 
 class Token:
     """トークンクラス"""
@@ -25,6 +30,14 @@ class Token:
 
 class ASTNode:
     """Abstract Syntax Tree ノード"""
+    # 変数参照の解決結果（script_resolver.py が設定。未解決の場合はNone）
+    _name = None
+    _slot = None
+    # 文字列の追記（X = X & 式）の変数ノードと式の並び（script_string_builder.py が設定）
+    _append = None
+    # ステートメントのソース上の行番号（1始まり、parse_statement が設定。式のノードはNone）
+    line = None
+
     def __init__(self, type_: str, **kwargs):
         self.type = type_
         for key, value in kwargs.items():
@@ -121,15 +134,83 @@ class ScriptParser:
         self.locale = locale  # デフォルトで日本語
         self.tokens = []
         self.current = 0
-        # バージョン情報をコンソールに出力
-        print(f"[ScriptParser] Version: {PARSER_VERSION} (Build: {PARSER_BUILD_DATE})")
+        # バージョン情報を出力（DEBUGレベル）
+        logger.debug("[ScriptParser] Version: %s (Build: %s)", PARSER_VERSION, PARSER_BUILD_DATE)
+
+    # 空白スキップ用（tokenize内で毎回生成しないようクラス定義時にコンパイル）
+    _WHITESPACE_REGEX = re.compile(r'[ \t]*')
+
+    @classmethod
+    def _get_token_regex(cls):
+        """
+        TOKEN_PATTERNSを1本の正規表現に結合して返す（クラスごとに1回だけ構築）
+
+        各パターンは名前付きグループ T0, T1, ... として順番通りに連結されるため、
+        「先に定義されたパターンを優先する」という従来のマッチ順序はそのまま保たれる。
+
+        Returns:
+            (結合済み正規表現, {グループ名: (トークン種別, 値グループ番号またはNone)})
+        """
+        # サブクラスでTOKEN_PATTERNSを上書きした場合はそのクラス用に再構築する
+        if '_token_regex' not in cls.__dict__:
+            parts = []
+            group_info = {}
+            group_index = 0
+            for i, (pattern, token_type) in enumerate(cls.TOKEN_PATTERNS):
+                # 行頭アンカーは match(line, pos) では不要（posの位置から照合される）
+                body = pattern[1:] if pattern.startswith('^') else pattern
+                group_name = f'T{i}'
+                group_index += 1
+                inner_groups = re.compile(body).groups
+                # 文字列リテラル等はパターン内の最初のグループが値を表す
+                value_group = group_index + 1 if inner_groups else None
+                group_index += inner_groups
+                group_info[group_name] = (token_type, value_group)
+                parts.append(f'(?P<{group_name}>{body})')
+            cls._token_regex = re.compile('|'.join(parts), re.IGNORECASE)
+            cls._token_group_info = group_info
+        return cls._token_regex, cls._token_group_info
+
+    @staticmethod
+    def _strip_inline_comment(line: str) -> str:
+        """文字列リテラル外の ' 以降（インラインコメント）を除去"""
+        if "'" not in line:
+            return line
+
+        in_string = False
+        i = 0
+        length = len(line)
+        while i < length:
+            char = line[i]
+            if char == '\\':
+                # エスケープ: 次の1文字はそのまま残す
+                i += 2
+                continue
+            if char == '"':
+                in_string = not in_string
+            elif char == "'" and not in_string:
+                # ここから行末までコメント
+                return line[:i]
+            i += 1
+        return line
 
     def tokenize(self, script: str) -> List[Token]:
         """スクリプトをトークンに分解"""
-        tokens = []
-        lines = script.split('\n')
+        return list(self.iter_tokens(script))
 
-        for line_num, line in enumerate(lines):
+    def iter_tokens(self, script: str) -> Iterator[Token]:
+        """
+        スクリプトを1行ずつトークン化して順次返すジェネレータ
+
+        is_end_of_line は行単位で確定させてから返すため、
+        tokenize() と全く同じTokenの並びになる。
+        """
+        token_regex, group_info = self._get_token_regex()
+        skip_whitespace = self._WHITESPACE_REGEX.match
+        # 文字列トークンの診断ログはDEBUG有効時のみ（判定はスクリプトごとに1回）
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
+
+        for line_num, line in enumerate(script.split('\n')):
             line = line.strip()
             if not line:
                 continue
@@ -142,125 +223,84 @@ class ScriptParser:
                 continue
 
             # インラインコメント処理: 文字列リテラル外の ' 以降を除去
-            # 文字列リテラル内の ' は保護する必要がある
-            processed_line = ""
-            in_string = False
-            escape_next = False
-            i = 0
-
-            while i < len(line):
-                char = line[i]
-
-                # エスケープ処理
-                if escape_next:
-                    processed_line += char
-                    escape_next = False
-                    i += 1
-                    continue
-
-                if char == '\\':
-                    processed_line += char
-                    escape_next = True
-                    i += 1
-                    continue
-
-                # ダブルクォート処理
-                if char == '"':
-                    in_string = not in_string
-                    processed_line += char
-                    i += 1
-                    continue
-
-                # インラインコメント検出（文字列外のみ）
-                if char == "'" and not in_string:
-                    # ここから行末までコメント
-                    break
-
-                processed_line += char
-                i += 1
-
             # 処理後の行が空になった場合はスキップ
-            line = processed_line.strip()
+            line = self._strip_inline_comment(line).strip()
             if not line:
                 continue
 
-            # この行の開始トークンインデックスを記録
-            line_start_token_idx = len(tokens)
-
+            line_tokens = []
+            line_length = len(line)
             pos = 0
-            while pos < len(line):
+            while pos < line_length:
                 # 空白をスキップ
-                while pos < len(line) and line[pos] in ' \t':
-                    pos += 1
-                if pos >= len(line):
+                pos = skip_whitespace(line, pos).end()
+                if pos >= line_length:
                     break
 
-                # トークンマッチング
-                matched = False
-                for pattern, token_type in self.TOKEN_PATTERNS:
-                    regex = re.compile(pattern, re.IGNORECASE)
-                    match = regex.match(line[pos:])
-                    if match:
-                        value = match.group(0)
-                        # Raw文字列リテラルの場合、エスケープ処理を最小限にする
-                        if token_type == 'RAW_STRING':
-                            # グループ1が存在すれば（括弧でキャプチャされた部分）それを使用
-                            original_value = match.group(0)
-                            value = match.group(1) if match.groups() else value[2:-1]  # r"..." の r" と " を除去
-                            # Raw文字列ではVBA式エスケープ（""）のみ処理
-                            value = value.replace('""', '"')
-                            print(f"[ScriptParser] RAW_STRING: '{original_value}' -> '{value}'")
-                            # その他のエスケープシーケンス（\n, \t等）は処理しない
-                        # 通常の文字列リテラルの場合、引用符を除去
-                        elif token_type == 'STRING':
-                            # グループ1が存在すれば（括弧でキャプチャされた部分）それを使用
-                            original_value = match.group(0)
-                            value = match.group(1) if match.groups() else value[1:-1]
-                            print(f"[ScriptParser] STRING matched: '{original_value}' -> group(1)='{match.group(1) if match.groups() else 'N/A'}'")
-                            # エスケープシーケンスを処理
-                            # VBAでは "" はダブルクォート、その他の\はそのまま（正規表現用）
-                            value = value.replace('""', '"')
-                            print(f"[ScriptParser] STRING after VBA escape: '{value}'")
-                            # 明示的なエスケープシーケンスのみ置換（日本語文字列の文字化け対策）
-                            # unicode_escapeは日本語などマルチバイト文字で文字化けを引き起こすため使用しない
-                            # CRITICAL: \\ を先に処理しないと、\\n や \\t が誤って変換される
-                            value = value.replace('\\\\', '\x00')  # 一時的にヌル文字に置き換え
-                            value = value.replace('\\n', '\n')
-                            value = value.replace('\\t', '\t')
-                            value = value.replace('\\r', '\r')
-                            value = value.replace('\x00', '\\')
-                        # 関数呼び出しの場合、名前と括弧を分離
-                        elif token_type == 'FUNCTION':
-                            value = value[:-1]  # 括弧を除去
-                        # 配列変数参照の場合、名前と括弧を分離
-                        elif token_type == 'ARRAY_VAR':
-                            value = value[:-2]  # []を除去
-                        # 配列アクセスの場合、名前と括弧を分離
-                        elif token_type == 'ARRAY':
-                            value = value[:-1]  # 括弧を除去
-                        # 数値の場合、適切な型に変換
-                        elif token_type == 'INT':
-                            value = int(value)
-                        elif token_type == 'FLOAT':
-                            value = float(value)
-
-                        tokens.append(Token(token_type, value, line_num))
-                        pos += len(match.group(0))
-                        matched = True
-                        break
-
-                if not matched:
+                # トークンマッチング（全パターンを1回の照合で判定）
+                match = token_regex.match(line, pos)
+                if match is None:
                     # マッチしなかった文字に対してエラーを発生
                     char = line[pos]
                     if char not in ' \t\n\r':  # 空白文字以外で無効な文字
                         raise SyntaxError(get_message('error_invalid_char', self.locale, char, line_num, pos))
                     pos += 1
+                    continue
 
-            # この行の最後のトークンに is_end_of_line=True を設定
-            if len(tokens) > line_start_token_idx:
-                tokens[-1].is_end_of_line = True
+                token_type, value_group = group_info[match.lastgroup]
+                value = match.group(match.lastgroup)
+                # Raw文字列リテラルの場合、エスケープ処理を最小限にする
+                if token_type == 'RAW_STRING':
+                    # グループ1が存在すれば（括弧でキャプチャされた部分）それを使用
+                    original_value = value
+                    value = match.group(value_group) if value_group else value[2:-1]  # r"..." の r" と " を除去
+                    # Raw文字列ではVBA式エスケープ（""）のみ処理
+                    value = value.replace('""', '"')
+                    if debug_enabled:
+                        logger.debug("[ScriptParser] RAW_STRING: '%s' -> '%s'", original_value, value)
+                    # その他のエスケープシーケンス（\n, \t等）は処理しない
+                # 通常の文字列リテラルの場合、引用符を除去
+                elif token_type == 'STRING':
+                    # グループ1が存在すれば（括弧でキャプチャされた部分）それを使用
+                    original_value = value
+                    value = match.group(value_group) if value_group else value[1:-1]
+                    if debug_enabled:
+                        logger.debug("[ScriptParser] STRING matched: '%s' -> group(1)='%s'", original_value, value)
+                    # エスケープシーケンスを処理
+                    # VBAでは "" はダブルクォート、その他の\はそのまま（正規表現用）
+                    value = value.replace('""', '"')
+                    if debug_enabled:
+                        logger.debug("[ScriptParser] STRING after VBA escape: '%s'", value)
+                    # 明示的なエスケープシーケンスのみ置換（日本語文字列の文字化け対策）
+                    # unicode_escapeは日本語などマルチバイト文字で文字化けを引き起こすため使用しない
+                    # CRITICAL: \\ を先に処理しないと、\\n や \\t が誤って変換される
+                    value = value.replace('\\\\', '\x00')  # 一時的にヌル文字に置き換え
+                    value = value.replace('\\n', '\n')
+                    value = value.replace('\\t', '\t')
+                    value = value.replace('\\r', '\r')
+                    value = value.replace('\x00', '\\')
+                # 関数呼び出しの場合、名前と括弧を分離
+                elif token_type == 'FUNCTION':
+                    value = value[:-1]  # 括弧を除去
+                # 配列変数参照の場合、名前と括弧を分離
+                elif token_type == 'ARRAY_VAR':
+                    value = value[:-2]  # []を除去
+                # 配列アクセスの場合、名前と括弧を分離
+                elif token_type == 'ARRAY':
+                    value = value[:-1]  # 括弧を除去
+                # 数値の場合、適切な型に変換
+                elif token_type == 'INT':
+                    value = int(value)
+                elif token_type == 'FLOAT':
+                    value = float(value)
+
+                line_tokens.append(Token(token_type, value, line_num))
+                pos = match.end()
 
-        return tokens
+            # この行の最後のトークンに is_end_of_line=True を設定
+            if line_tokens:
+                line_tokens[-1].is_end_of_line = True
+                yield from line_tokens
 
     def parse(self, script: str) -> List[ASTNode]:
         """スクリプトをパースしてASTを構築"""
@@ -276,6 +316,16 @@ class ScriptParser:
         return statements
 
     def parse_statement(self) -> Optional[ASTNode]:
+        """ステートメントをパースし、先頭のトークンの行番号（1始まり）を line 属性に記録"""
+        if self.is_at_end():
+            return None
+        line = self.peek().line + 1
+        stmt = self.parse_statement_node()
+        if stmt is not None:
+            stmt.line = line
+        return stmt
+
+    def parse_statement_node(self) -> Optional[ASTNode]:
         """ステートメントをパース"""
         if self.is_at_end():
             return None
@@ -778,6 +828,13 @@ class ScriptParser:
             self.advance()
             return_type = self.consume('IDENTIFIER').value
 
+        # CACHED修飾子（オプション - 同じ行の末尾のみ。結果のメモ化を有効にする）
+        cached = False
+        if (not self.previous().is_end_of_line and self.check('IDENTIFIER')
+                and str(self.peek().value).upper() == 'CACHED'):
+            self.advance()
+            cached = True
+
         # 関数本体
         body = []
         while not self.check('END_FUNCTION') and not self.is_at_end():
@@ -791,7 +848,8 @@ class ScriptParser:
                        name=func_name,
                        parameters=parameters,
                        body=body,
-                       return_type=return_type)
+                       return_type=return_type,
+                       cached=cached)
 
     def parse_parameter(self) -> ASTNode:
         """パラメータをパース"""
@@ -912,8 +970,8 @@ class ScriptParser:
                     from builtin_functions import is_builtin_function
                     if is_builtin_function(var_name):
                         # ビルトイン関数として処理
-                        print(get_message('warning_space_before_paren', self.locale, var_name))
-                        print(get_message('suggestion_no_space', self.locale, var_name))
+                        log_message(logger, logging.WARNING, 'warning_space_before_paren', self.locale, var_name)
+                        log_message(logger, logging.WARNING, 'suggestion_no_space', self.locale, var_name)
                         self.consume('LPAREN')
 
                         # 引数を取得
@@ -1143,8 +1201,8 @@ class ScriptParser:
                 from builtin_functions import is_builtin_function
                 if is_builtin_function(name):
                     # ビルトイン関数として処理
-                    print(get_message('warning_space_before_paren', self.locale, name))
-                    print(get_message('suggestion_no_space', self.locale, name))
+                    log_message(logger, logging.WARNING, 'warning_space_before_paren', self.locale, name)
+                    log_message(logger, logging.WARNING, 'suggestion_no_space', self.locale, name)
                     self.consume('LPAREN')
 
                     # 引数を取得
@@ -1160,8 +1218,8 @@ class ScriptParser:
                 else:
                     # ユーザー定義関数または未定義関数として処理
                     # ユーザーフレンドリーな警告を表示
-                    print(get_message('warning_space_before_paren', self.locale, name))
-                    print(get_message('suggestion_no_space', self.locale, name))
+                    log_message(logger, logging.WARNING, 'warning_space_before_paren', self.locale, name)
+                    log_message(logger, logging.WARNING, 'suggestion_no_space', self.locale, name)
                     self.consume('LPAREN')
 
                     # 引数を取得
@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptProcessPool - 計算の重いスクリプトをワーカープロセスで実行するモード
+
+目的:
+- 長い数値計算のスクリプトはインタープリターのループがGILを保持し続け、ComfyUI本体のスレッド
+  （WebSocketサーバー・プロンプトのワーカー）を止めてしまう。スクリプトの先頭付近に
+      ' @PROCESS
+  というコメント行（ディレクティブ）を書いたノードは、常駐のワーカープロセスで実行する
+
+アーキテクチャ:
+- ワーカープロセス: sys.executable でこのモジュールを起動し（_WORKER_BOOTSTRAP）、標準入力から
+  リクエストを受け取り、結果を標準出力のパイプで返す（pickle）。プロセス内の標準出力（print）は
+  標準エラーに付け替えるため、結果のパイプと混ざらない。ワーカーは終了せずに次のリクエストを待ち、
+  パース済みAST・コンパイル結果のキャッシュ（script_cache.py）もプロセスごとに保持する
+- 送るもの: スクリプトのテキストと ScriptEngine の初期変数（VAL1・VAL2・TXT1・TXT2・スカラーのany_input）
+- 返すもの: RETURN / RETURN1 / RETURN2、代入の有無、PRINTの出力、RELAY_OUTPUT、ビルトイン関数の呼び出し回数、
+  エラー（型名とメッセージ）。
+  配列は辞書に変換して送り、ScriptArray / GridArray に戻す
+- 事前の判定（process_mode_blocker）: 次の場合はディレクティブがあってもプロセス内で実行する
+    スカラー以外の初期変数（テンソルなどのany_input）
+    プロセス内のオブジェクトが必要な関数の呼び出し（IN_PROCESS_FUNCTIONS: LOOP_SUBGRAPH、VRAMFREE、
+    OPTIMAL_LATENT、ComfyUIの出力フォルダを使うファイル入出力、PYEXEC）
+    プロファイラの使用（script_profiler.py はプロセス内のエンジンを計測する）
+- プロセス数: 環境変数 EASYSCRIPTER_PROCESS_WORKERS（既定 DEFAULT_PROCESS_WORKERS、0でこのモードを無効化）。
+  ワーカーは最初の使用時に起動し、以降は再利用する
+- キャンセル: CancellationToken（script_cancellation.py）がキャンセルされた場合はワーカープロセスを終了し、
+  ScriptCancelled を送出する（ビルトイン関数の実行中でも停止できる）。実行予算・実行モードの
+  環境変数はワーカープロセスにも引き継がれる
+- ワーカープロセスを起動できない場合は警告を出してプロセス内で実行する
+
+使用方法:
+    pool = select_process_pool(engine, script)
+    if pool is not None:
+        pool.execute(engine, script, cancel_token)   # 結果は engine に反映される
+    else:
+        engine.execute(script)
+"""
+
+import builtins
+import logging
+import os
+import pickle
+import queue
+import re
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, List, Optional
+
+try:
+    from .script_engine import ScriptEngine, engine_options
+    from .script_cache import get_ast_cache
+    from .script_parser import ASTNode
+    from .script_array import ScriptArray, GridArray
+    from .script_cancellation import CancellationToken, ExecutionGuard, ScriptCancelled
+    from .script_logging import get_logger, log_message
+    from .script_metrics import get_metrics
+    from .locales import get_message
+except ImportError:
+    from script_engine import ScriptEngine, engine_options
+    from script_cache import get_ast_cache
+    from script_parser import ASTNode
+    from script_array import ScriptArray, GridArray
+    from script_cancellation import CancellationToken, ExecutionGuard, ScriptCancelled
+    from script_logging import get_logger, log_message
+    from script_metrics import get_metrics
+    from locales import get_message
+
+logger = get_logger('process')
+
+ENV_PROCESS_WORKERS = 'EASYSCRIPTER_PROCESS_WORKERS'
+DEFAULT_PROCESS_WORKERS = 2
+
+# プロセスモードを指定するディレクティブ（' @PROCESS のコメント行）
+PROCESS_DIRECTIVE = re.compile(r"^\s*'\s+@PROCESS\b", re.IGNORECASE | re.MULTILINE)
+
+# プロセス内のオブジェクト・ComfyUIの状態が必要な関数（プロセス内で実行する）
+IN_PROCESS_FUNCTIONS = frozenset([
+    'LOOP_SUBGRAPH', 'LOOPSUBGRAPH', 'VRAMFREE', 'OPTIMAL_LATENT', 'OPTIMALLATENT',
+    'OUTPUT', 'INPUT', 'ISFILEEXIST', 'PYEXEC',
+])
+
+# ワーカープロセスに送れる初期変数の型
+PORTABLE_TYPES = (type(None), bool, int, float, str)
+
+# ワーカープロセスから返す変数
+RESULT_VARIABLES = ('RETURN', 'RETURN1', 'RETURN2')
+
+# キャンセル・空きワーカーを確認する間隔（秒）
+CANCEL_POLL_INTERVAL = 0.05
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ワーカープロセスの起動コード（標準出力を結果のパイプ専用にしてから、このモジュールを読み込む）
+_WORKER_BOOTSTRAP = (
+    "import os, sys\n"
+    "channel = os.fdopen(os.dup(1), 'wb')\n"
+    "os.dup2(2, 1)\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "import script_process_pool\n"
+    "script_process_pool.worker_main(sys.stdin.buffer, channel)\n"
+)
+
+
+def _read_process_count() -> int:
+    """環境変数からワーカープロセス数を読み取る（未設定・不正な値は既定値、0以下は無効）"""
+    value = os.environ.get(ENV_PROCESS_WORKERS)
+    if not value:
+        return DEFAULT_PROCESS_WORKERS
+    try:
+        return max(0, int(value.strip()))
+    except ValueError:
+        return DEFAULT_PROCESS_WORKERS
+
+
+def _called_functions(value: Any, names: set):
+    """ASTから呼び出している関数名（大文字）を集める"""
+    if isinstance(value, (list, tuple)):
+        for item in value:
+            _called_functions(item, names)
+        return
+    if not isinstance(value, ASTNode):
+        return
+    if value.type == 'FUNCTION_CALL':
+        names.add(value.name.upper())
+    for key, attr in vars(value).items():
+        if not key.startswith('_') and key != 'type':
+            _called_functions(attr, names)
+
+
+def process_mode_blocker(engine: ScriptEngine, script: str) -> Optional[str]:
+    """
+    スクリプトをワーカープロセスで実行できない理由を返す（実行できる場合はNone）
+
+    Args:
+        engine: 初期変数を設定済みのエンジン
+        script: スクリプト
+    """
+    if engine.profiler is not None:
+        return 'profiler'
+    for name, value in engine.variables.items():
+        if not isinstance(value, PORTABLE_TYPES):
+            return f"{name}: {type(value).__name__}"
+    if engine.arrays:
+        return ", ".join(sorted(engine.arrays))
+    try:
+        ast = get_ast_cache().get_or_parse(script, engine.parser, engine.optimizer)
+    except Exception:
+        return 'parse error'  # 構文エラーはプロセス内の実行で報告する
+    names: set = set()
+    _called_functions(ast, names)
+    blocked = sorted(names & IN_PROCESS_FUNCTIONS)
+    if blocked:
+        return ", ".join(blocked)
+    return None
+
+
+def select_process_pool(engine: ScriptEngine, script: str) -> Optional['ScriptProcessPool']:
+    """
+    ' @PROCESS ディレクティブのあるスクリプトをワーカープロセスで実行できる場合はプールを返す
+
+    Returns:
+        ScriptProcessPool（プロセス内で実行する場合はNone）
+    """
+    if not script or not PROCESS_DIRECTIVE.search(script):
+        return None
+    if _read_process_count() <= 0:
+        return None
+    blocker = process_mode_blocker(engine, script)
+    if blocker is not None:
+        log_message(logger, logging.INFO, 'process_pool_kept_in_process', engine.locale, blocker)
+        return None
+    return ScriptProcessPool.get_instance()
+
+
+def _portable_value(value: Any) -> Any:
+    """結果の値をパイプで送れる形にする（配列は辞書に変換）"""
+    if isinstance(value, (ScriptArray, GridArray)):
+        return {key: _portable_value(item) for key, item in value.items()}
+    return value
+
+
+def _restore_value(value: Any) -> Any:
+    """_portable_value で変換した配列を ScriptArray / GridArray に戻す"""
+    if value.__class__ is dict and value:
+        restored = {key: _restore_value(item) for key, item in value.items()}
+        if all(key.__class__ is int for key in restored):
+            return ScriptArray.from_mapping(restored)
+        if all(key.__class__ is tuple for key in restored):
+            return GridArray.from_mapping(restored)
+    return value
+
+
+def _restore_error(error_type: str, message: str) -> Exception:
+    """ワーカープロセスのエラー（型名とメッセージ）を例外に戻す"""
+    if error_type == ScriptCancelled.__name__:
+        return ScriptCancelled(message)
+    error_class = getattr(builtins, error_type, None)
+    if isinstance(error_class, type) and issubclass(error_class, Exception):
+        try:
+            return error_class(message)
+        except Exception:
+            pass
+    return RuntimeError(message)
+
+
+def run_request(request: Dict[str, Any]) -> Dict[str, Any]:
+    """ワーカープロセスでスクリプトを1回実行し、結果をパイプで送れる辞書で返す"""
+    locale = request['locale']
+    engine = ScriptEngine(locale=locale, **engine_options(request['script'], locale))
+    engine.guard = ExecutionGuard.from_environment(None, locale)
+    engine.variables.update(request['variables'])
+    error = None
+    try:
+        engine.execute(request['script'])
+    except Exception as e:
+        error = (type(e).__name__, str(e))
+    return {
+        'variables': {name: _portable_value(engine.variables[name])
+                      for name in RESULT_VARIABLES if name in engine.variables},
+        'return1_assigned': engine.return1_assigned,
+        'return2_assigned': engine.return2_assigned,
+        'print_stack': [str(line) for line in engine.print_stack],
+        'relay_output_assigned': engine.relay_output_assigned,
+        'relay_output_value': _portable_value(engine.relay_output_value),
+        'builtin_calls': dict(engine.builtin_calls),
+        'error': error,
+    }
+
+
+def worker_main(requests, channel):
+    """ワーカープロセスのメインループ（親プロセスがパイプを閉じると終了）"""
+    while True:
+        try:
+            request = pickle.load(requests)
+        except EOFError:
+            return
+        response = run_request(request)
+        try:
+            data = pickle.dumps(response, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            data = pickle.dumps({'error': ('RuntimeError', get_message('error_process_result', request['locale'], e))},
+                                protocol=pickle.HIGHEST_PROTOCOL)
+        channel.write(data)
+        channel.flush()
+
+
+class _WorkerProcess:
+    """常駐のワーカープロセス1つ（結果の受信スレッド付き）"""
+
+    def __init__(self):
+        env = dict(os.environ)
+        # ComfyUIのモジュール（folder_pathsなど）を親プロセスと同じパスから読み込む
+        env['PYTHONPATH'] = os.pathsep.join(path for path in sys.path if path)
+        self.process = subprocess.Popen(
+            [sys.executable, '-c', _WORKER_BOOTSTRAP, _PACKAGE_DIR],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env
+        )
+        self.responses: queue.Queue = queue.Queue()
+        self.reader = threading.Thread(target=self._read_responses, daemon=True,
+                                       name=f"EasyScripterProcess-{self.process.pid}")
+        self.reader.start()
+
+    def _read_responses(self):
+        """ワーカープロセスの結果を受信（終了時は None を送る）"""
+        stdout = self.process.stdout
+        try:
+            while True:
+                self.responses.put(pickle.load(stdout))
+        except Exception:
+            self.responses.put(None)
+
+    def is_alive(self) -> bool:
+        return self.process.poll() is None
+
+    def send(self, request: Dict[str, Any]):
+        pickle.dump(request, self.process.stdin, protocol=pickle.HIGHEST_PROTOCOL)
+        self.process.stdin.flush()
+
+    def kill(self):
+        """ワーカープロセスを終了"""
+        try:
+            self.process.kill()
+            self.process.wait(timeout=5.0)
+        except (OSError, subprocess.TimeoutExpired):
+            pass
+
+
+class ScriptProcessPool:
+    """常駐ワーカープロセスのプール（シングルトン）"""
+
+    _instance: Optional['ScriptProcessPool'] = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls) -> 'ScriptProcessPool':
+        """シングルトンインスタンスを取得"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:  # ダブルチェックロッキング
+                    cls._instance = cls(max(1, _read_process_count()))
+                    get_metrics().register_gauges('process_pool', cls._instance.get_gauges)
+        return cls._instance
+
+    def __init__(self, size: int):
+        self.size = size
+        self._idle: List[_WorkerProcess] = []
+        self._started = 0  # 起動済み（使用中を含む）のワーカー数
+        self._condition = threading.Condition()
+
+    def _acquire(self, cancel_token: Optional[CancellationToken], locale: str) -> _WorkerProcess:
+        """空いているワーカーを取得（なければ起動、上限に達している場合は空くまで待つ）"""
+        with self._condition:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.is_alive():
+                        return worker
+                    self._started -= 1
+                if self._started < self.size:
+                    self._started += 1
+                    break
+                if cancel_token is not None and cancel_token.cancelled:
+                    raise ScriptCancelled(cancel_token.reason or get_message('error_script_cancelled', locale))
+                self._condition.wait(CANCEL_POLL_INTERVAL)
+        try:
+            worker = _WorkerProcess()
+        except Exception:
+            self._discard()
+            raise
+        log_message(logger, logging.INFO, 'process_pool_worker_started', locale, worker.process.pid)
+        return worker
+
+    def _release(self, worker: _WorkerProcess):
+        """使用後のワーカーを戻す"""
+        with self._condition:
+            self._idle.append(worker)
+            self._condition.notify()
+
+    def _discard(self):
+        """終了したワーカーの枠を空ける"""
+        with self._condition:
+            self._started -= 1
+            self._condition.notify()
+
+    def get_gauges(self) -> Dict[str, Any]:
+        """メトリクス用の現在値（上限・起動済み・待機中のワーカー数）"""
+        with self._condition:
+            return {"size": self.size, "started": self._started, "idle": len(self._idle)}
+
+    def execute(self, engine: ScriptEngine, script: str, cancel_token: Optional[CancellationToken] = None):
+        """
+        スクリプトをワーカープロセスで実行し、結果を engine に反映する
+
+        Args:
+            engine: 初期変数を設定済みのエンジン（RETURN系・PRINTの出力・RELAY_OUTPUTが反映される）
+            script: スクリプト
+            cancel_token: キャンセルされた場合はワーカープロセスを終了して ScriptCancelled を送出
+
+        Raises:
+            ScriptCancelled: キャンセルされた
+            Exception: スクリプトのエラー（ワーカープロセスのエラーの型とメッセージ）
+        """
+        locale = engine.locale
+        try:
+            worker = self._acquire(cancel_token, locale)
+        except OSError as e:
+            log_message(logger, logging.WARNING, 'process_pool_start_failed', locale, e)
+            engine.execute(script)
+            return
+
+        try:
+            worker.send({'script': script, 'locale': locale, 'variables': dict(engine.variables)})
+            while True:
+                try:
+                    response = worker.responses.get(timeout=CANCEL_POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    if cancel_token is not None and cancel_token.cancelled:
+                        log_message(logger, logging.WARNING, 'process_pool_worker_killed', locale, worker.process.pid)
+                        raise ScriptCancelled(cancel_token.reason or get_message('error_script_cancelled', locale))
+        except BaseException:
+            worker.kill()
+            self._discard()
+            raise
+
+        if response is None:
+            worker.kill()
+            self._discard()
+            raise RuntimeError(get_message('error_process_worker_exited', locale, worker.process.returncode))
+        self._release(worker)
+        self._apply_response(engine, response)
+
+    @staticmethod
+    def _apply_response(engine: ScriptEngine, response: Dict[str, Any]):
+        """ワーカープロセスの結果をエンジンに反映"""
+        for name, value in response.get('variables', {}).items():
+            engine.variables[name] = _restore_value(value)
+        engine.return1_assigned = response.get('return1_assigned', False)
+        engine.return2_assigned = response.get('return2_assigned', False)
+        engine.print_stack.extend(response.get('print_stack', ()))
+        engine.builtin_calls.update(response.get('builtin_calls', {}))
+        if response.get('relay_output_assigned'):
+            engine.relay_output_assigned = True
+            engine.relay_output_value = _restore_value(response.get('relay_output_value'))
+        error = response.get('error')
+        if error is not None:
+            raise _restore_error(*error)
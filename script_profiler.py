@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptProfiler - スクリプトの行・関数単位のプロファイラ
+
+目的:
+- 数百行のスクリプトのどの行・どの関数に時間がかかっているかを確認する（オプトイン）
+
+アーキテクチャ:
+- attach(engine) で ScriptEngine の execute / execute_statement / invoke_user_function /
+  call_builtin をインスタンス属性の計測用ラッパーで置き換える（クラスのメソッドは変更しないため、
+  プロファイルしないエンジンに計測のコストはかからない）。detach() で元に戻す
+- 行単位の計測のため、プロファイル中はツリーウォーカー（mode='interpreter'）で実行する。
+  実行結果は他のモードと同じ（計測値はツリーウォーカーの時間）
+- 計測する値:
+    行（ASTNode.line）    実行回数・累計時間・自己時間（入れ子のステートメントと呼び出した関数の本体を除く）
+    ユーザー定義関数      呼び出し回数・累計時間・自己時間（CACHEDのメモ化で本体を実行しない呼び出しは数えない）
+    ビルトイン関数        呼び出し回数・累計時間
+  再帰呼び出しの累計時間は最も外側の呼び出しだけを数える。
+  execute() を複数回呼び出した場合は行番号ごとに合算する（同じスクリプトの繰り返し実行を想定）
+- 呼び出しスタック（<script>;関数;ビルトイン関数）ごとの自己時間を記録し、
+  collapsed-stack形式（flamegraph.pl / speedscope の入力）で出力できる
+- 出力: format_report()（ノードのUI表示用のテキスト）、to_dict() / write_json()、
+  collapsed_stacks() / write_collapsed()
+
+環境変数（EasyScripterノードでの有効化、いずれかを設定するとプロファイルする）:
+    EASYSCRIPTER_PROFILE             1 / true / on: レポートをノードのUI出力に追記
+    EASYSCRIPTER_PROFILE_JSON        JSONレポートの出力先（{node} はノードIDに置換）
+    EASYSCRIPTER_PROFILE_COLLAPSED   collapsed-stack形式の出力先（{node} はノードIDに置換）
+
+使用方法:
+    profiler = ScriptProfiler().attach(engine)
+    engine.execute(script)
+    profiler.detach()
+    print("\\n".join(profiler.format_report(locale)))
+"""
+
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+try:
+    from .locales import get_message
+except ImportError:
+    from locales import get_message
+
+
+ENV_PROFILE = 'EASYSCRIPTER_PROFILE'
+ENV_PROFILE_JSON = 'EASYSCRIPTER_PROFILE_JSON'
+ENV_PROFILE_COLLAPSED = 'EASYSCRIPTER_PROFILE_COLLAPSED'
+
+# 呼び出しスタックの最も外側のフレーム名
+ROOT_FRAME = '<script>'
+
+# format_report() で表示する行数
+DEFAULT_REPORT_LIMIT = 15
+
+# レポートに表示するソースの最大文字数
+_SOURCE_WIDTH = 48
+
+_clock = time.perf_counter
+
+# 置き換えるScriptEngineのメソッド
+_WRAPPED_METHODS = ('execute', 'execute_statement', 'invoke_user_function', 'call_builtin')
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000.0, 3)
+
+
+class ScriptProfiler:
+    """1つの ScriptEngine の実行時間を行・関数・ビルトイン関数ごとに集計"""
+
+    def __init__(self, ui_report: bool = True, json_path: Optional[str] = None, collapsed_path: Optional[str] = None):
+        # 出力先（EasyScripterノード用）
+        self.ui_report = ui_report
+        self.json_path = json_path
+        self.collapsed_path = collapsed_path
+
+        self.executions = 0
+        self.total_seconds = 0.0
+        # 行番号 → [ステートメント種別, 実行回数, 累計秒, 自己秒, ソース]
+        self.lines: Dict[Optional[int], List[Any]] = {}
+        # 関数名 → [呼び出し回数, 累計秒, 自己秒]
+        self.functions: Dict[str, List[Any]] = {}
+        self.builtins: Dict[str, List[Any]] = {}
+        # 呼び出しスタック → 自己秒
+        self.stacks: Dict[Tuple[str, ...], float] = {}
+        # 実行中のスクリプトの行（行のソースは最初の実行時に記録）
+        self.source_lines: List[str] = []
+
+        self._engine = None
+        self._mode: Optional[str] = None
+        self._frames: List[str] = []
+        self._frame_children: List[float] = []
+        self._statement_children = 0.0
+        self._active_lines: Dict[Optional[int], int] = {}
+        self._active_functions: Dict[str, int] = {}
+        self._active_builtins: Dict[str, int] = {}
+
+    @classmethod
+    def from_environment(cls) -> Optional['ScriptProfiler']:
+        """環境変数の設定でプロファイラを作成（プロファイルしない場合はNone）"""
+        ui_report = os.environ.get(ENV_PROFILE, '').strip().lower() in ('1', 'true', 'yes', 'on')
+        json_path = os.environ.get(ENV_PROFILE_JSON) or None
+        collapsed_path = os.environ.get(ENV_PROFILE_COLLAPSED) or None
+        if not (ui_report or json_path or collapsed_path):
+            return None
+        return cls(ui_report, json_path, collapsed_path)
+
+    # ========================================
+    # エンジンへの接続
+    # ========================================
+
+    def attach(self, engine) -> 'ScriptProfiler':
+        """エンジンのメソッドを計測用のラッパーで置き換える"""
+        if self._engine is not None:
+            self.detach()
+        self._engine = engine
+        self._mode = engine.mode
+        engine.mode = 'interpreter'
+        engine.profiler = self
+        engine.execute = self._wrap_execute(engine.execute)
+        engine.execute_statement = self._wrap_statement(engine.execute_statement)
+
+        invoke_user_function = engine.invoke_user_function
+        call_builtin = engine.call_builtin
+        functions, active_functions = self.functions, self._active_functions
+        builtins, active_builtins = self.builtins, self._active_builtins
+        frame = self._frame
+
+        def profiled_invoke_user_function(func_def, func_name, arguments, arg_names=None):
+            return frame(func_name.upper(), functions, active_functions, invoke_user_function,
+                         (func_def, func_name, arguments, arg_names))
+
+        def profiled_call_builtin(descriptor, args):
+            return frame(descriptor.name, builtins, active_builtins, call_builtin, (descriptor, args))
+
+        engine.invoke_user_function = profiled_invoke_user_function
+        engine.call_builtin = profiled_call_builtin
+        return self
+
+    def detach(self):
+        """エンジンのメソッドと実行モードを元に戻す"""
+        engine = self._engine
+        if engine is None:
+            return
+        for name in _WRAPPED_METHODS:
+            engine.__dict__.pop(name, None)
+        engine.mode = self._mode
+        engine.profiler = None
+        self._engine = None
+
+    def _wrap_execute(self, execute: Callable[[str], Any]) -> Callable[[str], Any]:
+        def profiled_execute(script: str) -> Any:
+            self.source_lines = script.split('\n')
+            self.executions += 1
+            self._frames.append(ROOT_FRAME)
+            self._frame_children.append(0.0)
+            start = _clock()
+            try:
+                return execute(script)
+            finally:
+                elapsed = _clock() - start
+                path = tuple(self._frames)
+                self._frames.pop()
+                own = elapsed - self._frame_children.pop()
+                self.stacks[path] = self.stacks.get(path, 0.0) + own
+                self.total_seconds += elapsed
+        return profiled_execute
+
+    def _wrap_statement(self, execute_statement: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        lines = self.lines
+        active = self._active_lines
+
+        def profiled_execute_statement(node):
+            line = node.line
+            outer_children = self._statement_children
+            self._statement_children = 0.0
+            active[line] = active.get(line, 0) + 1
+            start = _clock()
+            try:
+                return execute_statement(node)
+            finally:
+                elapsed = _clock() - start
+                depth = active[line] = active[line] - 1
+                stat = lines.get(line)
+                if stat is None:
+                    stat = lines[line] = [node.type, 0, 0.0, 0.0, self.source(line)]
+                stat[1] += 1
+                if not depth:
+                    stat[2] += elapsed
+                stat[3] += elapsed - self._statement_children
+                self._statement_children = outer_children + elapsed
+        return profiled_execute_statement
+
+    def _frame(self, name: str, table: Dict[str, List[Any]], active: Dict[str, int],
+               function: Callable[..., Any], args: Tuple[Any, ...]) -> Any:
+        """関数呼び出し1回分を呼び出しスタックのフレームとして計測"""
+        frames = self._frames
+        children = self._frame_children
+        frames.append(name)
+        children.append(0.0)
+        active[name] = active.get(name, 0) + 1
+        start = _clock()
+        try:
+            return function(*args)
+        finally:
+            elapsed = _clock() - start
+            path = tuple(frames)
+            frames.pop()
+            own = elapsed - children.pop()
+            if children:
+                children[-1] += elapsed
+            self.stacks[path] = self.stacks.get(path, 0.0) + own
+            depth = active[name] = active[name] - 1
+            stat = table.get(name)
+            if stat is None:
+                stat = table[name] = [0, 0.0, 0.0]
+            stat[0] += 1
+            if not depth:
+                stat[1] += elapsed
+            stat[2] += own
+
+    # ========================================
+    # レポート
+    # ========================================
+
+    def source(self, line: Optional[int]) -> str:
+        """行番号のソース（前後の空白を除き、長い行は省略）"""
+        if line is None or not 0 < line <= len(self.source_lines):
+            return ''
+        text = self.source_lines[line - 1].strip()
+        return text if len(text) <= _SOURCE_WIDTH else text[:_SOURCE_WIDTH - 3] + '...'
+
+    def to_dict(self, limit: Optional[int] = None) -> Dict[str, Any]:
+        """JSONに変換可能なレポート（時間はミリ秒、累計時間の降順）"""
+        lines = sorted(self.lines.items(), key=lambda item: item[1][2], reverse=True)
+        functions = sorted(self.functions.items(), key=lambda item: item[1][1], reverse=True)
+        builtins = sorted(self.builtins.items(), key=lambda item: item[1][1], reverse=True)
+        return {
+            "executions": self.executions,
+            "total_ms": _ms(self.total_seconds),
+            "lines": [{"line": line, "statement": statement, "source": source, "hits": hits,
+                       "total_ms": _ms(total), "self_ms": _ms(own)}
+                      for line, (statement, hits, total, own, source) in lines[:limit]],
+            "functions": [{"name": name, "calls": calls, "total_ms": _ms(total), "self_ms": _ms(own)}
+                          for name, (calls, total, own) in functions[:limit]],
+            "builtins": [{"name": name, "calls": calls, "total_ms": _ms(total)}
+                         for name, (calls, total, own) in builtins[:limit]],
+        }
+
+    def format_report(self, locale: str = 'ja', limit: int = DEFAULT_REPORT_LIMIT) -> List[str]:
+        """ノードのUIに表示するレポートの行"""
+        report = self.to_dict(limit)
+        output = [get_message('profile_header', locale, report["total_ms"], report["executions"])]
+        if report["lines"]:
+            output.append(get_message('profile_lines_header', locale))
+            for entry in report["lines"]:
+                line = '-' if entry["line"] is None else entry["line"]
+                output.append(f"  {line:>5} {entry['hits']:>8} {entry['total_ms']:>10.3f} {entry['self_ms']:>10.3f}  "
+                              f"{entry['source'] or entry['statement']}")
+        if report["functions"]:
+            output.append(get_message('profile_functions_header', locale))
+            for entry in report["functions"]:
+                output.append(f"  {entry['name']:<20} {entry['calls']:>8} {entry['total_ms']:>10.3f} {entry['self_ms']:>10.3f}")
+        if report["builtins"]:
+            output.append(get_message('profile_builtins_header', locale))
+            for entry in report["builtins"]:
+                output.append(f"  {entry['name']:<20} {entry['calls']:>8} {entry['total_ms']:>10.3f}")
+        return output
+
+    def collapsed_stacks(self) -> str:
+        """collapsed-stack形式（フレームを ; で連結したスタックと自己時間（マイクロ秒）の行）"""
+        output = []
+        for path, seconds in sorted(self.stacks.items()):
+            microseconds = int(round(seconds * 1_000_000))
+            if microseconds > 0:
+                output.append(f"{';'.join(path)} {microseconds}")
+        return '\n'.join(output) + ('\n' if output else '')
+
+    def write_json(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+    def write_collapsed(self, path: str):
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(self.collapsed_stacks())
+
+    def write_outputs(self, node_id: Any = None):
+        """環境変数で指定された出力先にJSON・collapsed-stackを書き出す（{node} はノードIDに置換）"""
+        node = str(node_id) if node_id is not None else 'unknown'
+        if self.json_path:
+            self.write_json(self.json_path.replace('{node}', node))
+        if self.collapsed_path:
+            self.write_collapsed(self.collapsed_path.replace('{node}', node))
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptResolver - 変数参照の静的解決とスロット方式の変数フレーム
+
+目的:
+- 変数の読み書きのたびに get_variable() / set_variable() で名前を大文字化し、
+  スコープの辞書を順に探す処理を省く。解決済みの参照は実行時にリストの添字1回でアクセスする
+
+アーキテクチャ:
+- resolve_program(ast): パース直後（ASTCacheへの登録時）に1回だけ実行し、ASTノードに注釈を付ける
+    VARIABLE / ASSIGN / FOR ノード（オプティマイザーが生成する HOISTED / HOIST も同様）
+        _name: 大文字化済みの変数名
+        _slot: >= 0  関数フレームのスロット番号（ローカル変数・パラメータ・関数名）
+               -1    グローバル変数（トップレベル、特殊変数、関数内で代入されない名前）
+               None  未解決（ScriptEngine.get_variable / set_variable の汎用処理を使う）
+    FUNCTION_DEF ノード
+        _frame_layout: 関数のスロット割り当て（FrameLayout）
+- VariableFrame: 関数呼び出し1回分の変数。ローカル変数は同名のパラメータを隠すため、
+  同名のローカル変数とパラメータは1つのスロットを共有する
+- 未代入のスロットは UNSET。読み出し時はツリーウォーカーと同じく、関数名なら戻り値、
+  それ以外はグローバル変数にフォールバックする
+- RETURN / RETURN1 / RETURN2 への代入はグローバル変数との連動があるため未解決のまま残す
+- パラメータのデフォルト値は呼び出し元のスコープで評価されるため未解決のまま残す
+
+使用方法:
+    resolve_program(ast)                      # ASTCacheが自動的に実行
+    layout = get_frame_layout(func_def)
+    frame = layout.new_frame(parameters)
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+try:
+    from .script_parser import ASTNode
+except ImportError:
+    from script_parser import ASTNode
+
+
+# 特殊変数（関数内からも常にグローバルスコープを参照する）
+SPECIAL_VARIABLES = frozenset(['RETURN', 'VAL1', 'VAL2', 'VAL_1', 'VAL_2', 'TXT1', 'TXT2'])
+
+# グローバル変数と連動するため代入を汎用処理に任せる変数
+LINKED_RETURN_VARIABLES = frozenset(['RETURN', 'RETURN1', 'RETURN2'])
+
+# 関数名（戻り値）のスロット番号
+RETURN_SLOT = 0
+
+GLOBAL_SLOT = -1
+
+
+class _Unset:
+    """未代入のスロットを表す番兵"""
+    __slots__ = ()
+
+    def __repr__(self) -> str:
+        return 'UNSET'
+
+
+UNSET = _Unset()
+
+
+class FrameLayout:
+    """関数ごとの変数名 → スロット番号の割り当て（スロット0は関数名）"""
+
+    __slots__ = ('function_name', 'names', 'slots')
+
+    def __init__(self, function_name: str, names: Iterable[str]):
+        self.function_name = function_name.upper()
+        ordered: List[str] = [self.function_name]
+        for name in names:
+            if name not in ordered:
+                ordered.append(name)
+        self.names = tuple(ordered)
+        self.slots: Dict[str, int] = {name: slot for slot, name in enumerate(self.names)}
+
+    def new_frame(self, parameters: Dict[str, Any]) -> 'VariableFrame':
+        """パラメータの値を設定した新しいフレームを作成"""
+        frame = VariableFrame(self)
+        slots = self.slots
+        for name, value in parameters.items():
+            slot = slots.get(name)
+            if slot is None:
+                frame.extra[name] = value
+            else:
+                frame.values[slot] = value
+        return frame
+
+
+class VariableFrame:
+    """関数呼び出し1回分の変数（ローカル変数とパラメータ）"""
+
+    __slots__ = ('layout', 'values', 'extra')
+
+    def __init__(self, layout: FrameLayout):
+        self.layout = layout
+        self.values: List[Any] = [UNSET] * len(layout.names)
+        # レイアウトにない名前（静的に解決できなかった代入）
+        self.extra: Dict[str, Any] = {}
+
+    def load(self, name: str) -> Any:
+        """名前で値を取得（未代入の場合は UNSET）"""
+        slot = self.layout.slots.get(name)
+        if slot is None:
+            return self.extra.get(name, UNSET)
+        return self.values[slot]
+
+    def store(self, name: str, value: Any):
+        """名前で値を設定"""
+        slot = self.layout.slots.get(name)
+        if slot is None:
+            self.extra[name] = value
+        else:
+            self.values[slot] = value
+
+
+def _collect_assigned_names(value: Any, names: List[str]):
+    """関数本体で代入される変数名を収集（入れ子の関数定義は対象外）"""
+    if isinstance(value, ASTNode):
+        if value.type == 'FUNCTION_DEF':
+            return
+        if value.type in ('ASSIGN', 'FOR', 'HOIST'):
+            names.append(value.variable.upper())
+        elif value.type == 'dim' and not value.sizes:
+            # 配列サイズのないDIMは通常の変数として宣言される
+            names.append(value.array_name.upper())
+        for key, attr in list(vars(value).items()):
+            if not key.startswith('_'):
+                _collect_assigned_names(attr, names)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _collect_assigned_names(item, names)
+
+
+def _annotate(value: Any, layout: Optional[FrameLayout]):
+    """ノードに _name / _slot を設定（layoutがNoneの場合はトップレベル）"""
+    if isinstance(value, ASTNode):
+        node_type = value.type
+        if node_type == 'FUNCTION_DEF':
+            resolve_function(value)
+            return
+        if node_type in ('VARIABLE', 'HOISTED'):
+            name = value.name.upper()
+            value._name = name
+            if layout is None or name in SPECIAL_VARIABLES:
+                value._slot = GLOBAL_SLOT
+            else:
+                value._slot = layout.slots.get(name, GLOBAL_SLOT)
+        elif node_type in ('ASSIGN', 'FOR', 'HOIST'):
+            name = value.variable.upper()
+            value._name = name
+            if name in LINKED_RETURN_VARIABLES:
+                value._slot = None
+            elif layout is None:
+                value._slot = GLOBAL_SLOT
+            else:
+                value._slot = layout.slots[name]
+        for key, attr in list(vars(value).items()):
+            if not key.startswith('_'):
+                _annotate(attr, layout)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            _annotate(item, layout)
+
+
+def resolve_function(func_def: ASTNode) -> FrameLayout:
+    """FUNCTION_DEFの本体を解決し、スロット割り当てを返す（結果はノードに保存）"""
+    names = [param.name.upper() for param in func_def.parameters]
+    _collect_assigned_names(func_def.body, names)
+    layout = FrameLayout(func_def.name, names)
+    _annotate(func_def.body, layout)
+    func_def._frame_layout = layout
+    return layout
+
+
+def get_frame_layout(func_def: ASTNode) -> FrameLayout:
+    """関数のスロット割り当てを取得（未解決の場合はここで解決）"""
+    layout = getattr(func_def, '_frame_layout', None)
+    if layout is None:
+        layout = resolve_function(func_def)
+    return layout
+
+
+def resolve_program(ast: Iterable[Any]) -> Iterable[Any]:
+    """スクリプト全体の変数参照を解決（同じASTに対して何度実行しても同じ結果になる）"""
+    _annotate(ast, None)
+    return ast
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptSelectCase - SELECT CASE文のジャンプテーブル
+
+目的:
+- スタイル名 → 設定値の振り分けのように、50〜200個のリテラルのCaseを並べたSELECT CASEで、
+  Caseごとに match_single_condition() / compare_values() を順に呼ぶ処理を省く
+
+アーキテクチャ:
+- bind_case_table(node): SELECT_CASEノードごとに1回だけ CaseTable を作成し、
+  _case_table 属性にキャッシュする（ASTCacheを通じて全エンジンで共有）
+- リテラルのCase値（CASE "abc", 2.5, -1 など）は正規化したキーでハッシュ表に登録する。
+  ScriptEngine.compare_values と同じ規則で比較されるように、表は3つに分ける
+    numbers  数値として比較される値（数値、または数値形式の文字列） → float
+    texts    数値形式でない値 → 大文字化した文字列（数値のテスト値とも文字列で比較されるため）
+    strings  すべての値 → 大文字化した文字列（数値形式でないテスト値用）
+  同じキーが複数のCaseにある場合は最初のCaseが優先される
+- 範囲（CASE 1 TO 5）・IS条件・リテラル以外の式を含むCaseは順次判定用に残し、
+  ハッシュ表で見つかったCaseより前にあるものだけを元の順序で判定する
+  （条件式が評価される順序と回数はツリーウォーカーの逐次判定と同じ）
+
+使用方法:
+    table = bind_case_table(node)
+    index = table.find(engine, test_value)   # 一致したCaseの番号（Case ElseはNone）
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from .script_parser import ASTNode
+except ImportError:
+    from script_parser import ASTNode
+
+
+def numeric_key(value: Any) -> Optional[float]:
+    """
+    比較で数値として扱われる値をfloatに変換（数値として扱われない場合はNone）
+
+    数値型、または "-1.5" のような数値形式の文字列が対象（ScriptEngine.compare_values の判定）
+    """
+    if isinstance(value, (int, float)):
+        try:
+            return float(value)
+        except OverflowError:
+            return None
+    if isinstance(value, str) and value.replace('.', '', 1).replace('-', '', 1).isdigit():
+        try:
+            return float(value)
+        except ValueError:
+            return None
+    return None
+
+
+def _literal_condition_value(condition: Any) -> Tuple[bool, Any]:
+    """Case条件がリテラルの単一値であれば (True, 値) を返す"""
+    if isinstance(condition, ASTNode) and condition.type == 'CASE_VALUE':
+        condition = condition.value
+    if not isinstance(condition, ASTNode):
+        return False, None
+    if condition.type == 'LITERAL':
+        return True, condition.value
+    if (condition.type == 'UNARY_OP' and condition.operator in ('MINUS', 'PLUS')
+            and isinstance(condition.operand, ASTNode) and condition.operand.type == 'LITERAL'
+            and type(condition.operand.value) in (int, float)):
+        # 負の数値リテラル（-1 は UNARY_OP としてパースされる）
+        value = float(condition.operand.value)
+        return True, -value if condition.operator == 'MINUS' else value
+    return False, None
+
+
+class CaseTable:
+    """SELECT CASE文のCase条件を事前に振り分けた表"""
+
+    __slots__ = ('numbers', 'texts', 'strings', 'sequential', 'miss')
+
+    def __init__(self, node: ASTNode):
+        self.numbers: Dict[float, int] = {}
+        self.texts: Dict[str, int] = {}
+        self.strings: Dict[str, int] = {}
+        # 順次判定するCaseの (番号, 条件リスト)
+        sequential: List[Tuple[int, Any]] = []
+        for index, case in enumerate(node.cases):
+            for condition in case.conditions:
+                is_literal, value = _literal_condition_value(condition)
+                if not is_literal:
+                    if not sequential or sequential[-1][0] != index:
+                        sequential.append((index, case.conditions))
+                    continue
+                key = str(value).upper()
+                self.strings.setdefault(key, index)
+                number = numeric_key(value)
+                if number is None:
+                    self.texts.setdefault(key, index)
+                else:
+                    self.numbers.setdefault(number, index)
+        self.sequential: Tuple[Tuple[int, Any], ...] = tuple(sequential)
+        self.miss = len(node.cases)
+
+    def find(self, engine, test_value: Any) -> Optional[int]:
+        """テスト値に一致する最初のCaseの番号を返す（一致しない場合はNone）"""
+        miss = self.miss
+        key = str(test_value).upper()
+        number = numeric_key(test_value)
+        if number is None:
+            hit = self.strings.get(key, miss)
+        else:
+            # 数値同士は数値で比較し、数値形式でないCase値とは文字列で比較する
+            hit = min(self.numbers.get(number, miss), self.texts.get(key, miss))
+        for index, conditions in self.sequential:
+            if index >= hit:
+                break
+            if engine.match_case(test_value, conditions):
+                return index
+        return hit if hit < miss else None
+
+
+def bind_case_table(node: ASTNode) -> CaseTable:
+    """SELECT_CASEノードのジャンプテーブルを取得（初回のみ作成し、ノードにキャッシュ）"""
+    table = getattr(node, '_case_table', None)
+    if table is None:
+        table = CaseTable(node)
+        node._case_table = table
+    return table
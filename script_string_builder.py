@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptStringBuilder - ループ内の文字列の追記（X = X & 式）のバッファリング
+
+目的:
+- プロンプトを組み立てるスクリプトの S = S & 部分 をループで数千回繰り返すと、
+  追記のたびにそれまでの文字列全体をコピーするため、N個の部分の連結が O(N²) になる。
+  ループの実行中は追記する部分をリストに溜め、ループを抜けるときに1回だけ連結する
+
+アーキテクチャ:
+- split_append(node): ASSIGNノードが X = X & 式1 & 式2 ... の形であれば (変数Xのノード, 式の並び) を返す
+- bind_append_plan(loop): WHILE/FORノードごとに1回だけ AppendPlan を作成し、_append_plan 属性に
+  キャッシュする（ASTCacheを通じて全エンジンで共有）。ループ本体の追記のASSIGNノードには
+  ツリーウォーカー用に _append 属性（split_append の結果）を設定する
+- バッファリングする変数（AppendPlan.targets）の条件:
+    ループ内（条件式・FORの範囲・入れ子のループを含む）で X が追記の代入としてのみ現れる
+    （追記する式、他の代入、FORのループ変数、配列名、関数名などに X が現れない）
+    RETURN系・入出力と連動する特殊変数ではない
+    関数名（戻り値）の場合は、ループ内に戻り値を上書きするRETURN文がない
+  ループ内に関数定義がある場合はバッファリングしない
+- ループ内で呼び出す関数（ビルトイン関数以外）がユーザー定義関数であれば、関数からグローバル変数を
+  参照できるため、実行時にバッファリングを見送る（AppendPlan.calls）
+- 実行時はループ開始時に open_builders() で ScriptEngine.string_builders（変数名 → 部分のリスト）に
+  バッファを登録し、ループ終了時（EXITや例外で抜ける場合も含む）に close_builders() で連結して代入する。
+  外側のループがバッファリング中の変数は内側のループでは登録しない。
+  最初の追記で変数の現在の値を文字列化してリストの先頭に置くため、1回も追記しなかった変数は変更しない
+- ScriptTranspiler は同じ AppendPlan を使い、バッファを生成コードのローカル変数で保持する
+
+使用方法:
+    plan = bind_append_plan(loop_node)
+    owned = open_builders(plan, engine)
+    try:
+        ...ループ本体（追記は engine.string_builders[name] に溜める）...
+    finally:
+        close_builders(owned, engine)
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .script_resolver import SPECIAL_VARIABLES, LINKED_RETURN_VARIABLES, RETURN_SLOT
+    from .script_call_site import bind_call_site, CALL_BUILTIN
+except ImportError:
+    from script_parser import ASTNode
+    from script_resolver import SPECIAL_VARIABLES, LINKED_RETURN_VARIABLES, RETURN_SLOT
+    from script_call_site import bind_call_site, CALL_BUILTIN
+
+
+# 値がスクリプトの外（RETURN系の連動、入出力）からも参照されるためバッファリングしない変数
+UNBUFFERED_VARIABLES = SPECIAL_VARIABLES | LINKED_RETURN_VARIABLES | frozenset(['ANY_INPUT', 'RELAY_OUTPUT'])
+
+# 名前の出現として扱わない文字列属性
+_NON_NAME_FIELDS = frozenset(['type', 'operator', 'exit_type'])
+
+
+def split_append(node: Any) -> Optional[Tuple[ASTNode, Tuple[Any, ...]]]:
+    """
+    ASSIGNノードが X = X & 式1 & 式2 ... の形であれば (変数Xのノード, (式1, 式2, ...)) を返す
+
+    & は左結合のため、連結の一番左の項が代入先と同じ変数であるものが対象
+    """
+    if not isinstance(node, ASTNode) or node.type != 'ASSIGN':
+        return None
+    parts = []
+    value = node.value
+    while isinstance(value, ASTNode) and value.type == 'BINARY_OP' and value.operator == 'CONCAT':
+        parts.append(value.right)
+        value = value.left
+    if (not parts or not isinstance(value, ASTNode) or value.type != 'VARIABLE'
+            or value.name.upper() != node.variable.upper()):
+        return None
+    parts.reverse()
+    return value, tuple(parts)
+
+
+class _LoopScan:
+    """ループ内の名前の出現・追記の代入・関数呼び出しを収集"""
+
+    def __init__(self):
+        self.appends: Dict[str, List[ASTNode]] = {}  # 変数名 → 追記のASSIGNノード
+        self.names: Set[str] = set()  # 追記の代入先以外で現れた名前
+        self.calls: Set[str] = set()
+        self.has_function_def = False
+        self.has_return = False
+
+    def scan(self, value: Any):
+        if isinstance(value, ASTNode):
+            node_type = value.type
+            if node_type == 'LITERAL':
+                return
+            if node_type == 'FUNCTION_DEF':
+                self.has_function_def = True
+                return
+            if node_type == 'RETURN':
+                self.has_return = True
+            elif node_type == 'FUNCTION_CALL' and bind_call_site(value).kind != CALL_BUILTIN:
+                self.calls.add(value.name.upper())
+            append = split_append(value)
+            if append is not None:
+                value._append = append
+                self.appends.setdefault(value.variable.upper(), []).append(value)
+                self.scan(append[1])
+                return
+            for key, attr in list(vars(value).items()):
+                if key.startswith('_') or key in _NON_NAME_FIELDS:
+                    continue
+                if isinstance(attr, str):
+                    self.names.add(attr.upper())
+                else:
+                    self.scan(attr)
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                self.scan(item)
+
+
+class AppendPlan:
+    """ループ内でバッファリングできる文字列変数"""
+
+    __slots__ = ('targets', 'calls')
+
+    def __init__(self, loop: ASTNode):
+        loop_scan = _LoopScan()
+        loop_scan.scan(loop)
+        targets = []
+        if not loop_scan.has_function_def:
+            for name, assigns in loop_scan.appends.items():
+                slot = assigns[0]._slot
+                if name in loop_scan.names or name in UNBUFFERED_VARIABLES:
+                    continue
+                if slot == RETURN_SLOT and loop_scan.has_return:
+                    # RETURN文が戻り値を上書きする順序を保てない
+                    continue
+                targets.append((name, slot))
+        # (変数名, スロット番号) の並び
+        self.targets: Tuple[Tuple[str, Optional[int]], ...] = tuple(targets)
+        # ユーザー定義関数の可能性がある呼び出し先の名前
+        self.calls = frozenset(loop_scan.calls)
+
+
+def bind_append_plan(node: ASTNode) -> AppendPlan:
+    """WHILE/FORノードの AppendPlan を取得（初回のみ作成し、ノードにキャッシュ）"""
+    plan = getattr(node, '_append_plan', None)
+    if plan is None:
+        plan = AppendPlan(node)
+        node._append_plan = plan
+    return plan
+
+
+def open_builders(plan: AppendPlan, engine) -> Tuple[Tuple[str, Optional[int]], ...]:
+    """
+    ループ開始時に追記のバッファを登録し、このループが受け持つ (変数名, スロット番号) を返す
+
+    ループ内で呼び出す関数がユーザー定義関数の場合はバッファリングしない
+    """
+    if not plan.targets or not plan.calls.isdisjoint(engine.user_functions):
+        return ()
+    builders = engine.string_builders
+    owned = tuple(target for target in plan.targets if target[0] not in builders)
+    for name, slot in owned:
+        builders[name] = []
+    return owned
+
+
+def close_builders(owned: Tuple[Tuple[str, Optional[int]], ...], engine):
+    """ループ終了時にバッファを連結して変数に代入（追記しなかった変数は変更しない）"""
+    builders = engine.string_builders
+    for name, slot in owned:
+        parts = builders.pop(name)
+        if parts:
+            engine.store_variable(name, slot, ''.join(parts))
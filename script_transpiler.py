@@ -0,0 +1,816 @@
+# -*- coding: utf-8 -*-
+"""
+ScriptTranspiler - ASTをPythonソースに変換して実行する方式（ScriptEngine の transpiled モード）
+
+目的:
+- 10万回規模のループを回す数値計算スクリプトで、インタープリターのオーバーヘッドを取り除く
+- FOR/WHILE はPythonのネイティブなループ、ユーザー定義関数の本体はPythonの関数、
+  ビルトイン関数は BUILTIN_FUNCTIONS の関数を直接呼び出すコードになる
+
+アーキテクチャ:
+- 変換単位: トップレベルのステートメント1つ、またはFUNCTION_DEFの本体1つ。
+  生成したソースを compile() し、得られた関数をASTノードの
+  _transpiled / _transpiled_body 属性にキャッシュする（ASTCacheを通じて全エンジンで共有）
+- 変数はリゾルバー（script_resolver.py）が割り当てたスロット番号で関数フレームを直接読み書きする。
+  生成コードはエンジンの辞書（variables / arrays / スコープ）を直接読み書きするため、
+  ツリーウォーカーと状態を共有したまま混在して実行できる
+- VBAの意味論は小さなヘルパーに集約:
+  大文字小文字を区別しない文字列の = / <>（_vb_equal / _vb_not_equal）、
+  & の整形（engine.format_for_string）、真偽値の判定（engine.is_true）、
+  数値変換（engine.to_number）
+- フォールバック: DIM/REDIM/SPLIT・HOISTなど変換対象外の構文はノード単位で
+  engine.execute_statement() / engine.evaluate_expression() を呼び出すコードになる。
+  変換自体に失敗した単位は丸ごとツリーウォーカーで実行する
+- EXIT FOR/WHILE は break になる。間に別の種類のループがある場合（WHILE内のFOR内の EXIT WHILE）は
+  対象ループのフラグを立てて break し、内側のループを抜けるたびにフラグを判定して break する。
+  変換単位内に対象のループがない場合（関数本体のループ外の EXIT FOR など）だけ、
+  ツリーウォーカーと同じ LoopExit を送出する。関数本体の EXIT FUNCTION は return になる
+
+使用方法:
+    engine = ScriptEngine(mode='transpiled')
+    engine.execute(script)
+"""
+
+import math
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .script_parser import ASTNode
+    from .script_control_flow import FunctionExit, LoopExit, counter_values
+    from .script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT
+    from .script_resolver import RETURN_SLOT, UNSET
+    from .script_optimizer import HoistedResult
+    from .script_select_case import bind_case_table
+    from .script_string_builder import split_append, bind_append_plan
+    from .script_array import ScriptArray, GridArray, MISSING
+    from .script_logging import get_logger
+    from .script_metrics import COUNT_BUILTIN_CALLS
+    from .locales import get_message
+except ImportError:
+    from script_parser import ASTNode
+    from script_control_flow import FunctionExit, LoopExit, counter_values
+    from script_call_site import bind_call_site, CALL_BUILTIN, CALL_ADAPTER, CALL_SPLIT
+    from script_resolver import RETURN_SLOT, UNSET
+    from script_optimizer import HoistedResult
+    from script_select_case import bind_case_table
+    from script_string_builder import split_append, bind_append_plan
+    from script_array import ScriptArray, GridArray, MISSING
+    from script_logging import get_logger
+    from script_metrics import COUNT_BUILTIN_CALLS
+    from locales import get_message
+
+logger = get_logger('engine')
+
+# 変換済みのステートメント・関数本体（引数はScriptEngine）
+TranspiledUnit = Callable[[Any], Any]
+
+# 生成コード内で使用する二項演算子
+_ARITHMETIC_OPERATORS = {'PLUS': '+', 'MINUS': '-', 'MULTIPLY': '*'}
+_COMPARISON_OPERATORS = {'LT': '<', 'GT': '>', 'LTE': '<=', 'GTE': '>='}
+_DIVISION_HELPERS = {'DIVIDE': '_divide', 'MOD': '_modulo', 'INTDIV': '_int_divide'}
+
+
+# ======================================================================
+# 生成コードから呼び出すヘルパー
+# ======================================================================
+
+def _vb_equal(left: Any, right: Any) -> bool:
+    """= 演算子（両方が文字列の場合は大文字小文字を区別しない）"""
+    if isinstance(left, str) and isinstance(right, str):
+        return left.upper() == right.upper()
+    return bool(left == right)
+
+
+def _vb_not_equal(left: Any, right: Any) -> bool:
+    """<> 演算子（両方が文字列の場合は大文字小文字を区別しない）"""
+    if isinstance(left, str) and isinstance(right, str):
+        return left.upper() != right.upper()
+    return bool(left != right)
+
+
+def _divide(engine, left: float, right: float) -> float:
+    if right == 0:
+        raise RuntimeError(get_message('error_zero_division', engine.locale))
+    return left / right
+
+
+def _modulo(engine, left: float, right: float) -> float:
+    if right == 0:
+        raise RuntimeError(get_message('error_zero_division_mod', engine.locale))
+    return left % right
+
+
+def _int_divide(engine, left: float, right: float) -> int:
+    if right == 0:
+        raise RuntimeError(get_message('error_zero_division', engine.locale))
+    return int(left // right)
+
+
+def _array_get(arrays: Dict[str, Any], name: str, key: Any) -> Any:
+    """配列要素を取得（存在しない場合は0）"""
+    array_dict = arrays.get(name)
+    if array_dict is not None:
+        value = array_dict.get(key, MISSING)
+        if value is not MISSING:
+            return value
+    return 0
+
+
+def _scoped_array_get(local_arrays: Dict[str, Any], global_arrays: Dict[str, Any], name: str, key: Any) -> Any:
+    """関数スコープ → グローバルの順に配列要素を取得（存在しない場合は0）"""
+    array_dict = local_arrays.get(name)
+    if array_dict is not None:
+        value = array_dict.get(key, MISSING)
+        if value is not MISSING:
+            return value
+    return _array_get(global_arrays, name, key)
+
+
+def _call_builtin(engine, name: str, func: Callable, *args: Any) -> Any:
+    """ビルトイン関数を直接呼び出す（エラーはツリーウォーカーと同じメッセージに変換）"""
+    try:
+        return func(*args)
+    except Exception as e:
+        raise engine.builtin_call_error(name, e)
+
+
+def _call_builtin_counted(engine, name: str, func: Callable, *args: Any) -> Any:
+    """_call_builtin に呼び出し回数の集計を加えたもの（EASYSCRIPTER_COUNT_BUILTINS 有効時）"""
+    engine.builtin_calls[name] += 1
+    try:
+        return func(*args)
+    except Exception as e:
+        raise engine.builtin_call_error(name, e)
+
+
+def _call_function(engine, node: ASTNode, name: str, arguments: Tuple[Tuple[Any, Optional[str]], ...]) -> Any:
+    """ユーザー定義関数・特殊処理関数を呼び出す（arguments は (値, 元の配列名) の並び）"""
+    args = [value for value, _ in arguments]
+    arg_names = [arg_name for _, arg_name in arguments]
+    if name in engine.user_functions:
+        return engine.execute_user_function(name, args, arg_names)
+    return engine.call_function(node, name, args, arg_names)
+
+
+_HELPERS = {
+    'LoopExit': LoopExit,
+    'FunctionExit': FunctionExit,
+    'UNSET': UNSET,
+    'ScriptArray': ScriptArray,
+    'GridArray': GridArray,
+    '_counter_values': counter_values,
+    'HoistedResult': HoistedResult,
+    '_vb_equal': _vb_equal,
+    '_vb_not_equal': _vb_not_equal,
+    '_divide': _divide,
+    '_modulo': _modulo,
+    '_int_divide': _int_divide,
+    '_array_get': _array_get,
+    '_scoped_array_get': _scoped_array_get,
+    '_call_builtin': _call_builtin_counted if COUNT_BUILTIN_CALLS else _call_builtin,
+    '_call_function': _call_function,
+}
+
+
+# ======================================================================
+# ソース生成
+# ======================================================================
+
+class _LoopContext:
+    """変換中のループ（EXITのbreak生成用）"""
+    __slots__ = ('loop_type', 'flag', 'exit_flags')
+
+    def __init__(self, loop_type: str):
+        self.loop_type = loop_type
+        self.flag: Optional[str] = None  # 内側のループからこのループを抜ける場合のフラグ変数
+        self.exit_flags: List[str] = []  # このループを抜けた直後に判定する外側のループのフラグ
+
+
+class PythonSourceGenerator:
+    """
+    ASTからPythonソースを生成する（1つの変換単位ごとにインスタンスを作成）
+
+    生成される関数内のローカル変数:
+        V: engine.variables / GA: engine.arrays
+        S, F, SA: 関数スコープ、その変数フレームのスロット・配列（関数本体のみ）
+        K: ツリーウォーカーに渡すASTノードなどの定数
+    """
+
+    def __init__(self, function_name: Optional[str] = None):
+        self.function_name = function_name  # 関数本体の場合は大文字の関数名
+        self.lines: List[str] = []
+        self.constants: List[Any] = []
+        self.bindings: Dict[str, Any] = {}
+        self.loops: List[_LoopContext] = []  # 変換中のループ（EXITのbreak判定用）
+        self.builders: Dict[str, str] = {}  # 追記をバッファリング中の文字列変数 → 部分のリストのローカル変数
+        self._temp_count = 0
+
+    @property
+    def in_function(self) -> bool:
+        return self.function_name is not None
+
+    def generate(self, statements: Iterable[Any], entry_name: str) -> str:
+        """ステートメントの並びを実行する関数 entry_name(eng) のソースを生成"""
+        self.emit(0, f"def {entry_name}(eng):")
+        self.emit(1, "V = eng.variables")
+        self.emit(1, "GA = eng.arrays")
+        self.emit(1, "_num = eng.to_number")
+        self.emit(1, "_truth = eng.is_true")
+        self.emit(1, "_fmt = eng.format_for_string")
+        if self.in_function:
+            self.emit(1, "S = eng.call_stack[-1]")
+            self.emit(1, "F = S['frame'].values")
+            self.emit(1, "SA = S['arrays']")
+        self.block(statements, 1)
+        return "\n".join(self.lines) + "\n"
+
+    def emit(self, indent: int, line: str):
+        self.lines.append("    " * indent + line)
+
+    def temp(self) -> str:
+        self._temp_count += 1
+        return f"_t{self._temp_count}"
+
+    def constant(self, value: Any) -> str:
+        self.constants.append(value)
+        return f"K[{len(self.constants) - 1}]"
+
+    def bind_builtin(self, name: str, func: Any) -> str:
+        """ビルトイン関数（CALL_ADAPTERの場合は BuiltinDescriptor）を生成コードの名前に束縛"""
+        binding = f"_f_{name}"
+        self.bindings[binding] = func
+        return binding
+
+    # ------------------------------------------------------------------
+    # ステートメント
+    # ------------------------------------------------------------------
+
+    def block(self, statements: Iterable[Any], indent: int):
+        start = len(self.lines)
+        for statement in statements:
+            self.statement(statement, indent)
+        if len(self.lines) == start:
+            self.emit(indent, "pass")
+
+    def statement(self, node: Any, indent: int):
+        if not isinstance(node, ASTNode):
+            return
+        node_type = node.type
+        if node_type == 'ASSIGN':
+            append = split_append(node)
+            if append is not None and (node._name or node.variable.upper()) in self.builders:
+                self.append_statement(node, append, indent)
+                return
+            code, kind = self.expression(node.value)
+            self.assign(node, code, kind, indent, detect_relay=True)
+        elif node_type == 'ASSIGN_ARRAY':
+            self.assign_array(node.array, [node.index], node.value, indent, multi=False)
+        elif node_type == 'ASSIGN_ARRAY_MULTI':
+            self.assign_array(node.array, node.indices, node.value, indent, multi=True)
+        elif node_type == 'IF':
+            self.if_statement(node, indent)
+        elif node_type == 'WHILE':
+            self.while_loop(node, indent)
+        elif node_type == 'FOR':
+            self.for_loop(node, indent)
+        elif node_type == 'SELECT_CASE':
+            self.select_case(node, indent)
+        elif node_type == 'RETURN':
+            self.return_statement(node, indent)
+        elif node_type == 'EXIT':
+            self.exit_statement(node, indent)
+        elif node_type == 'FUNCTION_DEF':
+            self.emit(indent, f"eng.execute_function_definition({self.constant(node)})")
+        elif node_type in ('dim', 'REDIM_STMT', 'ARRAY_STMT', 'SPLIT_STMT', 'HOIST'):
+            # 変換対象外の構文はツリーウォーカーで実行
+            self.emit(indent, f"eng.execute_statement({self.constant(node)})")
+        else:
+            # その他の式（関数呼び出しなど）
+            self.emit(indent, self.expression(node)[0])
+
+    def assign(self, node: ASTNode, code: str, kind: Optional[str], indent: int, detect_relay: bool = False):
+        """ASSIGN/FORの変数への代入コードを生成（ScriptEngine.store_variable と同じ動作）"""
+        name = node._name or node.variable.upper()
+        slot = node._slot
+        value = self.temp()
+        self.emit(indent, f"{value} = {code}")
+        # RELAY_OUTPUT変数への代入を検出（Tier 3実装）
+        if detect_relay and name == 'RELAY_OUTPUT':
+            self.emit(indent, "eng.relay_output_assigned = True")
+            self.emit(indent, f"eng.relay_output_value = {value}")
+        self.store(name, slot, value, kind, indent)
+
+    def store(self, name: str, slot: Optional[int], value: str, kind: Optional[str], indent: int):
+        """評価済みの値（ローカル変数 value）を変数に代入するコードを生成"""
+        if slot is None:
+            # 未解決の変数（RETURNなど）はエンジンの処理に任せる
+            self.emit(indent, f"eng.set_variable({name!r}, {value})")
+            return
+        if kind is None:
+            # 配列（リスト・辞書）の可能性がある値はエンジンの処理に任せる
+            self.emit(indent, f"if isinstance({value}, (list, dict, ScriptArray, GridArray)):")
+            self.emit(indent + 1, f"eng.set_variable({name!r}, {value})")
+            self.emit(indent, "else:")
+            indent += 1
+        if slot < 0:
+            self.emit(indent, f"V[{name!r}] = {value}")
+            return
+        if slot == RETURN_SLOT:
+            # 関数名への代入は戻り値の設定
+            self.emit(indent, f"S['return_value'] = {value}")
+        self.emit(indent, f"F[{slot}] = {value}")
+
+    def append_statement(self, node: ASTNode, append: Tuple[ASTNode, Tuple[Any, ...]], indent: int):
+        """ループ内の文字列の追記（X = X & 式）をバッファに溜めるコードを生成（script_string_builder.py）"""
+        parts = self.builders[node._name or node.variable.upper()]
+        variable, expressions = append
+        codes = []
+        for expression in expressions:
+            code, kind = self.expression(expression)
+            codes.append(code if kind == 'str' else f"_fmt({code})")
+        self.emit(indent, f"if {parts} is not None:")
+        self.emit(indent + 1, f"if {parts}:")
+        if len(codes) == 1:
+            self.emit(indent + 2, f"{parts}.append({codes[0]})")
+        else:
+            self.emit(indent + 2, f"{parts}.extend(({', '.join(codes)}))")
+        self.emit(indent + 1, "else:")
+        # 最初の追記では変数の現在の値を先頭に置く
+        self.emit(indent + 2, f"{parts}.extend((_fmt({self.expression(variable)[0]}), {', '.join(codes)}))")
+        self.emit(indent, "else:")
+        # 呼び出す関数がユーザー定義関数のためバッファリングしていない場合は通常の代入
+        code, kind = self.expression(node.value)
+        self.assign(node, code, kind, indent + 1, detect_relay=True)
+
+    def open_builders(self, node: ASTNode, indent: int) -> List[Tuple[str, Optional[int], str]]:
+        """ループ内の文字列の追記のバッファを用意し、このループが受け持つ (変数名, スロット番号, リスト) を返す"""
+        plan = bind_append_plan(node)
+        owned = []
+        for name, slot in plan.targets:
+            if name in self.builders:
+                continue  # 外側のループがバッファリング中
+            parts = self.temp()
+            if plan.calls:
+                # 呼び出す関数がユーザー定義関数の場合はバッファリングしない（None）
+                self.emit(indent, f"{parts} = [] if {self.constant(plan.calls)}.isdisjoint(eng.user_functions) else None")
+            else:
+                self.emit(indent, f"{parts} = []")
+            self.builders[name] = parts
+            owned.append((name, slot, parts))
+        return owned
+
+    def close_builders(self, owned: List[Tuple[str, Optional[int], str]], indent: int):
+        """ループのtry文に、バッファを連結して変数に代入する finally 節を追加"""
+        if not owned:
+            return
+        self.emit(indent, "finally:")
+        for name, slot, parts in owned:
+            del self.builders[name]
+            value = self.temp()
+            self.emit(indent + 1, f"if {parts}:")
+            self.emit(indent + 2, f"{value} = ''.join({parts})")
+            self.store(name, slot, value, 'str', indent + 2)
+
+    def assign_array(self, array: str, indices: Iterable[Any], value_node: Any, indent: int, multi: bool):
+        name = array.upper()
+        index_codes = [f"int({self.expression(index)[0]})" for index in indices]
+        key = self.temp()
+        value = self.temp()
+        # インデックス → 値の順に評価（ツリーウォーカーと同じ）
+        self.emit(indent, f"{key} = {'(' + ', '.join(index_codes) + ',)' if multi else index_codes[0]}")
+        self.emit(indent, f"{value} = {self.expression(value_node)[0]}")
+        arrays = "SA" if self.in_function else "GA"
+        target = self.temp()
+        self.emit(indent, f"{target} = {arrays}.get({name!r})")
+        self.emit(indent, f"if {target} is None:")
+        # 多次元配列はタプルをキーとする辞書
+        self.emit(indent + 1, f"{target} = {arrays}[{name!r}] = {'{}' if multi else 'ScriptArray()'}")
+        self.emit(indent, f"{target}[{key}] = {value}")
+
+    def if_statement(self, node: ASTNode, indent: int):
+        self.emit(indent, f"if {self.condition(node.condition)}:")
+        self.block(node.then_branch, indent + 1)
+        for elseif_condition, elseif_statements in (getattr(node, 'elseif_branches', None) or ()):
+            self.emit(indent, f"elif {self.condition(elseif_condition)}:")
+            self.block(elseif_statements, indent + 1)
+        if node.else_branch:
+            self.emit(indent, "else:")
+            self.block(node.else_branch, indent + 1)
+
+    def enter_loop(self, loop_type: str) -> Tuple[_LoopContext, int]:
+        self.loops.append(_LoopContext(loop_type))
+        return self.loops[-1], len(self.lines)
+
+    def exit_loop(self, loop: _LoopContext, start: int, indent: int):
+        self.loops.pop()
+        if loop.flag is not None:
+            # 内側のループから抜ける場合のフラグはループに入る前に初期化
+            self.lines.insert(start, "    " * indent + f"{loop.flag} = False")
+        for flag in loop.exit_flags:
+            # 外側のループへのEXITで抜けた場合は続けて break
+            self.emit(indent, f"if {flag}:")
+            self.emit(indent + 1, "break")
+
+    def load_guard(self, indent: int) -> str:
+        """ループに入る前にキャンセル・実行予算の監視（eng.guard）をローカル変数に取得"""
+        guard = self.temp()
+        self.emit(indent, f"{guard} = eng.guard")
+        return guard
+
+    def guard_step(self, guard: str, node: ASTNode, indent: int):
+        """ループの反復ごとに本体のステートメント数を数える（ExecutionGuard.step）"""
+        self.emit(indent, f"if {guard} is not None:")
+        self.emit(indent + 1, f"{guard}.step({len(node.body or ()) or 1})")
+
+    def while_loop(self, node: ASTNode, indent: int):
+        loop, start = self.enter_loop('WHILE')
+        owned = self.open_builders(node, indent)
+        guard = self.load_guard(indent)
+        self.emit(indent, "try:")
+        self.emit(indent + 1, f"while {self.condition(node.condition)}:")
+        self.guard_step(guard, node, indent + 2)
+        self.block(node.body, indent + 2)
+        self.emit(indent, "except LoopExit as _exit:")
+        # 他のループタイプ（FOR）のEXITは再スロー
+        self.emit(indent + 1, "if _exit.loop_type != 'WHILE':")
+        self.emit(indent + 2, "raise")
+        self.close_builders(owned, indent)
+        self.exit_loop(loop, start, indent)
+
+    def for_loop(self, node: ASTNode, indent: int):
+        loop, start = self.enter_loop('FOR')
+        owned = self.open_builders(node, indent)
+        guard = self.load_guard(indent)
+        current = self.temp()
+        end = self.temp()
+        self.emit(indent, f"{current} = {self.number(*self.expression(node.start))}")
+        self.emit(indent, f"{end} = {self.number(*self.expression(node.end))}")
+
+        step_node = node.step if hasattr(node, 'step') else 1
+        if isinstance(step_node, ASTNode) and step_node.type == 'LITERAL':
+            step_node = step_node.value
+        constant_step = not isinstance(step_node, ASTNode) and type(step_node) in (int, float) and math.isfinite(step_node)
+        if constant_step and not float(step_node).is_integer():
+            # 小数の定数STEPは累積加算（ループ方向をコンパイル時に決定）
+            step = repr(float(step_node))
+            loop_condition = f"{current} <= {end}" if step_node > 0 else f"{current} >= {end}"
+            self.emit(indent, "try:")
+            self.emit(indent + 1, f"while {loop_condition}:")
+            self.guard_step(guard, node, indent + 2)
+            self.assign(node, current, 'float', indent + 2)
+            self.block(node.body, indent + 2)
+            self.emit(indent + 2, f"{current} += {step}")
+        else:
+            # 整数のSTEPは開始値が整数ならrangeで列挙（script_control_flow.counter_values）
+            if constant_step:
+                step = repr(float(step_node))
+            else:
+                step = self.temp()
+                self.emit(indent, f"{step} = {self.number(*self.expression(step_node))}")
+            self.emit(indent, "try:")
+            self.emit(indent + 1, f"for {current} in _counter_values({current}, {end}, {step}):")
+            self.guard_step(guard, node, indent + 2)
+            self.assign(node, current, 'float', indent + 2)
+            self.block(node.body, indent + 2)
+        self.emit(indent, "except LoopExit as _exit:")
+        # 他のループタイプ（WHILE）のEXITは再スロー
+        self.emit(indent + 1, "if _exit.loop_type != 'FOR':")
+        self.emit(indent + 2, "raise")
+        self.close_builders(owned, indent)
+        self.exit_loop(loop, start, indent)
+
+    def select_case(self, node: ASTNode, indent: int):
+        test_value = self.temp()
+        index = self.temp()
+        self.emit(indent, f"{test_value} = {self.expression(node.test_expression)[0]}")
+        # 一致するCaseの番号はジャンプテーブルで検索（script_select_case.py）
+        find_case = self.constant(bind_case_table(node).find)
+        self.emit(indent, f"{index} = {find_case}(eng, {test_value})")
+        if node.cases:
+            self.emit(indent, f"if {index} is not None:")
+            self.case_branches(index, node.cases, 0, len(node.cases), indent + 1)
+            if node.else_case:
+                self.emit(indent, "else:")
+                self.block(node.else_case, indent + 1)
+        elif node.else_case:
+            self.block(node.else_case, indent)
+
+    def case_branches(self, index: str, cases: Any, low: int, high: int, indent: int):
+        """Case番号 low〜high-1 の分岐を二分探索の形で生成"""
+        if high - low > 4:
+            middle = (low + high) // 2
+            self.emit(indent, f"if {index} < {middle}:")
+            self.case_branches(index, cases, low, middle, indent + 1)
+            self.emit(indent, "else:")
+            self.case_branches(index, cases, middle, high, indent + 1)
+            return
+        for number in range(low, high - 1):
+            self.emit(indent, f"{'if' if number == low else 'elif'} {index} == {number}:")
+            self.block(cases[number].statements, indent + 1)
+        if high - low > 1:
+            self.emit(indent, "else:")
+            self.block(cases[high - 1].statements, indent + 1)
+        else:
+            self.block(cases[low].statements, indent)
+
+    def return_statement(self, node: ASTNode, indent: int):
+        value_node = getattr(node, 'value', None)
+        if not value_node:
+            # 単純なRETURN（戻り値なし）
+            if self.in_function:
+                self.emit(indent, "S['return_value'] = 0")
+            return
+        code = self.expression(value_node)[0]
+        if self.in_function:
+            self.emit(indent, f"S['return_value'] = {code}")
+        else:
+            # グローバルスコープでのRETURN（RETURN変数として扱う）
+            self.emit(indent, f"V['RETURN'] = {code}")
+
+    def exit_statement(self, node: ASTNode, indent: int):
+        exit_type = node.exit_type.upper()
+        if exit_type == 'FUNCTION':
+            self.emit(indent, "return" if self.in_function else "raise FunctionExit()")
+        elif exit_type in ('FOR', 'WHILE'):
+            targets = [depth for depth, loop in enumerate(self.loops) if loop.loop_type == exit_type]
+            if not targets:
+                # 変換単位の外（関数の呼び出し元のループなど）へのEXITは例外で伝える
+                self.emit(indent, f"raise LoopExit({exit_type!r})")
+                return
+            depth = targets[-1]
+            if depth < len(self.loops) - 1:
+                # 間にある別の種類のループはフラグを判定して順に抜ける
+                target = self.loops[depth]
+                if target.flag is None:
+                    target.flag = self.temp()
+                self.emit(indent, f"{target.flag} = True")
+                for inner in self.loops[depth + 1:]:
+                    if target.flag not in inner.exit_flags:
+                        inner.exit_flags.append(target.flag)
+            self.emit(indent, "break")
+        else:
+            # 不明なEXIT文タイプはツリーウォーカーでエラーにする
+            self.emit(indent, f"eng.execute_statement({self.constant(node)})")
+
+    # ------------------------------------------------------------------
+    # 式（(ソース, 型) を返す。型は 'float'、'str'、または不明を表すNone）
+    # ------------------------------------------------------------------
+
+    def expression(self, node: Any) -> Tuple[str, Optional[str]]:
+        if not isinstance(node, ASTNode):
+            # ASTNodeでない場合(直接の値)
+            return self.literal(node)
+        node_type = node.type
+        if node_type == 'LITERAL':
+            return self.literal(node.value)
+        if node_type == 'VARIABLE':
+            return self.variable(node), None
+        if node_type == 'HOISTED':
+            return self.hoisted(node), None
+        if node_type == 'ARRAY_ACCESS':
+            key = f"int({self.expression(node.index)[0]})"
+            return self.array_get(node.array.upper(), key), None
+        if node_type == 'BINARY_OP':
+            return self.binary_op(node)
+        if node_type == 'UNARY_OP':
+            return self.unary_op(node)
+        if node_type == 'FUNCTION_CALL':
+            return self.function_call(node), None
+        # 変換対象外の式はツリーウォーカーで評価
+        return f"eng.evaluate_expression({self.constant(node)})", None
+
+    def literal(self, value: Any) -> Tuple[str, Optional[str]]:
+        if type(value) is float and math.isfinite(value):
+            return f"({value!r})", 'float'
+        if type(value) is str:
+            return repr(value), 'str'
+        if value is None or type(value) in (int, bool):
+            return repr(value), None
+        return self.constant(value), None
+
+    def variable(self, node: ASTNode) -> str:
+        """VARIABLEの読み出しコードを生成（ScriptEngine.load_variable と同じ動作）"""
+        name = node._name or node.name.upper()
+        slot = node._slot
+        if slot is None:
+            return f"eng.get_variable({name!r}, 0)"
+        if slot < 0:
+            return f"V.get({name!r}, 0)"
+        # 未代入のスロットは戻り値またはグローバル変数
+        value = self.temp()
+        return f"({value} if ({value} := F[{slot}]) is not UNSET else eng.get_variable({name!r}, 0))"
+
+    def hoisted(self, node: ASTNode) -> str:
+        """ループの外で評価済みの値の読み出しコードを生成（script_optimizer.py参照）"""
+        name = node._name or node.name.upper()
+        slot = node._slot
+        if slot is None:
+            read = f"eng.get_variable({name!r}, 0)"
+        elif slot < 0:
+            read = f"V.get({name!r}, 0)"
+        else:
+            read = f"F[{slot}]"
+        value = self.temp()
+        # 評価時の例外・配列は HoistedResult に入っている
+        return f"({value}.unwrap() if ({value} := {read}).__class__ is HoistedResult else {value})"
+
+    def array_get(self, name: str, key: str) -> str:
+        if self.in_function:
+            return f"_scoped_array_get(SA, GA, {name!r}, {key})"
+        return f"_array_get(GA, {name!r}, {key})"
+
+    def array_exists(self, name: str) -> str:
+        if self.in_function:
+            return f"({name!r} in SA or {name!r} in GA)"
+        return f"{name!r} in GA"
+
+    def number(self, code: str, kind: Optional[str]) -> str:
+        """値を数値に変換するコード（floatならそのまま）"""
+        if kind == 'float':
+            return code
+        value = self.temp()
+        return f"({value} if ({value} := {code}).__class__ is float else _num({value}))"
+
+    def truth(self, code: str, kind: Optional[str]) -> str:
+        """値を真偽値に変換するコード（engine.is_true と同じ規則）"""
+        if kind == 'float':
+            return f"({code} != 0)"
+        value = self.temp()
+        return f"(({value} != 0) if ({value} := {code}).__class__ is float else _truth({value}))"
+
+    def condition(self, node: Any) -> str:
+        """IF/WHILEなどの条件式（比較・論理演算は真偽値を直接計算）"""
+        if isinstance(node, ASTNode):
+            if node.type == 'BINARY_OP':
+                op = node.operator
+                if op == 'AND':
+                    return f"({self.condition(node.left)} and {self.condition(node.right)})"
+                if op == 'OR':
+                    return f"({self.condition(node.left)} or {self.condition(node.right)})"
+                if op == 'EQ':
+                    return f"_vb_equal({self.expression(node.left)[0]}, {self.expression(node.right)[0]})"
+                if op == 'NEQ':
+                    return f"_vb_not_equal({self.expression(node.left)[0]}, {self.expression(node.right)[0]})"
+                if op in _COMPARISON_OPERATORS:
+                    left = self.number(*self.expression(node.left))
+                    right = self.number(*self.expression(node.right))
+                    return f"({left} {_COMPARISON_OPERATORS[op]} {right})"
+            elif node.type == 'UNARY_OP' and node.operator == 'NOT':
+                return f"(not {self.condition(node.operand)})"
+        return self.truth(*self.expression(node))
+
+    def binary_op(self, node: ASTNode) -> Tuple[str, Optional[str]]:
+        op = node.operator
+        # 比較・論理演算（VBA準拠: 結果は数値 True=1.0, False=0.0）
+        if op in ('AND', 'OR', 'EQ', 'NEQ') or op in _COMPARISON_OPERATORS:
+            return f"(1.0 if {self.condition(node)} else 0.0)", 'float'
+        if op == 'CONCAT':
+            parts = []
+            for operand in (node.left, node.right):
+                code, kind = self.expression(operand)
+                parts.append(code if kind == 'str' else f"_fmt({code})")
+            return f"({parts[0]} + {parts[1]})", 'str'
+
+        left = self.number(*self.expression(node.left))
+        right = self.number(*self.expression(node.right))
+        if op in _ARITHMETIC_OPERATORS:
+            return f"({left} {_ARITHMETIC_OPERATORS[op]} {right})", 'float'
+        if op == 'POWER':
+            return f"({left} ** {right})", None
+        if op in _DIVISION_HELPERS:
+            return f"{_DIVISION_HELPERS[op]}(eng, {left}, {right})", ('float' if op != 'INTDIV' else None)
+        # その他の演算子はエンジンの処理に任せる
+        return f"eng.evaluate_binary_op({op!r}, {left}, {right})", None
+
+    def unary_op(self, node: ASTNode) -> Tuple[str, Optional[str]]:
+        op = node.operator
+        if op == 'NOT':
+            # VBA準拠: 結果は数値（True=1.0, False=0.0）
+            return f"(1.0 if {self.condition(node)} else 0.0)", 'float'
+        operand = self.expression(node.operand)
+        if op == 'MINUS':
+            return f"(-{self.number(*operand)})", 'float'
+        if op == 'PLUS':
+            return self.number(*operand), 'float'
+        return f"eng.evaluate_unary_op({op!r}, {operand[0]})", None
+
+    def argument(self, arg: Any, with_name: bool) -> str:
+        """
+        関数の引数を評価するコード
+
+        配列変数参照・配列名の変数は配列の実体を渡す（ツリーウォーカーと同じ）。
+        with_name=True の場合は (値, 元の配列名) のタプルを生成する。
+        """
+        if isinstance(arg, ASTNode) and arg.type in ('ARRAY_VAR', 'VARIABLE'):
+            name = arg.name.upper()
+            if self.in_function:
+                array_code = f"(SA[{name!r}] if {name!r} in SA else GA[{name!r}])"
+            else:
+                array_code = f"GA[{name!r}]"
+            if arg.type == 'ARRAY_VAR':
+                # 配列が存在しない場合は空の配列として渡す
+                value = f"({array_code} if {self.array_exists(name)} else ScriptArray())"
+                return f"({value}, {name!r})" if with_name else value
+            fallback = self.variable(arg)
+            if with_name:
+                return f"(({array_code}, {name!r}) if {self.array_exists(name)} else ({fallback}, None))"
+            return f"({array_code} if {self.array_exists(name)} else {fallback})"
+        code = self.expression(arg)[0]
+        return f"({code}, None)" if with_name else code
+
+    def function_call(self, node: ASTNode) -> str:
+        site = bind_call_site(node)
+        name = site.name
+        arguments = node.arguments
+
+        # 配列が定義されている場合は配列アクセス
+        index_codes = [f"int({self.expression(arg)[0]})" for arg in arguments]
+        if len(index_codes) == 1:
+            key = index_codes[0]
+        else:
+            key = "(" + "".join(f"{code}, " for code in index_codes) + ")"
+        array_read = self.array_get(name, key)
+
+        if site.kind == CALL_SPLIT:
+            # SPLIT関数は第1引数を配列名として扱うためツリーウォーカーで評価
+            call = f"eng.evaluate_expression({self.constant(node)})"
+        elif site.kind == CALL_BUILTIN:
+            # 通常のビルトイン関数は直接呼び出す（同名のユーザー定義関数は定義できない）
+            args = "".join(f", {self.argument(arg, with_name=False)}" for arg in arguments)
+            call = f"_call_builtin(eng, {name!r}, {self.bind_builtin(name, site.builtin)}{args})"
+        elif site.kind == CALL_ADAPTER:
+            # engine・locale渡しや引数の変換が必要なビルトイン関数は呼び出し方法に従って呼び出す
+            args = "".join(f"{self.argument(arg, with_name=False)}, " for arg in arguments)
+            call = f"eng.call_builtin({self.bind_builtin(name, site.descriptor)}, [{args}])"
+        else:
+            pairs = "".join(f"{self.argument(arg, with_name=True)}, " for arg in arguments)
+            call = f"_call_function(eng, {self.constant(node)}, {name!r}, ({pairs}))"
+        return f"({array_read} if {self.array_exists(name)} else {call})"
+
+
+# ======================================================================
+# 変換とキャッシュ
+# ======================================================================
+
+def generate_source(statements: Iterable[Any], function_name: Optional[str] = None,
+                    entry_name: str = '_easyscripter_unit') -> Tuple[str, PythonSourceGenerator]:
+    """
+    ステートメントの並びからPythonソースを生成
+
+    Args:
+        statements: ステートメントのASTノード
+        function_name: 関数本体の場合は関数名（Noneはトップレベル）
+        entry_name: 生成する関数の名前
+
+    Returns:
+        (ソース, 定数やビルトイン関数の束縛を保持するジェネレーター)
+    """
+    generator = PythonSourceGenerator(function_name.upper() if function_name else None)
+    return generator.generate(statements, entry_name), generator
+
+
+def _build_unit(statements: Tuple[Any, ...], function_name: Optional[str], label: str) -> Optional[TranspiledUnit]:
+    """ソースを生成してcompile()し、実行用の関数を返す（変換できない場合はNone）"""
+    entry_name = '_easyscripter_unit'
+    try:
+        source, generator = generate_source(statements, function_name, entry_name)
+        code = compile(source, f"<easyscripter:{label}>", 'exec')
+    except Exception as e:
+        logger.debug("[ScriptTranspiler] Falling back to tree-walker for %s: %s", label, e)
+        return None
+    namespace = dict(_HELPERS)
+    namespace.update(generator.bindings)
+    namespace['K'] = tuple(generator.constants)
+    exec(code, namespace)
+    return namespace[entry_name]
+
+
+def transpile_statement(node: Any) -> TranspiledUnit:
+    """トップレベルのステートメントを変換（結果はノードにキャッシュ）"""
+    unit = getattr(node, '_transpiled', None)
+    if unit is None:
+        unit = _build_unit((node,), None, f"statement:{getattr(node, 'type', '?')}")
+        if unit is None:
+            def unit(engine):
+                return engine.execute_statement(node)
+        node._transpiled = unit
+    return unit
+
+
+def transpile_block(statements: Iterable[Any]) -> Tuple[TranspiledUnit, ...]:
+    """トップレベルのステートメントの並びを変換"""
+    return tuple(transpile_statement(statement) for statement in statements)
+
+
+def transpile_function_body(func_def: ASTNode) -> TranspiledUnit:
+    """ユーザー定義関数（FUNCTION_DEF）の本体をPythonの関数に変換（結果はノードにキャッシュ）"""
+    unit = getattr(func_def, '_transpiled_body', None)
+    if unit is None:
+        unit = _build_unit(tuple(func_def.body), func_def.name, f"function:{func_def.name.upper()}")
+        if unit is None:
+            body = tuple(func_def.body)
+
+            def unit(engine):
+                return engine.execute_block(body)
+        func_def._transpiled_body = unit
+    return unit
@@ -3,15 +3,47 @@ ComfyUI U5 EasyScripter Node Implementation - 型安全版
 Executes VBA-style scripts in ComfyUI
 """
 
+import logging
+
 from .locales import get_message, detect_locale_from_language_code
 from comfy.comfy_types import IO
 
 try:
-    from .script_engine import ScriptEngine
-    from .script_execution_queue import get_execution_queue
+    from .script_engine import ScriptEngine, engine_options
+    from .script_execution_queue import get_execution_queue, scheduling_hints, QueueFullError
+    from .script_cancellation import CancellationToken, ExecutionGuard
+    from .script_profiler import ScriptProfiler
+    from .script_process_pool import select_process_pool
+    from .script_locks import get_named_lock
+    from .script_metrics import get_metrics
+    from .script_array import ScriptArray, GridArray
+    from .script_logging import get_logger, log_message, LocalizedMessage
 except ImportError:
-    from script_engine import ScriptEngine
-    from script_execution_queue import get_execution_queue
+    from script_engine import ScriptEngine, engine_options
+    from script_execution_queue import get_execution_queue, scheduling_hints, QueueFullError
+    from script_cancellation import CancellationToken, ExecutionGuard
+    from script_profiler import ScriptProfiler
+    from script_process_pool import select_process_pool
+    from script_locks import get_named_lock
+    from script_metrics import get_metrics
+    from script_array import ScriptArray, GridArray
+    from script_logging import get_logger, log_message, LocalizedMessage
+
+logger = get_logger('node')
+
+
+def _relay_value(value):
+    """RELAY_OUTPUT の配列（ARRAY(...)・A[] の配列参照）を従来どおり辞書型配列にして後続のノードに渡す"""
+    if isinstance(value, (ScriptArray, GridArray)):
+        return value.to_dict()
+    if isinstance(value, dict) and isinstance(value.get('_data'), (ScriptArray, GridArray)):
+        return dict(value, _data=value['_data'].to_dict())
+    return value
+
+
+def _task_id(unique_id) -> str:
+    """キュー・メトリクスで使うタスクID"""
+    return f"easyscripter_{unique_id}" if unique_id else "easyscripter_unknown"
 
 class ComfyUI_u5_EasyScripterNode:
     """ComfyUI U5 EasyScripter - Node that executes VBA-style scripts"""
@@ -73,9 +105,9 @@ class ComfyUI_u5_EasyScripterNode:
         content = f"{script}_{unique_id}_{time.time()}"
         hash_value = hashlib.md5(content.encode()).hexdigest()
 
-        # デバッグログ（get_messageは6行目でグローバルインポート済み）
+        # デバッグログ（DEBUGレベル有効時のみ出力）
         locale = 'ja'  # デフォルトロケール
-        print(get_message('scripter_node_is_changed', locale, hash_value[:8] + "...", unique_id))
+        log_message(logger, logging.DEBUG, 'scripter_node_is_changed', locale, hash_value[:8] + "...", unique_id)
 
         return hash_value
 
@@ -106,27 +138,35 @@ class ComfyUI_u5_EasyScripterNode:
             time_since_last = current_time - ComfyUI_u5_EasyScripterNode._last_execution_time
         ComfyUI_u5_EasyScripterNode._last_execution_time = current_time
         
-        script_hash = hash(script) if script else 0
         locale = 'ja'  # デフォルトロケール
-        print(get_message('scripter_node_diag_execution_counter', locale,
-                         ComfyUI_u5_EasyScripterNode._execution_counter,
-                         time_since_last,
-                         unique_id,
-                         script_hash))
+        if logger.isEnabledFor(logging.DEBUG):
+            script_hash = hash(script) if script else 0
+            log_message(logger, logging.DEBUG, 'scripter_node_diag_execution_counter', locale,
+                        ComfyUI_u5_EasyScripterNode._execution_counter,
+                        time_since_last,
+                        unique_id,
+                        script_hash)
 
         # キューイング制御を取得
         exec_queue = get_execution_queue(locale=locale)
 
         # タスクIDを生成（デバッグ用）
-        task_id = f"easyscripter_{unique_id}" if unique_id else "easyscripter_unknown"
+        task_id = _task_id(unique_id)
 
-        # キューに追加し、順次実行（タイムアウト120秒）
+        # ' @PRIORITY / ' @COST ディレクティブ（なければノードとスクリプトごとの実行時間の履歴で順序を決める）
+        priority, cost_hint = scheduling_hints(script, locale)
+
+        # キューに追加し、ワーカープールで実行（タイムアウト120秒）
         try:
-            print(get_message('scripter_node_task_sent', locale, task_id))
+            log_message(logger, logging.DEBUG, 'scripter_node_task_sent', locale, task_id)
             result = exec_queue.enqueue_and_wait(
                 self._execute_script_impl,
                 task_id=task_id,
                 timeout=120.0,  # 2分タイムアウト
+                cancel_token=CancellationToken(),  # タイムアウト時に実行中のスクリプトを停止
+                priority=priority,
+                cost_hint=cost_hint,
+                cost_key=f"{unique_id}:{hash(script)}",
                 output=output,
                 script=script,
                 VAL1_int=VAL1_int,
@@ -141,17 +181,22 @@ class ComfyUI_u5_EasyScripterNode:
                 dynprompt=dynprompt
             )
             return result
+        except QueueFullError as e:
+            log_message(logger, logging.WARNING, 'scripter_node_queue_full', locale, task_id, e)
+            # 過負荷時のフォールバック結果（待たずにすぐ返す）
+            return {
+                "ui": {"text": [get_message('scripter_node_queue_full_error', locale, e)]},
+                "result": (0, 0.0, "BUSY", 0, 0.0, "BUSY", None)
+            }
         except TimeoutError as e:
-            print(get_message('scripter_node_timeout', locale, task_id, e))
+            log_message(logger, logging.ERROR, 'scripter_node_timeout', locale, task_id, e)
             # タイムアウト時のフォールバック結果
             return {
                 "ui": {"text": [get_message('scripter_node_timeout_error', locale, e)]},
                 "result": (0, 0.0, "TIMEOUT", 0, 0.0, "TIMEOUT", None)
             }
         except Exception as e:
-            print(get_message('scripter_node_queue_error', locale, task_id, e))
-            import traceback
-            traceback.print_exc()
+            log_message(logger, logging.ERROR, 'scripter_node_queue_error', locale, task_id, e, exc_info=True)
             # エラー時のフォールバック結果
             return {
                 "ui": {"text": [get_message('scripter_node_queue_error_result', locale, e)]},
@@ -161,10 +206,11 @@ class ComfyUI_u5_EasyScripterNode:
     def _execute_script_impl(self, output, script, VAL1_int=None, VAL1_float=None,
                             VAL2_int=None, VAL2_float=None, TXT1=None, TXT2=None, any_input=None,
                             _iteration_dependency=None,
-                            unique_id=None, dynprompt=None):
+                            unique_id=None, dynprompt=None, cancel_token=None):
         """Execute the VBA-style script (内部実装)
 
         この関数は ScriptExecutionQueue のワーカースレッドから呼び出されます。
+        cancel_token はキューのタイムアウト時にキャンセルされ、スクリプトの実行を停止します。
         """
 
         # output引数は無視（読み取り専用のため、widgets_values配列の順序整合性のためだけに存在）
@@ -173,12 +219,12 @@ class ComfyUI_u5_EasyScripterNode:
         locale = 'ja'
 
         # 【DEBUG】ノードID確認
-        print(get_message('scripter_node_debug_execute_called', locale, unique_id, type(unique_id).__name__))
+        log_message(logger, logging.DEBUG, 'scripter_node_debug_execute_called', locale, unique_id, type(unique_id).__name__)
 
         # デバッグ用：受信値をそのまま表示
-        print(get_message('executing_script', locale))
-        print(get_message('received_values', locale, VAL1_int, VAL1_float, VAL2_int, VAL2_float))
-        print(get_message('received_texts', locale, TXT1, TXT2))
+        log_message(logger, logging.DEBUG, 'executing_script', locale)
+        log_message(logger, logging.DEBUG, 'received_values', locale, VAL1_int, VAL1_float, VAL2_int, VAL2_float)
+        log_message(logger, logging.DEBUG, 'received_texts', locale, TXT1, TXT2)
 
         # 入力値の統合処理 - VAL1とVAL2をint値とfloat値で合算
         # ComfyUIでは未接続でもデフォルト値が入るため、両方の値を加算
@@ -197,25 +243,32 @@ class ComfyUI_u5_EasyScripterNode:
         text_input1 = str(TXT1) if TXT1 else ""
         text_input2 = str(TXT2) if TXT2 else ""
 
-        print(get_message('resolved_values', locale, val1, val2, text_input1, text_input2))
+        log_message(logger, logging.DEBUG, 'resolved_values', locale, val1, val2, text_input1, text_input2)
 
         # ========================================
         # DIAG-4: ScriptEngine状態確認（生成前）
         # ========================================
-        print(get_message('scripter_node_diag_impl_start', locale, unique_id))
+        log_message(logger, logging.DEBUG, 'scripter_node_diag_impl_start', locale, unique_id)
 
         # Initialize script engine with locale
-        engine = ScriptEngine(locale=locale)
+        # （実行モード・AST最適化は ' @MODE / ' @OPTIMIZE ディレクティブ、なければ EASYSCRIPTER_ENGINE_MODE / EASYSCRIPTER_OPTIMIZE）
+        engine = ScriptEngine(locale=locale, **engine_options(script, locale))
+        # キャンセル・実行予算（EASYSCRIPTER_MAX_STATEMENTS / EASYSCRIPTER_MAX_SECONDS）の監視
+        engine.guard = ExecutionGuard.from_environment(cancel_token, locale)
+        # 行・関数単位のプロファイル（EASYSCRIPTER_PROFILE* 環境変数で有効化）
+        profiler = ScriptProfiler.from_environment()
+        if profiler is not None:
+            profiler.attach(engine)
 
         # ========================================
         # DIAG-4: ScriptEngine状態確認（生成後）
         # ========================================
-        print(get_message('scripter_node_diag_engine_created', locale,
-                         id(engine),
-                         engine.return1_assigned,
-                         engine.return2_assigned,
-                         engine.loop_config,
-                         len(engine.variables)))
+        log_message(logger, logging.DEBUG, 'scripter_node_diag_engine_created', locale,
+                    id(engine),
+                    engine.return1_assigned,
+                    engine.return2_assigned,
+                    engine.loop_config,
+                    len(engine.variables))
 
         engine.return1_assigned = False
         engine.return2_assigned = False
@@ -250,9 +303,14 @@ class ComfyUI_u5_EasyScripterNode:
             engine.variables["RETURN"] = 0.0  # 後方互換性
         else:
             try:
-                engine.execute(script)
+                # ' @PROCESS ディレクティブのあるスクリプトはワーカープロセスで実行（script_process_pool.py）
+                process_pool = select_process_pool(engine, script)
+                if process_pool is not None:
+                    process_pool.execute(engine, script, cancel_token)
+                else:
+                    engine.execute(script)
                 script_executed = True
-                print(get_message('script_executed', locale))
+                log_message(logger, logging.DEBUG, 'script_executed', locale)
 
                 # RETURNに値が代入された場合、RETURN1に同期
                 if engine.return1_assigned:
@@ -261,12 +319,25 @@ class ComfyUI_u5_EasyScripterNode:
                         engine.set_variable("RETURN1", return_val)
             except Exception as e:
                 error_msg = f"{type(e).__name__}: {str(e)}"
-                print(get_message('script_error', locale) + f" {error_msg}")
-                import traceback
-                traceback.print_exc()
+                logger.error("%s %s", LocalizedMessage('script_error', locale, ()), error_msg, exc_info=True)
                 engine.add_to_print_stack(get_message('error_prefix', locale) + f" {error_msg}")
                 engine.variables["RETURN1"] = 0.0
+                # スクリプトのエラーはノードの結果として返すため、キューの失敗とは別に記録する
+                get_metrics().increment('script_errors')
+                get_metrics().record_task_error(_task_id(unique_id))
             engine.variables["RETURN"] = 0.0  # 後方互換性
+            get_metrics().record_builtin_calls(engine.builtin_calls)
+
+        # プロファイル結果の出力（UI表示はResult行の後に追記）
+        profile_lines = []
+        if profiler is not None:
+            profiler.detach()
+            try:
+                profiler.write_outputs(unique_id)
+            except OSError as e:
+                log_message(logger, logging.WARNING, 'scripter_node_profile_write_error', locale, e)
+            if profiler.ui_report:
+                profile_lines = profiler.format_report(locale)
 
         # Get results
         # RETURN1の値を取得（RETURNからも取得して後方互換性を保つ）
@@ -285,7 +356,7 @@ class ComfyUI_u5_EasyScripterNode:
         print_lines = engine.get_print_output()  # PRINT関数の出力を取得
         print_output = "\n".join(print_lines) if print_lines else ""
 
-        print(get_message('results', locale, return1_value, len(print_lines)))
+        log_message(logger, logging.DEBUG, 'results', locale, return1_value, len(print_lines))
 
         # Type conversion for RETURN1 outputs
         if isinstance(return1_value, str):
@@ -320,23 +391,23 @@ class ComfyUI_u5_EasyScripterNode:
                 text_output2 = "0"
 
         # Console output
-        if print_output:
-            print(get_message('output_header', locale))
+        if print_output and logger.isEnabledFor(logging.INFO):
+            log_message(logger, logging.INFO, 'output_header', locale)
             for line in print_lines:
-                print(f"  {line}")
+                logger.info("  %s", line)
 
-        print(get_message('scripter_node_final_result_line1', locale, int_output1, float_output1, text_output1))
-        print(get_message('scripter_node_final_result_line2', locale, int_output2, float_output2, text_output2))
+        log_message(logger, logging.INFO, 'scripter_node_final_result_line1', locale, int_output1, float_output1, text_output1)
+        log_message(logger, logging.INFO, 'scripter_node_final_result_line2', locale, int_output2, float_output2, text_output2)
 
         # ANY型出力（Tier 3実装: RELAY_OUTPUT変数対応）
         if engine.relay_output_assigned:
             # スクリプトでRELAY_OUTPUTが代入された場合
-            relay_output = engine.relay_output_value
-            print(get_message('scripter_node_relay_output_assigned', locale, type(relay_output).__name__))
+            relay_output = _relay_value(engine.relay_output_value)
+            log_message(logger, logging.DEBUG, 'scripter_node_relay_output_assigned', locale, type(relay_output).__name__)
         else:
             # RELAY_OUTPUT未使用時は従来通りany_inputをパススルー
             relay_output = any_input
-            print(get_message('scripter_node_relay_output_passthrough', locale, type(relay_output).__name__))
+            log_message(logger, logging.DEBUG, 'scripter_node_relay_output_passthrough', locale, type(relay_output).__name__)
 
         # UI表示用テキストを作成
         ui_display_lines = []
@@ -344,21 +415,23 @@ class ComfyUI_u5_EasyScripterNode:
             ui_display_lines.extend(print_lines)  # PRINT関数の出力行を追加
         ui_display_lines.append(f"[Result] RETURN1: INT={int_output1}, FLOAT={float_output1:.2f}, TEXT={text_output1}")
         ui_display_lines.append(f"[Result] RETURN2: INT={int_output2}, FLOAT={float_output2:.2f}, TEXT={text_output2}")
+        ui_display_lines.extend(profile_lines)
 
         # サブグラフループ検出（修正版：チャネルベースのloop_config構造に対応）
         if engine.loop_config:  # チャネル設定が存在すればTrue
-            print(get_message('scripter_node_loop_detected', locale, engine.loop_config))
-            # サブグラフを構築して返す
-            subgraph = self._build_loop_subgraph(
-                engine=engine,
-                unique_id=unique_id,
-                dynprompt=dynprompt,
-                return1_outputs=(int_output1, float_output1, text_output1),
-                return2_outputs=(int_output2, float_output2, text_output2),
-                relay_output=relay_output,
-                ui_display_lines=ui_display_lines,
-                locale=locale
-            )
+            log_message(logger, logging.INFO, 'scripter_node_loop_detected', locale, engine.loop_config)
+            # サブグラフを構築して返す（dynpromptのグラフ展開は並行実行中の他のワーカーと排他）
+            with get_named_lock('LOOP_SUBGRAPH'):
+                subgraph = self._build_loop_subgraph(
+                    engine=engine,
+                    unique_id=unique_id,
+                    dynprompt=dynprompt,
+                    return1_outputs=(int_output1, float_output1, text_output1),
+                    return2_outputs=(int_output2, float_output2, text_output2),
+                    relay_output=relay_output,
+                    ui_display_lines=ui_display_lines,
+                    locale=locale
+                )
             return subgraph
 
         # 【LOOP_SUBGRAPH UI修正】複製ノードの場合はUI出力を抑制
@@ -366,18 +439,18 @@ class ComfyUI_u5_EasyScripterNode:
         is_loop_duplicate = unique_id and (":" in str(unique_id) or "_loop_" in str(unique_id))
 
         # 【DEBUG】UI出力判定ログ
-        print(get_message('scripter_node_debug_ui_decision', locale, unique_id, is_loop_duplicate))
-        print(get_message('scripter_node_debug_ui_lines', locale, len(ui_display_lines), ui_display_lines))
+        log_message(logger, logging.DEBUG, 'scripter_node_debug_ui_decision', locale, unique_id, is_loop_duplicate)
+        log_message(logger, logging.DEBUG, 'scripter_node_debug_ui_lines', locale, len(ui_display_lines), ui_display_lines)
 
         if is_loop_duplicate:
             # 複製ノードはUI出力なし（resultのみ返す）
-            print(get_message('scripter_node_debug_suppress_ui', locale, unique_id))
+            log_message(logger, logging.DEBUG, 'scripter_node_debug_suppress_ui', locale, unique_id)
             return {
                 "result": (int_output1, float_output1, text_output1, int_output2, float_output2, text_output2, relay_output)
             }
         else:
             # 元のノードのみUIを表示
-            print(get_message('scripter_node_debug_output_ui', locale, unique_id))
+            log_message(logger, logging.DEBUG, 'scripter_node_debug_output_ui', locale, unique_id)
             return {
                 "ui": {
                     "text": ui_display_lines  # 配列形式
@@ -427,7 +500,7 @@ class ComfyUI_u5_EasyScripterNode:
                     "count": count,
                     "current_iteration": 0
                 }
-                print(get_message('scripter_node_loop_auto_applied', locale, channel, count))
+                log_message(logger, logging.INFO, 'scripter_node_loop_auto_applied', locale, channel, count)
     
     def _group_by_subgraph(self, channel_subgraphs):
         """サブグラフの同一性でチャネルをグループ化
@@ -648,7 +721,7 @@ class ComfyUI_u5_EasyScripterNode:
             downstream = self._get_downstream_nodes(dynprompt, unique_id, slots)
 
             if not downstream:
-                print(get_message('scripter_node_loop_skip_no_connection', locale, channel))
+                log_message(logger, logging.WARNING, 'scripter_node_loop_skip_no_connection', locale, channel)
                 continue
             
             # サブグラフ全体を収集
@@ -664,7 +737,7 @@ class ComfyUI_u5_EasyScripterNode:
         
         # サブグラフ接続がない場合、ループなしで通常出力
         if not channel_subgraphs:
-            print(get_message('scripter_node_loop_warning_no_connections', locale))
+            log_message(logger, logging.WARNING, 'scripter_node_loop_warning_no_connections', locale)
             return {
                 "ui": {"text": ui_display_lines + [get_message('scripter_node_loop_warning_no_connections_disabled', locale)]},
                 "result": (return1_outputs[0], return1_outputs[1], return1_outputs[2],
@@ -791,7 +864,7 @@ class ComfyUI_u5_EasyScripterNode:
 
         except Exception as e:
             locale = 'ja'  # デフォルトロケール
-            print(get_message('scripter_node_loop_connection_check_error', locale, e))
+            log_message(logger, logging.ERROR, 'scripter_node_loop_connection_check_error', locale, e)
             return False
     
     def _auto_select_channel_simple(self, unique_id, dynprompt):
@@ -833,7 +906,7 @@ class ComfyUI_u5_EasyScripterNode:
 
         except Exception as e:
             locale = 'ja'  # デフォルトロケール
-            print(get_message('scripter_node_loop_auto_select_error', locale, e))
+            log_message(logger, logging.ERROR, 'scripter_node_loop_auto_select_error', locale, e)
             return None
 
     def _get_downstream_nodes(self, dynprompt, unique_id, channel_slots):
@@ -888,7 +961,7 @@ class ComfyUI_u5_EasyScripterNode:
 
         except Exception as e:
             locale = 'ja'  # デフォルトロケール
-            print(get_message('scripter_node_loop_successor_error', locale, e))
+            log_message(logger, logging.ERROR, 'scripter_node_loop_successor_error', locale, e)
             return []
     
     def _is_subgraph(self, downstream_nodes):
@@ -958,7 +1031,7 @@ class ComfyUI_u5_EasyScripterNode:
 
             except Exception as e:
                 locale = 'ja'  # デフォルトロケール
-                print(get_message('scripter_node_loop_node_collection_error', locale, node_id, e))
+                log_message(logger, logging.ERROR, 'scripter_node_loop_node_collection_error', locale, node_id, e)
         
         # 開始ノードから辿り始める
         for start_node in start_nodes:
@@ -11,13 +11,20 @@ import comfy.controlnet
 import comfy.model_management
 import nodes
 
+try:
+    from .script_logging import get_logger
+except ImportError:
+    from script_logging import get_logger
+
+logger = get_logger('loaders')
+
 # UI更新用（PromptServer経由でフロントエンドに通知）
 try:
     from server import PromptServer
     HAS_PROMPT_SERVER = True
 except ImportError:
     HAS_PROMPT_SERVER = False
-    print("[u5_loaders] Warning: PromptServer not available, UI updates disabled")
+    logger.warning("[u5_loaders] Warning: PromptServer not available, UI updates disabled")
 
 
 # ==================== 統一マッチロジック（OPTIMAL_LATENT準拠）====================
@@ -230,9 +237,9 @@ def send_widget_update(node_type: str, widget_name: str, new_value: str, unique_
             message["unique_id"] = unique_id
 
         PromptServer.instance.send_sync("u5_widget_update", message)
-        print(f"[u5_loaders] UI update sent: {node_type}.{widget_name} = {new_value}")
+        logger.debug("[u5_loaders] UI update sent: %s.%s = %s", node_type, widget_name, new_value)
     except Exception as e:
-        print(f"[u5_loaders] Failed to send UI update: {e}")
+        logger.warning("[u5_loaders] Failed to send UI update: %s", e)
 
 
 class u5_CheckpointLoader: